@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, send_file, session, Response, abort, current_app
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, send_file, session, Response, abort, current_app, has_request_context, has_app_context, g, before_render_template, get_flashed_messages
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_socketio import SocketIO, emit, join_room
 from flask_mail import Mail, Message
@@ -11,14 +11,23 @@ import re
 import threading
 import time
 import random
+import hashlib
+import math
+import pickle
+import tempfile
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, UserPermission, UserPermissionToggle, RoleDepartmentPermissionDefault, PaymentRequest, AuditLog, Notification, PaidNotification, RecurringPaymentSchedule, LateInstallment, InstallmentEditHistory, ReturnReasonHistory, RequestType, Branch, BranchAlias, Region, FinanceAdminNote, ChequeBook, ChequeSerial, BankLayout, ProcurementItemRequest, ProcurementReceiptEntry, ProcurementInvoiceEntry, PersonCompanyOption, ProcurementCategory, ProcurementItem, LocationPriority, CurrentMoneyEntry, DepartmentTemporaryManager, ChequeBookPermission
+from models import db, User, UserPermission, UserPermissionToggle, RoleDepartmentPermissionDefault, PaymentRequest, AuditLog, Notification, PaidNotification, RecurringPaymentSchedule, LateInstallment, InstallmentEditHistory, ReturnReasonHistory, RequestType, Branch, BranchAlias, Region, FinanceAdminNote, ChequeBook, ChequeSerial, BankLayout, ProcurementItemRequest, ProcurementReceiptEntry, ProcurementInvoiceEntry, PersonCompanyOption, ProcurementCategory, ProcurementItem, LocationPriority, CurrentMoneyEntry, DepartmentTemporaryManager, ChequeBookPermission, RequestVisibility, UserNotificationCounter, ScheduledJob, SchedulerLease, PaymentOccurrence, InstallmentLedger, RequestBranchAllocation, FinanceSlaPolicy, ExportJob, DataBackfill
+from migrations import run_migrations, sqlite_path_from_uri
+from recurring_rules import compile_rule, MAX_OCCURRENCES
 from config import Config
 import json
 from playwright.sync_api import sync_playwright
 from io import BytesIO
 import base64
 from sqlalchemy import func, or_
+from sqlalchemy.orm import Session as SASession
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 
 
@@ -44,12 +53,48 @@ MAINTENANCE_FILE_PATH = os.path.join(DEFAULT_INSTANCE_DIR, 'maintenance.json')
 # Feature flags file (for IT-only temporary toggles)
 FEATURE_FLAGS_FILE_PATH = os.path.join(DEFAULT_INSTANCE_DIR, 'feature_flags.json')
 
-def read_maintenance_state():
+# Parsed instance JSON files, keyed on path and reused until the file's mtime/size changes.
+# The mtime check lets a toggle made in one worker reach the others without re-parsing on every request.
+_instance_json_cache = {}
+_instance_json_cache_lock = threading.Lock()
+
+
+def _read_instance_json(path):
+    """Return the parsed JSON in `path` (None if missing/invalid), re-reading only when the file changes."""
     try:
-        with open(MAINTENANCE_FILE_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception:
-        return {"enabled": False, "message": "The system is undergoing maintenance. Please try again later."}
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+    cached = _instance_json_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    data = None
+    if stamp is not None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            data = None
+    with _instance_json_cache_lock:
+        _instance_json_cache[path] = (stamp, data)
+    return data
+
+
+def invalidate_instance_json_cache(path=None):
+    """Drop the cached copy of one instance JSON file (or all of them)."""
+    with _instance_json_cache_lock:
+        if path is None:
+            _instance_json_cache.clear()
+        else:
+            _instance_json_cache.pop(path, None)
+
+
+def read_maintenance_state():
+    data = _read_instance_json(MAINTENANCE_FILE_PATH)
+    if isinstance(data, dict):
+        return dict(data)
+    return {"enabled": False, "message": "The system is undergoing maintenance. Please try again later."}
 
 def write_maintenance_state(enabled: bool, message: str = None):
     state = read_maintenance_state()
@@ -59,19 +104,16 @@ def write_maintenance_state(enabled: bool, message: str = None):
     os.makedirs(os.path.dirname(MAINTENANCE_FILE_PATH), exist_ok=True)
     with open(MAINTENANCE_FILE_PATH, 'w', encoding='utf-8') as f:
         json.dump(state, f)
+    invalidate_instance_json_cache(MAINTENANCE_FILE_PATH)
 
 
 def read_feature_flags():
     """Read feature flags used for IT-only temporary toggles."""
-    try:
-        with open(FEATURE_FLAGS_FILE_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                return data
-            return {}
-    except Exception:
-        # Default: all flags off
-        return {}
+    data = _read_instance_json(FEATURE_FLAGS_FILE_PATH)
+    if isinstance(data, dict):
+        return dict(data)
+    # Default: all flags off
+    return {}
 
 
 def write_feature_flags(**kwargs):
@@ -81,134 +123,20 @@ def write_feature_flags(**kwargs):
     os.makedirs(os.path.dirname(FEATURE_FLAGS_FILE_PATH), exist_ok=True)
     with open(FEATURE_FLAGS_FILE_PATH, 'w', encoding='utf-8') as f:
         json.dump(flags, f)
+    invalidate_instance_json_cache(FEATURE_FLAGS_FILE_PATH)
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 
-# Ensure new procurement item request columns exist before first request (SQLite only)
-def ensure_procurement_item_request_columns_exist():
-    try:
-        import sqlite3
-        db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '') or ''
-        # Only attempt SQLite migrations here
-        if db_uri.startswith('sqlite:///'):
-            db_path = db_uri.replace('sqlite:///', '')
-            if os.name == 'nt':
-                db_path = db_path.replace('/', '\\')
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA table_info(procurement_item_requests)")
-            existing_columns = [row[1] for row in cursor.fetchall()]
-            if 'requestor_evidence_upload_path' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN requestor_evidence_upload_path TEXT")
-                conn.commit()
-                print("✓ Added 'requestor_evidence_upload_path' column to procurement_item_requests table (startup)")
-            conn.close()
-    except Exception as e:
-        # Non-fatal - app can run and show a warning
-        print(f"Warning: Could not ensure procurement_item_requests new columns: {e}")
-
-def ensure_cheque_serials_columns_exist():
-    """Ensure cheque_serials has upload_paths and cancelled_upload_paths (SQLite). Runs at import so flask run also migrates."""
-    try:
-        import sqlite3
-        db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '') or ''
-        if not db_uri.startswith('sqlite:///'):
-            return
-        db_path = db_uri.replace('sqlite:///', '')
-        if os.name == 'nt':
-            db_path = db_path.replace('/', '\\')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(cheque_serials)")
-        cols = [row[1] for row in cursor.fetchall()]
-        if 'upload_paths' not in cols:
-            cursor.execute("ALTER TABLE cheque_serials ADD COLUMN upload_paths TEXT")
-            conn.commit()
-            print("✓ Added 'upload_paths' column to cheque_serials table (startup)")
-        if 'cancelled_upload_paths' not in cols:
-            cursor.execute("ALTER TABLE cheque_serials ADD COLUMN cancelled_upload_paths TEXT")
-            conn.commit()
-            print("✓ Added 'cancelled_upload_paths' column to cheque_serials table (startup)")
-        conn.close()
-    except Exception as e:
-        print(f"Warning: Could not ensure cheque_serials columns: {e}")
-
-
-def ensure_cheque_book_acknowledgment_columns_exist():
-    """Add acknowledgment columns to cheque_books if they do not exist yet (SQLite)."""
-    try:
-        import sqlite3
-        db_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'payment_system.db')
-        if not os.path.exists(db_path):
-            return
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(cheque_books)")
-        cols = [row[1] for row in cursor.fetchall()]
-        if 'acknowledged' not in cols:
-            cursor.execute("ALTER TABLE cheque_books ADD COLUMN acknowledged INTEGER NOT NULL DEFAULT 0")
-            conn.commit()
-            print("✓ Added 'acknowledged' column to cheque_books table (startup)")
-        if 'acknowledged_at' not in cols:
-            cursor.execute("ALTER TABLE cheque_books ADD COLUMN acknowledged_at DATETIME")
-            conn.commit()
-            print("✓ Added 'acknowledged_at' column to cheque_books table (startup)")
-        if 'acknowledged_by_user_id' not in cols:
-            cursor.execute("ALTER TABLE cheque_books ADD COLUMN acknowledged_by_user_id INTEGER REFERENCES users(user_id)")
-            conn.commit()
-            print("✓ Added 'acknowledged_by_user_id' column to cheque_books table (startup)")
-        conn.close()
-    except Exception as e:
-        print(f"Warning: Could not ensure cheque_book acknowledgment columns: {e}")
-
-
-def ensure_cheque_book_permissions_table_exists():
-    """Create cheque_book_permissions table if it does not exist yet (SQLite)."""
-    try:
-        import sqlite3
-        db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '') or ''
-        if not db_uri.startswith('sqlite:///'):
-            return
-        db_path = db_uri.replace('sqlite:///', '')
-        if os.name == 'nt':
-            db_path = db_path.replace('/', '\\')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS cheque_book_permissions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                book_id INTEGER NOT NULL REFERENCES cheque_books(id) ON DELETE CASCADE,
-                serial_id INTEGER REFERENCES cheque_serials(id) ON DELETE CASCADE,
-                granted_to_user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
-                granted_by_user_id INTEGER NOT NULL REFERENCES users(user_id),
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print(f"Warning: Could not ensure cheque_book_permissions table: {e}")
-
-
-# Run migrations immediately at import time so `flask run` and `python app.py` both migrate
+# Apply pending schema migrations (see migrations.py) once at import so `flask run` and `python app.py`
+# both start on an up-to-date schema; request handlers never run DDL. Deploys can run `python migrations.py`.
 try:
-    ensure_procurement_item_request_columns_exist()
+    _migration_db_path = sqlite_path_from_uri(app.config.get('SQLALCHEMY_DATABASE_URI'))
+    if _migration_db_path:
+        run_migrations(_migration_db_path, verbose=True)
 except Exception as _err:
-    print(f"Warning: ensure_procurement_item_request_columns_exist failed at startup: {_err}")
-try:
-    ensure_cheque_serials_columns_exist()
-except Exception as _err:
-    print(f"Warning: ensure_cheque_serials_columns_exist failed at startup: {_err}")
-try:
-    ensure_cheque_book_acknowledgment_columns_exist()
-except Exception as _err:
-    print(f"Warning: ensure_cheque_book_acknowledgment_columns_exist failed at startup: {_err}")
-try:
-    ensure_cheque_book_permissions_table_exists()
-except Exception as _err:
-    print(f"Warning: ensure_cheque_book_permissions_table_exists failed at startup: {_err}")
+    print(f"Warning: schema migrations failed at startup: {_err}")
 
 # Reduce noisy print output by routing stdout/stderr into Flask logger and raising default log level to INFO.
 import logging, sys
@@ -332,145 +260,29 @@ def inject_flask_request():
 
 def format_recurring_schedule(interval, payment_schedule=None):
     """Format recurring interval into human-readable text"""
-    try:
-        parts = interval.split(':')
-        frequency = parts[0]
-        interval_value = int(parts[1])
-        
-        # Handle the new single date format
-        if frequency == 'monthly' and len(parts) > 2 and parts[2] == 'date':
-            # Extract the date (format: YYYY-MM-DD)
-            date_str = parts[3]
-            
-            try:
-                from datetime import datetime
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                formatted_date = date_obj.strftime('%B %d, %Y')
-            except ValueError:
-                formatted_date = date_str
-            
-            # Create the base schedule text
-            if interval_value == 1:
-                schedule_text = f"Every month starting on {formatted_date}"
-            else:
-                schedule_text = f"Every {interval_value} months starting on {formatted_date}"
-            
-            # Check for end date
-            end_date_index = parts.index('end') if 'end' in parts else -1
-            if end_date_index != -1 and end_date_index + 1 < len(parts):
-                end_date = parts[end_date_index + 1]
-                try:
-                    end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
-                    formatted_end_date = end_date_obj.strftime('%B %d, %Y')
-                    schedule_text += f" until {formatted_end_date}"
-                except ValueError:
-                    schedule_text += f" until {end_date}"
-            
-            # Add payment schedule information if available
-            if payment_schedule:
-                try:
-                    import json
-                    schedule_data = json.loads(payment_schedule)
-                    if schedule_data:
-                        payment_details = []
-                        for payment in schedule_data:
-                            date = payment.get('date', '')
-                            amount = payment.get('amount', 0)
-                            if date and amount > 0:
-                                payment_details.append(f"{date}: {amount:.3f} OMR")
-                        
-                        if payment_details:
-                            schedule_text += f"\n\nPayment Schedule:\n" + "\n".join(payment_details)
-                except (json.JSONDecodeError, TypeError):
-                    pass
-            
-            return schedule_text
-        
-        # Handle the old format with specific days (for backward compatibility)
-        elif frequency == 'monthly' and len(parts) > 2 and parts[2] == 'days':
-            # Extract specific days and dates
-            days = parts[3].split(',')
-            year = parts[4] if len(parts) > 4 else None
-            month = parts[5] if len(parts) > 5 else None
-            
-            # Format the starting dates using the exact same logic as the preview
-            if year and month:
-                month_names = ['January', 'February', 'March', 'April', 'May', 'June', 
-                             'July', 'August', 'September', 'October', 'November', 'December']
-                # The stored month is 1-based (1-12), so convert to 0-based for array indexing
-                month_int = int(month) - 1  # Convert 1-based to 0-based
-                month_name = month_names[month_int] if 0 <= month_int <= 11 else str(month)
-                starting_dates = [f"{month_name} {day}, {year}" for day in days]
-                starting_text = ", ".join(starting_dates)
-            else:
-                starting_text = f"days {', '.join(days)}"
-            
-            # Create the base schedule text using the exact same format as the preview
-            if interval_value == 1:
-                schedule_text = f"Every month starting on {starting_text}"
-            else:
-                schedule_text = f"Every {interval_value} months starting on {starting_text}"
-            
-            # Check for end date
-            end_date_index = parts.index('end') if 'end' in parts else -1
-            if end_date_index != -1 and end_date_index + 1 < len(parts):
-                end_date = parts[end_date_index + 1]
-                try:
-                    from datetime import datetime
-                    end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
-                    formatted_end_date = end_date_obj.strftime('%B %d, %Y')
-                    schedule_text += f" until {formatted_end_date}"
-                except ValueError:
-                    schedule_text += f" until {end_date}"
-            
-            # Add payment schedule information if available
-            if payment_schedule:
-                try:
-                    import json
-                    schedule_data = json.loads(payment_schedule)
-                    if schedule_data:
-                        payment_details = []
-                        for payment in schedule_data:
-                            date = payment.get('date', '')
-                            amount = payment.get('amount', 0)
-                            if date and amount > 0:
-                                payment_details.append(f"{date}: {amount:.3f} OMR")
-                        
-                        if payment_details:
-                            schedule_text += f"\n\nPayment Schedule:\n" + "\n".join(payment_details)
-                except (json.JSONDecodeError, TypeError):
-                    pass
-            
-            return schedule_text
-        
-        # Handle legacy formats
-        if frequency == 'daily':
-            if interval_value == 1:
-                return "Daily"
-            else:
-                return f"Every {interval_value} days"
-        elif frequency == 'weekly':
-            if interval_value == 1:
-                return "Weekly"
-            else:
-                return f"Every {interval_value} weeks"
-        elif frequency == 'monthly':
-            if interval_value == 1:
-                return "Monthly"
-            else:
-                return f"Every {interval_value} months"
-        elif frequency == 'quarterly':
-            if interval_value == 1:
-                return "Quarterly"
-            else:
-                return f"Every {interval_value} quarters"
-        elif frequency == 'yearly':
-            if interval_value == 1:
-                return "Yearly"
-            else:
-                return f"Every {interval_value} years"
-    except (ValueError, IndexError):
+    rule = compile_rule(interval)
+    if rule is None or rule.frequency == 'custom':
         return "Invalid schedule"
+    schedule_text = rule.describe()
+    
+    # Add payment schedule information if available (monthly date / days formats)
+    if payment_schedule and rule.frequency == 'monthly' and rule.kind in ('date', 'days'):
+        try:
+            schedule_data = json.loads(payment_schedule)
+            if schedule_data:
+                payment_details = []
+                for payment in schedule_data:
+                    payment_date = payment.get('date', '')
+                    amount = payment.get('amount', 0)
+                    if payment_date and amount > 0:
+                        payment_details.append(f"{payment_date}: {amount:.3f} OMR")
+                
+                if payment_details:
+                    schedule_text += f"\n\nPayment Schedule:\n" + "\n".join(payment_details)
+        except (json.JSONDecodeError, TypeError):
+            pass
+    
+    return schedule_text
 
 # Make the function available in templates
 app.jinja_env.globals.update(format_recurring_schedule=format_recurring_schedule)
@@ -484,15 +296,33 @@ mail = Mail(app)
 # Initialize SocketIO for real-time updates
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
+# Socket ids of connected users (user_id -> set of sids). Badge counters are only computed
+# and pushed for users who have a tab open.
+_connected_user_sids = {}
+_connected_user_sids_lock = threading.Lock()
+
 @socketio.on('connect')
 def handle_connect():
-    """Handle client connection"""
+    """Handle client connection: join the user's own room and send the current badge counts"""
     print(f'Client connected: {request.sid}')
+    if current_user.is_authenticated:
+        join_room(f'user_{current_user.user_id}')
+        with _connected_user_sids_lock:
+            _connected_user_sids.setdefault(current_user.user_id, set()).add(request.sid)
+        try:
+            emit('badge_counts', get_badge_counts(current_user))
+        except Exception as e:
+            print(f"Error sending badge counts on connect: {e}")
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     print(f'Client disconnected: {request.sid}')
+    with _connected_user_sids_lock:
+        for user_id, sids in list(_connected_user_sids.items()):
+            sids.discard(request.sid)
+            if not sids:
+                del _connected_user_sids[user_id]
 
 @socketio.on('join_room')
 def handle_join_room(data):
@@ -514,6 +344,7 @@ login_manager.login_view = 'login'
 # Create upload folder if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['CHEQUE_UPLOAD_FOLDER'], exist_ok=True)
+os.makedirs(app.config['EXPORT_FOLDER'], exist_ok=True)
 
 
 @login_manager.user_loader
@@ -574,12 +405,12 @@ def enforce_idle_timeout():
 @app.before_request
 def maintenance_gate():
     try:
-        state = read_maintenance_state()
-        if not state.get('enabled'):
+        # Allow static and socket endpoints (checked first so they never touch the maintenance state)
+        if request.path.startswith('/static') or request.path.startswith('/socket.io'):
             return None
 
-        # Allow static and socket endpoints
-        if request.path.startswith('/static') or request.path.startswith('/socket.io'):
+        state = read_maintenance_state()
+        if not state.get('enabled'):
             return None
 
         # Allow maintenance endpoints so IT can toggle and for public status
@@ -1016,45 +847,10 @@ def get_dashboard_all_tab_base_query(user):
             PaymentRequest.is_draft == False
         )
 
-    # Department Manager (Auditing) - build visible set
+    # Department Manager (Auditing) - own, Auditing, view-only statuses of other departments, managed requests
     if user.role == 'Department Manager' and user.department == 'Auditing':
-        all_non_archived = PaymentRequest.query.filter(
-            PaymentRequest.is_archived == False,
-            PaymentRequest.is_draft == False
-        ).all()
-        visible_request_ids = set()
-        for req in all_non_archived:
-            if req.user_id == user.user_id:
-                visible_request_ids.add(req.request_id)
-            req_dept = (req.department or '').strip()
-            requestor_dept = (req.user.department or '').strip() if req.user else ''
-            if req_dept.lower() == 'auditing' and requestor_dept.lower() == 'auditing':
-                visible_request_ids.add(req.request_id)
-            if getattr(req, 'temporary_manager_id', None) == user.user_id:
-                visible_request_ids.add(req.request_id)
-            try:
-                dt = DepartmentTemporaryManager.query.filter(
-                    DepartmentTemporaryManager.department == (req.department or ''),
-                    db.or_(
-                        DepartmentTemporaryManager.request_type == 'Finance Payment Request',
-                        DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
-                    )
-                ).first()
-            except Exception:
-                dt = None
-            if dt and getattr(dt, 'temporary_manager_id', None) == user.user_id:
-                visible_request_ids.add(req.request_id)
-            if req_dept.lower() != 'auditing' and req.status in [
-                'Completed', 'Recurring', 'Proof Pending', 'Proof Sent', 'Proof Rejected'
-            ]:
-                visible_request_ids.add(req.request_id)
-            approvers = get_authorized_manager_approvers(req)
-            if user in approvers:
-                visible_request_ids.add(req.request_id)
-        if not visible_request_ids:
-            return PaymentRequest.query.filter(PaymentRequest.request_id == -1)
         return PaymentRequest.query.filter(
-            PaymentRequest.request_id.in_(visible_request_ids),
+            auditing_manager_visibility_filter(user),
             PaymentRequest.is_archived == False,
             PaymentRequest.is_draft == False
         )
@@ -1068,41 +864,8 @@ def get_dashboard_all_tab_base_query(user):
                 PaymentRequest.is_archived == False,
                 PaymentRequest.is_draft == False
             )
-        all_non_archived = PaymentRequest.query.filter(PaymentRequest.is_archived == False).all()
-        authorized_request_ids = set()
-        department_match_ids = set()
-        temp_manager_ids = set()
-        temp_manager_payment_depts = set()
-        try:
-            for ta in DepartmentTemporaryManager.query.filter(
-                DepartmentTemporaryManager.temporary_manager_id == user.user_id,
-                db.or_(
-                    DepartmentTemporaryManager.request_type == 'Finance Payment Request',
-                    DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
-                )
-            ).all():
-                if ta.department:
-                    temp_manager_payment_depts.add(ta.department.strip().lower())
-        except Exception:
-            pass
-        for req in all_non_archived:
-            requestor_dept = (req.user.department or '').strip() if req.user else ''
-            req_dept = (req.department or '').strip()
-            if req_dept.lower() == user_dept.lower() and requestor_dept.lower() == user_dept.lower():
-                department_match_ids.add(req.request_id)
-            if getattr(req, 'temporary_manager_id', None) == user.user_id:
-                temp_manager_ids.add(req.request_id)
-            req_dept_normalized = req_dept.lower().strip() if req_dept else ''
-            if req_dept_normalized and req_dept_normalized in temp_manager_payment_depts:
-                temp_manager_ids.add(req.request_id)
-            approvers = get_authorized_manager_approvers(req)
-            if user in approvers:
-                authorized_request_ids.add(req.request_id)
-        all_visible_ids = department_match_ids | temp_manager_ids | authorized_request_ids
-        if not all_visible_ids:
-            return PaymentRequest.query.filter(PaymentRequest.request_id == -1)
         return PaymentRequest.query.filter(
-            PaymentRequest.request_id.in_(all_visible_ids),
+            department_manager_visibility_filter(user),
             PaymentRequest.is_archived == False,
             PaymentRequest.is_draft == False
         )
@@ -1121,62 +884,10 @@ def get_dashboard_all_tab_base_query(user):
             PaymentRequest.is_draft == False
         )
 
-    # Regular staff / temp manager
-    authorized_approver_request_ids = set()
-    try:
-        for req in PaymentRequest.query.filter(
-            PaymentRequest.is_archived == False,
-            PaymentRequest.is_draft == False
-        ).all():
-            approvers = get_authorized_manager_approvers(req)
-            if user in approvers:
-                authorized_approver_request_ids.add(req.request_id)
-    except Exception:
-        pass
-    if is_temp_manager_any:
-        try:
-            temp_departments = [
-                dt.department.strip()
-                for dt in DepartmentTemporaryManager.query.filter(
-                    DepartmentTemporaryManager.temporary_manager_id == user.user_id,
-                    db.or_(
-                        DepartmentTemporaryManager.request_type == 'Finance Payment Request',
-                        DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
-                    )
-                ).all()
-                if dt.department
-            ]
-        except Exception:
-            temp_departments = []
-        if temp_departments:
-            dept_conditions = [
-                db.func.lower(db.func.trim(PaymentRequest.department)) == d.strip().lower()
-                for d in temp_departments
-            ]
-            dept_filter = db.or_(*dept_conditions) if dept_conditions else db.false()
-            return PaymentRequest.query.outerjoin(User, PaymentRequest.user_id == User.user_id).filter(
-                db.and_(
-                    db.or_(
-                        dept_filter,
-                        PaymentRequest.temporary_manager_id == user.user_id,
-                        PaymentRequest.user_id == user.user_id,
-                        PaymentRequest.request_id.in_(authorized_approver_request_ids) if authorized_approver_request_ids else db.false()
-                    ),
-                    PaymentRequest.is_archived == False,
-                    PaymentRequest.is_draft == False
-                )
-            )
-    if authorized_approver_request_ids:
-        return PaymentRequest.query.filter(
-            db.or_(
-                PaymentRequest.user_id == user.user_id,
-                PaymentRequest.request_id.in_(authorized_approver_request_ids)
-            ),
-            PaymentRequest.is_archived == False,
-            PaymentRequest.is_draft == False
-        )
+    # Regular staff / temp manager: own requests plus requests they manage (request_visibility covers
+    # per-request and department-level temporary manager assignments as well as approver rights)
     return PaymentRequest.query.filter(
-        PaymentRequest.user_id == user.user_id,
+        staff_visibility_filter(user),
         PaymentRequest.is_archived == False,
         PaymentRequest.is_draft == False
     )
@@ -1185,7 +896,9 @@ def get_dashboard_all_tab_base_query(user):
 def get_prev_next_request_ids(user, request_id):
     """
     Return (prev_request_id, next_request_id) in the same order as the dashboard "All Requests" tab.
-    Order: get_status_priority_order(), get_all_tab_datetime_order() (same as dashboard).
+    Order: get_status_priority_order(), get_all_tab_datetime_order(), request_id desc (same as dashboard).
+    Keyset lookup on the all_tab_priority / all_tab_sort_at generated columns: the current row's sort key is
+    read once and each neighbour is a LIMIT 1 seek on ix_payment_requests_all_tab_order.
     """
     base = get_dashboard_all_tab_base_query(user)
     if base is None:
@@ -1194,23 +907,50 @@ def get_prev_next_request_ids(user, request_id):
     if user.role not in ['Finance Admin', 'GM', 'Operation Manager']:
         base = base.filter(~PaymentRequest.user.has(User.role == 'CEO'))
     try:
-        ordered = base.order_by(
-            get_status_priority_order(),
-            get_all_tab_datetime_order()
-        )
-        rows = ordered.all()
-        ids = [r.request_id for r in rows]
+        current = base.filter(PaymentRequest.request_id == request_id).first()
+        if current is None:
+            return (None, None)
+        prev_id = _all_tab_neighbour_id(base, current, previous=True)
+        next_id = _all_tab_neighbour_id(base, current, previous=False)
     except Exception:
         return (None, None)
-    try:
-        idx = ids.index(request_id)
-    except ValueError:
-        return (None, None)
-    prev_id = ids[idx - 1] if idx > 0 else None
-    next_id = ids[idx + 1] if idx + 1 < len(ids) else None
     return (prev_id, next_id)
 
 
+def _all_tab_neighbour_id(base, current, previous):
+    """Request id of the row just before/after `current` in "All Requests" order, or None.
+    Tries the rest of the current priority group first, then the nearest priority group."""
+    priority = PaymentRequest.all_tab_priority
+    sort_at = PaymentRequest.all_tab_sort_at
+    request_id = PaymentRequest.request_id
+    cur_sort_at = current.all_tab_sort_at
+    if previous:
+        # Rows earlier in the list: more recent sort_at (NULLs sort last), or same sort_at with a higher id
+        if cur_sort_at is None:
+            same_group = db.or_(sort_at.isnot(None), request_id > current.request_id)
+        else:
+            same_group = db.tuple_(sort_at, request_id) > db.tuple_(cur_sort_at, current.request_id)
+        same_order = (sort_at.asc(), request_id.asc())
+        other_group = priority < current.all_tab_priority
+        other_order = (priority.desc(), sort_at.asc(), request_id.asc())
+    else:
+        if cur_sort_at is None:
+            same_group = db.and_(sort_at.is_(None), request_id < current.request_id)
+        else:
+            same_group = db.or_(
+                db.tuple_(sort_at, request_id) < db.tuple_(cur_sort_at, current.request_id),
+                sort_at.is_(None)
+            )
+        same_order = (sort_at.desc(), request_id.desc())
+        other_group = priority > current.all_tab_priority
+        other_order = (priority.asc(), sort_at.desc(), request_id.desc())
+
+    row = base.filter(priority == current.all_tab_priority, same_group).order_by(*same_order).first()
+    if row is None:
+        row = base.filter(other_group).order_by(*other_order).first()
+    return row.request_id if row else None
+
+
 def get_recurring_datetime_order():
     """Ordering for recurring requests: updated_at → created_at (desc)."""
     return db.func.coalesce(
@@ -1471,6 +1211,8 @@ def create_notification(user_id, title, message, notification_type, request_id=N
         item_request_id=item_request_id
     )
     db.session.add(notification)
+    db.session.flush()
+    _adjust_unread_counters(_counted_unread_by_user([notification]))
     db.session.commit()
     
     print(f"DEBUG: Notification created successfully with ID: {notification.notification_id}")
@@ -1506,30 +1248,118 @@ def create_notification(user_id, title, message, notification_type, request_id=N
             app.logger.error(f"Failed to emit WebSocket for notification {notification.notification_id}: {e}")
         except:
             pass
+    if user_id:
+        push_unread_counts([user_id])
     
-    # Email sending disabled globally except for PIN emails (handled separately).
-    # Keep the set here in case we re-enable specific types in the future.
-    email_notification_types = set()
-    if notification_type in email_notification_types:
-        user = User.query.get(user_id)
-        if user and user.email:
-            # For request_returned, only notify managers (avoid emailing requestor)
-            if notification_type == 'request_returned':
-                manager_roles = {'Department Manager', 'GM', 'Operation Manager'}
-                if user.role not in manager_roles:
-                    return notification
-            # For new_submission, email only manager-level recipients (skip submitter)
-            if notification_type == 'new_submission':
-                manager_roles = {'Department Manager', 'GM', 'Operation Manager'}
-                if user.role not in manager_roles:
-                    # Allow IT Department Manager (same role, IT dept) via role check above
-                    return notification
-            success, email_msg = send_notification_email(user, title, message, request_id)
-            if not success:
-                app.logger.error(f"Failed to send notification email for user_id={user_id}, type={notification_type}: {email_msg}")
+    _email_notification_if_enabled(user_id, title, message, notification_type, request_id)
     
     return notification
 
+
+# Email sending disabled globally except for PIN emails (handled separately).
+# Keep the set here in case we re-enable specific types in the future.
+EMAIL_NOTIFICATION_TYPES = set()
+
+
+def _email_notification_if_enabled(user_id, title, message, notification_type, request_id=None):
+    """Send the notification by email when its type is in EMAIL_NOTIFICATION_TYPES"""
+    if notification_type not in EMAIL_NOTIFICATION_TYPES:
+        return
+    user = User.query.get(user_id)
+    if user and user.email:
+        # For request_returned and new_submission, email only manager-level recipients
+        # (avoid emailing the requestor / submitter)
+        if notification_type in ('request_returned', 'new_submission'):
+            manager_roles = {'Department Manager', 'GM', 'Operation Manager'}
+            if user.role not in manager_roles:
+                return
+        success, email_msg = send_notification_email(user, title, message, request_id)
+        if not success:
+            app.logger.error(f"Failed to send notification email for user_id={user_id}, type={notification_type}: {email_msg}")
+
+
+def notification_spec(user_id, title, message, notification_type, request_id=None, item_request_id=None):
+    """One recipient's notification, for fan_out_notifications()"""
+    return {
+        'user_id': user_id,
+        'title': title,
+        'message': message,
+        'notification_type': notification_type,
+        'request_id': request_id,
+        'item_request_id': item_request_id
+    }
+
+
+def fan_out_notifications(specs):
+    """Create the notifications for one event in a single transaction.
+    specs: iterable of notification_spec() dicts (user_id may also be a User). Identical
+    notifications to the same user are dropped (recipient lists from several roles often
+    overlap), all rows are inserted with one commit, and each user room gets one socket event.
+    Returns the created Notification objects."""
+    notifications = []
+    seen = set()
+    for spec in specs:
+        user_id = spec['user_id']
+        if isinstance(user_id, User):
+            user_id = user_id.user_id
+        if not user_id:
+            continue
+        key = (user_id, spec['title'], spec['message'], spec['notification_type'], spec.get('request_id'), spec.get('item_request_id'))
+        if key in seen:
+            continue
+        seen.add(key)
+        notifications.append(Notification(
+            user_id=user_id,
+            title=spec['title'],
+            message=spec['message'],
+            notification_type=spec['notification_type'],
+            request_id=spec.get('request_id'),
+            item_request_id=spec.get('item_request_id')
+        ))
+    if not notifications:
+        return []
+
+    db.session.add_all(notifications)
+    db.session.flush()
+    _adjust_unread_counters(_counted_unread_by_user(notifications))
+    # Read what the events and emails need before the commit expires the rows (saves a reload per notification)
+    created = [(n.notification_id, n.user_id, n.title, n.message, n.notification_type, n.request_id, n.item_request_id)
+               for n in notifications]
+    db.session.commit()
+
+    # One event per user room; the client refreshes its badge and dropdown on new_notification
+    by_user = {}
+    for row in created:
+        by_user.setdefault(row[1], []).append(row)
+    try:
+        for user_id, user_notifications in by_user.items():
+            notification_id, _, title, message, notification_type, request_id, item_request_id = user_notifications[-1]
+            socketio.emit('new_notification', {
+                'title': title,
+                'message': message,
+                'type': notification_type,
+                'request_id': request_id,
+                'item_request_id': item_request_id,
+                'notification_id': notification_id,
+                'count': len(user_notifications)
+            }, room=f'user_{user_id}')
+    except Exception as e:
+        # Don't let socket errors break notification creation
+        app.logger.error(f"Failed to emit WebSocket for notification fan-out: {e}")
+    push_unread_counts(by_user.keys())
+
+    for _, user_id, title, message, notification_type, request_id, _ in created:
+        _email_notification_if_enabled(user_id, title, message, notification_type, request_id)
+    return notifications
+
+
+def create_notifications_bulk(user_ids, title, message, notification_type, request_id=None, item_request_id=None):
+    """Send the same notification to many users (ids or User objects) in one transaction"""
+    return fan_out_notifications(
+        notification_spec(user_id, title, message, notification_type, request_id, item_request_id)
+        for user_id in user_ids
+    )
+
 def check_and_notify_low_balance(available_balance):
     """Check if balance is low and send notification to procurement managers"""
     LOW_BALANCE_THRESHOLD = 2500.0
@@ -1598,316 +1428,435 @@ def get_department_text_for_notification(request):
     else:
         return f"from {requestor_dept}"
 
-def get_authorized_manager_approvers(request):
-    """Get all users who are authorized to approve this request at the manager stage.
-    This mirrors the authorization logic in manager_approve_request."""
-    authorized_users = []
-    
+ABDALAZIZ_NAME = 'Abdalaziz Al-Brashdi'
+PAYMENT_TEMP_MANAGER_TYPES = ('Finance Payment Request', 'Both Payment and Item Request')
+ITEM_TEMP_MANAGER_TYPES = ('Procurement Item Request', 'Both Payment and Item Request')
+_APPROVER_POOL_ROLES = ('GM', 'Operation Manager', 'Finance Admin', 'Department Manager', 'Branch Inventory Officer')
+
+
+def _load_users_by_id(user_ids, users_by_id):
+    """Load the given user ids into users_by_id (chunked IN queries, skipping ids already loaded)."""
+    missing = [uid for uid in {uid for uid in user_ids if uid} if uid not in users_by_id]
+    for i in range(0, len(missing), 500):
+        for user in User.query.filter(User.user_id.in_(missing[i:i + 500])).all():
+            users_by_id[user.user_id] = user
+
+
+def _load_approver_context(requests, temp_manager_types, requestor_ids):
+    """Load everything the manager-approver rules need for a batch of requests in a constant number of queries.
+    Returns a dict of users by id, approver pools by role and the first department-level temporary manager per department."""
+    dept_temp_ids = {}
+    for dt in DepartmentTemporaryManager.query.filter(
+        DepartmentTemporaryManager.request_type.in_(temp_manager_types)
+    ).order_by(DepartmentTemporaryManager.id).all():
+        dept = (dt.department or '').strip().lower()
+        if dept and dept not in dept_temp_ids:
+            dept_temp_ids[dept] = dt.temporary_manager_id
+
+    users_by_id = {}
+    pool = User.query.filter(
+        db.or_(User.role.in_(_APPROVER_POOL_ROLES), User.name == ABDALAZIZ_NAME)
+    ).order_by(User.user_id).all()
+    for user in pool:
+        users_by_id[user.user_id] = user
+
+    _load_users_by_id(
+        list(requestor_ids)
+        + [getattr(r, 'temporary_manager_id', None) for r in requests]
+        + list(dept_temp_ids.values()),
+        users_by_id
+    )
+    _load_users_by_id([users_by_id[uid].manager_id for uid in requestor_ids if uid in users_by_id], users_by_id)
+
+    ctx = {
+        'users': users_by_id,
+        'dept_temp_ids': dept_temp_ids,
+        'gm': [u.user_id for u in pool if u.role == 'GM'],
+        'operation_manager': [u.user_id for u in pool if u.role == 'Operation Manager'],
+        'finance_admin': [u.user_id for u in pool if u.role == 'Finance Admin'],
+        'branch_inventory_officer': [u.user_id for u in pool if u.role == 'Branch Inventory Officer'],
+        'dept_managers': {},
+        'abdalaziz': next((u.user_id for u in pool if u.name == ABDALAZIZ_NAME), None),
+    }
+    for user in pool:
+        if user.role == 'Department Manager':
+            ctx['dept_managers'].setdefault(user.department, []).append(user.user_id)
+    return ctx
+
+
+def _dept_temp_manager_id(department, ctx):
+    """Department-level temporary manager id for a request department, if the user still exists."""
+    temp_id = ctx['dept_temp_ids'].get((department or '').strip().lower())
+    return temp_id if temp_id in ctx['users'] else None
+
+
+def _unique_ids(ids):
+    """Remove duplicates and missing ids while preserving order."""
+    seen = set()
+    unique = []
+    for uid in ids:
+        if uid and uid not in seen:
+            seen.add(uid)
+            unique.append(uid)
+    return unique
+
+
+def _excluding(user_ids, own_id):
+    """Drop the requestor from a list of approver ids (users can't approve their own request)."""
+    return [uid for uid in user_ids if uid != own_id]
+
+
+def _payment_manager_approver_ids(req, ctx):
+    """Manager-stage approver ids for a payment request. Mirrors the authorization logic in manager_approve_request."""
     # If per-request temporary manager is assigned (IT feature), only that user is authorized
-    if request.temporary_manager_id:
-        temp_manager = User.query.get(request.temporary_manager_id)
-        if temp_manager:
-            authorized_users.append(temp_manager)
-            print(f"DEBUG: Found per-request temporary manager: {temp_manager.name} (ID: {temp_manager.user_id})")
-        return authorized_users
-
-    # If a department-level temporary manager is assigned, include that user among authorized approvers
-    # Only include temporary managers assigned for "Finance Payment Request" or "Both Payment and Item Request"
-    # NOT those assigned only for "Procurement Item Request"
-    try:
-        req_dept = (request.department or '').strip()
-        if req_dept:
-            # Query all temporary managers for payment requests, then filter by department (case-insensitive)
-            dept_temp = None
-            for dt in DepartmentTemporaryManager.query.filter(
-                db.or_(
-                    DepartmentTemporaryManager.request_type == 'Finance Payment Request',
-                    DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
-                )
-            ).all():
-                dt_dept = (dt.department or '').strip()
-                if dt_dept.lower() == req_dept.lower():
-                    dept_temp = dt
-                    break
-        else:
-            dept_temp = None
-    except Exception:
-        dept_temp = None
-    if dept_temp:
-        temp_manager = User.query.get(dept_temp.temporary_manager_id)
-        if temp_manager:
-            authorized_users.append(temp_manager)
-            print(f"DEBUG: Added department-level temporary manager for payment request (dept: {req_dept}, request_type: {dept_temp.request_type}): {temp_manager.name} (ID: {temp_manager.user_id})")
-    
-    # No temporary manager, use standard authorization checks
-    
+    if req.temporary_manager_id:
+        return [req.temporary_manager_id] if req.temporary_manager_id in ctx['users'] else []
+
+    # Department-level temporary manager assigned for "Finance Payment Request" or "Both Payment and Item Request"
+    ids = [_dept_temp_manager_id(req.department, ctx)]
+
+    requestor = ctx['users'].get(req.user_id)
+    if not requestor:
+        return _unique_ids(ids)
+    own_id = requestor.user_id
+
     # Hard rule: Requests submitted by GM/CEO/Operation Manager can ONLY be approved by Abdalaziz
-    # Abdalaziz is their assigned manager and should receive notifications
-    if request.user.role in ['GM', 'CEO', 'Operation Manager']:
-        abdalaziz = User.query.filter_by(name='Abdalaziz Al-Brashdi').first()
-        if abdalaziz:
-            authorized_users.append(abdalaziz)
-            print(f"DEBUG: Added Abdalaziz for GM/CEO/Operation Manager submitter (assigned manager)")
-    else:
-        # General Manager - can approve all requests (except GM/CEO/Operation Manager)
-        gm_users = User.query.filter_by(role='GM').all()
-        for user in gm_users:
-            if user.user_id != request.user_id:  # Can't approve own request
-                authorized_users.append(user)
-                print(f"DEBUG: Added GM: {user.name}")
-        
-        # Operation Manager - can approve all requests (except GM/CEO/Operation Manager)
-        op_manager_users = User.query.filter_by(role='Operation Manager').all()
-        for user in op_manager_users:
-            if user.user_id != request.user_id:  # Can't approve own request
-                authorized_users.append(user)
-                print(f"DEBUG: Added Operation Manager: {user.name}")
-        
-        # Check if submitter has a manager_id (direct manager relationship)
-        if request.user.manager_id:
-            manager = User.query.get(request.user.manager_id)
-            if manager and manager.user_id != request.user_id:
-                if manager not in authorized_users:
-                    authorized_users.append(manager)
-                    print(f"DEBUG: Added direct manager: {manager.name} (ID: {manager.user_id})")
-        
-        # Special case: General Manager can approve Department Manager requests
-        if request.user.role == 'Department Manager':
-            gm_users = User.query.filter_by(role='GM').all()
-            for user in gm_users:
-                if user not in authorized_users:
-                    authorized_users.append(user)
-                    print(f"DEBUG: Added GM for Department Manager request: {user.name}")
-            
-            # Operation Manager can also approve Department Manager requests
-            op_manager_users = User.query.filter_by(role='Operation Manager').all()
-            for user in op_manager_users:
-                if user not in authorized_users:
-                    authorized_users.append(user)
-                    print(f"DEBUG: Added Operation Manager for Department Manager request: {user.name}")
-        
-        # Special case: For payment requests from Procurement Manager with request type "Bank money",
-        # the original authorized manager is the Auditing Department Manager. GM, Operation Manager,
-        # and temporary managers remain allowed (already added above).
-        if (request.user.role == 'Department Manager' and
-                (request.user.department or '').strip() == 'Procurement' and
-                getattr(request, 'request_type', None) == 'Bank money'):
-            auditing_dept_managers = User.query.filter_by(role='Department Manager', department='Auditing').all()
-            for user in auditing_dept_managers:
-                if user.user_id != request.user_id and user not in authorized_users:
-                    authorized_users.append(user)
-                    print(f"DEBUG: Added Auditing Department Manager for Procurement Manager Bank money request: {user.name}")
-        
-        # Special case: Abdalaziz can approve GM, CEO, Finance Staff, and Operation Manager requests
-        # (But GM/CEO/Operation Manager requests are handled above, so this covers Finance Staff)
-        # Abdalaziz is the assigned manager for Finance Staff and should receive notifications
-        if request.user.role == 'Finance Staff':
-            abdalaziz = User.query.filter_by(name='Abdalaziz Al-Brashdi').first()
-            if abdalaziz and abdalaziz not in authorized_users:
-                authorized_users.append(abdalaziz)
-                print(f"DEBUG: Added Abdalaziz for Finance Staff request (assigned manager)")
-        
-        # Special case: Operation Manager can approve Operation department and Project requests
-        if (request.user.department == 'Operation' or request.user.department == 'Project') and \
-           request.user.role != 'Operation Manager':
-            op_manager_users = User.query.filter_by(role='Operation Manager').all()
-            for user in op_manager_users:
-                if user.user_id != request.user_id and user not in authorized_users:
-                    authorized_users.append(user)
-                    print(f"DEBUG: Added Operation Manager for Operation/Project department: {user.name}")
-        
-        # Special case: Finance Admin can approve Finance department requests
-        if request.user.department == 'Finance' and request.user.role != 'Finance Admin':
-            finance_admins = User.query.filter_by(role='Finance Admin').all()
-            for user in finance_admins:
-                if user.user_id != request.user_id and user not in authorized_users:
-                    authorized_users.append(user)
-                    print(f"DEBUG: Added Finance Admin for Finance department: {user.name}")
-        
-        # Special case: Department Manager can approve same department requests.
-        # Exception: For Procurement Manager + Bank money, the original approver is Auditing Department Manager
-        # (added above), so do not add Procurement same-department manager here.
-        is_procurement_bank_money = (
-            request.user.role == 'Department Manager' and
-            (request.user.department or '').strip() == 'Procurement' and
-            getattr(request, 'request_type', None) == 'Bank money'
-        )
-        if not is_procurement_bank_money:
-            dept_managers = User.query.filter_by(
-                role='Department Manager',
-                department=request.user.department
-            ).all()
-            for user in dept_managers:
-                if user.user_id != request.user_id and user not in authorized_users:
-                    authorized_users.append(user)
-                    print(f"DEBUG: Added Department Manager for same department: {user.name}")
-    
-    # Remove duplicates (in case a user was added multiple times)
-    seen = set()
-    unique_authorized = []
-    for user in authorized_users:
-        if user.user_id not in seen:
-            seen.add(user.user_id)
-            unique_authorized.append(user)
-    
-    print(f"DEBUG: Total authorized manager approvers: {len(unique_authorized)}")
-    return unique_authorized
+    if requestor.role in ['GM', 'CEO', 'Operation Manager']:
+        ids.append(ctx['abdalaziz'])
+        return _unique_ids(ids)
+
+    # General Manager and Operation Manager - can approve all requests (except GM/CEO/Operation Manager)
+    ids += _excluding(ctx['gm'], own_id)
+    ids += _excluding(ctx['operation_manager'], own_id)
+
+    # Direct manager relationship
+    if requestor.manager_id in ctx['users'] and requestor.manager_id != own_id:
+        ids.append(requestor.manager_id)
+
+    # General Manager and Operation Manager can approve Department Manager requests
+    if requestor.role == 'Department Manager':
+        ids += ctx['gm'] + ctx['operation_manager']
+
+    # Procurement Manager "Bank money" requests: the original authorized manager is the Auditing Department Manager
+    is_procurement_bank_money = (
+        requestor.role == 'Department Manager' and
+        (requestor.department or '').strip() == 'Procurement' and
+        getattr(req, 'request_type', None) == 'Bank money'
+    )
+    if is_procurement_bank_money:
+        ids += _excluding(ctx['dept_managers'].get('Auditing', []), own_id)
+
+    # Abdalaziz is the assigned manager for Finance Staff
+    if requestor.role == 'Finance Staff':
+        ids.append(ctx['abdalaziz'])
+
+    # Operation Manager can approve Operation department and Project requests
+    if requestor.department in ('Operation', 'Project') and requestor.role != 'Operation Manager':
+        ids += _excluding(ctx['operation_manager'], own_id)
+
+    # Finance Admin can approve Finance department requests
+    if requestor.department == 'Finance' and requestor.role != 'Finance Admin':
+        ids += _excluding(ctx['finance_admin'], own_id)
+
+    # Department Manager can approve same department requests (except Procurement Manager + Bank money, see above)
+    if not is_procurement_bank_money:
+        ids += _excluding(ctx['dept_managers'].get(requestor.department, []), own_id)
+
+    return _unique_ids(ids)
+
+
+def _item_manager_approver_ids(item_request, ctx):
+    """Manager-stage approver ids for a procurement item request."""
+    # Department-level temporary manager assigned for "Procurement Item Request" or "Both Payment and Item Request"
+    ids = [_dept_temp_manager_id(item_request.department, ctx)]
 
-def get_authorized_manager_approvers_for_item_request(item_request):
-    """Get all users who are authorized to approve this item request at the manager stage."""
-    authorized_users = []
-    
-    # If a department-level temporary manager is assigned for this item_request.department, include that user among authorized approvers
-    # Only include temporary managers assigned for "Procurement Item Request" or "Both Payment and Item Request"
-    # NOT those assigned only for "Finance Payment Request"
-    try:
-        req_dept = (item_request.department or '').strip()
-        if req_dept:
-            # Query all temporary managers for item requests, then filter by department (case-insensitive)
-            dept_temp = None
-            for dt in DepartmentTemporaryManager.query.filter(
-                db.or_(
-                    DepartmentTemporaryManager.request_type == 'Procurement Item Request',
-                    DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
-                )
-            ).all():
-                dt_dept = (dt.department or '').strip()
-                if dt_dept.lower() == req_dept.lower():
-                    dept_temp = dt
-                    break
-        else:
-            dept_temp = None
-    except Exception:
-        dept_temp = None
-    if dept_temp:
-        temp_manager = User.query.get(dept_temp.temporary_manager_id)
-        if temp_manager:
-            authorized_users.append(temp_manager)
-            print(f"DEBUG: Added department-level temporary manager for item request (dept: {req_dept}, request_type: {dept_temp.request_type}): {temp_manager.name} (ID: {temp_manager.user_id})")
-    
-    # Get the requestor user - explicitly load from database if needed
     if not item_request.user_id:
-        return authorized_users
-    
-    requestor = User.query.get(item_request.user_id)
+        return _unique_ids(ids)
+    requestor = ctx['users'].get(item_request.user_id)
     if not requestor:
         log_action(f"WARNING: User not found for item request #{item_request.id} with user_id {item_request.user_id}")
-        return authorized_users
-    
-    # Special rule: If a Branch Manager or Supervisor (in Branch department) submits an item request,
-    # include Branch Inventory Officer(s) among the authorized manager approvers.
-    # Do NOT short-circuit other approvers — GM and Operation Manager should still be included.
-    try:
-        if requestor.role in ['Branch Manager', 'Supervisor'] and (requestor.department or '').strip().lower() == 'branch':
-            branch_inventory_officers = User.query.filter_by(role='Branch Inventory Officer').all()
-            for bio in branch_inventory_officers:
-                if bio.user_id != requestor.user_id:
-                    authorized_users.append(bio)
-            # Intentionally do NOT return here; allow GM/Operation Manager and other fallbacks to be added below.
-    except Exception as e:
-        app.logger.warning(f"Error applying Branch Inventory Officer special case for item request approvers: {e}")
-    
-    # Special rule: For item requests from Operation department, Branch Inventory Officer is the original assigned
-    # manager approval (not Operation Manager). Include Branch Inventory Officer(s) among authorized approvers.
-    try:
-        if (requestor.department or '').strip() == 'Operation':
-            branch_inventory_officers = User.query.filter_by(role='Branch Inventory Officer').all()
-            for bio in branch_inventory_officers:
-                if bio.user_id != requestor.user_id:
-                    authorized_users.append(bio)
-    except Exception as e:
-        app.logger.warning(f"Error applying Branch Inventory Officer for Operation department item request approvers: {e}")
-    
+        return _unique_ids(ids)
+    own_id = requestor.user_id
+
+    # Branch Manager/Supervisor (Branch department) and Operation department item requests:
+    # Branch Inventory Officer is among the authorized approvers (GM/Operation Manager are still added below)
+    if requestor.role in ['Branch Manager', 'Supervisor'] and (requestor.department or '').strip().lower() == 'branch':
+        ids += _excluding(ctx['branch_inventory_officer'], own_id)
+    if (requestor.department or '').strip() == 'Operation':
+        ids += _excluding(ctx['branch_inventory_officer'], own_id)
+
     # Hard rule: Requests submitted by GM/CEO/Operation Manager can ONLY be approved by Abdalaziz
     if requestor.role in ['GM', 'CEO', 'Operation Manager']:
-        abdalaziz = User.query.filter_by(name='Abdalaziz Al-Brashdi').first()
-        if abdalaziz:
-            authorized_users.append(abdalaziz)
-    else:
-        # General Manager - can approve all requests (except GM/CEO/Operation Manager)
-        # This includes Finance department requests - GM can approve Finance department item requests
-        gm_users = User.query.filter_by(role='GM').all()
-        for user in gm_users:
-            if user.user_id != requestor.user_id:
-                authorized_users.append(user)
-        
-        # Operation Manager - can approve all requests (except GM/CEO/Operation Manager)
-        # This includes Finance department requests - Operation Manager can approve Finance department item requests
-        op_manager_users = User.query.filter_by(role='Operation Manager').all()
-        for user in op_manager_users:
-            if user.user_id != requestor.user_id:
-                authorized_users.append(user)
-        
-        # Check if submitter has a manager_id (direct manager relationship)
-        if requestor.manager_id:
-            manager = User.query.get(requestor.manager_id)
-            if manager and manager.user_id != requestor.user_id:
-                if manager not in authorized_users:
-                    authorized_users.append(manager)
-        
-        # Special case: General Manager can approve Department Manager requests
-        if requestor.role == 'Department Manager':
-            gm_users = User.query.filter_by(role='GM').all()
-            for user in gm_users:
-                if user not in authorized_users:
-                    authorized_users.append(user)
-            
-            op_manager_users = User.query.filter_by(role='Operation Manager').all()
-            for user in op_manager_users:
-                if user not in authorized_users:
-                    authorized_users.append(user)
-        
-        # Special case: Abdalaziz can approve Finance Staff requests
-        if requestor.role == 'Finance Staff':
-            abdalaziz = User.query.filter_by(name='Abdalaziz Al-Brashdi').first()
-            if abdalaziz and abdalaziz not in authorized_users:
-                authorized_users.append(abdalaziz)
-        
-        # Special case: Operation Manager can approve Operation department and Project requests
-        if (requestor.department == 'Operation' or requestor.department == 'Project') and \
-           requestor.role != 'Operation Manager':
-            op_manager_users = User.query.filter_by(role='Operation Manager').all()
-            for user in op_manager_users:
-                if user.user_id != requestor.user_id and user not in authorized_users:
-                    authorized_users.append(user)
-        
-        # Special case: Finance department item requests
-        # Authorized approvers: Abdalaziz (Finance Admin), GM, Operation Manager, and any assigned temporary manager
-        # Only Abdalaziz is authorized from Finance Admin role, not other Finance Admin users (unless they are temporary managers)
-        # GM and Operation Manager are already added above for all requests, so they're included here
-        if requestor.department == 'Finance' and requestor.role != 'Finance Admin':
-            abdalaziz = User.query.filter_by(name='Abdalaziz Al-Brashdi').first()
-            if abdalaziz and abdalaziz not in authorized_users:
-                authorized_users.append(abdalaziz)
-        
-        # Special case: IT Department Manager can approve IT department requests
-        if requestor.department == 'IT' and requestor.role != 'Department Manager':
-            it_managers = User.query.filter_by(
-                role='Department Manager',
-                department='IT'
-            ).all()
-            for user in it_managers:
-                if user.user_id != requestor.user_id and user not in authorized_users:
-                    authorized_users.append(user)
-        
-        # Special case: Department Manager can approve same department requests
-        dept_managers = User.query.filter_by(
-            role='Department Manager',
-            department=requestor.department
+        ids.append(ctx['abdalaziz'])
+        return _unique_ids(ids)
+
+    # General Manager and Operation Manager - can approve all requests, including Finance department item requests
+    ids += _excluding(ctx['gm'], own_id)
+    ids += _excluding(ctx['operation_manager'], own_id)
+
+    # Direct manager relationship
+    if requestor.manager_id in ctx['users'] and requestor.manager_id != own_id:
+        ids.append(requestor.manager_id)
+
+    # General Manager and Operation Manager can approve Department Manager requests
+    if requestor.role == 'Department Manager':
+        ids += ctx['gm'] + ctx['operation_manager']
+
+    # Abdalaziz can approve Finance Staff requests
+    if requestor.role == 'Finance Staff':
+        ids.append(ctx['abdalaziz'])
+
+    # Operation Manager can approve Operation department and Project requests
+    if requestor.department in ('Operation', 'Project') and requestor.role != 'Operation Manager':
+        ids += _excluding(ctx['operation_manager'], own_id)
+
+    # Finance department item requests: only Abdalaziz from the Finance Admin role
+    if requestor.department == 'Finance' and requestor.role != 'Finance Admin':
+        ids.append(ctx['abdalaziz'])
+
+    # IT Department Manager can approve IT department requests
+    if requestor.department == 'IT' and requestor.role != 'Department Manager':
+        ids += _excluding(ctx['dept_managers'].get('IT', []), own_id)
+
+    # Department Manager can approve same department requests
+    ids += _excluding(ctx['dept_managers'].get(requestor.department, []), own_id)
+
+    return _unique_ids(ids)
+
+
+def _resolve_manager_approvers_bulk(requests):
+    """Resolve manager-stage approver ids for payment requests. Returns ({request_id: [user_ids]}, users_by_id)."""
+    requests = [r for r in requests or [] if r is not None]
+    if not requests:
+        return {}, {}
+    ctx = _load_approver_context(requests, PAYMENT_TEMP_MANAGER_TYPES, [r.user_id for r in requests])
+    return {r.request_id: _payment_manager_approver_ids(r, ctx) for r in requests}, ctx['users']
+
+
+def _resolve_item_manager_approvers_bulk(item_requests):
+    """Resolve manager-stage approver ids for item requests. Returns ({item_request_id: [user_ids]}, users_by_id)."""
+    item_requests = [r for r in item_requests or [] if r is not None]
+    if not item_requests:
+        return {}, {}
+    ctx = _load_approver_context(item_requests, ITEM_TEMP_MANAGER_TYPES, [r.user_id for r in item_requests])
+    return {r.id: _item_manager_approver_ids(r, ctx) for r in item_requests}, ctx['users']
+
+
+def get_authorized_manager_approver_ids_bulk(requests):
+    """Batched get_authorized_manager_approvers: {request_id: [approver user_ids]} for a list of payment requests,
+    using a constant number of queries regardless of how many requests are passed."""
+    return _resolve_manager_approvers_bulk(requests)[0]
+
+
+def get_authorized_manager_approver_ids_for_item_requests_bulk(item_requests):
+    """Batched get_authorized_manager_approvers_for_item_request: {item_request_id: [approver user_ids]}."""
+    return _resolve_item_manager_approvers_bulk(item_requests)[0]
+
+
+def get_authorized_manager_approvers(request):
+    """Get all users who are authorized to approve this request at the manager stage.
+    This mirrors the authorization logic in manager_approve_request."""
+    approver_ids, users_by_id = _resolve_manager_approvers_bulk([request])
+    return [users_by_id[uid] for uid in approver_ids.get(request.request_id, [])]
+
+# --- Request visibility index ---
+# Reasons stored in request_visibility that grant manager-level visibility of a payment request.
+MANAGER_VISIBILITY_REASONS = ('temporary_manager', 'department_temporary_manager', 'manager_approver')
+
+
+def _payment_temp_managers_by_department():
+    """Map normalized department name -> user ids assigned as department-level temporary manager for payment requests."""
+    by_dept = {}
+    for dt in DepartmentTemporaryManager.query.filter(
+        db.or_(
+            DepartmentTemporaryManager.request_type == 'Finance Payment Request',
+            DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
+        )
+    ).all():
+        dept = (dt.department or '').strip().lower()
+        if dept and dt.temporary_manager_id:
+            by_dept.setdefault(dept, set()).add(dt.temporary_manager_id)
+    return by_dept
+
+
+def _compute_request_visibility_rows(req, temp_managers_by_dept, approver_ids):
+    """Return the set of (user_id, reason) pairs that make a payment request visible to a user."""
+    rows = set()
+    if req.user_id:
+        rows.add((req.user_id, 'requestor'))
+    if req.temporary_manager_id:
+        rows.add((req.temporary_manager_id, 'temporary_manager'))
+    for user_id in temp_managers_by_dept.get((req.department or '').strip().lower(), ()):
+        rows.add((user_id, 'department_temporary_manager'))
+    for user_id in approver_ids:
+        rows.add((user_id, 'manager_approver'))
+    return rows
+
+
+def refresh_request_visibility(requests_or_ids, commit=True):
+    """Recompute request_visibility rows for the given payment requests (objects or ids).
+    Call after a request is created or submitted, or when its department, type or temporary manager changes."""
+    request_ids = []
+    for item in requests_or_ids or []:
+        request_id = getattr(item, 'request_id', item)
+        if request_id:
+            request_ids.append(int(request_id))
+    if not request_ids:
+        return 0
+    temp_managers_by_dept = _payment_temp_managers_by_department()
+    inserted = 0
+    # Chunk to stay under SQLite's bound-parameter limit
+    for i in range(0, len(request_ids), 500):
+        chunk = request_ids[i:i + 500]
+        RequestVisibility.query.filter(RequestVisibility.request_id.in_(chunk)).delete(synchronize_session=False)
+        rows = []
+        chunk_requests = PaymentRequest.query.filter(PaymentRequest.request_id.in_(chunk)).all()
+        try:
+            approvers_by_request = get_authorized_manager_approver_ids_bulk(chunk_requests)
+        except Exception as e:
+            app.logger.warning(f"Could not resolve manager approvers for requests {chunk[0]}..{chunk[-1]}: {e}")
+            approvers_by_request = {}
+        for req in chunk_requests:
+            approver_ids = approvers_by_request.get(req.request_id, [])
+            for user_id, reason in _compute_request_visibility_rows(req, temp_managers_by_dept, approver_ids):
+                rows.append({'user_id': user_id, 'request_id': req.request_id, 'reason': reason, 'created_at': datetime.utcnow()})
+        if rows:
+            db.session.execute(RequestVisibility.__table__.insert(), rows)
+            inserted += len(rows)
+    if commit:
+        db.session.commit()
+    return inserted
+
+
+def refresh_request_visibility_for_department(department, commit=True):
+    """Recompute visibility for every request of a department (e.g. after a department-level temporary manager change)."""
+    dept = (department or '').strip().lower()
+    if not dept:
+        return 0
+    ids = [
+        row[0] for row in db.session.query(PaymentRequest.request_id).filter(
+            db.func.lower(db.func.trim(PaymentRequest.department)) == dept
         ).all()
-        for user in dept_managers:
-            if user.user_id != requestor.user_id and user not in authorized_users:
-                authorized_users.append(user)
-    
-    # Remove duplicates
-    seen = set()
-    unique_authorized = []
-    for user in authorized_users:
-        if user.user_id not in seen:
-            seen.add(user.user_id)
-            unique_authorized.append(user)
+    ]
+    return refresh_request_visibility(ids, commit=commit)
+
+
+def rebuild_request_visibility():
+    """Rebuild the whole request_visibility table from scratch (backfill, or after user role/manager changes)."""
+    RequestVisibility.query.delete(synchronize_session=False)
+    ids = [row[0] for row in db.session.query(PaymentRequest.request_id).all()]
+    inserted = refresh_request_visibility(ids, commit=False)
+    db.session.commit()
+    return inserted
+
+
+def user_visibility_profile(user):
+    """The user attributes the request visibility rules depend on (compare before and after a user change)"""
+    if user is None:
+        return None
+    return (user.role, user.department, user.manager_id, user.name)
+
+
+def request_ids_affected_by_user_change(user_id, before, after):
+    """Ids of the payment requests whose visibility can change when a user is created, edited or deleted, given
+    the user's visibility profile before and after (None when the user does not exist on that side).
+    Returns None when any request may be affected (GM and Operation Manager can approve nearly every request).
+    Must run while the user's current request_visibility rows still exist."""
+    if before == after:
+        return []
+    profiles = [profile for profile in (before, after) if profile is not None]
+    if any(role in ('GM', 'Operation Manager') for role, _, _, _ in profiles):
+        return None
     
-    return unique_authorized
+    # Requestors whose requests the user submits or approves through the manager rules
+    requestor_ids = {user_id}
+    requestor_ids.update(uid for (uid,) in db.session.query(User.user_id).filter(User.manager_id == user_id))
+    departments = set()
+    requestor_roles = set()
+    for role, department, _manager_id, name in profiles:
+        if role == 'Department Manager':
+            departments.add(department)
+            if (department or '').strip() == 'Auditing':
+                departments.add('Procurement')  # Procurement Manager "Bank money" requests
+        if role == 'Finance Admin':
+            departments.add('Finance')
+        if name == ABDALAZIZ_NAME:
+            requestor_roles.update(('GM', 'CEO', 'Operation Manager', 'Finance Staff'))
+    requestors = db.session.query(User.user_id).filter(or_(
+        User.user_id.in_(requestor_ids),
+        User.department.in_(departments),
+        User.role.in_(requestor_roles)
+    ))
+    query = db.session.query(PaymentRequest.request_id).filter(or_(
+        PaymentRequest.user_id.in_(requestors),
+        # Requests the user can see now (approver rights they may lose)
+        PaymentRequest.request_id.in_(db.session.query(RequestVisibility.request_id).filter(RequestVisibility.user_id == user_id))
+    ))
+    return [request_id for (request_id,) in query]
+
+
+def refresh_request_visibility_for_user_change(request_ids):
+    """Refresh the requests returned by request_ids_affected_by_user_change (None = rebuild everything)"""
+    if request_ids is None:
+        return rebuild_request_visibility()
+    return refresh_request_visibility(request_ids)
+
+
+def visible_request_ids_query(user, reasons=None):
+    """Indexed subquery of request ids the user can see through request_visibility, optionally limited to reasons."""
+    query = db.session.query(RequestVisibility.request_id).filter(RequestVisibility.user_id == user.user_id)
+    if reasons:
+        query = query.filter(RequestVisibility.reason.in_(list(reasons)))
+    return query
+
+
+def _normalized_department(column):
+    """SQL expression for lower(trim(department)) used for case-insensitive department matching."""
+    return db.func.lower(db.func.trim(db.func.coalesce(column, '')))
+
+
+def department_manager_visibility_filter(user, reasons=MANAGER_VISIBILITY_REASONS):
+    """SQL filter for what a (non-Auditing) Department Manager sees: requests where both the request
+    department and the requestor's department match theirs, plus requests they manage via request_visibility."""
+    user_dept = (user.department or '').strip().lower()
+    return db.or_(
+        db.and_(
+            _normalized_department(PaymentRequest.department) == user_dept,
+            PaymentRequest.user.has(_normalized_department(User.department) == user_dept)
+        ),
+        PaymentRequest.request_id.in_(visible_request_ids_query(user, reasons))
+    )
+
+
+def auditing_manager_visibility_filter(user):
+    """SQL filter for the Auditing Department Manager: own requests, Auditing requests from Auditing requestors,
+    view-only completed/proof/recurring requests of other departments, and requests they manage."""
+    return db.or_(
+        PaymentRequest.user_id == user.user_id,
+        db.and_(
+            _normalized_department(PaymentRequest.department) == 'auditing',
+            PaymentRequest.user.has(_normalized_department(User.department) == 'auditing')
+        ),
+        db.and_(
+            _normalized_department(PaymentRequest.department) != 'auditing',
+            PaymentRequest.status.in_(['Completed', 'Recurring', 'Proof Pending', 'Proof Sent', 'Proof Rejected'])
+        ),
+        PaymentRequest.request_id.in_(visible_request_ids_query(user, MANAGER_VISIBILITY_REASONS))
+    )
+
+
+def staff_visibility_filter(user):
+    """SQL filter for regular staff and department-level temporary managers: own requests plus requests they manage."""
+    return db.or_(
+        PaymentRequest.user_id == user.user_id,
+        PaymentRequest.request_id.in_(visible_request_ids_query(user, MANAGER_VISIBILITY_REASONS))
+    )
+
+
+def get_authorized_manager_approvers_for_item_request(item_request):
+    """Get all users who are authorized to approve this item request at the manager stage."""
+    approver_ids, users_by_id = _resolve_item_manager_approvers_bulk([item_request])
+    return [users_by_id[uid] for uid in approver_ids.get(item_request.id, [])]
 
 def notify_users_by_role(request, notification_type, title, message, request_id=None):
     """Notify users based on RBAC notification permissions"""
@@ -1915,8 +1864,7 @@ def notify_users_by_role(request, notification_type, title, message, request_id=
     # Handle user management notifications (no request object)
     if notification_type in ['user_created', 'user_updated', 'user_deleted']:
         it_staff_users = User.query.filter_by(role='IT Staff').all()
-        for user in it_staff_users:
-            create_notification(user.user_id, title, message, notification_type, request_id)
+        create_notifications_bulk(it_staff_users, title, message, notification_type, request_id)
         return
     
     # Get the requestor's role and department
@@ -1929,11 +1877,13 @@ def notify_users_by_role(request, notification_type, title, message, request_id=
     print(f"   - requestor_department: {requestor_department}")
     print(f"   - title: {title}")
     
+    # All recipients of this event, created together in one transaction below
+    specs = []
+    
     # Finance Admin and Finance Staff - get notifications when requests reach Pending Finance Approval
     if notification_type in ['ready_for_finance_review']:
         finance_users = User.query.filter(User.role.in_(['Finance Staff', 'Finance Admin'])).all()
-        for user in finance_users:
-            create_notification(user.user_id, title, message, notification_type, request_id)
+        specs += [notification_spec(user.user_id, title, message, notification_type, request_id) for user in finance_users]
     
     # Handle new_submission notifications
     elif notification_type == 'new_submission':
@@ -1950,8 +1900,7 @@ def notify_users_by_role(request, notification_type, title, message, request_id=
         else:
             amount_str = 'N/A'
         submitter_notification_message = f"Your {request_type_name} request for OMR {amount_str} has been submitted successfully and is awaiting manager approval."
-        create_notification(request.user_id, submitter_notification_title, submitter_notification_message, notification_type, request_id)
-        print(f"DEBUG: Notified submitting user: {request.user.name} (ID: {request.user_id})")
+        specs.append(notification_spec(request.user_id, submitter_notification_title, submitter_notification_message, notification_type, request_id))
         
         # Get all authorized manager approvers using the helper function
         authorized_approvers = get_authorized_manager_approvers(request)
@@ -1980,68 +1929,28 @@ def notify_users_by_role(request, notification_type, title, message, request_id=
             pass
         
         # Notify all authorized manager approvers
-        for approver in authorized_approvers:
-            create_notification(approver.user_id, title, message, notification_type, request_id)
-            print(f"DEBUG: Notified authorized approver: {approver.name} (ID: {approver.user_id}, Role: {approver.role})")
-        
-        # General Manager - receives notifications from ALL requests (regardless of role/department)
-        gm_users = User.query.filter_by(role='GM').all()
-        for user in gm_users:
-            # Only notify if not already in authorized_approvers (avoid duplicates)
-            if user not in authorized_approvers:
-                create_notification(user.user_id, title, message, notification_type, request_id)
-                print(f"DEBUG: Notified GM {user.username} about new_submission")
+        recipients = list(authorized_approvers)
         
-        # Operation Manager - receives notifications from ALL requests (regardless of role/department)
-        op_manager_users = User.query.filter_by(role='Operation Manager').all()
-        for user in op_manager_users:
-            # Only notify if not already in authorized_approvers (avoid duplicates)
-            if user not in authorized_approvers:
-                create_notification(user.user_id, title, message, notification_type, request_id)
-                print(f"DEBUG: Notified Operation Manager {user.username} about new_submission")
+        # General Manager and Operation Manager - receive notifications from ALL requests (regardless of role/department)
+        recipients += User.query.filter(User.role.in_(['GM', 'Operation Manager'])).all()
         
         # IT Department Manager - only from IT Staff submissions (explicitly notify even if not in authorized_approvers)
         if requestor_role == 'IT Staff' or requestor_department == 'IT':
-            it_manager_users = User.query.filter_by(role='Department Manager', department='IT').all()
-            for user in it_manager_users:
-                # Only notify if not already in authorized_approvers (avoid duplicates)
-                if user not in authorized_approvers:
-                    create_notification(user.user_id, title, message, notification_type, request_id)
-                    print(f"DEBUG: Notified IT Department Manager {user.username} about IT Staff request")
+            recipients += User.query.filter_by(role='Department Manager', department='IT').all()
         
-        print(f"DEBUG: Total notifications sent for new_submission: 1 to submitter + {len(authorized_approvers)} to authorized approvers + GM/Operation Manager/IT Manager")
+        # Duplicates (e.g. a GM who is also an authorized approver) are dropped by fan_out_notifications()
+        specs += [notification_spec(user.user_id, title, message, notification_type, request_id) for user in recipients]
     
     # Requestor - for updates on their own requests
     elif notification_type in ['request_rejected', 'request_approved', 'proof_uploaded', 'status_changed']:
-        create_notification(request.user_id, title, message, notification_type, request_id)
+        specs.append(notification_spec(request.user_id, title, message, notification_type, request_id))
         
-        # For proof_uploaded, also notify Finance Admin
-        if notification_type == 'proof_uploaded':
-            print(f"DEBUG: Also notifying Finance Admin about proof upload")
+        # For proof_uploaded and request_approved, also notify Finance Admin / Finance Staff
+        if notification_type in ['proof_uploaded', 'request_approved']:
             finance_users = User.query.filter(User.role.in_(['Finance Staff', 'Finance Admin'])).all()
-            for user in finance_users:
-                create_notification(
-                    user_id=user.user_id,
-                    title=title,
-                    message=message,
-                    notification_type=notification_type,
-                    request_id=request_id
-                )
-                print(f"DEBUG: Notified Finance user {user.username} about proof upload")
-        
-        # For request_approved, also notify Finance Admin if they didn't approve it
-        elif notification_type == 'request_approved':
-            print(f"DEBUG: Also notifying Finance Admin about request approval")
-            finance_users = User.query.filter(User.role.in_(['Finance Staff', 'Finance Admin'])).all()
-            for user in finance_users:
-                create_notification(
-                    user_id=user.user_id,
-                    title=title,
-                    message=message,
-                    notification_type=notification_type,
-                    request_id=request_id
-                )
-                print(f"DEBUG: Notified Finance user {user.username} about request approval")
+            specs += [notification_spec(user.user_id, title, message, notification_type, request_id) for user in finance_users]
+    
+    fan_out_notifications(specs)
     
     # Emit real-time notification to all users after creating database notifications
     try:
@@ -2072,10 +1981,8 @@ def notify_system_wide(title, message, notification_type):
     # Roles that receive system-wide notifications
     system_roles = ['Finance Admin', 'Finance Staff', 'GM', 'CEO', 'Operation Manager', 'IT Staff', 'Department Manager']
     
-    for role in system_roles:
-        users = User.query.filter_by(role=role).all()
-        for user in users:
-            create_notification(user.user_id, title, message, notification_type)
+    users = User.query.filter(User.role.in_(system_roles)).all()
+    create_notifications_bulk(users, title, message, notification_type)
 
 def create_recurring_payment_schedule(request_id, total_amount, payment_schedule_data):
     """Create a recurring payment schedule with variable amounts"""
@@ -2112,78 +2019,364 @@ def get_payment_schedule(request_id):
     schedules = RecurringPaymentSchedule.query.filter_by(request_id=request_id).order_by(RecurringPaymentSchedule.payment_order).all()
     return [schedule.to_dict() for schedule in schedules]
 
-def get_recurring_scheduled_dates(req):
-    """Get scheduled dates for a recurring payment request as a semicolon-separated string
-    For Cheque + Recurring requests, includes day calculations"""
-    if not req or req.recurring != 'Recurring':
-        return ''
-    
+# --- Materialised payment occurrences (payment_occurrences) ---
+# Interval-based series are materialised from PAYMENT_OCCURRENCE_LOOKBACK_DAYS back to this far ahead;
+# the daily refresh_payment_occurrences job moves the window forward. Requests with installments
+# (RecurringPaymentSchedule) are copied as-is.
+PAYMENT_OCCURRENCE_HORIZON_DAYS = 400
+PAYMENT_OCCURRENCE_LOOKBACK_DAYS = 400
+# PaymentRequest columns that change its due dates / amounts
+_OCCURRENCE_REQUEST_FIELDS = ('recurring', 'recurring_interval', 'date', 'amount')
+_OCCURRENCE_SOURCE_MODELS = (RecurringPaymentSchedule, PaidNotification, LateInstallment)
+
+
+def _rule_dates(rule, start, end, anchor):
+    """Every due date of a compiled rule in [start, end], paging past recurring_rules.MAX_OCCURRENCES"""
     dates = []
-    date_objects = []  # Store date objects for day calculation
+    while start <= end:
+        chunk = rule.occurrences(start, end, anchor=anchor)
+        dates.extend(chunk)
+        if len(chunk) < MAX_OCCURRENCES:
+            break
+        start = chunk[-1] + timedelta(days=1)
+    return dates
+
+
+def expand_recurring_interval_dates(req, window_start, horizon_end):
+    """Due dates of an interval-based recurring request (no installments) between window_start and horizon_end.
+    Expanding from the window start (not the start of the series) keeps old daily / weekly series current."""
+    rule = compile_rule(req.recurring_interval)
+    if rule is None or rule.frequency == 'custom':
+        return []
+    return _rule_dates(rule, window_start, horizon_end, req.date)
+
+
+def refresh_payment_occurrences(request_ids=None, session=None):
+    """Rebuild payment_occurrences and installment_ledgers for the given requests (every recurring request if None).
+    Does not commit. Returns the number of occurrences written."""
+    session = session or db.session
+    delete_stmt = db.delete(PaymentOccurrence)
+    ledger_delete_stmt = db.delete(InstallmentLedger)
+    request_query = session.query(PaymentRequest).filter(
+        PaymentRequest.recurring == 'Recurring',
+        PaymentRequest.recurring_interval.isnot(None),
+        PaymentRequest.recurring_interval != ''
+    )
+    if request_ids is not None:
+        request_ids = list(set(request_ids))
+        if not request_ids:
+            return 0
+        delete_stmt = delete_stmt.where(PaymentOccurrence.request_id.in_(request_ids))
+        ledger_delete_stmt = ledger_delete_stmt.where(InstallmentLedger.request_id.in_(request_ids))
+        request_query = request_query.filter(PaymentRequest.request_id.in_(request_ids))
+    session.execute(delete_stmt)
+    session.execute(ledger_delete_stmt)
+    
+    requests = request_query.all()
+    if not requests:
+        return 0
     
-    # Check if it has custom dates stored in RecurringPaymentSchedule
-    schedules = RecurringPaymentSchedule.query.filter_by(request_id=req.request_id).order_by(RecurringPaymentSchedule.payment_order).all()
-    if schedules:
-        # Custom dates - get all payment dates
-        for schedule in schedules:
-            date_objects.append(schedule.payment_date)
-            dates.append(schedule.payment_date.strftime('%Y-%m-%d'))
-    elif req.recurring_interval:
-        # Monthly recurring - parse recurring_interval to extract dates
+    def _for_requests(query, column):
+        return query.filter(column.in_(request_ids)) if request_ids is not None else query
+    
+    schedules_by_request = {}
+    for schedule in _for_requests(session.query(RecurringPaymentSchedule), RecurringPaymentSchedule.request_id).order_by(RecurringPaymentSchedule.payment_order):
+        schedules_by_request.setdefault(schedule.request_id, []).append(schedule)
+    paid_dates = set(_for_requests(session.query(PaidNotification.request_id, PaidNotification.paid_date), PaidNotification.request_id))
+    late_dates = set(_for_requests(session.query(LateInstallment.request_id, LateInstallment.payment_date), LateInstallment.request_id))
+    
+    window_start = date.today() - timedelta(days=PAYMENT_OCCURRENCE_LOOKBACK_DAYS)
+    horizon_end = date.today() + timedelta(days=PAYMENT_OCCURRENCE_HORIZON_DAYS)
+    rows = []
+    ledger_rows = []
+    now = datetime.utcnow()
+    for req in requests:
+        schedules = schedules_by_request.get(req.request_id)
+        if schedules:
+            ledger_rows.append(installment_ledger_row(req, schedules, paid_dates, now))
+            for schedule in schedules:
+                rows.append({
+                    'request_id': req.request_id,
+                    'schedule_id': schedule.schedule_id,
+                    'due_date': schedule.payment_date,
+                    'amount': schedule.amount,
+                    'paid': bool(schedule.is_paid),
+                    'late': (req.request_id, schedule.payment_date) in late_dates,
+                })
+        else:
+            for due_date in expand_recurring_interval_dates(req, window_start, horizon_end):
+                rows.append({
+                    'request_id': req.request_id,
+                    'schedule_id': None,
+                    'due_date': due_date,
+                    'amount': req.amount,
+                    'paid': (req.request_id, due_date) in paid_dates,
+                    'late': (req.request_id, due_date) in late_dates,
+                })
+    if rows:
+        session.execute(db.insert(PaymentOccurrence), rows)
+    if ledger_rows:
+        session.execute(db.insert(InstallmentLedger), ledger_rows)
+    return len(rows)
+
+
+def installment_ledger_row(req, schedules, paid_dates, updated_at):
+    """installment_ledgers values of a request from its installments and the (request_id, paid_date) paid markers"""
+    paid = [schedule for schedule in schedules if schedule.is_paid]
+    paid_total = round(sum(float(schedule.amount) for schedule in paid), 3)
+    unpaid_dates = [schedule.payment_date for schedule in schedules if not schedule.is_paid]
+    return {
+        'request_id': req.request_id,
+        'installment_count': len(schedules),
+        'paid_count': len(paid),
+        'scheduled_total': round(sum(float(schedule.amount) for schedule in schedules), 3),
+        'paid_total': paid_total,
+        'marked_paid_total': round(sum(float(schedule.amount) for schedule in schedules
+                                       if (req.request_id, schedule.payment_date) in paid_dates), 3),
+        'remaining_amount': round(float(req.amount) - paid_total, 3),
+        'next_due_date': min(unpaid_dates) if unpaid_dates else None,
+        'updated_at': updated_at,
+    }
+
+
+def get_installment_ledger(request_id):
+    """The request's InstallmentLedger row (None without installments), rebuilt first if this
+    transaction has changed its installments or paid markers and not committed yet"""
+    db.session.flush()
+    pending = db.session.info.get('occurrence_request_ids') or set()
+    if request_id in pending or db.session.info.get('occurrence_rebuild_all'):
+        refresh_payment_occurrences([request_id])
+        pending.discard(request_id)
+    return db.session.get(InstallmentLedger, request_id, populate_existing=True)
+
+
+def rebuild_payment_occurrences():
+    """Rebuild every request's occurrences (and move the horizon forward). Returns the number of rows."""
+    count = refresh_payment_occurrences()
+    db.session.commit()
+    return count
+
+
+def _request_ids_in_criteria(statement):
+    """request_id values a bulk UPDATE / DELETE is restricted to, or None if they cannot be read off its WHERE clause"""
+    from sqlalchemy.sql import operators, visitors
+    from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+    if statement.whereclause is None:
+        return None
+    request_ids = set()
+    for element in visitors.iterate(statement.whereclause):
+        if not (isinstance(element, BinaryExpression) and getattr(element.left, 'key', None) == 'request_id'
+                and isinstance(element.right, BindParameter)):
+            continue
+        value = element.right.effective_value
+        if element.operator is operators.eq:
+            request_ids.add(value)
+        elif element.operator is operators.in_op:
+            request_ids.update(value or [])
+    return request_ids or None
+
+
+@db.event.listens_for(SASession, 'after_flush')
+def _track_occurrence_changes(session, flush_context):
+    """Collect requests whose occurrences need rebuilding when this transaction commits"""
+    request_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, PaymentRequest):
+            if obj in session.deleted or (obj in session.new and obj.recurring == 'Recurring'):
+                request_ids.add(obj.request_id)
+            elif obj in session.dirty:
+                state = db.inspect(obj)
+                if any(state.attrs[field].history.has_changes() for field in _OCCURRENCE_REQUEST_FIELDS):
+                    request_ids.add(obj.request_id)
+        elif isinstance(obj, _OCCURRENCE_SOURCE_MODELS):
+            history = db.inspect(obj).attrs.request_id.history
+            request_ids.update(rid for rid in list(history.deleted) + [obj.request_id] if rid)
+    if request_ids:
+        session.info.setdefault('occurrence_request_ids', set()).update(request_ids)
+
+
+@db.event.listens_for(SASession, 'do_orm_execute')
+def _track_occurrence_bulk_changes(orm_execute_state):
+    """Same for query.update() / query.delete() on installments and paid / late markers"""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        if issubclass(orm_execute_state.bind_mapper.class_, _OCCURRENCE_SOURCE_MODELS):
+            request_ids = _request_ids_in_criteria(orm_execute_state.statement)
+            if request_ids is None:
+                orm_execute_state.session.info['occurrence_rebuild_all'] = True
+            else:
+                orm_execute_state.session.info.setdefault('occurrence_request_ids', set()).update(request_ids)
+
+
+@db.event.listens_for(SASession, 'before_commit')
+def _refresh_changed_occurrences(session):
+    """Rebuild the collected requests' occurrences in the transaction that changed them"""
+    session.flush()
+    request_ids = session.info.pop('occurrence_request_ids', None)
+    rebuild_all = session.info.pop('occurrence_rebuild_all', False)
+    if not request_ids and not rebuild_all:
+        return
+    # A failed rebuild rolls back to the savepoint so its DELETE is not committed without the new rows.
+    # Connection-level: a Session.begin_nested() savepoint fires the session's commit / rollback events
+    savepoint = session.connection().begin_nested()
+    try:
+        refresh_payment_occurrences(None if rebuild_all else request_ids, session=session)
+        savepoint.commit()
+    except Exception as e:
+        savepoint.rollback()
+        # The daily refresh_payment_occurrences job repairs anything missed here
+        app.logger.warning(f"Could not refresh payment occurrences: {e}")
+
+
+@db.event.listens_for(SASession, 'after_rollback')
+def _discard_occurrence_changes(session):
+    session.info.pop('occurrence_request_ids', None)
+    session.info.pop('occurrence_rebuild_all', None)
+
+
+_BRANCH_ALLOCATION_REQUEST_FIELDS = ('branch_name', 'branch_amounts', 'different_amounts_per_branch')
+
+
+def split_branch_names(branch_name):
+    """Branch names of a request's comma-separated branch_name, stripped, in order"""
+    return [name.strip() for name in (branch_name or '').split(',') if name.strip()]
+
+
+def branch_allocation_rows(request_id, branch_name, branch_amounts, different_amounts_per_branch):
+    """request_branch_allocations values of one request. Amounts are only kept when the request has
+    different amounts per branch and branch_amounts is a JSON list with one entry per branch."""
+    names = split_branch_names(branch_name)
+    amounts = [None] * len(names)
+    if different_amounts_per_branch and branch_amounts:
         try:
-            parts = req.recurring_interval.split(':')
-            if len(parts) >= 2 and parts[0] == 'monthly':
-                interval = int(parts[1])
-                # Check for date format: monthly:1:date:2025-10-11:end:2025-11-11
-                if len(parts) > 2 and parts[2] == 'date':
-                    start_date_str = parts[3]
-                    start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                    date_objects.append(start_date)
-                    dates.append(start_date_str)
-                    
-                    # Check if there's an end date
-                    if 'end' in parts:
-                        end_index = parts.index('end')
-                        if end_index + 1 < len(parts):
-                            end_date_str = parts[end_index + 1]
-                            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                            
-                            # Generate all dates from start to end based on interval
-                            current_date = add_months(start_date, interval)
-                            while current_date <= end_date:
-                                date_objects.append(current_date)
-                                dates.append(current_date.strftime('%Y-%m-%d'))
-                                current_date = add_months(current_date, interval)
-                                # Safety check to prevent infinite loop
-                                if len(dates) > 100:
-                                    break
-                # Check for days format: monthly:1:days:11,15:2025:10
-                elif len(parts) > 2 and parts[2] == 'days':
-                    # Extract specific days
-                    days = parts[3].split(',')
-                    year = int(parts[4]) if len(parts) > 4 else (req.date.year if req.date else date.today().year)
-                    month = int(parts[5]) if len(parts) > 5 else (req.date.month if req.date else date.today().month)
-                    
-                    for day in days:
-                        try:
-                            day_int = int(day)
-                            payment_date = date(year, month, day_int)
-                            date_objects.append(payment_date)
-                            dates.append(payment_date.strftime('%Y-%m-%d'))
-                        except (ValueError, TypeError):
-                            continue
-                # Simple monthly format: monthly:1 (use request date as start)
-                else:
-                    if req.date:
-                        date_objects.append(req.date)
-                        dates.append(req.date.strftime('%Y-%m-%d'))
-        except (ValueError, IndexError, AttributeError) as e:
-            # If parsing fails, return empty
-            pass
+            parsed = json.loads(branch_amounts) if isinstance(branch_amounts, str) else branch_amounts
+        except (TypeError, ValueError):
+            parsed = None
+        if isinstance(parsed, list) and len(parsed) == len(names):
+            for i, value in enumerate(parsed):
+                try:
+                    amount = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if math.isfinite(amount):
+                    amounts[i] = round(amount, 3)
+    return [
+        {'request_id': request_id, 'position': i, 'branch_name': name, 'amount': amounts[i]}
+        for i, name in enumerate(names)
+    ]
+
+
+def _resolve_branch_allocations(request_ids=None, session=None):
+    """Point allocations at the branch with their name, else the branch with that alias (lowest id wins)"""
+    session = session or db.session
+    by_name = db.select(Branch.id).where(
+        Branch.name == RequestBranchAllocation.branch_name
+    ).order_by(Branch.id).limit(1).scalar_subquery()
+    by_alias = db.select(BranchAlias.branch_id).where(
+        BranchAlias.alias_name == RequestBranchAllocation.branch_name
+    ).order_by(BranchAlias.id).limit(1).scalar_subquery()
+    stmt = db.update(RequestBranchAllocation).values(branch_id=func.coalesce(by_name, by_alias))
+    if request_ids is not None:
+        stmt = stmt.where(RequestBranchAllocation.request_id.in_(request_ids))
+    session.execute(stmt.execution_options(synchronize_session=False))
+
+
+def refresh_branch_allocations(request_ids=None, session=None):
+    """Rebuild request_branch_allocations for the given requests (every request if None).
+    Does not commit. Returns the number of allocations written."""
+    session = session or db.session
+    delete_stmt = db.delete(RequestBranchAllocation)
+    request_query = session.query(
+        PaymentRequest.request_id, PaymentRequest.branch_name,
+        PaymentRequest.branch_amounts, PaymentRequest.different_amounts_per_branch
+    ).filter(PaymentRequest.branch_name.isnot(None), PaymentRequest.branch_name != '')
+    if request_ids is not None:
+        request_ids = list(set(request_ids))
+        if not request_ids:
+            return 0
+        delete_stmt = delete_stmt.where(RequestBranchAllocation.request_id.in_(request_ids))
+        request_query = request_query.filter(PaymentRequest.request_id.in_(request_ids))
+    session.execute(delete_stmt)
+    
+    rows = []
+    for request_id, branch_name, branch_amounts, different_amounts in request_query:
+        rows.extend(branch_allocation_rows(request_id, branch_name, branch_amounts, different_amounts))
+    if rows:
+        session.execute(db.insert(RequestBranchAllocation), rows)
+        _resolve_branch_allocations(request_ids, session=session)
+    return len(rows)
+
+
+def rebuild_branch_allocations():
+    """Rebuild every request's branch allocations. Returns the number of rows."""
+    count = refresh_branch_allocations()
+    db.session.commit()
+    return count
+
+
+@db.event.listens_for(SASession, 'after_flush')
+def _track_branch_allocation_changes(session, flush_context):
+    """Collect requests whose branch allocations need rebuilding when this transaction commits"""
+    request_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, PaymentRequest):
+            if obj in session.new or obj in session.deleted:
+                request_ids.add(obj.request_id)
+            elif obj in session.dirty:
+                state = db.inspect(obj)
+                if any(state.attrs[field].history.has_changes() for field in _BRANCH_ALLOCATION_REQUEST_FIELDS):
+                    request_ids.add(obj.request_id)
+        elif isinstance(obj, (Branch, BranchAlias)):
+            # Renamed or deleted branches and aliases change which branch an allocation points at
+            session.info['branch_allocation_resolve'] = True
+    if request_ids:
+        session.info.setdefault('branch_allocation_request_ids', set()).update(request_ids)
+
+
+@db.event.listens_for(SASession, 'before_commit')
+def _refresh_changed_branch_allocations(session):
+    """Rebuild the collected requests' branch allocations in the transaction that changed them"""
+    session.flush()
+    request_ids = session.info.pop('branch_allocation_request_ids', None)
+    resolve = session.info.pop('branch_allocation_resolve', False)
+    if not request_ids and not resolve:
+        return
+    # Savepoint as in _refresh_changed_occurrences: keep the old allocations if the rebuild fails
+    savepoint = session.connection().begin_nested()
+    try:
+        if request_ids:
+            refresh_branch_allocations(request_ids, session=session)
+        if resolve:
+            _resolve_branch_allocations(session=session)
+        savepoint.commit()
+    except Exception as e:
+        savepoint.rollback()
+        # The daily refresh_branch_allocations job repairs anything missed here
+        app.logger.warning(f"Could not refresh branch allocations: {e}")
+
+
+@db.event.listens_for(SASession, 'after_rollback')
+def _discard_branch_allocation_changes(session):
+    session.info.pop('branch_allocation_request_ids', None)
+    session.info.pop('branch_allocation_resolve', None)
+
+
+def format_recurring_scheduled_dates(req, schedule_dates):
+    """Scheduled dates of a recurring request as newline-separated text, from its installment dates
+    (ordered by payment_order; empty for interval-based requests). Cheque requests get day counts."""
+    if not req or req.recurring != 'Recurring':
+        return ''
+    
+    date_objects = list(schedule_dates or [])  # Custom dates stored in RecurringPaymentSchedule
+    if not date_objects and req.recurring_interval:
+        # Interval-based recurring - the dates configured on the request (see RecurringRule.configured_dates)
+        rule = compile_rule(req.recurring_interval)
+        if rule is not None:
+            date_objects = rule.configured_dates(anchor=req.date)
     
     # If no dates found, return empty
-    if not dates:
+    if not date_objects:
         return ''
+    dates = [date_obj.strftime('%Y-%m-%d') for date_obj in date_objects]
     
     # Check if this is a Cheque + Recurring request
     if req.payment_method == 'Cheque' and req.recurring == 'Recurring':
@@ -2205,10 +2398,59 @@ def get_recurring_scheduled_dates(req):
         # Regular format: just return dates without day calculations
         return '\n'.join(dates)
 
+
+def preload_recurring_schedules(requests):
+    """Load the installments of many payment requests with one IN query, for the current request only:
+    fills each request's payment_schedules collection (used by the dashboard / report templates) and
+    the scheduled-date text read by get_recurring_scheduled_dates() and the get_recurring_dates filter."""
+    requests = [req for req in requests if isinstance(req, PaymentRequest) and req.request_id is not None]
+    if not requests:
+        return
+    schedules_by_request = {}
+    for schedule in RecurringPaymentSchedule.query.filter(
+        RecurringPaymentSchedule.request_id.in_({req.request_id for req in requests})
+    ).order_by(RecurringPaymentSchedule.request_id, RecurringPaymentSchedule.payment_order):
+        schedules_by_request.setdefault(schedule.request_id, []).append(schedule)
+    scheduled_dates = g.setdefault('recurring_scheduled_dates', {})
+    for req in requests:
+        schedules = schedules_by_request.get(req.request_id, [])
+        if 'payment_schedules' in db.inspect(req).unloaded:
+            set_committed_value(req, 'payment_schedules', schedules)
+        scheduled_dates[req.request_id] = format_recurring_scheduled_dates(req, [s.payment_date for s in schedules])
+
+
+@before_render_template.connect_via(app)
+def _preload_rendered_request_schedules(sender, template, context, **extra):
+    """Pages list their payment requests as `requests` (a list or a pagination); load their installments
+    in one query before the template walks them row by row"""
+    requests = context.get('requests')
+    if requests is None or isinstance(requests, PaymentRequest):
+        return
+    items = getattr(requests, 'items', requests)
+    if isinstance(items, (list, tuple)):
+        preload_recurring_schedules(items)
+
+
+def get_recurring_scheduled_dates(req):
+    """Get scheduled dates for a recurring payment request as a newline-separated string
+    For Cheque + Recurring requests, includes day calculations"""
+    if not req or req.recurring != 'Recurring':
+        return ''
+    if has_app_context():
+        preloaded = g.get('recurring_scheduled_dates', {}).get(req.request_id)
+        if preloaded is not None:
+            return preloaded
+    
+    # Check if it has custom dates stored in RecurringPaymentSchedule
+    schedule_dates = [payment_date for (payment_date,) in db.session.query(RecurringPaymentSchedule.payment_date).filter_by(
+        request_id=req.request_id
+    ).order_by(RecurringPaymentSchedule.payment_order)]
+    return format_recurring_scheduled_dates(req, schedule_dates)
+
 # Add filter for getting recurring scheduled dates (must be after function definition)
 @app.template_filter('get_recurring_dates')
 def get_recurring_dates_filter(req):
-    """Get scheduled dates for recurring payment request"""
+    """Get scheduled dates for recurring payment request (preload_recurring_schedules() batches a whole page)"""
     return get_recurring_scheduled_dates(req)
 
 def get_authorized_users_for_recurring_due(request):
@@ -2245,155 +2487,233 @@ def get_authorized_users_for_recurring_due(request):
     return list(authorized_user_ids)
 
 
+# Requestor roles that are not notified about their own recurring payments falling due
+# (finance roles already receive every reminder; management roles are not involved)
+RECURRING_DUE_NON_REQUESTOR_ROLES = ('Finance Admin', 'Finance Staff', 'GM', 'CEO', 'Operation Manager', 'IT Staff', 'Department Manager')
+
+
+def get_recurring_due_recipients(requests):
+    """Bulk get_authorized_users_for_recurring_due(): {request_id: [user_id, ...]} for (request, requestor role) pairs.
+    Finance users are loaded once and department managers once for all departments involved."""
+    finance_ids = {user_id for (user_id,) in db.session.query(User.user_id).filter(User.role.in_(['Finance Admin', 'Finance Staff']))}
+    departments = {req.department for req, _ in requests if req.department}
+    managers_by_department = {}
+    if departments:
+        for user_id, department in db.session.query(User.user_id, User.department).filter(
+            User.role == 'Department Manager', User.department.in_(departments)
+        ):
+            managers_by_department.setdefault(department, set()).add(user_id)
+    recipients = {}
+    for req, requestor_role in requests:
+        user_ids = finance_ids | managers_by_department.get(req.department, set())
+        # Project Staff and department staff are notified on their own requests
+        if requestor_role is not None and requestor_role not in RECURRING_DUE_NON_REQUESTOR_ROLES:
+            user_ids = user_ids | {req.user_id}
+        recipients[req.request_id] = list(user_ids)
+    return recipients
+
+
 def check_recurring_payments_due():
-    """Check for recurring payments due today and create notifications"""
+    """Check for recurring payments due today and create notifications.
+    One query finds every unpaid occurrence due today (no paid marker for today, no recurring_due
+    notification yet today); recipients are resolved in bulk and all notifications are written in
+    one transaction, so the cost does not grow with the number of recurring requests.
+    Returns the number of requests notified."""
     today = date.today()
-    
-    # Get all recurring payment requests with Payment Type "Recurring" and status in allowed list
-    recurring_requests = PaymentRequest.query.filter(
+    start_of_day = datetime.combine(today, datetime.min.time())
+    end_of_day = datetime.combine(today, datetime.max.time())
+    
+    paid_today = db.select(PaidNotification.id).where(
+        PaidNotification.request_id == PaymentOccurrence.request_id,
+        PaidNotification.paid_date == today
+    ).exists()
+    notified_today = db.select(Notification.notification_id).where(
+        Notification.request_id == PaymentOccurrence.request_id,
+        Notification.notification_type == 'recurring_due',
+        Notification.created_at >= start_of_day,
+        Notification.created_at <= end_of_day
+    ).exists()
+    due_rows = db.session.query(PaymentOccurrence, PaymentRequest, User.role).join(
+        PaymentRequest, PaymentRequest.request_id == PaymentOccurrence.request_id
+    ).outerjoin(
+        User, User.user_id == PaymentRequest.user_id
+    ).filter(
+        PaymentOccurrence.due_date == today,
+        PaymentOccurrence.paid == False,
         PaymentRequest.recurring == 'Recurring',  # Payment Type must be "Recurring"
-        PaymentRequest.status.in_([
-            'Pending Finance Approval',
-            'Proof Pending',
-            'Proof Sent',
-            'Proof Rejected',
-            'Completed',
-            'Recurring'
-        ]),
-        PaymentRequest.is_archived == False
-    ).all()
+        PaymentRequest.status.in_(CALENDAR_PENDING_STATUSES),
+        PaymentRequest.is_archived == False,
+        ~paid_today,
+        ~notified_today
+    ).order_by(PaymentOccurrence.request_id, PaymentOccurrence.id).all()
+    
+    # One reminder per request per day (the first installment due today if there are several)
+    due = {}
+    for occurrence, req, requestor_role in due_rows:
+        if req.request_id in due:
+            continue
+        if occurrence.schedule_id is None:
+            # Daily payments with a time of day are only due once that (local) time has passed
+            rule = compile_rule(req.recurring_interval)
+            if rule is not None and rule.time and datetime.now() < datetime.combine(today, datetime.min.time().replace(hour=rule.time[0], minute=rule.time[1])):
+                continue
+        due[req.request_id] = (occurrence, req, requestor_role)
+    if not due:
+        return 0
     
-    for request in recurring_requests:
-        # Check if this request has a custom payment schedule
-        payment_schedules = RecurringPaymentSchedule.query.filter_by(
-            request_id=request.request_id,
-            is_paid=False
-        ).order_by(RecurringPaymentSchedule.payment_order).all()
-        
-        if payment_schedules:
-            # Handle variable amount recurring payments
-            for schedule in payment_schedules:
-                if schedule.payment_date == today:
-                    # Check if payment was already marked as paid today
-                    paid_today = PaidNotification.query.filter_by(
-                        request_id=request.request_id,
-                        paid_date=today
-                    ).first()
-                    
-                    if paid_today:
-                        continue  # Skip this payment - already marked as paid today
-                    
-                    # Check if notification already exists for today
-                    start_of_day = datetime.combine(today, datetime.min.time())
-                    end_of_day = datetime.combine(today, datetime.max.time())
-                    
-                    existing_notification = Notification.query.filter_by(
-                        request_id=request.request_id,
-                        notification_type='recurring_due'
-                    ).filter(
-                        Notification.created_at >= start_of_day,
-                        Notification.created_at <= end_of_day
-                    ).first()
-                    
-                    if not existing_notification:
-                        # Get all authorized users for this request
-                        authorized_user_ids = get_authorized_users_for_recurring_due(request)
-                        
-                        # Create notifications for all authorized users
-                        for user_id in authorized_user_ids:
-                            create_notification(
-                                user_id=user_id,
-                                title="Recurring Payment Due",
-                                message=f'Recurring payment due today for {request.request_type} - {request.purpose} (Amount: {schedule.amount} OMR)',
-                                notification_type='recurring_due',
-                                request_id=request.request_id
-                            )
-                        
-                        # Log the action
-                        log_action(f"Recurring payment due notification created for request #{request.request_id} - Payment {schedule.payment_order} - Notified {len(authorized_user_ids)} users")
+    recipients = get_recurring_due_recipients([(req, requestor_role) for _, req, requestor_role in due.values()])
+    specs = []
+    for occurrence, req, _ in due.values():
+        if occurrence.schedule_id is not None:
+            message = f'Recurring payment due today for {req.request_type} - {req.purpose} (Amount: {occurrence.amount} OMR)'
         else:
-            # Handle traditional recurring payments (single amount)
-            if is_payment_due_today(request, today):
-                # Check if payment was already marked as paid today
-                paid_today = PaidNotification.query.filter_by(
-                    request_id=request.request_id,
-                    paid_date=today
-                ).first()
-                
-                if paid_today:
-                    continue  # Skip this payment - already marked as paid today
-                
-                # Check if notification already exists for today (more robust check)
-                start_of_day = datetime.combine(today, datetime.min.time())
-                end_of_day = datetime.combine(today, datetime.max.time())
-                
-                existing_notification = Notification.query.filter_by(
-                    request_id=request.request_id,
-                    notification_type='recurring_due'
-                ).filter(
-                    Notification.created_at >= start_of_day,
-                    Notification.created_at <= end_of_day
-                ).first()
-                
-                if not existing_notification:
-                    # Get all authorized users for this request
-                    authorized_user_ids = get_authorized_users_for_recurring_due(request)
-                    
-                    # Create notifications for all authorized users
-                    for user_id in authorized_user_ids:
-                        create_notification(
-                            user_id=user_id,
-                            title="Recurring Payment Due",
-                            message=f'Recurring payment due today for {request.request_type} - {request.purpose}',
-                            notification_type='recurring_due',
-                            request_id=request.request_id
-                        )
-                    
-                    # Log the action
-                    log_action(f"Recurring payment due notification created for request #{request.request_id} - Notified {len(authorized_user_ids)} users")
+            message = f'Recurring payment due today for {req.request_type} - {req.purpose}'
+        specs.extend(
+            notification_spec(user_id, "Recurring Payment Due", message, 'recurring_due', req.request_id)
+            for user_id in recipients[req.request_id]
+        )
+        # Audit entries go out with the notifications (only when triggered by a signed-in user)
+        if has_request_context() and current_user.is_authenticated:
+            db.session.add(AuditLog(
+                user_id=current_user.user_id,
+                action=f"Recurring payment due notification created for request #{req.request_id} - Notified {len(recipients[req.request_id])} users",
+                username_snapshot=current_user.username
+            ))
+    fan_out_notifications(specs)
+    return len(due)
+
+
+# --- Finance approval SLA ---
+
+# PaymentRequest fields that move its finance SLA deadline
+_FINANCE_SLA_FIELDS = ('finance_approval_start_time', 'finance_approval_end_time', 'is_urgent', 'request_type', 'department')
+# Statuses whose finance timer never counts as overdue (no longer in the finance approval stage)
+FINANCE_SLA_EXCLUDED_STATUSES = ('Completed', 'Recurring')
+
+
+def load_finance_sla_policies(connection=None):
+    """{(request_type, department): (urgent_hours, normal_hours)} from finance_sla_policies"""
+    rows = (connection or db.session).execute(db.select(
+        FinanceSlaPolicy.request_type, FinanceSlaPolicy.department, FinanceSlaPolicy.urgent_hours, FinanceSlaPolicy.normal_hours
+    )).all()
+    return {(row.request_type, row.department): (row.urgent_hours, row.normal_hours) for row in rows}
+
+
+def finance_sla_hours(request_type, department, is_urgent, policies):
+    """SLA in hours: the most specific policy (type + department, type, department, global), else the config defaults"""
+    for scope in ((request_type, department), (request_type, None), (None, department), (None, None)):
+        if scope in policies:
+            urgent_hours, normal_hours = policies[scope]
+            break
+    else:
+        urgent_hours, normal_hours = app.config['FINANCE_SLA_URGENT_HOURS'], app.config['FINANCE_SLA_NORMAL_HOURS']
+    return urgent_hours if is_urgent else normal_hours
 
 
-def get_overdue_requests_count():
-    """Get count of overdue finance approval requests"""
-    try:
-        current_time = datetime.utcnow()
-        
-        # Get ALL requests that have started finance approval timing but haven't ended
-        # Finance approval is still moving if finance_approval_start_time is set
-        # and finance_approval_end_time is None
-        # Exclude archived requests
-        pending_requests = PaymentRequest.query.filter(
-            PaymentRequest.finance_approval_start_time.isnot(None),
-            PaymentRequest.finance_approval_end_time.is_(None),  # Finance approval still moving
-            PaymentRequest.is_archived == False  # Exclude archived requests
-        ).all()
-        
-        overdue_count = 0
-        for request in pending_requests:
-            # EXCLUDE requests with status "Completed" or "Recurring"
-            # These statuses mean the request is no longer in finance approval stage
-            if request.status in ['Completed', 'Recurring']:
-                continue
-            
-            # Calculate time elapsed since finance approval started
-            time_elapsed = current_time - request.finance_approval_start_time
-            
-            # Determine alert thresholds based on urgency
-            if request.is_urgent:
-                # Urgent requests: 2 hours or more
-                alert_threshold = timedelta(hours=2)
-            else:
-                # Non-urgent requests: 24 hours or more (includes days)
-                alert_threshold = timedelta(hours=24)
-            
-            # Check if this request is overdue
-            # If time elapsed >= threshold, it MUST be counted
-            # This includes requests showing "days" since 1 day = 24 hours
-            if time_elapsed >= alert_threshold:
-                overdue_count += 1
-        
-        return overdue_count
-        
+def finance_sla_deadline(req, policies):
+    """When the request's running finance timer becomes overdue (None while no timer runs)"""
+    if req.finance_approval_start_time is None or req.finance_approval_end_time is not None:
+        return None
+    return req.finance_approval_start_time + timedelta(hours=finance_sla_hours(req.request_type, req.department, req.is_urgent, policies))
+
+
+def format_sla_threshold(threshold):
+    """'2 hours', '24 hours', '1.5 hours' for an SLA timedelta"""
+    hours = threshold.total_seconds() / 3600
+    return f"{hours:g} hour{'s' if hours != 1 else ''}"
+
+
+@db.event.listens_for(PaymentRequest, 'before_insert')
+@db.event.listens_for(PaymentRequest, 'before_update')
+def _stamp_finance_sla_deadline(mapper, connection, target):
+    """Keep finance_sla_deadline in step with the finance timer, urgency, request type and department"""
+    state = db.inspect(target)
+    if not any(state.attrs[field].history.has_changes() for field in _FINANCE_SLA_FIELDS):
+        return
+    if target.finance_approval_start_time is None or target.finance_approval_end_time is not None:
+        target.finance_sla_deadline = None
+    else:
+        target.finance_sla_deadline = finance_sla_deadline(target, load_finance_sla_policies(connection))
+    # A timer that starts or stops begins a new alert cycle; before the first alert, the next one is at the deadline
+    if state.attrs.finance_approval_start_time.history.has_changes() or state.attrs.finance_approval_end_time.history.has_changes():
+        target.finance_alert_count = 0
+        target.finance_last_alert_at = None
+    if not target.finance_alert_count:
+        target.finance_next_alert_at = target.finance_sla_deadline
+
+
+def refresh_finance_sla_deadlines():
+    """Re-stamp finance_sla_deadline on every running finance timer (after SLA policies change).
+    Does not commit. Returns the number of requests updated."""
+    policies = load_finance_sla_policies()
+    rows = db.session.query(
+        PaymentRequest.request_id, PaymentRequest.request_type, PaymentRequest.department, PaymentRequest.is_urgent,
+        PaymentRequest.finance_approval_start_time, PaymentRequest.finance_approval_end_time, PaymentRequest.updated_at,
+        PaymentRequest.finance_alert_count, PaymentRequest.finance_next_alert_at
+    ).filter(
+        PaymentRequest.finance_approval_start_time.isnot(None),
+        PaymentRequest.finance_approval_end_time.is_(None)
+    ).all()
+    if not rows:
+        return 0
+    updates = []
+    for row in rows:
+        deadline = finance_sla_deadline(row, policies)
+        # updated_at is passed through so re-stamping does not count as an edit of the request
+        updates.append({
+            'request_id': row.request_id,
+            'finance_sla_deadline': deadline,
+            'finance_next_alert_at': row.finance_next_alert_at if row.finance_alert_count else deadline,
+            'updated_at': row.updated_at
+        })
+    db.session.execute(db.update(PaymentRequest), updates)
+    return len(rows)
+
+
+def backfill_finance_sla_deadlines():
+    """Re-stamp the SLA deadlines (and next alert times) that migrations 019/020 filled in with the default
+    2 h / 24 h SLAs, using the configured SLAs and finance_sla_policies. Returns the number of running timers."""
+    count = refresh_finance_sla_deadlines()
+    # Already-alerted requests: next alert one repeat interval after the last one, as the alert job schedules it
+    policies = load_finance_sla_policies()
+    repeat_hours = app.config['FINANCE_ALERT_REPEAT_HOURS']
+    rows = db.session.query(
+        PaymentRequest.request_id, PaymentRequest.request_type, PaymentRequest.department, PaymentRequest.is_urgent,
+        PaymentRequest.finance_sla_deadline, PaymentRequest.finance_last_alert_at, PaymentRequest.updated_at
+    ).filter(
+        PaymentRequest.finance_sla_deadline.isnot(None),
+        PaymentRequest.finance_last_alert_at.isnot(None),
+        PaymentRequest.finance_alert_count > 0
+    ).all()
+    updates = []
+    for row in rows:
+        threshold = timedelta(hours=finance_sla_hours(row.request_type, row.department, row.is_urgent, policies))
+        repeat = timedelta(hours=repeat_hours) if repeat_hours > 0 else threshold
+        updates.append({
+            'request_id': row.request_id,
+            'finance_next_alert_at': max(row.finance_sla_deadline, row.finance_last_alert_at + repeat),
+            'updated_at': row.updated_at
+        })
+    if updates:
+        db.session.execute(db.update(PaymentRequest), updates)
+    db.session.commit()
+    return count
+
+
+def overdue_finance_requests_query(current_time=None):
+    """Requests whose running finance timer is past its SLA deadline: one range on (is_archived, finance_sla_deadline)"""
+    return PaymentRequest.query.filter(
+        PaymentRequest.finance_sla_deadline <= (current_time or datetime.utcnow()),
+        PaymentRequest.finance_approval_end_time.is_(None),  # Finance approval still moving
+        PaymentRequest.is_archived == False,  # Exclude archived requests
+        PaymentRequest.status.notin_(FINANCE_SLA_EXCLUDED_STATUSES)
+    )
+
+
+def get_overdue_requests_count():
+    """Get count of overdue finance approval requests"""
+    try:
+        return overdue_finance_requests_query().count()
     except Exception as e:
         print(f"Error getting overdue requests count: {e}")
         import traceback
@@ -2401,69 +2721,44 @@ def get_overdue_requests_count():
         return 0
 
 
-def get_overdue_requests():
-    """Get all overdue finance approval requests"""
+def get_overdue_requests(limit=None, offset=0):
+    """Get overdue finance approval requests, most overdue first (optionally one page of them)"""
     try:
         current_time = datetime.utcnow()
-        
-        # Get ALL requests that have started finance approval timing but haven't ended
-        # Finance approval is still moving if finance_approval_start_time is set
-        # and finance_approval_end_time is None
-        # Exclude archived requests
-        pending_requests = PaymentRequest.query.filter(
-            PaymentRequest.finance_approval_start_time.isnot(None),
-            PaymentRequest.finance_approval_end_time.is_(None),  # Finance approval still moving
-            PaymentRequest.is_archived == False  # Exclude archived requests
-        ).all()
+        query = overdue_finance_requests_query(current_time).options(db.joinedload(PaymentRequest.user)).order_by(
+            PaymentRequest.finance_approval_start_time, PaymentRequest.request_id
+        )
+        if limit is not None:
+            query = query.offset(offset).limit(limit)
         
         overdue_requests = []
-        for request in pending_requests:
-            # EXCLUDE requests with status "Completed" or "Recurring"
-            # These statuses mean the request is no longer in finance approval stage
-            if request.status in ['Completed', 'Recurring']:
-                continue
-            
+        for request in query.all():
             # Calculate time elapsed since finance approval started
             time_elapsed = current_time - request.finance_approval_start_time
             
-            # Determine alert thresholds based on urgency
-            if request.is_urgent:
-                # Urgent requests: 2 hours or more
-                alert_threshold = timedelta(hours=2)
-            else:
-                # Non-urgent requests: 24 hours or more (includes days)
-                alert_threshold = timedelta(hours=24)
-            
-            # Check if this request is overdue
-            # If time elapsed >= threshold, it MUST appear on overdue page
-            # This includes requests showing "days" since 1 day = 24 hours
-            if time_elapsed >= alert_threshold:
-                # Format time elapsed for display (show days, hours, and minutes)
-                total_seconds = int(time_elapsed.total_seconds())
-                days = total_seconds // 86400
-                hours = (total_seconds % 86400) // 3600
-                minutes = (total_seconds % 3600) // 60
-                
-                # Build time display string with appropriate units
-                time_parts = []
-                if days > 0:
-                    time_parts.append(f"{days} day{'s' if days != 1 else ''}")
-                if hours > 0:
-                    time_parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
-                if minutes > 0 or len(time_parts) == 0:  # Show minutes if no days/hours, or if there are minutes
-                    time_parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
-                
-                time_display = " and ".join(time_parts)
-                
-                overdue_requests.append({
-                    'request': request,
-                    'time_elapsed': time_elapsed,
-                    'time_display': time_display,
-                    'threshold': alert_threshold
-                })
-        
-        # Sort by time elapsed (most overdue first)
-        overdue_requests.sort(key=lambda x: x['time_elapsed'], reverse=True)
+            # Format time elapsed for display (show days, hours, and minutes)
+            total_seconds = int(time_elapsed.total_seconds())
+            days = total_seconds // 86400
+            hours = (total_seconds % 86400) // 3600
+            minutes = (total_seconds % 3600) // 60
+            
+            # Build time display string with appropriate units
+            time_parts = []
+            if days > 0:
+                time_parts.append(f"{days} day{'s' if days != 1 else ''}")
+            if hours > 0:
+                time_parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
+            if minutes > 0 or len(time_parts) == 0:  # Show minutes if no days/hours, or if there are minutes
+                time_parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
+            
+            time_display = " and ".join(time_parts)
+            
+            overdue_requests.append({
+                'request': request,
+                'time_elapsed': time_elapsed,
+                'time_display': time_display,
+                'threshold': request.finance_sla_deadline - request.finance_approval_start_time
+            })
         
         return overdue_requests
         
@@ -2474,240 +2769,116 @@ def get_overdue_requests():
         return []
 
 
+# Roles notified as well once a request has had FINANCE_ALERT_ESCALATE_AFTER timing alerts
+FINANCE_ALERT_ESCALATION_ROLES = ('GM',)
+
+
 def check_finance_approval_timing_alerts():
-    """Check for finance approval timing alerts and send notifications"""
-    try:
-        current_time = datetime.utcnow()
+    """Check for finance approval timing alerts and send notifications.
+    One indexed query finds the pending finance approval requests whose next alert time has passed;
+    Finance Admins are alerted (and the GM too once the escalation threshold is reached), all
+    notifications are inserted in one transaction and each request's alert state moves on.
+    Errors propagate so run_scheduled_job records the run as failed. Returns the number of requests alerted."""
+    current_time = datetime.utcnow()
+    due_requests = PaymentRequest.query.filter(
+        PaymentRequest.is_archived == False,  # Exclude archived requests
+        PaymentRequest.status == 'Pending Finance Approval',
+        PaymentRequest.finance_next_alert_at <= current_time,
+        PaymentRequest.finance_approval_end_time.is_(None)  # Not yet completed
+    ).all()
+    if not due_requests:
+        return 0
+    
+    finance_admin_ids = [user_id for (user_id,) in db.session.query(User.user_id).filter(User.role == 'Finance Admin')]
+    escalate_after = app.config['FINANCE_ALERT_ESCALATE_AFTER']
+    escalation_ids = []
+    if escalate_after and any(req.finance_alert_count >= escalate_after for req in due_requests):
+        escalation_ids = [user_id for (user_id,) in db.session.query(User.user_id).filter(User.role.in_(FINANCE_ALERT_ESCALATION_ROLES))]
+    repeat_hours = app.config['FINANCE_ALERT_REPEAT_HOURS']
+    
+    specs = []
+    state_updates = []
+    for request in due_requests:
+        # Calculate time elapsed since finance approval started
+        time_elapsed = current_time - request.finance_approval_start_time
+        threshold = request.finance_sla_deadline - request.finance_approval_start_time
+        
+        # Format time elapsed for display
+        hours = int(time_elapsed.total_seconds() // 3600)
+        minutes = int((time_elapsed.total_seconds() % 3600) // 60)
+        
+        if hours > 0:
+            time_display = f"{hours} hour{'s' if hours != 1 else ''} and {minutes} minute{'s' if minutes != 1 else ''}"
+        else:
+            time_display = f"{minutes} minute{'s' if minutes != 1 else ''}"
         
-        # Get all requests that are pending finance approval and have started timing
-        # Exclude archived requests
-        pending_requests = PaymentRequest.query.filter(
-            PaymentRequest.status == 'Pending Finance Approval',
-            PaymentRequest.finance_approval_start_time.isnot(None),
-            PaymentRequest.finance_approval_end_time.is_(None),  # Not yet completed
-            PaymentRequest.is_archived == False  # Exclude archived requests
-        ).all()
+        # Create alert message
+        urgency_text = "URGENT" if request.is_urgent else "NON-URGENT"
+        threshold_text = format_sla_threshold(threshold)
         
-        for request in pending_requests:
-            # Calculate time elapsed since finance approval started
-            time_elapsed = current_time - request.finance_approval_start_time
-            
-            # Determine alert thresholds based on urgency
-            if request.is_urgent:
-                # Urgent requests: 2 hours
-                alert_threshold = timedelta(hours=2)
-                recurring_threshold = timedelta(hours=2)
-            else:
-                # Non-urgent requests: 24 hours
-                alert_threshold = timedelta(hours=24)
-                recurring_threshold = timedelta(hours=24)
-            
-            # Check if we should send an alert
-            should_send_alert = False
-            alert_type = None
-            
-            if time_elapsed >= alert_threshold:
-                # Check if this is the first alert or a recurring alert
-                # Look for existing timing alerts for this request
-                existing_alerts = Notification.query.filter(
-                    Notification.request_id == request.request_id,
-                    Notification.notification_type.in_(['finance_approval_timing_alert', 'finance_approval_timing_recurring'])
-                ).order_by(Notification.created_at.desc()).all()
-                
-                if not existing_alerts:
-                    # First alert
-                    should_send_alert = True
-                    alert_type = 'finance_approval_timing_alert'
-                else:
-                    # Check if enough time has passed for a recurring alert
-                    last_alert = existing_alerts[0]
-                    time_since_last_alert = current_time - last_alert.created_at
-                    
-                    if time_since_last_alert >= recurring_threshold:
-                        should_send_alert = True
-                        alert_type = 'finance_approval_timing_recurring'
-            
-            if should_send_alert:
-                # Format time elapsed for display
-                hours = int(time_elapsed.total_seconds() // 3600)
-                minutes = int((time_elapsed.total_seconds() % 3600) // 60)
-                
-                if hours > 0:
-                    time_display = f"{hours} hour{'s' if hours != 1 else ''} and {minutes} minute{'s' if minutes != 1 else ''}"
-                else:
-                    time_display = f"{minutes} minute{'s' if minutes != 1 else ''}"
-                
-                # Create alert message
-                urgency_text = "URGENT" if request.is_urgent else "NON-URGENT"
-                threshold_text = "2 hours" if request.is_urgent else "24 hours"
-                
-                if alert_type == 'finance_approval_timing_alert':
-                    title = f"Finance Approval Overdue - {urgency_text} Request"
-                    message = f"Payment request #{request.request_id} has been pending finance approval for {time_display} (limit: {threshold_text}). Please take action immediately."
-                else:  # finance_approval_timing_recurring
-                    title = f"Finance Approval Still Overdue - {urgency_text} Request"
-                    message = f"Payment request #{request.request_id} is still pending finance approval after {time_display} (limit: {threshold_text}). This is a recurring alert - please take action immediately."
-                
-                # Send notification to all Finance Admin users
-                finance_admin_users = User.query.filter_by(role='Finance Admin').all()
-                for user in finance_admin_users:
-                    create_notification(
-                        user_id=user.user_id,
-                        title=title,
-                        message=message,
-                        notification_type=alert_type,
-                        request_id=request.request_id
-                    )
-                
-                # Log the action
-                log_action(f"Finance approval timing alert sent for request #{request.request_id} - {time_display} elapsed")
-                
-                print(f"Sent {alert_type} for request #{request.request_id} - {time_display} elapsed")
+        if request.finance_alert_count == 0:
+            alert_type = 'finance_approval_timing_alert'
+            title = f"Finance Approval Overdue - {urgency_text} Request"
+            message = f"Payment request #{request.request_id} has been pending finance approval for {time_display} (limit: {threshold_text}). Please take action immediately."
+        else:
+            alert_type = 'finance_approval_timing_recurring'
+            title = f"Finance Approval Still Overdue - {urgency_text} Request"
+            message = f"Payment request #{request.request_id} is still pending finance approval after {time_display} (limit: {threshold_text}). This is a recurring alert - please take action immediately."
+        
+        # Send notification to all Finance Admin users
+        specs.extend(notification_spec(user_id, title, message, alert_type, request.request_id) for user_id in finance_admin_ids)
+        
+        # Escalate once Finance has been alerted escalate_after times
+        escalated = bool(escalate_after) and request.finance_alert_count >= escalate_after
+        if escalated:
+            escalation_message = (f"Payment request #{request.request_id} has been pending finance approval for {time_display} "
+                                  f"(limit: {threshold_text}) after {request.finance_alert_count} alerts to Finance.")
+            specs.extend(
+                notification_spec(user_id, f"Finance Approval Escalated - {urgency_text} Request", escalation_message,
+                                  'finance_approval_escalation', request.request_id)
+                for user_id in escalation_ids
+            )
         
-        print(f"Checked {len(pending_requests)} pending finance approval requests for timing alerts")
+        # Alert again after the repeat interval (default: one SLA period)
+        repeat = timedelta(hours=repeat_hours) if repeat_hours > 0 else threshold
+        state_updates.append({
+            'request_id': request.request_id,
+            'finance_alert_count': request.finance_alert_count + 1,
+            'finance_last_alert_at': current_time,
+            'finance_next_alert_at': current_time + repeat,
+            'updated_at': request.updated_at  # alert bookkeeping is not an edit of the request
+        })
         
-    except Exception as e:
-        print(f"Error checking finance approval timing alerts: {e}")
-
-
-def background_scheduler():
-    """Background scheduler that runs timing checks every hour"""
-    while True:
-        try:
-            with app.app_context():
-                check_finance_approval_timing_alerts()
-                check_recurring_payments_due()
-        except Exception as e:
-            print(f"Error in background scheduler: {e}")
+        # Log the action (only when triggered by a signed-in user)
+        if has_request_context() and current_user.is_authenticated:
+            db.session.add(AuditLog(
+                user_id=current_user.user_id,
+                action=f"Finance approval timing alert sent for request #{request.request_id} - {time_display} elapsed"
+                       + (" (escalated)" if escalated else ""),
+                username_snapshot=current_user.username
+            ))
         
-        # Sleep for 1 hour (3600 seconds)
-        time.sleep(3600)
+        print(f"Sent {alert_type} for request #{request.request_id} - {time_display} elapsed{' (escalated)' if escalated else ''}")
+    
+    # Alert state and notifications are committed together
+    db.session.execute(db.update(PaymentRequest), state_updates)
+    if not fan_out_notifications(specs):
+        db.session.commit()
+    
+    print(f"Sent finance approval timing alerts for {len(due_requests)} request(s)")
+    return len(due_requests)
 
 
 def is_payment_due_today(request, today):
     """Check if a recurring payment is due today based on its configuration"""
-    if not request.recurring_interval:
+    rule = compile_rule(request.recurring_interval)
+    if rule is None or rule.frequency == 'custom' or not rule.is_due(today, anchor=request.date):
         return False
-    
-    try:
-        # Parse the recurring interval configuration
-        parts = request.recurring_interval.split(':')
-        frequency = parts[0]
-        interval = int(parts[1])
-        
-        if frequency == 'daily':
-            # Daily payments - check if it's been the right number of days AND time has passed
-            days_since_created = (today - request.date).days
-            
-            # Parse the time from the recurring interval
-            time_parts = request.recurring_interval.split(':')
-            if len(time_parts) >= 5 and time_parts[2] == 'time':
-                try:
-                    scheduled_hour = int(time_parts[3])
-                    scheduled_minute = int(time_parts[4])
-                    
-                    # Use local time instead of UTC
-                    from datetime import datetime
-                    current_time = datetime.now()
-                    scheduled_time = datetime.combine(today, datetime.min.time().replace(hour=scheduled_hour, minute=scheduled_minute))
-                    
-                    
-                    # Check if it's the right day and time has passed
-                    if interval == 1:
-                        # Every day - due if it's the same day or later AND time has passed
-                        if days_since_created >= 0:
-                            return current_time >= scheduled_time
-                    else:
-                        # Every X days - due if it's been X days since creation AND time has passed
-                        if days_since_created > 0 and days_since_created % interval == 0:
-                            return current_time >= scheduled_time
-                except (ValueError, IndexError):
-                    # If time parsing fails, fall back to day-only logic
-                    pass
-            
-            # Fallback to day-only logic if time parsing fails
-            if interval == 1:
-                return days_since_created >= 0
-            else:
-                return days_since_created > 0 and days_since_created % interval == 0
-            
-        elif frequency == 'weekly':
-            # Weekly payments - check if it's the right day of week
-            if len(parts) > 2 and parts[2] == 'days':
-                selected_days = parts[3].split(',')
-                weekday_names = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-                today_weekday = weekday_names[today.weekday()]
-                return today_weekday in selected_days
-            else:
-                # Default to same day of week as created
-                return today.weekday() == request.date.weekday()
-                
-        elif frequency == 'monthly':
-            # Monthly payments - check if it's the right day of month and enough months have passed
-            if len(parts) > 2 and parts[2] == 'days':
-                selected_days = [int(d) for d in parts[3].split(',')]
-                if today.day in selected_days:
-                    # Check if enough months have passed since creation
-                    months_since_created = (today.year - request.date.year) * 12 + (today.month - request.date.month)
-                    # Always require at least 1 month to pass (never due on creation day)
-                    return months_since_created > 0 and months_since_created % interval == 0
-            else:
-                # Default to same day of month as created
-                if today.day == request.date.day:
-                    months_since_created = (today.year - request.date.year) * 12 + (today.month - request.date.month)
-                    # Always require at least 1 month to pass (never due on creation day)
-                    return months_since_created > 0 and months_since_created % interval == 0
-            return False
-                
-        elif frequency == 'quarterly':
-            # Quarterly payments - check if it's the right month and day
-            if len(parts) > 2 and parts[2] == 'months':
-                # Convert month names to numbers
-                month_names = ['January', 'February', 'March', 'April', 'May', 'June',
-                             'July', 'August', 'September', 'October', 'November', 'December']
-                selected_month_names = [m.strip() for m in parts[3].split(',')]
-                selected_months = [month_names.index(m) + 1 for m in selected_month_names if m in month_names]
-                
-                if today.month in selected_months:
-                    if len(parts) > 4 and parts[4] == 'days':
-                        selected_days = [int(d) for d in parts[5].split(',')]
-                        if today.day in selected_days:
-                            # Check if enough quarters have passed
-                            months_since_created = (today.year - request.date.year) * 12 + (today.month - request.date.month)
-                            return months_since_created > 0 and months_since_created % (interval * 3) == 0
-                    else:
-                        if today.day == request.date.day:
-                            months_since_created = (today.year - request.date.year) * 12 + (today.month - request.date.month)
-                            return months_since_created > 0 and months_since_created % (interval * 3) == 0
-            return False
-            
-        elif frequency == 'yearly':
-            # Yearly payments - check if it's the right month and day
-            if len(parts) > 2 and parts[2] == 'months':
-                # Convert month names to numbers
-                month_names = ['January', 'February', 'March', 'April', 'May', 'June',
-                             'July', 'August', 'September', 'October', 'November', 'December']
-                selected_month_names = [m.strip() for m in parts[3].split(',')]
-                selected_months = [month_names.index(m) + 1 for m in selected_month_names if m in month_names]
-                
-                if today.month in selected_months:
-                    if len(parts) > 4 and parts[4] == 'days':
-                        selected_days = [int(d) for d in parts[5].split(',')]
-                        if today.day in selected_days:
-                            # Check if enough years have passed
-                            years_since_created = today.year - request.date.year
-                            return years_since_created > 0 and years_since_created % interval == 0
-                    else:
-                        if today.day == request.date.day:
-                            years_since_created = today.year - request.date.year
-                            return years_since_created > 0 and years_since_created % interval == 0
-            return False
-            
-    except (ValueError, IndexError, AttributeError):
-        # If parsing fails, don't create notification
-        return False
-    
-    return False
+    if rule.time:
+        # Daily payments with a time of day are only due once that (local) time has passed
+        scheduled_time = datetime.combine(today, datetime.min.time().replace(hour=rule.time[0], minute=rule.time[1]))
+        return datetime.now() >= scheduled_time
+    return True
 
 
 def calculate_finance_approval_duration(request):
@@ -2721,30 +2892,27 @@ def calculate_finance_approval_duration(request):
         return True
     return False
 
-def check_recurring_payment_completion(request_id):
-    """Check if all installments for a recurring payment are paid and mark as completed"""
+def check_recurring_payment_completion(request_id, emit=True):
+    """Check if all installments for a recurring payment are paid and mark as completed.
+    emit=False skips the request_updated event (bulk callers emit one combined update)."""
     try:
         # Get the payment request
         req = PaymentRequest.query.get(request_id)
         if not req or req.status != 'Recurring' or req.recurring != 'Recurring':
             return False
         
-        # Get all installments for this request
-        installments = RecurringPaymentSchedule.query.filter_by(request_id=request_id).all()
+        # Installment totals for this request
+        ledger = get_installment_ledger(request_id)
         
-        if not installments:
+        if not ledger or not ledger.installment_count:
             return False
         
         # Check if all installments are paid
-        all_paid = all(installment.is_paid for installment in installments)
+        all_paid = ledger.paid_count == ledger.installment_count
         
         if all_paid:
-            # Calculate total paid amount
-            total_paid = sum(float(installment.amount) for installment in installments)
-            total_requested = float(req.amount)
-            
             # Check if there's no remaining amount (allowing for small floating point differences)
-            remaining_amount = total_requested - total_paid
+            remaining_amount = float(ledger.remaining_amount)
             if abs(remaining_amount) < 0.001:  # Less than 0.001 OMR difference
                 # Mark the request as completed
                 req.status = 'Completed'
@@ -2791,12 +2959,13 @@ def check_recurring_payment_completion(request_id):
                 log_action(f"Recurring payment request #{request_id} automatically marked as completed - all installments paid")
                 
                 # Emit real-time update
-                socketio.emit('request_updated', {
-                    'request_id': request_id,
-                    'status': 'Completed',
-                    'recurring': True,
-                    'completed': True
-                })
+                if emit:
+                    socketio.emit('request_updated', {
+                        'request_id': request_id,
+                        'status': 'Completed',
+                        'recurring': True,
+                        'completed': True
+                    })
                 
                 return True
         
@@ -2919,7 +3088,7 @@ def get_notifications_for_user(user, limit=5, page=None, per_page=None):
             ).order_by(Notification.created_at.desc())
 
     elif user.role in ['GM', 'CEO']:
-        # GM: New submissions from ALL requests (all roles/departments) + updates on their own requests + system-wide + temporary manager assignments + item requests
+        # GM: New submissions from ALL requests (all roles/departments) + updates on their own requests + system-wide + finance approval escalations + temporary manager assignments + item requests
         query = Notification.query.filter(
             db.and_(
                 Notification.user_id == user.user_id,
@@ -2934,7 +3103,7 @@ def get_notifications_for_user(user, limit=5, page=None, per_page=None):
                     ]),
                     Notification.notification_type.in_([
                         'system_maintenance', 'system_update', 'security_alert', 'system_error',
-                        'admin_announcement'
+                        'admin_announcement', 'finance_approval_escalation'
                     ]),
                     Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
                 )
@@ -3159,190 +3328,172 @@ def get_notifications_for_user(user, limit=5, page=None, per_page=None):
         return query.limit(limit).all()
     return query.all()
 
-def get_unread_count_for_user(user):
-    """Get unread notification count for a user based on their role per RBAC"""
+def _unread_notification_filter(user):
+    """Filter for the notifications that count as unread for a user, based on their role per RBAC"""
     
     if user.role == 'Project Staff':
         # Project Staff: Updates on their own requests + recurring payment due on their own requests only
-        return Notification.query.filter(
-            db.and_(
-                Notification.user_id == user.user_id,
-                Notification.is_read == False,
-                db.or_(
-                    Notification.notification_type == 'recurring_due',
-                    Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold'])
-                )
+        return db.and_(
+            Notification.user_id == user.user_id,
+            Notification.is_read == False,
+            db.or_(
+                Notification.notification_type == 'recurring_due',
+                Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold'])
             )
-        ).count()
+        )
     
     elif user.role in ['Finance Staff', 'Finance Admin']:
         # Finance roles: New submissions when requests reach Pending Finance Approval + proof uploaded + recurring payment due + system-wide
         # Finance Staff additionally get updates on their own requests
         if user.role == 'Finance Staff':
-            return Notification.query.filter(
-                db.and_(
-                    Notification.user_id == user.user_id,
-                    Notification.is_read == False,
-                    db.or_(
-                        Notification.notification_type.in_(['ready_for_finance_review', 'proof_uploaded', 'recurring_due', 'installment_edited', 'finance_approval_timing_alert', 'finance_approval_timing_recurring', 'system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
-                        Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold'])
-                    )
+            return db.and_(
+                Notification.user_id == user.user_id,
+                Notification.is_read == False,
+                db.or_(
+                    Notification.notification_type.in_(['ready_for_finance_review', 'proof_uploaded', 'recurring_due', 'installment_edited', 'finance_approval_timing_alert', 'finance_approval_timing_recurring', 'system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
+                    Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold'])
                 )
-            ).count()
+            )
         elif user.name == 'Abdalaziz Al-Brashdi':
             # Abdalaziz gets finance notifications + new_submission from GM/Operation Manager/Finance Staff + updates on Finance Staff, GM, and Operation Manager requests
             # Also gets item request notifications for Finance department (as manager of Finance department)
-            return Notification.query.filter(
-                db.and_(
-                    Notification.user_id == user.user_id,
-                    Notification.is_read == False,
-                    db.or_(
-                        Notification.notification_type.in_(['ready_for_finance_review', 'proof_uploaded', 'recurring_due', 'installment_edited', 'finance_approval_timing_alert', 'finance_approval_timing_recurring', 'system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
-                        Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold']),
-                        # new_submission only for GM, Operation Manager, Finance Staff, or CEO (his assigned managers)
-                        db.and_(
-                            Notification.notification_type == 'new_submission',
-                            Notification.request_id.isnot(None),
-                            db.exists().where(
-                                db.and_(
-                                    PaymentRequest.request_id == Notification.request_id,
-                                    PaymentRequest.user_id == User.user_id,
-                                    User.role.in_(['GM', 'CEO', 'Operation Manager', 'Finance Staff'])
-                                )
+            return db.and_(
+                Notification.user_id == user.user_id,
+                Notification.is_read == False,
+                db.or_(
+                    Notification.notification_type.in_(['ready_for_finance_review', 'proof_uploaded', 'recurring_due', 'installment_edited', 'finance_approval_timing_alert', 'finance_approval_timing_recurring', 'system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
+                    Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold']),
+                    # new_submission only for GM, Operation Manager, Finance Staff, or CEO (his assigned managers)
+                    db.and_(
+                        Notification.notification_type == 'new_submission',
+                        Notification.request_id.isnot(None),
+                        db.exists().where(
+                            db.and_(
+                                PaymentRequest.request_id == Notification.request_id,
+                                PaymentRequest.user_id == User.user_id,
+                                User.role.in_(['GM', 'CEO', 'Operation Manager', 'Finance Staff'])
                             )
-                        ),
-                        # Item request notifications for Finance department (Abdalaziz is manager of Finance department)
-                        db.and_(
-                            Notification.notification_type.in_([
-                                'item_request_submission', 'item_request_assigned', 'item_request_updated',
-                                'request_approved', 'request_rejected', 'request_pending_approval',
-                                'request_on_hold', 'request_returned'
-                            ]),
-                            Notification.item_request_id.isnot(None),
-                            db.exists().where(
-                                db.and_(
-                                    ProcurementItemRequest.id == Notification.item_request_id,
-                                    ProcurementItemRequest.department == 'Finance'
-                                )
+                        )
+                    ),
+                    # Item request notifications for Finance department (Abdalaziz is manager of Finance department)
+                    db.and_(
+                        Notification.notification_type.in_([
+                            'item_request_submission', 'item_request_assigned', 'item_request_updated',
+                            'request_approved', 'request_rejected', 'request_pending_approval',
+                            'request_on_hold', 'request_returned'
+                        ]),
+                        Notification.item_request_id.isnot(None),
+                        db.exists().where(
+                            db.and_(
+                                ProcurementItemRequest.id == Notification.item_request_id,
+                                ProcurementItemRequest.department == 'Finance'
                             )
                         )
                     )
                 )
-            ).count()
+            )
         else:  # Other Finance Admin
-            return Notification.query.filter(
-                db.and_(
-                    Notification.user_id == user.user_id,
-                    Notification.is_read == False,
-                    db.or_(
-                        Notification.notification_type.in_(['ready_for_finance_review', 'proof_uploaded', 'recurring_due', 'installment_edited', 'finance_approval_timing_alert', 'finance_approval_timing_recurring', 'system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement', 'request_on_hold']),
-                        Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold'])
-                    )
-                )
-            ).count()
-    
-    elif user.role in ['GM', 'CEO']:
-        # GM: New submissions from ALL requests (all roles/departments) + updates on their own requests + system-wide + item requests
-        return Notification.query.filter(
-            db.and_(
+            return db.and_(
                 Notification.user_id == user.user_id,
                 Notification.is_read == False,
                 db.or_(
-                    Notification.notification_type == 'item_request_submission',
-                    Notification.notification_type == 'new_submission',
-                    Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'finance_note_added', 'one_time_payment_scheduled', 'request_returned', 'request_on_hold', 'item_request_updated', 'item_request_assigned']),
-                    Notification.notification_type.in_(['system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
-                    Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
+                    Notification.notification_type.in_(['ready_for_finance_review', 'proof_uploaded', 'recurring_due', 'installment_edited', 'finance_approval_timing_alert', 'finance_approval_timing_recurring', 'system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement', 'request_on_hold']),
+                    Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold'])
                 )
             )
-        ).count()
+    
+    elif user.role in ['GM', 'CEO']:
+        # GM: New submissions from ALL requests (all roles/departments) + updates on their own requests + system-wide + finance approval escalations + item requests
+        return db.and_(
+            Notification.user_id == user.user_id,
+            Notification.is_read == False,
+            db.or_(
+                Notification.notification_type == 'item_request_submission',
+                Notification.notification_type == 'new_submission',
+                Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'finance_note_added', 'one_time_payment_scheduled', 'request_returned', 'request_on_hold', 'item_request_updated', 'item_request_assigned']),
+                Notification.notification_type.in_(['system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement', 'finance_approval_escalation']),
+                Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
+            )
+        )
     
     elif user.role == 'Operation Manager':
         # Operation Manager: New submissions from ALL requests (all roles/departments) + updates on their own requests + system-wide + item requests
-        return Notification.query.filter(
-            db.and_(
-                Notification.user_id == user.user_id,
-                Notification.is_read == False,
-                db.or_(
-                    Notification.notification_type == 'item_request_submission',
-                    Notification.notification_type == 'new_submission',
-                    Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold', 'item_request_updated', 'item_request_assigned']),
-                    Notification.notification_type.in_(['system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
-                    Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
-                )
+        return db.and_(
+            Notification.user_id == user.user_id,
+            Notification.is_read == False,
+            db.or_(
+                Notification.notification_type == 'item_request_submission',
+                Notification.notification_type == 'new_submission',
+                Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'request_returned', 'request_on_hold', 'item_request_updated', 'item_request_assigned']),
+                Notification.notification_type.in_(['system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
+                Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
             )
-        ).count()
+        )
     
     elif user.role == 'Department Manager' and user.department == 'IT':
         # IT Department Manager: New submissions from IT Staff only + updates on their own requests + system-wide + user management + temporary manager assignments + item requests
-        return Notification.query.filter(
-            db.and_(
-                Notification.user_id == user.user_id,
-                Notification.is_read == False,
-                db.or_(
-                    # Item request submissions (for procurement item requests)
-                    Notification.notification_type == 'item_request_submission',
-                    # new_submission only if it's from IT Staff (join with PaymentRequest to check)
-                    db.and_(
-                        Notification.notification_type == 'new_submission',
-                        Notification.request_id.isnot(None),
-                        db.or_(
-                            # Request created by IT Staff (check user role)
-                            db.exists().where(
-                                db.and_(
-                                    PaymentRequest.request_id == Notification.request_id,
-                                    PaymentRequest.department == 'IT',
-                                    User.user_id == PaymentRequest.user_id,
-                                    User.role == 'IT Staff'
-                                )
-                            ),
-                            # Or request from IT department (fallback for existing notifications)
-                            Notification.message.contains('IT')
-                        )
-                    ),
-                    Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'user_created', 'user_updated', 'user_deleted', 'finance_note_added', 'request_archived', 'request_restored', 'request_permanently_deleted', 'one_time_payment_scheduled', 'request_returned', 'request_on_hold', 'item_request_updated']),
-                    Notification.notification_type.in_(['system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
-                    Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
-                )
+        return db.and_(
+            Notification.user_id == user.user_id,
+            Notification.is_read == False,
+            db.or_(
+                # Item request submissions (for procurement item requests)
+                Notification.notification_type == 'item_request_submission',
+                # new_submission only if it's from IT Staff (join with PaymentRequest to check)
+                db.and_(
+                    Notification.notification_type == 'new_submission',
+                    Notification.request_id.isnot(None),
+                    db.or_(
+                        # Request created by IT Staff (check user role)
+                        db.exists().where(
+                            db.and_(
+                                PaymentRequest.request_id == Notification.request_id,
+                                PaymentRequest.department == 'IT',
+                                User.user_id == PaymentRequest.user_id,
+                                User.role == 'IT Staff'
+                            )
+                        ),
+                        # Or request from IT department (fallback for existing notifications)
+                        Notification.message.contains('IT')
+                    )
+                ),
+                Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'user_created', 'user_updated', 'user_deleted', 'finance_note_added', 'request_archived', 'request_restored', 'request_permanently_deleted', 'one_time_payment_scheduled', 'request_returned', 'request_on_hold', 'item_request_updated']),
+                Notification.notification_type.in_(['system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
+                Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
             )
-        ).count()
+        )
     
     elif user.role == 'IT Staff':
         # IT Staff: Updates on their own requests + system-wide + user management + request archives + item request submissions
-        return Notification.query.filter(
-            db.and_(
-                Notification.user_id == user.user_id,
-                Notification.is_read == False,
-                db.or_(
-                    # Item request submissions (for procurement item requests)
-                    Notification.notification_type == 'item_request_submission',
-                    Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'user_created', 'user_updated', 'user_deleted', 'finance_note_added', 'request_archived', 'request_restored', 'request_permanently_deleted', 'one_time_payment_scheduled', 'request_returned', 'request_on_hold', 'item_request_updated']),
-                    Notification.notification_type.in_(['system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
-                    Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
-                )
+        return db.and_(
+            Notification.user_id == user.user_id,
+            Notification.is_read == False,
+            db.or_(
+                # Item request submissions (for procurement item requests)
+                Notification.notification_type == 'item_request_submission',
+                Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'status_changed', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'user_created', 'user_updated', 'user_deleted', 'finance_note_added', 'request_archived', 'request_restored', 'request_permanently_deleted', 'one_time_payment_scheduled', 'request_returned', 'request_on_hold', 'item_request_updated']),
+                Notification.notification_type.in_(['system_maintenance', 'system_update', 'security_alert', 'system_error', 'admin_announcement']),
+                Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
             )
-        ).count()
+        )
     
     elif user.role == 'Department Manager':
         # Other Department Managers: New submissions from their own department staff only + recurring payment due for their department + updates on their own requests + item requests
-        return Notification.query.filter(
-            db.and_(
-                Notification.user_id == user.user_id,
-                Notification.is_read == False,
-                db.or_(
-                    Notification.notification_type == 'item_request_submission',
-                    Notification.notification_type == 'new_submission',  # Simplified - same as get_notifications_for_user
-                    Notification.notification_type == 'recurring_due',
-                    Notification.notification_type.in_([
-                        'request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected',
-                        'status_changed', 'proof_required', 'recurring_approved', 'request_completed',
-                        'installment_paid', 'one_time_payment_scheduled', 'item_request_assigned', 'item_request_updated',
-                        'request_returned', 'request_on_hold', 'request_pending_approval'
-                    ]),
-                    Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
-                )
+        return db.and_(
+            Notification.user_id == user.user_id,
+            Notification.is_read == False,
+            db.or_(
+                Notification.notification_type == 'item_request_submission',
+                Notification.notification_type == 'new_submission',  # Simplified - same as get_notifications_for_user
+                Notification.notification_type == 'recurring_due',
+                Notification.notification_type.in_([
+                    'request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected',
+                    'status_changed', 'proof_required', 'recurring_approved', 'request_completed',
+                    'installment_paid', 'one_time_payment_scheduled', 'item_request_assigned', 'item_request_updated',
+                    'request_returned', 'request_on_hold', 'request_pending_approval'
+                ]),
+                Notification.notification_type.in_(['temporary_manager_assignment', 'temporary_manager_unassigned'])
             )
-        ).count()
+        )
     
     else:
         # Department Staff: Updates on their own requests only + recurring payment due for their own requests + item request assignments
@@ -3363,44 +3514,495 @@ def get_unread_count_for_user(user):
         
         if is_temp_manager_for_items:
             # Temporary managers for item requests should see all item request notifications
-            return Notification.query.filter(
-                db.and_(
-                    Notification.user_id == user.user_id,
-                    Notification.is_read == False,
-                    Notification.notification_type.in_([
-                        'item_request_submission', 'item_request_assigned', 'item_request_updated',
-                        'request_approved', 'request_rejected', 'request_pending_approval',
-                        'request_on_hold', 'request_returned',
-                        'request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected',
-                        'status_changed', 'recurring_due', 'proof_required', 'recurring_approved',
-                        'request_completed', 'installment_paid', 'finance_note_added', 'one_time_payment_scheduled',
-                        'temporary_manager_assignment', 'temporary_manager_unassigned',
-                        'new_submission'
-                    ])
-                )
-            ).count()
+            return db.and_(
+                Notification.user_id == user.user_id,
+                Notification.is_read == False,
+                Notification.notification_type.in_([
+                    'item_request_submission', 'item_request_assigned', 'item_request_updated',
+                    'request_approved', 'request_rejected', 'request_pending_approval',
+                    'request_on_hold', 'request_returned',
+                    'request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected',
+                    'status_changed', 'recurring_due', 'proof_required', 'recurring_approved',
+                    'request_completed', 'installment_paid', 'finance_note_added', 'one_time_payment_scheduled',
+                    'temporary_manager_assignment', 'temporary_manager_unassigned',
+                    'new_submission'
+                ])
+            )
         else:
-            return Notification.query.filter(
-                db.and_(
-                    Notification.user_id == user.user_id,
-                    Notification.is_read == False,
-                    Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'recurring_due', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'one_time_payment_scheduled', 'item_request_assigned', 'item_request_updated', 'request_returned', 'request_on_hold', 'request_pending_approval', 'temporary_manager_assignment', 'temporary_manager_unassigned', 'new_submission', 'item_request_submission'])
-                )
-            ).count()
+            return db.and_(
+                Notification.user_id == user.user_id,
+                Notification.is_read == False,
+                Notification.notification_type.in_(['request_rejected', 'request_approved', 'proof_uploaded', 'proof_rejected', 'status_changed', 'recurring_due', 'proof_required', 'recurring_approved', 'request_completed', 'installment_paid', 'one_time_payment_scheduled', 'item_request_assigned', 'item_request_updated', 'request_returned', 'request_on_hold', 'request_pending_approval', 'temporary_manager_assignment', 'temporary_manager_unassigned', 'new_submission', 'item_request_submission'])
+            )
+
+def count_unread_notifications(user):
+    """Unread notification count computed from the notifications table (seeds and reconciles the counters)"""
+    return Notification.query.filter(_unread_notification_filter(user)).count()
+
+
+def get_unread_count_for_user(user):
+    """Unread notification badge count for a user: a primary-key read of user_notification_counters"""
+    count = db.session.query(UserNotificationCounter.unread_count).filter_by(user_id=user.user_id).scalar()
+    if count is None:
+        # No counter yet (new user, or before the first reconcile)
+        count = count_unread_notifications(user)
+    return count
+
+
+def _set_unread_counter(user_id, count):
+    """Insert or overwrite a user's counter in the current transaction"""
+    now = datetime.utcnow()
+    stmt = sqlite_insert(UserNotificationCounter).values(user_id=user_id, unread_count=count, updated_at=now)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={'unread_count': count, 'updated_at': now}
+    ))
+
+
+def recount_unread_counters(user_ids):
+    """Recompute the counters of the given users from the notifications table, in the current transaction.
+    Used after bulk deletes and changes that alter which notifications count for a user (role, department)."""
+    user_ids = {uid for uid in user_ids if uid}
+    if not user_ids:
+        return
+    db.session.flush()
+    for user in User.query.filter(User.user_id.in_(user_ids)).all():
+        _set_unread_counter(user.user_id, count_unread_notifications(user))
+
+
+def _counted_unread_by_user(notifications):
+    """{user_id: n} for the given (flushed) notifications that currently count towards their user's unread badge"""
+    ids_by_user = {}
+    for notification in notifications:
+        if notification.user_id and not notification.is_read:
+            ids_by_user.setdefault(notification.user_id, []).append(notification.notification_id)
+    if not ids_by_user:
+        return {}
+    counted = {}
+    for user in User.query.filter(User.user_id.in_(list(ids_by_user))).all():
+        n = Notification.query.filter(
+            _unread_notification_filter(user),
+            Notification.notification_id.in_(ids_by_user[user.user_id])
+        ).count()
+        if n:
+            counted[user.user_id] = n
+    return counted
+
+
+def _adjust_unread_counters(deltas):
+    """Apply {user_id: delta} to the counters in the current transaction.
+    Users without a counter row get one seeded from a full count (which already includes the change)."""
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        result = db.session.execute(
+            db.update(UserNotificationCounter)
+            .where(UserNotificationCounter.user_id == user_id)
+            .values(unread_count=UserNotificationCounter.unread_count + delta, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            recount_unread_counters([user_id])
+
+
+def reconcile_unread_counters():
+    """Recompute every user's unread counter from scratch. Returns the number of counters that were corrected."""
+    counters = dict(db.session.query(UserNotificationCounter.user_id, UserNotificationCounter.unread_count).all())
+    corrected = 0
+    users = User.query.all()
+    for user in users:
+        count = count_unread_notifications(user)
+        if counters.get(user.user_id) != count:
+            _set_unread_counter(user.user_id, count)
+            corrected += 1
+    # Drop counters of users that no longer exist
+    UserNotificationCounter.query.filter(
+        ~UserNotificationCounter.user_id.in_([user.user_id for user in users])
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return corrected
+
+
+# --- Background exports ---
+# Report exports and database backups run on a small thread pool instead of inside the web request.
+# The page posts its filters to /api/exports and gets a job id back, follows the progress over
+# Socket.IO ('export_job_update' in the user's room; GET /api/exports/<id> as a fallback) and
+# downloads the finished file from EXPORT_FOLDER. A job runs the existing export view for its
+# kind under a request built from the saved filters and the submitting user, so the direct
+# export URLs and the jobs share one implementation.
+EXPORT_JOB_KINDS = {
+    'reports_excel': 'export_reports_excel',
+    'reports_pdf': 'export_reports_pdf',
+    'item_request_reports_excel': 'export_item_request_reports_excel',
+    'item_request_reports_pdf': 'export_item_request_reports_pdf',
+    'database_backup': 'backup_database',
+}
+EXPORT_JOB_ACTIVE_STATUSES = ('queued', 'running')
+EXPORT_JOB_PROGRESS_INTERVAL = 0.5  # Minimum seconds between two progress events of a job
+_export_job_executor = None
+_export_job_executor_lock = threading.Lock()
+# Live progress of the jobs running in this process (job id -> dict). Only the start and the outcome
+# are written to export_jobs, so a long export never holds a write lock on the database.
+_export_job_progress = {}
+_export_job_progress_lock = threading.Lock()
+
+
+def export_job_payload(job):
+    """JSON for an export job: its row, the live progress and (when finished) the download URL"""
+    payload = job.to_dict()
+    with _export_job_progress_lock:
+        payload['progress'] = _export_job_progress.get(job.id)
+    if job.status == 'done':
+        payload['download_url'] = url_for('download_export_job', job_id=job.id)
+    return payload
+
+
+def publish_export_job(user_id, payload):
+    try:
+        socketio.emit('export_job_update', payload, room=f'user_{user_id}')
+    except Exception as e:
+        print(f"Error emitting export job update: {e}")
+
+
+def _export_job_reporter(job_id, user_id):
+    """Progress callback for one job (g.export_job_progress): keeps the live progress and emits it, throttled"""
+    last_emit = [0.0]
+
+    def report(done, total, stage):
+        progress = {
+            'stage': stage,
+            'done': done,
+            'total': total,
+            'percent': min(100, int(done * 100 / total)) if total else None,
+        }
+        with _export_job_progress_lock:
+            _export_job_progress[job_id] = progress
+        now = time.monotonic()
+        if now - last_emit[0] >= EXPORT_JOB_PROGRESS_INTERVAL or done == total:
+            last_emit[0] = now
+            publish_export_job(user_id, {'id': job_id, 'status': 'running', 'progress': progress})
+
+    return report
+
+
+def export_job_executor():
+    """Thread pool running the export jobs of this process (EXPORT_JOB_WORKERS threads), created on first use"""
+    global _export_job_executor
+    with _export_job_executor_lock:
+        if _export_job_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _export_job_executor = ThreadPoolExecutor(
+                max_workers=max(1, app.config.get('EXPORT_JOB_WORKERS', 2)),
+                thread_name_prefix='export-job'
+            )
+        return _export_job_executor
+
+
+def submit_export_job(user, kind, params):
+    """Queue an export of `kind` for `user` with the page's query parameters ([name, value] pairs)"""
+    import uuid
+    job = ExportJob(id=uuid.uuid4().hex, user_id=user.user_id, kind=kind, params=json.dumps(params), status='queued')
+    db.session.add(job)
+    db.session.commit()
+    export_job_executor().submit(run_export_job, job.id)
+    return job
+
+
+def run_export_job(job_id):
+    """Worker body: generate one queued export into EXPORT_FOLDER and record the outcome on its row"""
+    from werkzeug.exceptions import HTTPException
+    from werkzeug.http import parse_options_header
+    
+    with app.app_context():
+        job = db.session.get(ExportJob, job_id)
+        if job is None or job.status != 'queued':
+            return
+        user = db.session.get(User, job.user_id)
+        endpoint = EXPORT_JOB_KINDS.get(job.kind)
+        params = [tuple(pair) for pair in json.loads(job.params or '[]')]
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        
+        with app.test_request_context(query_string=params):
+            publish_export_job(job.user_id, export_job_payload(job))
+            status, error = 'failed', None
+            file_path = download_name = mimetype = None
+            try:
+                if user is None or endpoint is None:
+                    raise ValueError('The export is no longer valid')
+                login_user(user)
+                g.export_job_progress = _export_job_reporter(job_id, user.user_id)
+                response = app.make_response(app.view_functions[endpoint]())
+                try:
+                    download_name = parse_options_header(response.headers.get('Content-Disposition', ''))[1].get('filename')
+                    if response.status_code != 200 or not download_name:
+                        # The views flash their error and redirect back to the page
+                        messages = [message for _, message in get_flashed_messages(with_categories=True)]
+                        error = ' '.join(messages) or f'Export failed (HTTP {response.status_code})'
+                    else:
+                        file_path = os.path.join(app.config['EXPORT_FOLDER'], job_id + os.path.splitext(download_name)[1])
+                        with open(file_path, 'wb') as f:
+                            for chunk in response.response:
+                                f.write(chunk)
+                        mimetype = response.mimetype
+                        status = 'done'
+                finally:
+                    response.close()
+            except HTTPException as e:
+                error = e.description
+            except Exception as e:
+                db.session.rollback()
+                error = str(e)
+                app.logger.warning(f"Export job {job_id} ({job.kind}) failed: {e}")
+            
+            # Fetch again: the view may have committed or rolled back the session
+            job = db.session.get(ExportJob, job_id)
+            now = datetime.utcnow()
+            job.status = status
+            job.error = error
+            job.finished_at = now
+            job.expires_at = now + timedelta(hours=app.config.get('EXPORT_RETENTION_HOURS', 24))
+            if status == 'done':
+                job.file_path = file_path
+                job.download_name = download_name
+                job.mimetype = mimetype
+                job.file_size = os.path.getsize(file_path)
+            db.session.commit()
+            with _export_job_progress_lock:
+                _export_job_progress.pop(job_id, None)
+            publish_export_job(job.user_id, export_job_payload(job))
+
+
+def purge_export_jobs():
+    """Delete export files (and their jobs) past their retention, and fail jobs that never finished
+    (their process was restarted). Returns the number of jobs deleted."""
+    now = datetime.utcnow()
+    retention = timedelta(hours=app.config.get('EXPORT_RETENTION_HOURS', 24))
+    stale_before = now - timedelta(minutes=app.config.get('EXPORT_JOB_TIMEOUT_MINUTES', 120))
+    for job in ExportJob.query.filter(ExportJob.status.in_(EXPORT_JOB_ACTIVE_STATUSES), ExportJob.created_at < stale_before).all():
+        job.status = 'failed'
+        job.error = 'The export did not finish (the server was restarted or the export timed out). Please export again.'
+        job.finished_at = now
+        job.expires_at = now + retention
+    
+    expired = ExportJob.query.filter(ExportJob.expires_at < now).all()
+    for job in expired:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        db.session.delete(job)
+    db.session.commit()
+    
+    # Files left behind without a job (e.g. the job row was deleted while a worker was still writing)
+    folder = app.config['EXPORT_FOLDER']
+    known = {path for (path,) in db.session.query(ExportJob.file_path).filter(ExportJob.file_path.isnot(None))}
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if path not in known and os.path.isfile(path) and datetime.utcfromtimestamp(os.path.getmtime(path)) < now - retention:
+            os.remove(path)
+    return len(expired)
+
+
+# --- Background job scheduler ---
+# Periodic jobs as (name, interval in seconds, function). Every process may run the scheduler
+# thread, but only the one holding the leader lease in scheduler_leases executes jobs, so alerts
+# go out once however many workers are running. scripts/run_jobs.py runs and inspects jobs from the CLI.
+SCHEDULED_JOBS = [
+    ('finance_approval_timing_alerts', 3600, check_finance_approval_timing_alerts),
+    ('recurring_payments_due', 900, check_recurring_payments_due),
+    ('reconcile_unread_counters', 86400, reconcile_unread_counters),
+    ('refresh_payment_occurrences', 86400, rebuild_payment_occurrences),
+    ('purge_export_jobs', 3600, purge_export_jobs),
+    ('refresh_branch_allocations', 86400, rebuild_branch_allocations),
+]
+SCHEDULER_LEASE_NAME = 'scheduler'
+SCHEDULER_LEASE_SECONDS = 300
+SCHEDULER_TICK_SECONDS = 60
+_scheduler_started = False
+_scheduler_start_lock = threading.Lock()
+
+
+def scheduler_holder_id(prefix='app'):
+    """Identity of this process in scheduler_leases (computed per call: gunicorn forks after import)."""
+    import socket
+    return f"{prefix}:{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_scheduler_lease(holder, seconds=SCHEDULER_LEASE_SECONDS):
+    """Take or renew the scheduler leader lease. Returns True if `holder` now holds it."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    try:
+        result = db.session.execute(
+            db.update(SchedulerLease)
+            .where(
+                SchedulerLease.name == SCHEDULER_LEASE_NAME,
+                or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now)
+            )
+            .values(holder=holder, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            result = db.session.execute(
+                sqlite_insert(SchedulerLease)
+                .values(name=SCHEDULER_LEASE_NAME, holder=holder, expires_at=expires_at)
+                .on_conflict_do_nothing(index_elements=['name'])
+            )
+        db.session.commit()
+        return result.rowcount > 0
+    except Exception as e:
+        db.session.rollback()
+        app.logger.warning(f"Could not acquire scheduler lease: {e}")
+        return False
+
+
+def release_scheduler_lease(holder):
+    """Give up the leader lease if `holder` has it, so another process can take over immediately."""
+    try:
+        SchedulerLease.query.filter_by(name=SCHEDULER_LEASE_NAME, holder=holder).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.warning(f"Could not release scheduler lease: {e}")
+
+
+def claim_scheduled_job(name, interval, started_at, only_if_due=False):
+    """Mark a job as started (last_started_at) and move its next_run_at on, in one UPDATE, unless it is
+    still running: started after its last finish, less than one interval ago (an older unfinished run is
+    assumed to have died with its process). With only_if_due the job must also be due.
+    Returns True if this caller may run the job."""
+    claimable = [
+        ScheduledJob.name == name,
+        or_(
+            ScheduledJob.last_started_at.is_(None),
+            ScheduledJob.last_finished_at >= ScheduledJob.last_started_at,
+            ScheduledJob.last_started_at < started_at - timedelta(seconds=interval)
+        )
+    ]
+    if only_if_due:
+        claimable.append(or_(ScheduledJob.next_run_at.is_(None), ScheduledJob.next_run_at <= started_at))
+    values = {
+        'interval_seconds': interval,
+        'last_started_at': started_at,
+        'next_run_at': started_at + timedelta(seconds=interval)
+    }
+    claimed = db.session.execute(
+        db.update(ScheduledJob).where(*claimable).values(**values).execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        claimed = db.session.execute(
+            sqlite_insert(ScheduledJob).values(name=name, run_count=0, **values).on_conflict_do_nothing(index_elements=['name'])
+        ).rowcount
+    db.session.commit()
+    return claimed > 0
+
+
+def run_scheduled_job(name, only_if_due=False):
+    """Run one job now and record its start time, duration, status and next run. Returns True on success,
+    False on failure and None if the job was not run (still running elsewhere, or no longer due)."""
+    specs = {job_name: (interval, fn) for job_name, interval, fn in SCHEDULED_JOBS}
+    if name not in specs:
+        raise KeyError(f"Unknown scheduled job: {name}")
+    interval, fn = specs[name]
+    
+    # next_run_at moves on when the job starts, so a worker that takes the lease over while a long
+    # job runs does not see the job as due and start it a second time
+    started_at = datetime.utcnow()
+    if not claim_scheduled_job(name, interval, started_at, only_if_due=only_if_due):
+        print(f"Scheduled job {name} skipped (already running or not due)")
+        return None
+    
+    status, error = 'ok', None
+    timer = time.monotonic()
+    try:
+        fn()
+    except Exception as e:
+        db.session.rollback()
+        status, error = 'error', str(e)
+        app.logger.warning(f"Scheduled job {name} failed: {e}")
+    duration_ms = int((time.monotonic() - timer) * 1000)
+    
+    # Only the run that made the latest claim records its result
+    db.session.execute(
+        db.update(ScheduledJob)
+        .where(ScheduledJob.name == name, ScheduledJob.last_started_at == started_at)
+        .values(
+            last_finished_at=datetime.utcnow(),
+            last_duration_ms=duration_ms,
+            last_status=status,
+            last_error=error,
+            run_count=func.coalesce(ScheduledJob.run_count, 0) + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    print(f"Scheduled job {name} finished ({status}, {duration_ms} ms)")
+    return status == 'ok'
+
+
+def run_due_jobs(holder):
+    """Run every job whose next_run_at has passed, if `holder` holds (or can take) the leader lease.
+    Returns the names of the jobs that ran."""
+    if not acquire_scheduler_lease(holder):
+        return []
+    ran = []
+    for name, interval, fn in SCHEDULED_JOBS:
+        job = db.session.get(ScheduledJob, name, populate_existing=True)
+        if job is not None and job.next_run_at is not None and job.next_run_at > datetime.utcnow():
+            continue
+        if run_scheduled_job(name, only_if_due=True) is None:
+            continue
+        ran.append(name)
+        # Renew between jobs so a slow job does not let the lease lapse
+        if not acquire_scheduler_lease(holder):
+            break
+    return ran
+
+
+def scheduler_loop(holder=None):
+    """Scheduler thread body: run the jobs that are due every SCHEDULER_TICK_SECONDS."""
+    holder = holder or scheduler_holder_id()
+    while True:
+        try:
+            with app.app_context():
+                run_due_jobs(holder)
+        except Exception as e:
+            print(f"Error in background scheduler: {e}")
+        time.sleep(SCHEDULER_TICK_SECONDS)
+
+
+def start_background_scheduler():
+    """Start the scheduler thread once per process (no-op when SCHEDULER_ENABLED is off)."""
+    global _scheduler_started
+    if not app.config.get('SCHEDULER_ENABLED', True):
+        return False
+    with _scheduler_start_lock:
+        if _scheduler_started:
+            return False
+        _scheduler_started = True
+    holder = scheduler_holder_id()
+    
+    def _release():
+        with app.app_context():
+            release_scheduler_lease(holder)
+    
+    import atexit
+    atexit.register(_release)
+    threading.Thread(target=scheduler_loop, args=(holder,), daemon=True).start()
+    return True
+
+
+@app.before_request
+def ensure_background_scheduler():
+    # Under gunicorn/flask run the __main__ block never runs, so start the scheduler with the first request
+    if not _scheduler_started:
+        start_background_scheduler()
+
 
 def notify_finance_and_admin(title, message, notification_type, request_id=None):
     """Notify Finance and Admin users about new submissions"""
     # Get all Finance and Admin users
     finance_admin_users = User.query.filter(User.role.in_(['Finance Staff', 'Finance Admin'])).all()
-    
-    for user in finance_admin_users:
-        create_notification(
-            user_id=user.user_id,
-            title=title,
-            message=message,
-            notification_type=notification_type,
-            request_id=request_id
-        )
+    create_notifications_bulk(finance_admin_users, title, message, notification_type, request_id)
     
     # Emit real-time notification to all users
     socketio.emit('new_notification', {
@@ -4142,144 +4744,25 @@ def department_dashboard():
             # 3. Completed and Recurring requests from OTHER departments (view-only)
             # 4. Any request where they are the temporary manager
             # 5. Any request where they are an authorized manager approver (even if department changed)
+            # Items 4-5 come from the precomputed request_visibility index.
             # Exclude archived requests and drafts
-            all_non_archived = PaymentRequest.query.filter(
+            base_query = PaymentRequest.query.filter(
+                auditing_manager_visibility_filter(current_user),
                 PaymentRequest.is_archived == False,
                 PaymentRequest.is_draft == False
-            ).all()
-            
-            visible_request_ids = set()
-            
-            for req in all_non_archived:
-                # Their own requests
-                if req.user_id == current_user.user_id:
-                    visible_request_ids.add(req.request_id)
-                
-                # Auditing department requests - only if BOTH request department AND requestor's department match
-                # This prevents showing requests where department was changed but requestor is from different department
-                req_dept = (req.department or '').strip()
-                requestor_dept = (req.user.department or '').strip() if req.user else ''
-                if req_dept.lower() == 'auditing' and requestor_dept.lower() == 'auditing':
-                    visible_request_ids.add(req.request_id)
-                
-                # Temporary manager (per-request)
-                if req.temporary_manager_id == current_user.user_id:
-                    visible_request_ids.add(req.request_id)
-                # Department-level temporary manager (assignment in settings) - include requests from departments
-                try:
-                    dt = DepartmentTemporaryManager.query.filter(
-                        DepartmentTemporaryManager.department == (req.department or ''),
-                        db.or_(
-                            DepartmentTemporaryManager.request_type == 'Finance Payment Request',
-                            DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
-                        )
-                    ).first()
-                except Exception:
-                    dt = None
-                if dt and getattr(dt, 'temporary_manager_id', None) == current_user.user_id:
-                    visible_request_ids.add(req.request_id)
-                
-                # Completed/Recurring and proof-related statuses from other departments (view-only)
-                if req_dept.lower() != 'auditing' and req.status in [
-                    'Completed', 'Recurring', 'Proof Pending', 'Proof Sent', 'Proof Rejected'
-                ]:
-                    visible_request_ids.add(req.request_id)
-                
-                # Authorized approver (handles cases where department was edited)
-                authorized_approvers = get_authorized_manager_approvers(req)
-                if current_user in authorized_approvers:
-                    visible_request_ids.add(req.request_id)
-            
-            # Build query with all visible request IDs
-            if visible_request_ids:
-                base_query = PaymentRequest.query.filter(
-                    PaymentRequest.request_id.in_(visible_request_ids),
-                    PaymentRequest.is_archived == False,
-                    PaymentRequest.is_draft == False
-                )
-            else:
-                # No requests visible - return empty query
-                base_query = PaymentRequest.query.filter(
-                    PaymentRequest.request_id == -1  # Impossible condition
-                )
+            )
         else:
             # Other Department Managers can see:
             # 1. Requests where BOTH the request department AND requestor's department match (normal case)
-            # 2. Requests where they are the temporary manager
+            # 2. Requests where they are the temporary manager (per-request or department-level)
             # 3. Requests where they are an authorized manager approver (even if department was changed)
-            # Exclude archived requests
-            user_dept = current_user.department.strip() if current_user.department else ''
-            
-            # First, get all non-archived requests to check for authorized approver status
-            all_non_archived = PaymentRequest.query.filter(
-                PaymentRequest.is_archived == False
-            ).all()
-            
-            # Find requests where user is an authorized approver (handles cases where department was edited)
-            authorized_request_ids = set()
-            department_match_ids = set()
-            temp_manager_ids = set()
-            
-            # First, get all departments where current user is a temporary manager for payment requests
-            temp_manager_payment_depts = set()
-            try:
-                temp_assignments = DepartmentTemporaryManager.query.filter(
-                    DepartmentTemporaryManager.temporary_manager_id == current_user.user_id,
-                    db.or_(
-                        DepartmentTemporaryManager.request_type == 'Finance Payment Request',
-                        DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
-                    )
-                ).all()
-                for ta in temp_assignments:
-                    if ta.department:
-                        temp_manager_payment_depts.add(ta.department.strip().lower())
-                print(f"DEBUG: User is temp manager for payment requests in departments: {temp_manager_payment_depts}")
-            except Exception as e:
-                print(f"DEBUG: Error getting temp manager departments: {e}")
-            
-            for req in all_non_archived:
-                # Check if requestor's department matches (this ensures we only show requests from their department)
-                requestor_dept = (req.user.department or '').strip() if req.user else ''
-                req_dept = (req.department or '').strip()
-                
-                # Only include if BOTH request department AND requestor's department match
-                # This prevents showing requests where department was changed but requestor is from different department
-                if req_dept.lower() == user_dept.lower() and requestor_dept.lower() == user_dept.lower():
-                    department_match_ids.add(req.request_id)
-                
-                # Check per-request temporary manager
-                if req.temporary_manager_id == current_user.user_id:
-                    temp_manager_ids.add(req.request_id)
-                
-                # Check department-level temporary manager assignment for this request's department
-                # For PAYMENT REQUESTS, check for "Finance Payment Request" or "Both Payment and Item Request"
-                # Use case-insensitive matching to include ALL requests (old and new) from assigned departments
-                req_dept_normalized = req_dept.lower().strip() if req_dept else ''
-                if req_dept_normalized and req_dept_normalized in temp_manager_payment_depts:
-                    # User is assigned as temp manager for this department - include ALL requests from this department
-                    temp_manager_ids.add(req.request_id)
-                    print(f"DEBUG: Added payment request {req.request_id} to temp_manager_ids (dept: {req_dept}, normalized: {req_dept_normalized})")
-                
-                # Check if user is an authorized approver (based on requestor, not request department)
-                authorized_approvers = get_authorized_manager_approvers(req)
-                if current_user in authorized_approvers:
-                    authorized_request_ids.add(req.request_id)
-            
-            # Combine all request IDs
-            all_visible_ids = department_match_ids | temp_manager_ids | authorized_request_ids
-            
-            # Build query with all visible request IDs
-            if all_visible_ids:
-                base_query = PaymentRequest.query.filter(
-                    PaymentRequest.request_id.in_(all_visible_ids),
-                    PaymentRequest.is_archived == False,
-                    PaymentRequest.is_draft == False
-                )
-            else:
-                # No requests visible - return empty query
-                base_query = PaymentRequest.query.filter(
-                    PaymentRequest.request_id == -1  # Impossible condition
-                )
+            # Items 2-3 come from the precomputed request_visibility index.
+            # Exclude archived requests and drafts
+            base_query = PaymentRequest.query.filter(
+                department_manager_visibility_filter(current_user),
+                PaymentRequest.is_archived == False,
+                PaymentRequest.is_draft == False
+            )
     elif current_user.department == 'Auditing' and current_user.role == 'Auditing Staff':
         # Auditing Staff can see:
         # 1. All their own requests (regardless of status or department)
@@ -4298,100 +4781,14 @@ def department_dashboard():
         )
     else:
         # For regular users, show their own requests (exclude archived and drafts)
-        # Also include requests where current user is an authorized manager approver (e.g. Finance Admin/Abdalaziz for Finance department On Hold / Pending Manager Approval)
-        authorized_approver_request_ids = set()
-        try:
-            all_non_archived = PaymentRequest.query.filter(
-                PaymentRequest.is_archived == False,
-                PaymentRequest.is_draft == False
-            ).all()
-            for req in all_non_archived:
-                approvers = get_authorized_manager_approvers(req)
-                if current_user in approvers:
-                    authorized_approver_request_ids.add(req.request_id)
-        except Exception as e:
-            app.logger.warning(f"Error computing authorized approver request IDs for dashboard: {e}")
-
-        # If the user is currently assigned as a department-level temporary manager,
-        # include requests for the departments they temporarily manage (only when assignment exists).
-        if is_temp_manager_any:
-            try:
-                # Only include departments where user is assigned for "Finance Payment Request" or "Both Payment and Item Request"
-                temp_departments = [
-                    dt.department.strip() 
-                    for dt in DepartmentTemporaryManager.query.filter(
-                        DepartmentTemporaryManager.temporary_manager_id == current_user.user_id,
-                        db.or_(
-                            DepartmentTemporaryManager.request_type == 'Finance Payment Request',
-                            DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
-                        )
-                    ).all() 
-                    if dt.department
-                ]
-            except Exception:
-                temp_departments = []
-            if temp_departments:
-                print(f"DEBUG: Building base_query for temp manager. temp_departments: {temp_departments}")
-                # Build case-insensitive department filter using OR conditions
-                # Include ALL requests from assigned departments (both old and new), regardless of requestor's department
-                dept_conditions = []
-                for dept in temp_departments:
-                    dept_normalized = dept.strip().lower()
-                    # Match by request department only (case-insensitive) - include ALL requests from this department
-                    dept_conditions.append(
-                        db.func.lower(db.func.trim(PaymentRequest.department)) == dept_normalized
-                    )
-                
-                if dept_conditions:
-                    dept_filter = db.or_(*dept_conditions)
-                else:
-                    dept_filter = db.false()  # No departments, no matches
-                
-                base_query = PaymentRequest.query.outerjoin(User, PaymentRequest.user_id == User.user_id).filter(
-                    db.and_(
-                        db.or_(
-                            dept_filter,  # All requests from assigned departments
-                            PaymentRequest.temporary_manager_id == current_user.user_id,  # Per-request temp manager
-                            PaymentRequest.user_id == current_user.user_id,  # Own requests
-                            PaymentRequest.request_id.in_(authorized_approver_request_ids) if authorized_approver_request_ids else db.false()
-                        ),
-                        PaymentRequest.is_archived == False,
-                        PaymentRequest.is_draft == False
-                    )
-                )
-                print(f"DEBUG: base_query built with {len(temp_departments)} temp_departments - will show ALL requests from these departments")
-            else:
-                if authorized_approver_request_ids:
-                    base_query = PaymentRequest.query.filter(
-                        db.or_(
-                            PaymentRequest.user_id == current_user.user_id,
-                            PaymentRequest.request_id.in_(authorized_approver_request_ids)
-                        ),
-                        PaymentRequest.is_archived == False,
-                        PaymentRequest.is_draft == False
-                    )
-                else:
-                    base_query = PaymentRequest.query.filter(
-                        PaymentRequest.user_id == current_user.user_id,
-                        PaymentRequest.is_archived == False,
-                        PaymentRequest.is_draft == False
-                    )
-        else:
-            if authorized_approver_request_ids:
-                base_query = PaymentRequest.query.filter(
-                    db.or_(
-                        PaymentRequest.user_id == current_user.user_id,
-                        PaymentRequest.request_id.in_(authorized_approver_request_ids)
-                    ),
-                    PaymentRequest.is_archived == False,
-                    PaymentRequest.is_draft == False
-                )
-            else:
-                base_query = PaymentRequest.query.filter(
-                    PaymentRequest.user_id == current_user.user_id,
-                    PaymentRequest.is_archived == False,
-                    PaymentRequest.is_draft == False
-                )
+        # Also include requests where current user is an authorized manager approver (e.g. Finance Admin/Abdalaziz
+        # for Finance department On Hold / Pending Manager Approval) and, for department-level temporary managers,
+        # all requests of the departments they temporarily manage. Both come from the request_visibility index.
+        base_query = PaymentRequest.query.filter(
+            staff_visibility_filter(current_user),
+            PaymentRequest.is_archived == False,
+            PaymentRequest.is_draft == False
+        )
     
     # Exclude CEO-submitted requests for non-authorized roles (visibility hardening)
     if current_user.role not in ['Finance Admin', 'GM', 'Operation Manager']:
@@ -4585,7 +4982,8 @@ def department_dashboard():
     if tab == 'all':
         requests_pagination = query.order_by(
             get_status_priority_order(),
-            get_all_tab_datetime_order()
+            get_all_tab_datetime_order(),
+            PaymentRequest.request_id.desc()
         ).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -4644,39 +5042,6 @@ def department_dashboard():
 @login_required
 def procurement_dashboard():
     """Dashboard for Procurement department users"""
-    # Migrate: Add amount, receipt_path, and procurement_quantities columns to procurement_item_requests if they don't exist
-    try:
-        import sqlite3
-        db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-        if os.name == 'nt':  # Windows
-            db_path = db_path.replace('/', '\\')
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Check if columns exist
-        cursor.execute("PRAGMA table_info(procurement_item_requests)")
-        existing_columns = [row[1] for row in cursor.fetchall()]
-        
-        if 'amount' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN amount NUMERIC(10, 3)")
-            conn.commit()
-            print("✓ Added 'amount' column to procurement_item_requests table")
-        
-        if 'receipt_path' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN receipt_path VARCHAR(255)")
-            conn.commit()
-            print("✓ Added 'receipt_path' column to procurement_item_requests table")
-
-        if 'procurement_quantities' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_quantities TEXT")
-            conn.commit()
-            print("✓ Added 'procurement_quantities' column to procurement_item_requests table")
-        
-        conn.close()
-    except Exception as e:
-        print(f"Warning: Could not migrate columns: {e}")
-    
     # Allow ALL users with Procurement department OR temporary managers for Procurement to access this dashboard
     # Normalize department value (strip whitespace and handle case)
     dept = current_user.department.strip() if current_user.department else ''
@@ -4719,78 +5084,13 @@ def procurement_dashboard():
         # Procurement Department Managers can see ALL their department's requests
         # plus any request where they are the temporary manager
         # plus any request where they are an authorized manager approver (even if department changed)
-        # Exclude archived requests
-        user_dept = current_user.department.strip() if current_user.department else ''
-        
-        # First, get all non-archived non-draft requests to check for authorized approver status
-        all_non_archived = PaymentRequest.query.filter(
+        # (per-request / department-level temporary manager and approver rights come from request_visibility)
+        # Exclude archived requests and drafts
+        base_query = PaymentRequest.query.filter(
+            department_manager_visibility_filter(current_user),
             PaymentRequest.is_archived == False,
             PaymentRequest.is_draft == False
-        ).all()
-        
-        # Find requests where user is an authorized approver (handles cases where department was edited)
-        authorized_request_ids = set()
-        department_match_ids = set()
-        temp_manager_ids = set()
-        
-        # Get all departments where current user is a temporary manager for payment requests
-        temp_manager_payment_depts = set()
-        try:
-            temp_assignments = DepartmentTemporaryManager.query.filter(
-                DepartmentTemporaryManager.temporary_manager_id == current_user.user_id,
-                db.or_(
-                    DepartmentTemporaryManager.request_type == 'Finance Payment Request',
-                    DepartmentTemporaryManager.request_type == 'Both Payment and Item Request'
-                )
-            ).all()
-            for ta in temp_assignments:
-                if ta.department:
-                    temp_manager_payment_depts.add(ta.department.strip().lower())
-            print(f"DEBUG: procurement_dashboard (Dept Manager) - User is temp manager for payment requests in departments: {temp_manager_payment_depts}")
-        except Exception as e:
-            print(f"DEBUG: Error getting temp manager departments (Dept Manager): {e}")
-        
-        for req in all_non_archived:
-            # Check if requestor's department matches (this ensures we only show requests from their department)
-            requestor_dept = (req.user.department or '').strip() if req.user else ''
-            req_dept = (req.department or '').strip()
-            
-            # Only include if BOTH request department AND requestor's department match
-            # This prevents showing requests where department was changed but requestor is from different department
-            if req_dept.lower() == user_dept.lower() and requestor_dept.lower() == user_dept.lower():
-                department_match_ids.add(req.request_id)
-            
-            # Check per-request temporary manager
-            if req.temporary_manager_id == current_user.user_id:
-                temp_manager_ids.add(req.request_id)
-            
-            # Check department-level temporary manager assignment for this request's department
-            # Use case-insensitive matching to include ALL requests (old and new) from assigned departments
-            req_dept_normalized = req_dept.lower().strip() if req_dept else ''
-            if req_dept_normalized and req_dept_normalized in temp_manager_payment_depts:
-                # User is assigned as temp manager for this department - include ALL requests from this department
-                temp_manager_ids.add(req.request_id)
-                print(f"DEBUG: procurement_dashboard (Dept Manager) - Added payment request {req.request_id} to temp_manager_ids (dept: {req_dept}, normalized: {req_dept_normalized})")
-            
-            # Check if user is an authorized approver (based on requestor, not request department)
-            authorized_approvers = get_authorized_manager_approvers(req)
-            if current_user in authorized_approvers:
-                authorized_request_ids.add(req.request_id)
-        
-        # Combine all request IDs
-        all_visible_ids = department_match_ids | temp_manager_ids | authorized_request_ids
-        
-        # Build query with all visible request IDs
-        if all_visible_ids:
-            base_query = PaymentRequest.query.filter(
-                PaymentRequest.request_id.in_(all_visible_ids),
-                PaymentRequest.is_archived == False
-            )
-        else:
-            # No requests visible - return empty query
-            base_query = PaymentRequest.query.filter(
-                PaymentRequest.request_id == -1  # Impossible condition
-            )
+        )
     else:
         # For regular Procurement Staff users OR temporary managers for Procurement
         # Show their own requests + all requests from departments they're assigned to as temp manager
@@ -4937,7 +5237,8 @@ def procurement_dashboard():
     if tab == 'all':
         requests_pagination = query.order_by(
             get_status_priority_order(),
-            get_all_tab_datetime_order()
+            get_all_tab_datetime_order(),
+            PaymentRequest.request_id.desc()
         ).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -5332,231 +5633,6 @@ def procurement_item_requests():
     if per_page not in [10, 20, 50, 100]:
         per_page = 10
     
-    # Migrate: Add amount and procurement_quantities columns to procurement_item_requests if they don't exist
-    try:
-        import sqlite3
-        db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-        if os.name == 'nt':  # Windows
-            db_path = db_path.replace('/', '\\')
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Check if amount and related columns exist
-        cursor.execute("PRAGMA table_info(procurement_item_requests)")
-        existing_columns = [row[1] for row in cursor.fetchall()]
-        
-        if 'amount' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN amount NUMERIC(10, 3)")
-            conn.commit()
-            print("✓ Added 'amount' column to procurement_item_requests table")
-
-        if 'procurement_quantities' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_quantities TEXT")
-            conn.commit()
-            print("✓ Added 'procurement_quantities' column to procurement_item_requests table")
-        
-        if 'payment_date' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN payment_date DATE")
-            conn.commit()
-            print("✓ Added 'payment_date' column to procurement_item_requests table")
-
-        # Check if receipt_reference_number column exists
-        if 'receipt_reference_number' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN receipt_reference_number VARCHAR(100)")
-            conn.commit()
-            print("✓ Added 'receipt_reference_number' column to procurement_item_requests table")
-
-        # Separate receipt and invoice amounts for completion
-        if 'receipt_amount' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN receipt_amount NUMERIC(10, 3)")
-            conn.commit()
-            print("✓ Added 'receipt_amount' column to procurement_item_requests table")
-        
-        if 'invoice_amount' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN invoice_amount NUMERIC(10, 3)")
-            conn.commit()
-            print("✓ Added 'invoice_amount' column to procurement_item_requests table")
-        
-        # Create procurement_receipt_entries table if it doesn't exist
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='procurement_receipt_entries'
-        """)
-        if not cursor.fetchone():
-            cursor.execute("""
-                CREATE TABLE procurement_receipt_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    item_request_id INTEGER NOT NULL,
-                    filename VARCHAR(500) NOT NULL,
-                    amount NUMERIC(10, 3) NOT NULL,
-                    reference_number VARCHAR(100) NOT NULL,
-                    created_at DATETIME NOT NULL,
-                    updated_at DATETIME NOT NULL,
-                    FOREIGN KEY (item_request_id) REFERENCES procurement_item_requests(id)
-                )
-            """)
-            conn.commit()
-            print("✓ Created 'procurement_receipt_entries' table")
-        
-        # Create procurement_invoice_entries table if it doesn't exist
-        cursor.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='procurement_invoice_entries'
-        """)
-        if not cursor.fetchone():
-            cursor.execute("""
-                CREATE TABLE procurement_invoice_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    item_request_id INTEGER NOT NULL,
-                    filename VARCHAR(500) NOT NULL,
-                    amount NUMERIC(10, 3) NOT NULL,
-                    items TEXT NOT NULL,
-                    created_at DATETIME NOT NULL,
-                    updated_at DATETIME NOT NULL,
-                    FOREIGN KEY (item_request_id) REFERENCES procurement_item_requests(id)
-                )
-            """)
-            conn.commit()
-            print("✓ Created 'procurement_invoice_entries' table")
-
-        if 'procurement_manager_quantities' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_manager_quantities TEXT")
-            conn.commit()
-            print("✓ Added 'procurement_manager_quantities' column to procurement_item_requests table")
-        
-        # Migrate existing JSON data to new tables (one-time migration)
-        try:
-            # Check if migration has been done
-            cursor.execute("SELECT COUNT(*) FROM procurement_receipt_entries")
-            receipt_count = cursor.fetchone()[0]
-            cursor.execute("SELECT COUNT(*) FROM procurement_invoice_entries")
-            invoice_count = cursor.fetchone()[0]
-            
-            # Only migrate if tables are empty
-            if receipt_count == 0 and invoice_count == 0:
-                cursor.execute("SELECT id, receipt_path, invoice_path FROM procurement_item_requests WHERE receipt_path IS NOT NULL OR invoice_path IS NOT NULL")
-                items_to_migrate = cursor.fetchall()
-                
-                migrated_receipts = 0
-                migrated_invoices = 0
-                
-                for item_id, receipt_path, invoice_path in items_to_migrate:
-                    # Migrate receipts
-                    if receipt_path:
-                        try:
-                            receipt_data = json.loads(receipt_path)
-                            if isinstance(receipt_data, list):
-                                for entry in receipt_data:
-                                    if isinstance(entry, dict):
-                                        filename = entry.get('filename') or entry.get('file') or entry.get('name')
-                                        amount = entry.get('amount') or 0
-                                        ref_num = entry.get('reference_number') or entry.get('referenceNumber') or ''
-                                        if filename:
-                                            cursor.execute("""
-                                                INSERT INTO procurement_receipt_entries 
-                                                (item_request_id, filename, amount, reference_number, created_at, updated_at)
-                                                VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
-                                            """, (item_id, filename, amount, ref_num))
-                                            migrated_receipts += 1
-                                    elif isinstance(entry, str):
-                                        cursor.execute("""
-                                            INSERT INTO procurement_receipt_entries 
-                                            (item_request_id, filename, amount, reference_number, created_at, updated_at)
-                                            VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
-                                        """, (item_id, entry, 0, ''))
-                                        migrated_receipts += 1
-                        except Exception as e:
-                            print(f"Warning: Could not migrate receipts for item request {item_id}: {e}")
-                    
-                    # Migrate invoices
-                    if invoice_path:
-                        try:
-                            invoice_data = json.loads(invoice_path)
-                            if isinstance(invoice_data, list):
-                                for entry in invoice_data:
-                                    if isinstance(entry, dict):
-                                        filename = entry.get('filename') or entry.get('file') or entry.get('name')
-                                        amount = entry.get('amount') or 0
-                                        items = entry.get('items') or []
-                                        if filename:
-                                            items_json = json.dumps(items) if isinstance(items, list) else '[]'
-                                            cursor.execute("""
-                                                INSERT INTO procurement_invoice_entries 
-                                                (item_request_id, filename, amount, items, created_at, updated_at)
-                                                VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
-                                            """, (item_id, filename, amount, items_json))
-                                            migrated_invoices += 1
-                                    elif isinstance(entry, str):
-                                        cursor.execute("""
-                                            INSERT INTO procurement_invoice_entries 
-                                            (item_request_id, filename, amount, items, created_at, updated_at)
-                                            VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
-                                        """, (item_id, entry, 0, '[]'))
-                                        migrated_invoices += 1
-                        except Exception as e:
-                            print(f"Warning: Could not migrate invoices for item request {item_id}: {e}")
-                
-                if migrated_receipts > 0 or migrated_invoices > 0:
-                    conn.commit()
-                    print(f"✓ Migrated {migrated_receipts} receipt entries and {migrated_invoices} invoice entries from JSON to database tables")
-        except Exception as e:
-            print(f"Warning: Could not migrate existing data: {e}")
-
-        if 'manager_quantity_rejection_reason' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN manager_quantity_rejection_reason TEXT")
-            conn.commit()
-            print("✓ Added 'manager_quantity_rejection_reason' column to procurement_item_requests table")
-
-        if 'procurement_manager_quantity_rejection_reason' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_manager_quantity_rejection_reason TEXT")
-            conn.commit()
-            print("✓ Added 'procurement_manager_quantity_rejection_reason' column to procurement_item_requests table")
-
-        if 'procurement_quantity_rejection_reason' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_quantity_rejection_reason TEXT")
-            conn.commit()
-            print("✓ Added 'procurement_quantity_rejection_reason' column to procurement_item_requests table")
-
-        # Add requestor_item_upload_path for storing requestor-uploaded item files (JSON)
-        if 'requestor_item_upload_path' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN requestor_item_upload_path TEXT")
-            conn.commit()
-            print("✓ Added 'requestor_item_upload_path' column to procurement_item_requests table")
-        # Add requestor_evidence_upload_path for storing requestor-uploaded evidence files (JSON)
-        if 'requestor_evidence_upload_path' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN requestor_evidence_upload_path TEXT")
-            conn.commit()
-            print("✓ Added 'requestor_evidence_upload_path' column to procurement_item_requests table")
-        # Add archive columns (same as payment requests - soft delete to archives)
-        if 'is_archived' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN is_archived INTEGER DEFAULT 0")
-            conn.commit()
-            print("✓ Added 'is_archived' column to procurement_item_requests table")
-        if 'archived_at' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN archived_at TEXT")
-            conn.commit()
-            print("✓ Added 'archived_at' column to procurement_item_requests table")
-        if 'archived_by' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN archived_by VARCHAR(100)")
-            conn.commit()
-            print("✓ Added 'archived_by' column to procurement_item_requests table")
-        if 'archived_by_user_id' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN archived_by_user_id INTEGER REFERENCES users(user_id)")
-            conn.commit()
-            print("✓ Added 'archived_by_user_id' column to procurement_item_requests table")
-
-        conn.close()
-    except Exception as e:
-        print(f"Warning: Could not migrate columns: {e}")
-    
-    # Update any old "Assigned" status to "Assigned to Procurement" (one-time migration)
-    old_assigned = ProcurementItemRequest.query.filter_by(status='Assigned').all()
-    if old_assigned:
-        for req in old_assigned:
-            req.status = 'Assigned to Procurement'
-        db.session.commit()
-    
     # Build base query for procurement item requests
     # Start with a query object that we can filter at database level
     base_query = ProcurementItemRequest.query
@@ -5663,6 +5739,7 @@ def procurement_item_requests():
                 except Exception as e:
                     print(f"DEBUG: Error getting temp manager item departments: {e}")
             
+            approvers_by_item = get_authorized_manager_approver_ids_for_item_requests_bulk(all_requests)
             for req in all_requests:
                 # Check if user is a department-level temporary manager for this item request
                 # Use case-insensitive matching to include ALL requests (old and new) from assigned departments
@@ -5672,10 +5749,8 @@ def procurement_item_requests():
                     temp_manager_item_ids.add(req.id)
                     print(f"DEBUG: procurement_item_requests - Added item request {req.id} to temp_manager_item_ids (dept: {req.department}, normalized: {req_dept_normalized})")
                 
-                # Also check via authorized approvers function
-                approvers = get_authorized_manager_approvers_for_item_request(req)
-                approver_ids = [a.user_id for a in approvers]
-                if current_user.user_id in approver_ids:
+                # Also check via authorized approvers (resolved in bulk above)
+                if current_user.user_id in approvers_by_item.get(req.id, []):
                     authorized_approvers_ids.add(req.id)
 
             # External statuses that Procurement Manager should be able to see across departments
@@ -5775,6 +5850,7 @@ def procurement_item_requests():
         except Exception as e:
             print(f"DEBUG: Error getting temp manager item departments: {e}")
         
+        approvers_by_item = get_authorized_manager_approver_ids_for_item_requests_bulk(all_requests)
         for req in all_requests:
             # Check if user is a department-level temporary manager for this item request
             # Use case-insensitive matching to include ALL requests (old and new) from assigned departments
@@ -5784,10 +5860,8 @@ def procurement_item_requests():
                 temp_manager_item_ids.add(req.id)
                 print(f"DEBUG: Added item request {req.id} to temp_manager_item_ids (dept: {req.department}, normalized: {req_dept_normalized})")
             
-            # Also check via authorized approvers function
-            approvers = get_authorized_manager_approvers_for_item_request(req)
-            approver_ids = [a.user_id for a in approvers]
-            if current_user.user_id in approver_ids:
+            # Also check via authorized approvers (resolved in bulk above)
+            if current_user.user_id in approvers_by_item.get(req.id, []):
                 authorized_approvers_ids.add(req.id)
         
         # Also show requests created by current user
@@ -6064,12 +6138,11 @@ def procurement_item_requests():
         # Auditing department stats show only completed requests
         stats_requests = [r for r in all_item_requests_for_stats if r.status == 'Completed']
     else:
-        authorized_approvers_ids = set()
-        for req in all_item_requests_for_stats:
-            approvers = get_authorized_manager_approvers_for_item_request(req)
-            approver_ids = [a.user_id for a in approvers]
-            if current_user.user_id in approver_ids:
-                authorized_approvers_ids.add(req.id)
+        approvers_by_item = get_authorized_manager_approver_ids_for_item_requests_bulk(all_item_requests_for_stats)
+        authorized_approvers_ids = {
+            req.id for req in all_item_requests_for_stats
+            if current_user.user_id in approvers_by_item.get(req.id, [])
+        }
         my_requests = [r.id for r in all_item_requests_for_stats if r.user_id == current_user.user_id]
         visible_request_ids = authorized_approvers_ids.union(my_requests)
         stats_requests = [r for r in all_item_requests_for_stats if r.id in visible_request_ids]
@@ -6500,28 +6573,6 @@ def view_item_request(request_id):
 @login_required
 def view_item_request_page(request_id):
     """View a specific item request in full page format"""
-    # Safety migration: ensure new procurement_quantities column exists before querying
-    try:
-        import sqlite3
-        db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-        if os.name == 'nt':  # Windows
-            db_path = db_path.replace('/', '\\')
-
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("PRAGMA table_info(procurement_item_requests)")
-        existing_columns = [row[1] for row in cursor.fetchall()]
-
-        if 'procurement_quantities' not in existing_columns:
-            cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_quantities TEXT")
-            conn.commit()
-            print("✓ Added 'procurement_quantities' column to procurement_item_requests table (view_item_request_page)")
-
-        conn.close()
-    except Exception as e:
-        print(f"Warning: Could not ensure procurement_quantities column exists: {e}")
-
     item_request = ProcurementItemRequest.query.get_or_404(request_id)
     
     # Check access permissions
@@ -7037,16 +7088,6 @@ def view_item_request_page(request_id):
     # Check if quantities have been edited (for showing Edited chip)
     quantities_edited = False
     try:
-        result = db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS item_request_quantity_edits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_request_id INTEGER NOT NULL,
-                first_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(item_request_id)
-            );
-        '''))
-        result.close()
         row = db.session.execute(db.text('SELECT 1 FROM item_request_quantity_edits WHERE item_request_id = :rid'), {'rid': request_id}).fetchone()
         quantities_edited = row is not None
     except Exception:
@@ -7137,19 +7178,6 @@ def get_item_request_quantity_history(request_id):
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
 
     try:
-        # Create table if it doesn't exist
-        db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS item_request_quantity_edit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_request_id INTEGER NOT NULL,
-                old_value TEXT,
-                new_value TEXT,
-                edited_by_user_id INTEGER,
-                edited_by_name TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-        '''))
-        
         rows = db.session.execute(
             db.text('''SELECT old_value, new_value, edited_by_name, created_at
                        FROM item_request_quantity_edit_logs
@@ -7359,14 +7387,7 @@ def schedule_item_payment_date(request_id):
             add_user(u)
         
         # Send notifications
-        for user_id in notified_user_ids:
-            create_notification(
-                user_id=user_id,
-                title=title,
-                message=msg,
-                notification_type="payment_scheduled",
-                item_request_id=request_id
-            )
+        create_notifications_bulk(notified_user_ids, title, msg, "payment_scheduled", item_request_id=request_id)
     except Exception as e:
         print(f"Error sending notifications for scheduled payment date: {e}")
     
@@ -8563,8 +8584,7 @@ def item_request_save_uploads(request_id):
         title = f"Changes saved for Item Request #{request_id}"
         who = current_user.name or 'assigned procurement staff'
         message = f"{who} saved changes for Item Request #{request_id}."
-        for uid in recipient_ids:
-            create_notification(uid, title, message, 'item_request_updated', item_request_id=request_id)
+        create_notifications_bulk(recipient_ids, title, message, 'item_request_updated', item_request_id=request_id)
     except Exception as e:
         app.logger.warning(f"Failed to send upload notifications for item request #{request_id}: {e}")
 
@@ -9079,30 +9099,6 @@ def update_item_request_quantities_procurement_manager(request_id):
 
     # Track quantity edits in edit history table (similar to payment requests)
     try:
-        # Create table if it doesn't exist
-        db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS item_request_quantity_edit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_request_id INTEGER NOT NULL,
-                old_value TEXT,
-                new_value TEXT,
-                edited_by_user_id INTEGER,
-                edited_by_name TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-        '''))
-        
-        # Create table to track which item requests have edited quantities
-        db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS item_request_quantity_edits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_request_id INTEGER NOT NULL,
-                first_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(item_request_id)
-            );
-        '''))
-        
         # Only log if quantities actually changed
         if old_quantities_str != new_quantities_str:
             # Insert edit log entry
@@ -9201,8 +9197,7 @@ def update_item_request_quantities_procurement_manager(request_id):
                 # Send notifications to all recipients
                 title = f"Changes saved for Item Request #{request_id}"
                 message = f"Item request #{request_id} quantities have been updated by {current_user.name}."
-                for uid in recipient_ids:
-                    create_notification(uid, title, message, 'item_request_updated', item_request_id=request_id)
+                create_notifications_bulk(recipient_ids, title, message, 'item_request_updated', item_request_id=request_id)
     except Exception as e:
         app.logger.warning(f"Failed to persist quantity edit history: {e}")
 
@@ -9309,8 +9304,7 @@ def update_item_request_quantities(request_id):
         title = f"Changes saved for Item Request #{request_id}"
         who = current_user.name or 'assigned procurement staff'
         message = f"{who} saved changes for Item Request #{request_id}."
-        for uid in recipient_ids:
-            create_notification(uid, title, message, 'item_request_updated', item_request_id=request_id)
+        create_notifications_bulk(recipient_ids, title, message, 'item_request_updated', item_request_id=request_id)
     except Exception as e:
         app.logger.warning(f"Failed to send notifications for item request #{request_id}: {e}")
 
@@ -9528,30 +9522,6 @@ def update_item_request_quantities_manager(request_id):
 
     # Track quantity edits in edit history table (similar to payment requests)
     try:
-        # Create table if it doesn't exist
-        db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS item_request_quantity_edit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_request_id INTEGER NOT NULL,
-                old_value TEXT,
-                new_value TEXT,
-                edited_by_user_id INTEGER,
-                edited_by_name TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-        '''))
-        
-        # Create table to track which item requests have edited quantities
-        db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS item_request_quantity_edits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_request_id INTEGER NOT NULL,
-                first_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(item_request_id)
-            );
-        '''))
-        
         # Only log if quantities actually changed
         if old_quantities_str != new_quantities_str:
             # Insert edit log entry
@@ -9688,8 +9658,7 @@ def update_item_request_quantities_manager(request_id):
             # Send notifications to all recipients
             title = f"Changes saved for Item Request #{request_id}"
             message = f"Item request #{request_id} quantities have been updated by {current_user.name}."
-            for uid in recipient_ids:
-                create_notification(uid, title, message, 'item_request_updated', item_request_id=request_id)
+            create_notifications_bulk(recipient_ids, title, message, 'item_request_updated', item_request_id=request_id)
         except Exception as e:
             app.logger.error(f"Failed to create notification for item request quantity update: {e}")
 
@@ -10702,9 +10671,6 @@ def procurement_request_item():
 @role_required('Finance Admin')
 def admin_dashboard():
     """Dashboard for admin - shows all requests with optional status filtering"""
-    # Check for recurring payments due today
-    check_recurring_payments_due()
-    
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     status_filter = request.args.get('status', None)
@@ -10845,7 +10811,8 @@ def admin_dashboard():
     if tab == 'all':
         requests_pagination = query.order_by(
             get_status_priority_order(),
-            get_all_tab_datetime_order()
+            get_all_tab_datetime_order(),
+            PaymentRequest.request_id.desc()
         ).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -10903,9 +10870,6 @@ def admin_dashboard():
 @role_required('Finance Staff')
 def finance_dashboard():
     """Dashboard for finance - can view all reports and submit requests"""
-    # Check for recurring payments due today
-    check_recurring_payments_due()
-    
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     department_filter = request.args.get('department', None)
@@ -11010,7 +10974,8 @@ def finance_dashboard():
     if tab == 'all':
         requests_pagination = query.order_by(
             get_status_priority_order(),
-            get_all_tab_datetime_order()
+            get_all_tab_datetime_order(),
+            PaymentRequest.request_id.desc()
         ).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -11128,7 +11093,8 @@ def gm_dashboard():
     if tab == 'all':
         requests_pagination = query.order_by(
             get_status_priority_order(),
-            get_all_tab_datetime_order()
+            get_all_tab_datetime_order(),
+            PaymentRequest.request_id.desc()
         ).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -11274,7 +11240,8 @@ def ceo_dashboard():
     if tab == 'all':
         requests_pagination = query.order_by(
             get_status_priority_order(),
-            get_all_tab_datetime_order()
+            get_all_tab_datetime_order(),
+            PaymentRequest.request_id.desc()
         ).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -11433,7 +11400,8 @@ def it_dashboard():
     if tab == 'all':
         requests_pagination = query.order_by(
             get_status_priority_order(),
-            get_all_tab_datetime_order()
+            get_all_tab_datetime_order(),
+            PaymentRequest.request_id.desc()
         ).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -12014,7 +11982,9 @@ def delete_item_request_permanently(item_request_id):
         notification_title = "Item Request Permanently Deleted"
         notification_message = f"Item request #{item_id_val} submitted by {requestor_name} has been permanently deleted from the database by {current_user.name}. This action cannot be undone."
         
+        notified_user_ids = [uid for (uid,) in db.session.query(Notification.user_id).filter_by(item_request_id=item_request_id).distinct()]
         Notification.query.filter_by(item_request_id=item_request_id).delete()
+        recount_unread_counters(notified_user_ids)
         
         for it_user in it_users_to_notify:
             create_notification(
@@ -12099,7 +12069,9 @@ def delete_request_permanently(request_id):
         notification_message = f"Payment request #{request_id_val} submitted by {requestor_name} has been permanently deleted from the database by {current_user.name}. This action cannot be undone."
         
         # Delete old notifications for this request first (before creating new ones)
+        notified_user_ids = [uid for (uid,) in db.session.query(Notification.user_id).filter_by(request_id=request_id).distinct()]
         Notification.query.filter_by(request_id=request_id).delete()
+        recount_unread_counters(notified_user_ids)
         
         # Create new "permanently deleted" notifications BEFORE deleting the request (so request_id is still valid)
         for it_user in it_users_to_notify:
@@ -12136,6 +12108,14 @@ def delete_request_permanently(request_id):
         # 6. Delete FinanceAdminNote entries
         FinanceAdminNote.query.filter_by(request_id=request_id).delete()
         
+        # 6b. Delete request_visibility index rows
+        RequestVisibility.query.filter_by(request_id=request_id).delete()
+        
+        # 6c. Delete materialised payment occurrences, the installment ledger and branch allocations
+        PaymentOccurrence.query.filter_by(request_id=request_id).delete()
+        InstallmentLedger.query.filter_by(request_id=request_id).delete()
+        RequestBranchAllocation.query.filter_by(request_id=request_id).delete()
+        
         # 7. Delete the PaymentRequest itself (notifications were already handled above)
         db.session.delete(req)
         
@@ -14015,9 +13995,17 @@ def backup_database():
         backup_filename = f'payment_system_backup_{timestamp}.db'
         backup_path = os.path.join(backups_dir, backup_filename)
         
-        # Copy the database file using shutil
-        import shutil
-        shutil.copy2(db_path, backup_path)
+        # SQLite online backup: a consistent copy even while requests are being written, copied in
+        # steps so a background export job can report its progress
+        import sqlite3
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(backup_path)
+        try:
+            source.backup(target, pages=1024,
+                          progress=lambda status, remaining, total: report_export_progress(total - remaining, total, 'Copying database'))
+        finally:
+            target.close()
+            source.close()
         
         # Verify backup was created
         if not os.path.exists(backup_path):
@@ -14058,9 +14046,6 @@ def project_dashboard():
         flash('You do not have permission to access this page.', 'danger')
         return redirect(url_for('department_dashboard'))
     
-    # Check for recurring payments due today
-    check_recurring_payments_due()
-    
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     status_filter = request.args.get('status', None)
@@ -14084,51 +14069,11 @@ def project_dashboard():
         # Project Manager sees all requests from Project department
         # plus any request where they are the temporary manager
         # plus any request where they are an authorized manager approver (even if department changed)
-        user_dept = 'Project'
-        
-        # First, get all non-archived requests to check for authorized approver status
-        all_non_archived = PaymentRequest.query.filter(
+        # (temporary manager and approver rights come from the request_visibility index)
+        query = PaymentRequest.query.filter(
+            department_manager_visibility_filter(current_user, reasons=('temporary_manager', 'manager_approver')),
             PaymentRequest.is_archived == False
-        ).all()
-        
-        # Find requests where user is an authorized approver (handles cases where department was edited)
-        authorized_request_ids = set()
-        department_match_ids = set()
-        temp_manager_ids = set()
-        
-        for req in all_non_archived:
-            # Check if requestor's department matches (this ensures we only show requests from their department)
-            requestor_dept = (req.user.department or '').strip() if req.user else ''
-            req_dept = (req.department or '').strip()
-            
-            # Only include if BOTH request department AND requestor's department match
-            # This prevents showing requests where department was changed but requestor is from different department
-            if req_dept.lower() == user_dept.lower() and requestor_dept.lower() == user_dept.lower():
-                department_match_ids.add(req.request_id)
-            
-            # Check temporary manager
-            if req.temporary_manager_id == current_user.user_id:
-                temp_manager_ids.add(req.request_id)
-            
-            # Check if user is an authorized approver (based on requestor, not request department)
-            authorized_approvers = get_authorized_manager_approvers(req)
-            if current_user in authorized_approvers:
-                authorized_request_ids.add(req.request_id)
-        
-        # Combine all request IDs
-        all_visible_ids = department_match_ids | temp_manager_ids | authorized_request_ids
-        
-        # Build query with all visible request IDs
-        if all_visible_ids:
-            query = PaymentRequest.query.filter(
-                PaymentRequest.request_id.in_(all_visible_ids),
-                PaymentRequest.is_archived == False
-            )
-        else:
-            # No requests visible - return empty query
-            query = PaymentRequest.query.filter(
-                PaymentRequest.request_id == -1  # Impossible condition
-            )
+        )
     else:
         # Fallback - should not happen due to role_required decorator
         query = PaymentRequest.query.filter(
@@ -14177,7 +14122,8 @@ def project_dashboard():
     if tab == 'all':
         requests_pagination = query.order_by(
             get_status_priority_order(),
-            get_all_tab_datetime_order()
+            get_all_tab_datetime_order(),
+            PaymentRequest.request_id.desc()
         ).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -14214,65 +14160,20 @@ def project_dashboard():
         # Project Manager sees all requests from Project department
         # plus any request where they are the temporary manager
         # plus any request where they are an authorized manager approver (even if department changed)
-        user_dept = 'Project'
-        
-        # Get all non-archived requests to check for authorized approver status
-        all_non_archived = PaymentRequest.query.filter(
+        # (temporary manager and approver rights come from the request_visibility index)
+        project_visibility = department_manager_visibility_filter(current_user, reasons=('temporary_manager', 'manager_approver'))
+        completed_query = PaymentRequest.query.filter(
+            project_visibility,
             PaymentRequest.is_archived == False
-        ).all()
-        
-        # Find requests where user is an authorized approver (handles cases where department was edited)
-        authorized_request_ids = set()
-        department_match_ids = set()
-        temp_manager_ids = set()
-        
-        for req in all_non_archived:
-            # Check if requestor's department matches (this ensures we only show requests from their department)
-            requestor_dept = (req.user.department or '').strip() if req.user else ''
-            req_dept = (req.department or '').strip()
-            
-            # Only include if BOTH request department AND requestor's department match
-            # This prevents showing requests where department was changed but requestor is from different department
-            if req_dept.lower() == user_dept.lower() and requestor_dept.lower() == user_dept.lower():
-                department_match_ids.add(req.request_id)
-            
-            # Check temporary manager
-            if req.temporary_manager_id == current_user.user_id:
-                temp_manager_ids.add(req.request_id)
-            
-            # Check if user is an authorized approver (based on requestor, not request department)
-            authorized_approvers = get_authorized_manager_approvers(req)
-            if current_user in authorized_approvers:
-                authorized_request_ids.add(req.request_id)
-        
-        # Combine all request IDs
-        all_visible_ids = department_match_ids | temp_manager_ids | authorized_request_ids
-        
-        # Build queries with all visible request IDs
-        if all_visible_ids:
-            completed_query = PaymentRequest.query.filter(
-                PaymentRequest.request_id.in_(all_visible_ids),
-                PaymentRequest.is_archived == False
-            )
-            rejected_query = PaymentRequest.query.filter(
-                PaymentRequest.request_id.in_(all_visible_ids),
-                PaymentRequest.is_archived == False
-            )
-            recurring_query = PaymentRequest.query.filter(
-                PaymentRequest.request_id.in_(all_visible_ids),
-                PaymentRequest.is_archived == False
-            )
-        else:
-            # No requests visible - return empty queries
-            completed_query = PaymentRequest.query.filter(
-                PaymentRequest.request_id == -1  # Impossible condition
-            )
-            rejected_query = PaymentRequest.query.filter(
-                PaymentRequest.request_id == -1  # Impossible condition
-            )
-            recurring_query = PaymentRequest.query.filter(
-                PaymentRequest.request_id == -1  # Impossible condition
-            )
+        )
+        rejected_query = PaymentRequest.query.filter(
+            project_visibility,
+            PaymentRequest.is_archived == False
+        )
+        recurring_query = PaymentRequest.query.filter(
+            project_visibility,
+            PaymentRequest.is_archived == False
+        )
     else:
         # Fallback - should not happen due to role_required decorator
         completed_query = PaymentRequest.query.filter(
@@ -14316,9 +14217,6 @@ def project_dashboard():
 @role_required('Operation Manager')
 def operation_dashboard():
     """Dashboard for operation manager - can view all requests but only in dashboard"""
-    # Check for recurring payments due today
-    check_recurring_payments_due()
-    
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     status_filter = request.args.get('status', None)
@@ -14382,7 +14280,8 @@ def operation_dashboard():
     if tab == 'all':
         requests_pagination = query.order_by(
             get_status_priority_order(),
-            get_all_tab_datetime_order()
+            get_all_tab_datetime_order(),
+            PaymentRequest.request_id.desc()
         ).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -14541,7 +14440,6 @@ def get_available_request_types():
 @login_required
 def new_request():
     """Create a new payment request"""
-    _ensure_archive_columns_payment_requests()  # also ensures different_amounts_per_branch, branch_amounts
     if request.method == 'POST':
         # Check if this is a draft save
         is_draft = request.form.get('save_as_draft') == 'true'
@@ -14780,6 +14678,12 @@ def new_request():
             available_branches = get_branches_for_request_forms()
             return render_template('new_request.html', user=current_user, today=datetime.utcnow().date().strftime('%Y-%m-%d'), available_request_types=available_request_types, available_branches=available_branches)
         
+        try:
+            refresh_request_visibility([new_req])
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"Could not index visibility for request #{new_req.request_id}: {e}")
+        
         # Skip notifications and schedules for drafts
         if is_draft:
             log_action(f"Saved payment request #{new_req.request_id} as draft - {request_type or 'Draft'}")
@@ -14981,7 +14885,6 @@ def drafts():
 @login_required
 def edit_draft(draft_id):
     """Edit a draft"""
-    _ensure_archive_columns_payment_requests()  # also ensures different_amounts_per_branch, branch_amounts
     draft = PaymentRequest.query.filter_by(
         request_id=draft_id,
         is_draft=True,
@@ -15149,6 +15052,12 @@ def edit_draft(draft_id):
             
             db.session.commit()
             
+            try:
+                refresh_request_visibility([draft])
+            except Exception as e:
+                db.session.rollback()
+                app.logger.warning(f"Could not index visibility for request #{draft.request_id}: {e}")
+            
             log_action(f"Submitted draft #{draft_id} as payment request")
             
             # Create notifications
@@ -15646,8 +15555,28 @@ def get_payment_schedule_api(request_id):
 def check_timing_alerts():
     """Manual endpoint to check and send timing alerts (for testing and manual triggers)"""
     try:
-        check_finance_approval_timing_alerts()
-        flash('Timing alerts check completed successfully.', 'success')
+        # Through the leader lease, like scripts/run_jobs.py: if another process leads, let it run the job
+        holder = scheduler_holder_id()
+        if not acquire_scheduler_lease(holder):
+            db.session.execute(
+                db.update(ScheduledJob).where(ScheduledJob.name == 'finance_approval_timing_alerts')
+                .values(next_run_at=datetime.utcnow()).execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            flash(f'Timing alerts check queued; the scheduler runs it within {SCHEDULER_TICK_SECONDS} seconds.', 'info')
+            return redirect(url_for('admin_dashboard'))
+        try:
+            ran = run_scheduled_job('finance_approval_timing_alerts')
+        finally:
+            # Keep the lease if this process's scheduler thread is the leader
+            if not _scheduler_started:
+                release_scheduler_lease(holder)
+        if ran:
+            flash('Timing alerts check completed successfully.', 'success')
+        elif ran is None:
+            flash('Timing alerts check is already running.', 'info')
+        else:
+            flash('Error checking timing alerts; see the scheduled job status for details.', 'error')
         return redirect(url_for('admin_dashboard'))
     except Exception as e:
         flash(f'Error checking timing alerts: {str(e)}', 'error')
@@ -15667,17 +15596,10 @@ def overdue_requests():
         if per_page not in [10, 20, 50, 100, 200, 500]:
             per_page = 50
         
-        # Get ALL overdue requests (no limit in the query)
-        overdue_requests_list = get_overdue_requests()
-        overdue_count = len(overdue_requests_list)
-        
-        # Calculate pagination
+        # Count, then load only the requested page (most overdue first)
+        overdue_count = get_overdue_requests_count()
         total_pages = (overdue_count + per_page - 1) // per_page if overdue_count > 0 else 1  # Ceiling division
-        start_index = (page - 1) * per_page
-        end_index = start_index + per_page
-        
-        # Get paginated results
-        paginated_overdue_requests = overdue_requests_list[start_index:end_index]
+        paginated_overdue_requests = get_overdue_requests(limit=per_page, offset=(page - 1) * per_page)
         
         return render_template('overdue_requests.html', 
                              overdue_requests=paginated_overdue_requests,
@@ -15804,40 +15726,13 @@ def write_cheque_save():
 
 
 def _ensure_bank_layouts_seeded():
-    """Create default bank_layouts rows if missing. Migrate columns and fix dimensions if needed."""
+    """Create default bank_layouts rows if missing (columns and page dimensions are handled by migrations.py)."""
     # Page width is intentionally wider than a standard cheque so fields near
     # the right edge are never clipped. The physical cheque paper positions are
     # controlled by the mm values in the layout, not the page boundary.
     CHEQUE_W_MM = 220.0
     CHEQUE_H_MM = 88.9
 
-    try:
-        import sqlite3
-        db_path = app.config.get('SQLALCHEMY_DATABASE_URI', '').replace('sqlite:///', '')
-        if db_path:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='bank_layouts'")
-            if cursor.fetchone():
-                cursor.execute("PRAGMA table_info(bank_layouts)")
-                existing = [row[1] for row in cursor.fetchall()]
-                for col in ['print_offset_name_x', 'print_offset_name_y', 'print_offset_amount_words_x', 'print_offset_amount_words_y',
-                            'print_offset_amount_nums_x', 'print_offset_amount_nums_y', 'print_offset_date_x', 'print_offset_date_y',
-                            'print_offset_crossing_x', 'print_offset_crossing_y']:
-                    if col not in existing:
-                        cursor.execute("ALTER TABLE bank_layouts ADD COLUMN " + col + " REAL")
-                        conn.commit()
-                # Upgrade any rows that are narrower than our new wider page
-                cursor.execute(
-                    "UPDATE bank_layouts SET cheque_width_mm=?, cheque_height_mm=? "
-                    "WHERE cheque_width_mm IS NULL OR cheque_width_mm < 220.0",
-                    (CHEQUE_W_MM, CHEQUE_H_MM)
-                )
-                conn.commit()
-            conn.close()
-    except Exception:
-        pass
-
     W_PX, H_PX = 720, 336   # Playwright viewport at 96 dpi → matches 7.5in × 3.5in
     def px_to_mm(left_px, top_px):
         return (left_px * CHEQUE_W_MM / W_PX, top_px * CHEQUE_H_MM / H_PX)
@@ -16476,29 +16371,19 @@ def view_request(request_id):
         print(f"[DEBUG] Found {len(schedule)} schedule entries")
         
         if schedule:
-            # Optimize: Get all paid notifications and late installments in single queries
-            # Use list comprehension for better performance
-            paid_notifications = PaidNotification.query.filter_by(request_id=request_id).all()
-            late_installments = LateInstallment.query.filter_by(request_id=request_id).all()
+            # Late markers in a single query, as a set for O(1) lookup
+            late_dates = {late.payment_date for late in LateInstallment.query.filter_by(request_id=request_id).all()}
             
-            # Create sets for O(1) lookup instead of O(n) list search
-            paid_dates = {paid.paid_date for paid in paid_notifications}
-            late_dates = {late.payment_date for late in late_installments}
+            # Total paid comes from the installment ledger (summed from the schedule if it has no row yet)
+            ledger = db.session.get(InstallmentLedger, request_id)
+            total_paid_amount = ledger.paid_total if ledger else sum(entry.amount for entry in schedule if entry.is_paid)
             
-            # Calculate total paid and remaining amounts
-            total_paid_amount = 0
-            
-            # Use list comprehension for better performance
             for entry in schedule:
                 # Check if this installment is already paid (use the is_paid field from the schedule)
                 is_paid = entry.is_paid
                 # Check if this installment is marked late (optimized lookup)
                 is_late = entry.payment_date in late_dates
                 
-                # If this installment is paid, add its amount to total paid
-                if is_paid:
-                    total_paid_amount += entry.amount
-                
                 schedule_rows.append({
                     'schedule_id': entry.schedule_id,
                     'date': entry.payment_date,
@@ -16795,19 +16680,8 @@ def view_request(request_id):
     was_just_edited = request.args.get('edited') == '1'
     edited_fields_param = request.args.get('edited_fields', '')
     edited_fields = [f for f in edited_fields_param.split(',') if f]
-    # Fetch all-time edited fields from audit table (created on demand)
+    # Fetch all-time edited fields from audit table
     try:
-        result = db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS request_field_edits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id INTEGER NOT NULL,
-                field_name TEXT NOT NULL,
-                first_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(request_id, field_name)
-            );
-        '''))
-        result.close()
         rows = db.session.execute(db.text('SELECT field_name FROM request_field_edits WHERE request_id = :rid'), { 'rid': req.request_id }).fetchall()
         cumulative_fields = [r[0] for r in rows]
     except Exception:
@@ -17021,14 +16895,7 @@ def schedule_one_time_payment(request_id):
             add_user(u)
 
         # Create notifications (deduped)
-        for uid in notified_user_ids:
-            create_notification(
-                user_id=uid,
-                title=title,
-                message=msg,
-                notification_type='one_time_payment_scheduled',
-                request_id=request_id
-            )
+        create_notifications_bulk(notified_user_ids, title, msg, 'one_time_payment_scheduled', request_id)
 
         # Emit broadcast signal for clients to refresh notifications
         try:
@@ -17432,6 +17299,13 @@ def edit_request(request_id):
 
     db.session.commit()
 
+    # Department / request type edits can change who may approve this request
+    try:
+        refresh_request_visibility([req])
+    except Exception as e:
+        db.session.rollback()
+        app.logger.warning(f"Could not index visibility for request #{request_id}: {e}")
+
     # Build edited_fields list for UI badges: only fields submitted AND changed this save
     def norm(v):
         return (v or '').strip()
@@ -17491,36 +17365,14 @@ def edit_request(request_id):
             if norm(original.get(key, '')) != norm(updated.get(key, '')):
                 edited_fields.append(key)
 
-    # Persist cumulative edited fields (create table if missing, upsert per field)
+    # Persist cumulative edited fields (upsert per field)
     try:
-        db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS request_field_edits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id INTEGER NOT NULL,
-                field_name TEXT NOT NULL,
-                first_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(request_id, field_name)
-            );
-        '''))
         for key in edited_fields:
             db.session.execute(db.text('''
                 INSERT INTO request_field_edits (request_id, field_name) VALUES (:rid, :fname)
                 ON CONFLICT(request_id, field_name) DO UPDATE SET last_edited_at = CURRENT_TIMESTAMP
             '''), { 'rid': request_id, 'fname': key })
         # Also persist detailed edit history per field (old/new values)
-        db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS request_field_edit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id INTEGER NOT NULL,
-                field_name TEXT NOT NULL,
-                old_value TEXT,
-                new_value TEXT,
-                edited_by_user_id INTEGER,
-                edited_by_name TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-        '''))
         for key in edited_fields:
             db.session.execute(db.text('''
                 INSERT INTO request_field_edit_logs (request_id, field_name, old_value, new_value, edited_by_user_id, edited_by_name)
@@ -17791,18 +17643,6 @@ def request_field_history(request_id: int):
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
 
     try:
-        db.session.execute(db.text('''
-            CREATE TABLE IF NOT EXISTS request_field_edit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id INTEGER NOT NULL,
-                field_name TEXT NOT NULL,
-                old_value TEXT,
-                new_value TEXT,
-                edited_by_user_id INTEGER,
-                edited_by_name TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-        '''))
         rows = db.session.execute(
             db.text('''SELECT old_value, new_value, edited_by_name, created_at
                        FROM request_field_edit_logs
@@ -19748,6 +19588,12 @@ def reassign_manager(request_id):
     
     db.session.commit()
     
+    try:
+        refresh_request_visibility([req])
+    except Exception as e:
+        db.session.rollback()
+        app.logger.warning(f"Could not index visibility for request #{request_id}: {e}")
+    
     log_action(f"Reassigned temporary manager for request #{request_id} to {new_manager.name} (IT Staff only action)")
     
     # Notify the new temporary manager
@@ -19790,35 +19636,6 @@ def reassign_manager(request_id):
     return redirect(url_for('view_request', request_id=request_id))
 
 
-def _ensure_archive_columns_payment_requests():
-    """Ensure archive_reason, archive_supporting_files, different_amounts_per_branch, branch_amounts exist on payment_requests.
-    Uses the same db.engine as the app so we always touch the correct database."""
-    try:
-        from sqlalchemy import text
-        with db.engine.connect() as conn:
-            result = conn.execute(text("PRAGMA table_info(payment_requests)"))
-            existing_columns = [row[1] for row in result]
-            to_add = []
-            if 'archive_reason' not in existing_columns:
-                to_add.append(('archive_reason', "ALTER TABLE payment_requests ADD COLUMN archive_reason TEXT"))
-            if 'archive_supporting_files' not in existing_columns:
-                to_add.append(('archive_supporting_files', "ALTER TABLE payment_requests ADD COLUMN archive_supporting_files TEXT"))
-            if 'different_amounts_per_branch' not in existing_columns:
-                to_add.append(('different_amounts_per_branch', "ALTER TABLE payment_requests ADD COLUMN different_amounts_per_branch INTEGER DEFAULT 0"))
-            if 'branch_amounts' not in existing_columns:
-                to_add.append(('branch_amounts', "ALTER TABLE payment_requests ADD COLUMN branch_amounts TEXT"))
-            if 'truck_plate_no' not in existing_columns:
-                to_add.append(('truck_plate_no', "ALTER TABLE payment_requests ADD COLUMN truck_plate_no VARCHAR(50)"))
-            for name, sql in to_add:
-                conn.execute(text(sql))
-                conn.commit()
-                print(f"✓ Added '{name}' column to payment_requests table")
-    except Exception as e:
-        print(f"Warning: Could not migrate payment_requests columns: {e}")
-        import traceback
-        traceback.print_exc()
-
-
 @app.route('/request/<int:request_id>/delete', methods=['POST'])
 @login_required
 @role_required('IT Staff', 'Department Manager', 'GM', 'CEO', 'Operation Manager', 'Auditing Staff', 'Finance Admin')
@@ -19828,8 +19645,6 @@ def delete_request(request_id):
         flash('You do not have permission to perform this action.', 'danger')
         return redirect(url_for('dashboard'))
     
-    _ensure_archive_columns_payment_requests()
-    
     req = PaymentRequest.query.get_or_404(request_id)
     
     # Check if already archived
@@ -20033,8 +19848,6 @@ def bulk_delete_requests():
         flash('You do not have permission to perform this action.', 'danger')
         return redirect(url_for('dashboard'))
     
-    _ensure_archive_columns_payment_requests()
-    
     request_ids = request.form.getlist('request_ids')
     
     if not request_ids:
@@ -20458,6 +20271,7 @@ def edit_installment(request_id):
         
         for notification in old_date_notifications:
             db.session.delete(notification)
+        recount_unread_counters(n.user_id for n in old_date_notifications)
         
         # Send notification to Finance Admin about the edit
         finance_admin_users = User.query.filter_by(role='Finance Admin').all()
@@ -20533,52 +20347,105 @@ def get_installment_edit_history(schedule_id):
 
 # ==================== REPORTS ROUTES ====================
 
-def _report_display_amount_for_request(req, branch_filter_list):
+def _report_selected_branch_names(branch_filter_list):
+    """Names that count as "selected" for a branch filter: each filter branch plus its aliases"""
+    selected_names = set()
+    for fname in branch_filter_list or []:
+        fname = (fname or '').strip()
+        if not fname:
+            continue
+        selected_names.add(fname)
+        branch = Branch.query.filter_by(name=fname).first()
+        if branch and getattr(branch, 'aliases', None):
+            for a in branch.aliases:
+                if getattr(a, 'alias_name', None):
+                    selected_names.add(a.alias_name.strip())
+    return selected_names
+
+
+def payment_request_branch_filter(branch_filter):
+    """Condition for PaymentRequest queries: any of the request's branches is a filter branch or one of its aliases"""
+    return db.select(RequestBranchAllocation.id).where(
+        RequestBranchAllocation.request_id == PaymentRequest.request_id,
+        RequestBranchAllocation.branch_name.in_(_report_selected_branch_names(branch_filter))
+    ).exists()
+
+
+def _report_branch_share(selected_names):
+    """Per-request SUM of the amounts allocated to the selected branches (NULL without per-branch amounts)"""
+    return db.select(func.sum(RequestBranchAllocation.amount)).where(
+        RequestBranchAllocation.request_id == PaymentRequest.request_id,
+        RequestBranchAllocation.branch_name.in_(selected_names)
+    ).scalar_subquery()
+
+
+def _report_display_amounts(requests, branch_filter_list):
     """
-    When a branch filter is applied, return the amount to show for this request in the report:
-    - If the request has different_amounts_per_branch and branch_amounts, return the sum of
-      amounts only for branches that match the filter (so the amount column and total card
-      show only the portion that applies to the selected branch(es)).
-    - Otherwise return the full request amount (requestor amount + finance extra amount).
+    When a branch filter is applied, the amount to show for each request in the report ({request_id: amount}):
+    - If the request has different amounts per branch, the sum of its amounts for branches that match
+      the filter (so the amount column and total card show only the portion that applies to the
+      selected branch(es)).
+    - Otherwise the full request amount (requestor amount + finance extra amount).
     branch_filter_list: list of selected branch names (e.g. from request.args.getlist('branch')).
     """
-    if not branch_filter_list:
-        return None  # Caller uses full amount
-    try:
-        if not getattr(req, 'different_amounts_per_branch', False) or not getattr(req, 'branch_amounts', None):
-            return req.total_display_amount
-        branch_names_str = (req.branch_name or '').strip()
-        if not branch_names_str:
-            return req.total_display_amount
-        branch_names = [b.strip() for b in branch_names_str.split(',') if b.strip()]
-        try:
-            amounts = json.loads(req.branch_amounts) if isinstance(req.branch_amounts, str) else (req.branch_amounts or [])
-        except Exception:
-            amounts = []
-        if len(amounts) != len(branch_names):
-            return req.total_display_amount
-        # Build set of names that count as "selected" (canonical + aliases for each filter branch)
-        selected_names = set()
-        for fname in branch_filter_list:
-            fname = (fname or '').strip()
-            if not fname:
-                continue
-            selected_names.add(fname)
-            branch = Branch.query.filter_by(name=fname).first()
-            if branch and getattr(branch, 'aliases', None):
-                for a in branch.aliases:
-                    if getattr(a, 'alias_name', None):
-                        selected_names.add(a.alias_name.strip())
-        display = 0.0
-        for i, bname in enumerate(branch_names):
-            if bname in selected_names and i < len(amounts):
-                try:
-                    display += float(amounts[i])
-                except (TypeError, ValueError):
-                    pass
-        return display if display > 0 else req.total_display_amount
-    except Exception:
-        return req.total_display_amount
+    if not branch_filter_list or not requests:
+        return {}
+    shares = dict(db.session.query(
+        RequestBranchAllocation.request_id, func.sum(RequestBranchAllocation.amount)
+    ).filter(
+        RequestBranchAllocation.request_id.in_([r.request_id for r in requests]),
+        RequestBranchAllocation.branch_name.in_(_report_selected_branch_names(branch_filter_list))
+    ).group_by(RequestBranchAllocation.request_id))
+    display_amounts = {}
+    for r in requests:
+        share = float(shares.get(r.request_id) or 0)
+        display_amounts[r.request_id] = share if share > 0 else r.total_display_amount
+    return display_amounts
+
+
+def report_summary(query, branch_filter=None, date_from=None, date_to=None):
+    """Summary cards of the reports page for a filtered PaymentRequest query, computed in SQL.
+    One COUNT / SUM grouped by status (and by how each request's amount is counted) replaces loading
+    every row. Returns (total_requests, {status: count}, total_amount)."""
+    is_recurring = PaymentRequest.recurring == 'Recurring'
+    # PaymentRequest.total_display_amount: requestor amount + finance extra amount
+    display_amount = func.coalesce(PaymentRequest.amount, 0) + func.coalesce(PaymentRequest.finance_extra_amount, 0)
+    if branch_filter:
+        # Requests split across branches count the selected branches' share (see _report_display_amounts)
+        branch_share = _report_branch_share(_report_selected_branch_names(branch_filter))
+        display_amount = db.case((branch_share > 0, branch_share), else_=display_amount)
+    
+    # With a date range recurring requests count their paid installments in range; the rest count their display amount
+    group_columns = [PaymentRequest.status]
+    if date_from or date_to:
+        group_columns.append(db.case((is_recurring, 'recurring'), else_='plain'))
+    rows = query.with_entities(
+        *group_columns, func.count(PaymentRequest.request_id), func.sum(display_amount)
+    ).group_by(*group_columns).all()
+    
+    status_counts = {}
+    total_amount = 0.0
+    has_recurring = False
+    for row in rows:
+        status, kind = row[0], (row[1] if len(group_columns) > 1 else 'plain')
+        count, amount = row[-2], row[-1]
+        status_counts[status] = status_counts.get(status, 0) + count
+        if kind == 'plain':
+            total_amount += float(amount or 0)
+        else:
+            has_recurring = True
+    
+    if has_recurring:
+        installments_total = db.session.query(func.sum(RecurringPaymentSchedule.amount)).filter(
+            RecurringPaymentSchedule.request_id.in_(query.filter(is_recurring).with_entities(PaymentRequest.request_id).scalar_subquery()),
+            RecurringPaymentSchedule.is_paid == True
+        )
+        if date_from:
+            installments_total = installments_total.filter(RecurringPaymentSchedule.payment_date >= date_from)
+        if date_to:
+            installments_total = installments_total.filter(RecurringPaymentSchedule.payment_date <= date_to)
+        total_amount += float(installments_total.scalar() or 0)
+    return sum(status_counts.values()), status_counts, total_amount
 
 
 @app.route('/reports')
@@ -20673,39 +20540,9 @@ def reports():
         if company_conditions:
             query = query.filter(db.or_(*company_conditions))
     if branch_filter:
-        # Alias-aware branch filtering: include canonical name and any aliases
-        # Also handle multiple branch names (comma-separated) in branch_name field
-        # Handle multiple branch filters
-        all_branch_conditions = []
-        for branch_name in branch_filter:
-            selected_branch = Branch.query.filter_by(name=branch_name).first()
-            if selected_branch:
-                alias_names = [a.alias_name for a in getattr(selected_branch, 'aliases', [])]
-                names = [selected_branch.name] + alias_names
-                # Build OR conditions to match if any name appears in the comma-separated branch_name
-                conditions = []
-                for name in names:
-                    # Match exact, at start (with comma after), at end (with comma before), or in middle (with commas around)
-                    conditions.append(PaymentRequest.branch_name == name)  # Exact match
-                    conditions.append(PaymentRequest.branch_name.like(f'{name},%'))  # At start
-                    conditions.append(PaymentRequest.branch_name.like(f'%, {name}'))  # At end (with space after comma)
-                    conditions.append(PaymentRequest.branch_name.like(f'%,{name}'))  # At end (no space)
-                    conditions.append(PaymentRequest.branch_name.like(f'%, {name},%'))  # In middle (with spaces)
-                    conditions.append(PaymentRequest.branch_name.like(f'%,{name},%'))  # In middle (no spaces)
-                all_branch_conditions.append(db.or_(*conditions))
-            else:
-                # For non-alias branches, check if branch name appears in comma-separated list
-                conditions = [
-                    PaymentRequest.branch_name == branch_name,  # Exact match
-                    PaymentRequest.branch_name.like(f'{branch_name},%'),  # At start
-                    PaymentRequest.branch_name.like(f'%, {branch_name}'),  # At end (with space)
-                    PaymentRequest.branch_name.like(f'%,{branch_name}'),  # At end (no space)
-                    PaymentRequest.branch_name.like(f'%, {branch_name},%'),  # In middle (with spaces)
-                    PaymentRequest.branch_name.like(f'%,{branch_name},%')  # In middle (no spaces)
-                ]
-                all_branch_conditions.append(db.or_(*conditions))
-        if all_branch_conditions:
-            query = query.filter(db.or_(*all_branch_conditions))
+        # Alias-aware branch filtering: any of the request's branches (request_branch_allocations)
+        # is a selected branch or one of its aliases
+        query = query.filter(payment_request_branch_filter(branch_filter))
     # Branch type filter (handle multiple values)
     if branch_type_filter:
         query = query.filter(PaymentRequest.branch_type.in_(branch_type_filter))
@@ -20783,71 +20620,30 @@ def reports():
                 db.and_(PaymentRequest.recurring == 'Recurring', schedule_exists)
             )
         )
-    # Sort by status priority then by date (Completed by completion_date, others by created_at)
-    # Get all filtered requests for stats calculation (before pagination)
-    all_filtered_requests = query.order_by(
-        get_status_priority_order(),
-        get_all_tab_datetime_order()
-    ).all()
-    
-    # Calculate stats from all filtered requests
-    total_requests = len(all_filtered_requests)
-    completed_count = len([r for r in all_filtered_requests if r.status == 'Completed'])
-    pending_count = len([r for r in all_filtered_requests if r.status in ['Pending Manager Approval', 'Pending Finance Approval']])
-    on_hold_count = len([r for r in all_filtered_requests if r.status == 'On Hold'])
-    
-    # Calculate total amount
-    # When branch filter is applied, for requests with different_amounts_per_branch use only the amount for the selected branch(es).
-    # If a date range is applied, for recurring requests only sum matching paid schedules.
-    total_amount = 0.0
-    request_display_amounts = {}  # request_id -> amount to show in table (when branch filter applied)
-    if branch_filter:
-        for r in all_filtered_requests:
-            display_amt = _report_display_amount_for_request(r, branch_filter)
-            if display_amt is not None:
-                request_display_amounts[r.request_id] = display_amt
-
-    if date_from or date_to:
-        # Pre-parse date bounds
-        date_from_dt = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
-        date_to_dt = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
-
-        for r in all_filtered_requests:
-            try:
-                if getattr(r, 'recurring', None) == 'Recurring':
-                    # Sum only schedule amounts that fall within the date range and are paid
-                    sched_q = RecurringPaymentSchedule.query.filter(RecurringPaymentSchedule.request_id == r.request_id, RecurringPaymentSchedule.is_paid == True)
-                    if date_from_dt:
-                        sched_q = sched_q.filter(RecurringPaymentSchedule.payment_date >= date_from_dt)
-                    if date_to_dt:
-                        sched_q = sched_q.filter(RecurringPaymentSchedule.payment_date <= date_to_dt)
-                    schedules = sched_q.all()
-                    total_amount += sum(float(s.amount) for s in schedules)
-                else:
-                    amt = request_display_amounts.get(r.request_id) if branch_filter else None
-                    total_amount += float(amt) if amt is not None else r.total_display_amount
-            except Exception:
-                try:
-                    amt = request_display_amounts.get(r.request_id) if branch_filter else None
-                    total_amount += float(amt) if amt is not None else r.total_display_amount
-                except Exception:
-                    pass
-    else:
-        if branch_filter and request_display_amounts:
-            total_amount = sum(request_display_amounts.get(r.request_id, r.total_display_amount) for r in all_filtered_requests)
-        else:
-            total_amount = sum(r.total_display_amount for r in all_filtered_requests)
+    # Summary cards: one grouped aggregate over the filtered requests (no rows loaded)
+    date_from_dt = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+    date_to_dt = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+    total_requests, status_counts, total_amount = report_summary(query, branch_filter, date_from_dt, date_to_dt)
+    completed_count = status_counts.get('Completed', 0)
+    pending_count = status_counts.get('Pending Manager Approval', 0) + status_counts.get('Pending Finance Approval', 0)
+    on_hold_count = status_counts.get('On Hold', 0)
     it_amount = None
     
-    # Paginate the query for display with the same ordering
+    # Load only the current page, sorted by status priority then by date (Completed by completion_date,
+    # others by created_at); the summary already counted the rows
     pagination = query.order_by(
         get_status_priority_order(),
-        get_all_tab_datetime_order()
+        get_all_tab_datetime_order(),
+        PaymentRequest.request_id.desc()
     ).paginate(
-        page=page, per_page=per_page, error_out=False
+        page=page, per_page=per_page, error_out=False, count=False
     )
+    pagination.total = total_requests
     requests = pagination.items
     
+    # When a branch filter is applied, requests with different_amounts_per_branch show only the selected branches' amount
+    request_display_amounts = _report_display_amounts(requests, branch_filter)  # request_id -> amount to show in table
+    
     # Get unique departments for filter (exclude archived)
     # For non-IT, non-Auditing Department Managers, only show their own department
     if current_user.role == 'Department Manager' and current_user.department not in ['IT', 'Auditing']:
@@ -21221,13 +21017,139 @@ def item_request_reports():
                          user=current_user)
 
 
+# Rows fetched per round trip by the streaming Excel and PDF report exports
+REPORT_EXPORT_CHUNK_SIZE = 500
+
+
+def report_export_progress(done, total, stage):
+    """Tell the background export job running this export (if any) how far it got"""
+    reporter = g.get('export_job_progress')
+    if reporter is not None:
+        reporter(done, total, stage)
+
+
+def export_job_row_total(query):
+    """Number of rows an export will read, for its job's progress (None outside a job, to skip the COUNT)"""
+    if g.get('export_job_progress') is None:
+        return None
+    return query.order_by(None).count()
+
+
+def iter_export_rows(rows, total, stage):
+    """Yield `rows`, reporting progress to the running export job once per REPORT_EXPORT_CHUNK_SIZE rows"""
+    if g.get('export_job_progress') is None:
+        yield from rows
+        return
+    done = 0
+    report_export_progress(done, total, stage)
+    for row in rows:
+        yield row
+        done += 1
+        if done % REPORT_EXPORT_CHUNK_SIZE == 0:
+            report_export_progress(done, total, stage)
+    report_export_progress(done, total, stage)
+
+
+def xlsx_text_length(value, multiline=False):
+    """Length the Excel exports' column auto-fit counts for a cell value (longest line if multiline)"""
+    text = str(value) if value is not None else ''
+    if multiline:
+        return max(len(line) for line in text.split('\n'))
+    return len(text)
+
+
+def xlsx_wrapped_row_height(values, widths, columns):
+    """Height of an Excel export row so the text in the given (1-based) columns fits when wrapped"""
+    height = 15  # Default row height
+    for col in columns:
+        value = values[col - 1] if col <= len(values) else None
+        if value:
+            text = str(value)
+            # Estimate lines needed (rough calculation: ~7 characters per unit width), ~15 points per line
+            chars_per_line = max(1, int(widths[col - 1] * 7))
+            lines = max(len(text.split('\n')), (len(text) // chars_per_line) + 1)
+            height = max(height, lines * 15)
+    return height
+
+
+def iter_spooled_rows(spool):
+    """Read back the rows an export pickled into a temporary file, one at a time"""
+    spool.seek(0)
+    while True:
+        try:
+            yield pickle.load(spool)
+        except EOFError:
+            return
+
+
+def send_xlsx_workbook(wb, download_name):
+    """Save a (write-only) workbook to a temporary file and stream it as a download"""
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return send_file(
+        output,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=download_name
+    )
+
+
+@app.route('/api/exports', methods=['GET', 'POST'])
+@login_required
+def api_export_jobs():
+    """GET: the current user's recent export jobs. POST {kind, params}: queue an export of `kind`
+    (see EXPORT_JOB_KINDS) with `params`, the page's query string; returns the job (202)."""
+    if request.method == 'GET':
+        jobs = ExportJob.query.filter_by(user_id=current_user.user_id).order_by(ExportJob.created_at.desc()).limit(20).all()
+        return jsonify({'jobs': [export_job_payload(job) for job in jobs]})
+    
+    data = request.get_json(silent=True) or {}
+    kind = data.get('kind')
+    if kind not in EXPORT_JOB_KINDS:
+        return jsonify({'error': 'Unknown export type'}), 400
+    from urllib.parse import parse_qsl
+    params = parse_qsl(str(data.get('params') or '').lstrip('?'), keep_blank_values=True)
+    
+    active = ExportJob.query.filter(
+        ExportJob.user_id == current_user.user_id,
+        ExportJob.status.in_(EXPORT_JOB_ACTIVE_STATUSES)
+    ).count()
+    if active >= app.config.get('EXPORT_JOB_MAX_ACTIVE_PER_USER', 3):
+        return jsonify({'error': 'You already have exports in progress. Please wait for them to finish.'}), 429
+    
+    job = submit_export_job(current_user, kind, params)
+    return jsonify(export_job_payload(job)), 202
+
+
+@app.route('/api/exports/<job_id>')
+@login_required
+def api_export_job(job_id):
+    """Status and progress of one of the current user's export jobs"""
+    job = ExportJob.query.filter_by(id=job_id, user_id=current_user.user_id).first()
+    if job is None:
+        return jsonify({'error': 'Export not found'}), 404
+    return jsonify(export_job_payload(job))
+
+
+@app.route('/exports/<job_id>/download')
+@login_required
+def download_export_job(job_id):
+    """Download the file of one of the current user's finished export jobs"""
+    job = ExportJob.query.filter_by(id=job_id, user_id=current_user.user_id).first()
+    if job is None or job.status != 'done' or not job.file_path or not os.path.exists(job.file_path):
+        flash('This export is no longer available. Please export again.', 'warning')
+        return redirect(url_for('dashboard'))
+    return send_file(job.file_path, mimetype=job.mimetype, as_attachment=True, download_name=job.download_name)
+
+
 @app.route('/export/item-request-reports/excel')
 @login_required
 def export_item_request_reports_excel():
     """Export item request reports to Excel with professional formatting"""
-    import io
     try:
         import openpyxl
+        from openpyxl.cell import WriteOnlyCell
         from openpyxl.styles import Font, PatternFill, Alignment
         from openpyxl.utils import get_column_letter
     except ImportError:
@@ -21330,9 +21252,6 @@ def export_item_request_reports_excel():
             ProcurementItemRequest.completion_date <= datetime.strptime(date_to, '%Y-%m-%d')
         )
     
-    # Get all filtered requests
-    all_requests = query.order_by(ProcurementItemRequest.created_at.desc()).all()
-    
     # Helper function to convert to float
     def to_float(value):
         try:
@@ -21340,210 +21259,188 @@ def export_item_request_reports_excel():
         except Exception:
             return 0.0
     
-    # Sum all amounts
+    def row_values(req):
+        """Cell values of one item request's row (the Amount column as a float, the rest as text)"""
+        request_date_str = req.request_date.strftime('%Y-%m-%d') if req.request_date else '-'
+        completion_date_str = req.completion_date.strftime('%Y-%m-%d') if getattr(req, 'completion_date', None) else '-'
+        # Get quantity from assigned procurement staff (preferred), then manager, then original
+        quantity_source = req.assigned_procurement_quantities or req.procurement_manager_quantities or req.procurement_quantities or req.quantity or ''
+        
+        # Format Item Name with line breaks instead of commas, filtering out items with quantity 0
+        item_names = req.item_name.split(',') if req.item_name else []
+        quantities = quantity_source.split(';') if quantity_source else []
+        
+        # Filter items where quantity is not 0
+        filtered_items = []
+        filtered_quantities = []
+        for idx, item in enumerate(item_names):
+            item_trimmed = item.strip()
+            if item_trimmed:
+                qty_val = ''
+                if idx < len(quantities):
+                    qty_raw = quantities[idx].strip()
+                    qty_val = qty_raw if qty_raw else '0'
+                else:
+                    qty_val = '0'
+                
+                # Only include if quantity is not '0'
+                try:
+                    qty_num = float(qty_val) if qty_val else 0
+                    if qty_num != 0:
+                        filtered_items.append(item_trimmed)
+                        filtered_quantities.append(qty_val)
+                except:
+                    # If we can't parse as float, include it (might be non-numeric)
+                    if qty_val != '0':
+                        filtered_items.append(item_trimmed)
+                        filtered_quantities.append(qty_val)
+        
+        # Format Branch with line breaks instead of commas
+        branches = req.branch_name.split(',') if req.branch_name else []
+        branch_display = '\n'.join([branch.strip() for branch in branches if branch.strip()]) if branches else ''
+        
+        # Format branch_type for display
+        branch_type_display = ''
+        if req.branch_type:
+            if req.branch_type == 'branch':
+                branch_type_display = 'Branch'
+            elif req.branch_type == 'flats':
+                branch_type_display = 'Flats'
+            else:
+                branch_type_display = str(req.branch_type)
+        
+        return [
+            f"#{req.id}",
+            str(req.category or ''),
+            '\n'.join(filtered_items),
+            '\n'.join(filtered_quantities),
+            str(req.requestor_name or ''),
+            str(req.department or ''),
+            branch_display,
+            branch_type_display,
+            request_date_str,
+            completion_date_str,
+            str(req.status or ''),
+            to_float(req.receipt_amount),
+            str(req.assigned_to_user.name if req.assigned_to_user else '')
+        ]
+    
     # Exclude "Rejected by Manager" and "Rejected by Procurement Manager" from total amount
     # UNLESS those statuses are explicitly included in the status filter
     rejected_statuses = ['Rejected by Manager', 'Rejected by Procurement Manager']
     has_rejected_filter = status_filter and any(status in rejected_statuses for status in status_filter)
     
-    if has_rejected_filter:
-        # If rejected statuses are in the filter, include all requests in total
-        total_amount = sum(to_float(r.receipt_amount) for r in all_requests)
-    else:
-        # Exclude rejected requests from total amount
-        total_amount = sum(
-            to_float(r.receipt_amount) 
-            for r in all_requests 
-            if r.status not in rejected_statuses
-        )
+    # Headers in row 7 (include Completion Date); Amount is column 12 after adding Branch Type
+    headers = ['ID', 'Category', 'Item Name', 'Quantity', 'Requestor', 'Department', 'Branch', 'Branch Type', 'Request Date', 'Completion Date', 'Status', 'Amount (OMR)', 'Assigned To']
+    amount_col = 12
+    wrap_cols = (3, 4, 7)  # Item Name, Quantity, Branch columns - enable wrapping
+    fit_multiline_cols = (3, 6)  # Auto-fit and row heights look at these columns
     
     try:
-        # Create Excel workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Item Request Reports"
-        
-        # Add report header information
-        ws['A1'] = 'Item Request Reports'
-        ws['A1'].font = Font(size=16, bold=True)
-        
-        generation_date = datetime.now().strftime('%Y-%m-%d %H:%M')
-        ws['A2'] = f"Report Generated: {generation_date}"
-        
-        # Build comprehensive filters line
-        filter_parts = []
-        filter_parts.append(f"Dept: {', '.join(department_filter) if department_filter else 'All'}")
-        filter_parts.append(f"Category: {', '.join(category_filter) if category_filter else 'All'}")
-        filter_parts.append(f"Branch: {', '.join(branch_filter) if branch_filter else 'All'}")
-        filter_parts.append(f"Status: {', '.join(status_filter) if status_filter else 'All'}")
-        filters_line = " | ".join(filter_parts)
-        ws['A3'] = filters_line
-        
-        # Date scope
-        if date_from and date_to:
-            ws['A4'] = f"Date Range: {date_from} to {date_to}"
-        elif date_from:
-            ws['A4'] = f"Date From: {date_from} (no end date)"
-        elif date_to:
-            ws['A4'] = f"Date To: {date_to} (no start date)"
-        else:
-            ws['A4'] = "Date Range: All dates (no filter applied)"
-        
-        ws['A5'] = f"Total Amount: OMR {total_amount:.3f}"
-        ws['A5'].font = Font(size=12, bold=True)
-        
-        # Add headers starting from row 7 (include Completion Date)
-        headers = ['ID', 'Category', 'Item Name', 'Quantity', 'Requestor', 'Department', 'Branch', 'Branch Type', 'Request Date', 'Completion Date', 'Status', 'Amount (OMR)', 'Assigned To']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=7, column=col, value=str(header))
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-            ws.row_dimensions[7].height = 20
-        
-        # Add data rows
-        for row_idx, req in enumerate(all_requests, 8):
-            request_date_str = req.request_date.strftime('%Y-%m-%d') if req.request_date else '-'
-            completion_date_str = req.completion_date.strftime('%Y-%m-%d') if getattr(req, 'completion_date', None) else '-'
-            amount_value = to_float(req.receipt_amount)
-            # Get quantity from assigned procurement staff (preferred), then manager, then original
-            quantity_source = req.assigned_procurement_quantities or req.procurement_manager_quantities or req.procurement_quantities or req.quantity or ''
-            
-            # Format Item Name with line breaks instead of commas, filtering out items with quantity 0
-            item_names = req.item_name.split(',') if req.item_name else []
-            quantities = quantity_source.split(';') if quantity_source else []
-            
-            # Filter items where quantity is not 0
-            filtered_items = []
-            filtered_quantities = []
-            for idx, item in enumerate(item_names):
-                item_trimmed = item.strip()
-                if item_trimmed:
-                    qty_val = ''
-                    if idx < len(quantities):
-                        qty_raw = quantities[idx].strip()
-                        qty_val = qty_raw if qty_raw else '0'
-                    else:
-                        qty_val = '0'
-                    
-                    # Only include if quantity is not '0'
-                    try:
-                        qty_num = float(qty_val) if qty_val else 0
-                        if qty_num != 0:
-                            filtered_items.append(item_trimmed)
-                            filtered_quantities.append(qty_val)
-                    except:
-                        # If we can't parse as float, include it (might be non-numeric)
-                        if qty_val != '0':
-                            filtered_items.append(item_trimmed)
-                            filtered_quantities.append(qty_val)
-            
-            item_display = '\n'.join(filtered_items) if filtered_items else ''
-            quantity_display = '\n'.join(filtered_quantities) if filtered_quantities else ''
-            
-            # Format Branch with line breaks instead of commas
-            branches = req.branch_name.split(',') if req.branch_name else []
-            branch_display = '\n'.join([branch.strip() for branch in branches if branch.strip()]) if branches else ''
-            
-            # Format branch_type for display
-            branch_type_display = ''
-            if req.branch_type:
-                if req.branch_type == 'branch':
-                    branch_type_display = 'Branch'
-                elif req.branch_type == 'flats':
-                    branch_type_display = 'Flats'
+        # First pass: stream the requests in chunks into a temporary file, collecting the total and
+        # the longest text per column (both are written before the first data row)
+        max_lengths = [xlsx_text_length(header, col in fit_multiline_cols) for col, header in enumerate(headers, 1)]
+        total_amount = 0
+        row_total = export_job_row_total(query)
+        with tempfile.TemporaryFile() as spool:
+            rows = query.order_by(ProcurementItemRequest.created_at.desc()).yield_per(REPORT_EXPORT_CHUNK_SIZE)
+            for req in iter_export_rows(rows, row_total, 'Reading requests'):
+                values = row_values(req)
+                if has_rejected_filter or req.status not in rejected_statuses:
+                    total_amount += values[amount_col - 1]
+                for col, value in enumerate(values, 1):
+                    max_lengths[col - 1] = max(max_lengths[col - 1], xlsx_text_length(value, col in fit_multiline_cols))
+                pickle.dump(values, spool, pickle.HIGHEST_PROTOCOL)
+            
+            # Auto-adjust column widths
+            widths = []
+            for col_idx, max_length in enumerate(max_lengths, 1):
+                column_letter = get_column_letter(col_idx)
+                # Special handling for specific columns
+                if column_letter == 'A':  # ID column
+                    adjusted_width = min(max_length + 2, 12)
+                elif column_letter == 'D':  # Requestor column
+                    adjusted_width = min(max_length + 2, 20)
+                elif column_letter == 'I':  # Amount column
+                    adjusted_width = max(max_length + 2, 18)
                 else:
-                    branch_type_display = str(req.branch_type)
-            
-            row_data = [
-                f"#{req.id}",
-                str(req.category or ''),
-                item_display or '',
-                quantity_display or '',
-                str(req.requestor_name or ''),
-                str(req.department or ''),
-                branch_display or '',
-                branch_type_display,
-                request_date_str,
-                completion_date_str,
-                str(req.status or ''),
-                amount_value,
-                str(req.assigned_to_user.name if req.assigned_to_user else '')
-            ]
-            
-            for col, data in enumerate(row_data, 1):
-                # For Amount column (now column 12 after adding Branch Type), explicitly set as float
-                if col == 12:
-                    numeric_value = float(amount_value) if amount_value is not None else 0.0
-                    cell = ws.cell(row=row_idx, column=col, value=numeric_value)
-                    cell.number_format = '#,##0.000'
-                    cell.alignment = Alignment(horizontal='right', vertical='top')
-                else:
-                    cell = ws.cell(row=row_idx, column=col, value=str(data) if data is not None else '')
-                    if col in [3, 4, 7]:  # Item Name, Quantity, Branch columns - enable wrapping
-                        cell.alignment = Alignment(wrap_text=True, vertical='top')
-                    else:
-                        cell.alignment = Alignment(vertical='top', horizontal='left')
-        
-        # Auto-adjust column widths
-        for col_idx in range(1, len(headers) + 1):
-            max_length = 0
-            column_letter = get_column_letter(col_idx)
-            
-            for row in range(7, ws.max_row + 1):
-                cell = ws.cell(row=row, column=col_idx)
-                try:
-                    cell_value = str(cell.value) if cell.value is not None else ''
-                    if col_idx in [3, 6]:  # Item Name, Branch
-                        lines = cell_value.split('\n')
-                        max_line_length = max(len(line) for line in lines) if lines else 0
-                        max_length = max(max_length, max_line_length)
-                    else:
-                        max_length = max(max_length, len(cell_value))
-                except:
-                    pass
-            
-            # Special handling for specific columns
-            if column_letter == 'A':  # ID column
-                adjusted_width = min(max_length + 2, 12)
-            elif column_letter == 'D':  # Requestor column
-                adjusted_width = min(max_length + 2, 20)
-            elif column_letter == 'I':  # Amount column
-                adjusted_width = max(max_length + 2, 18)
+                    adjusted_width = min(max_length + 2, 50)
+                widths.append(max(adjusted_width, 10))
+            
+            # Second pass: write-only workbook, rows are written to disk as they are appended.
+            # Column widths have to be set before the first row.
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet("Item Request Reports")
+            for col_idx, width in enumerate(widths, 1):
+                ws.column_dimensions[get_column_letter(col_idx)].width = width
+            
+            # Report header information
+            title_cell = WriteOnlyCell(ws, value='Item Request Reports')
+            title_cell.font = Font(size=16, bold=True)
+            ws.append([title_cell])
+            
+            generation_date = datetime.now().strftime('%Y-%m-%d %H:%M')
+            ws.append([f"Report Generated: {generation_date}"])
+            
+            # Build comprehensive filters line
+            filter_parts = []
+            filter_parts.append(f"Dept: {', '.join(department_filter) if department_filter else 'All'}")
+            filter_parts.append(f"Category: {', '.join(category_filter) if category_filter else 'All'}")
+            filter_parts.append(f"Branch: {', '.join(branch_filter) if branch_filter else 'All'}")
+            filter_parts.append(f"Status: {', '.join(status_filter) if status_filter else 'All'}")
+            ws.append([" | ".join(filter_parts)])
+            
+            # Date scope
+            if date_from and date_to:
+                ws.append([f"Date Range: {date_from} to {date_to}"])
+            elif date_from:
+                ws.append([f"Date From: {date_from} (no end date)"])
+            elif date_to:
+                ws.append([f"Date To: {date_to} (no start date)"])
             else:
-                adjusted_width = min(max_length + 2, 50)
-            
-            adjusted_width = max(adjusted_width, 10)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Auto-adjust row heights for rows with wrapped text
-        for row_idx in range(7, ws.max_row + 1):
-            max_height = 15
-            for col_idx in [3, 6]:  # Columns with wrapped text
-                cell = ws.cell(row=row_idx, column=col_idx)
-                if cell.value:
-                    cell_value = str(cell.value)
-                    column_letter = get_column_letter(col_idx)
-                    column_width = ws.column_dimensions[column_letter].width
-                    chars_per_line = max(1, int(column_width * 7))
-                    lines = len(cell_value.split('\n'))
-                    estimated_lines = max(lines, (len(cell_value) // chars_per_line) + 1)
-                    row_height = max(max_height, estimated_lines * 15)
-                    max_height = row_height
-            
-            ws.row_dimensions[row_idx].height = max_height
-        
-        # Create response
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'item_request_reports_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        )
+                ws.append(["Date Range: All dates (no filter applied)"])
+            
+            total_cell = WriteOnlyCell(ws, value=f"Total Amount: OMR {total_amount:.3f}")
+            total_cell.font = Font(size=12, bold=True)
+            ws.append([total_cell])
+            ws.append([])
+            
+            header_font = Font(bold=True)
+            header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+            header_alignment = Alignment(horizontal="center", vertical="center")
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=str(header))
+                cell.font = header_font
+                cell.fill = header_fill
+                cell.alignment = header_alignment
+                header_cells.append(cell)
+            ws.row_dimensions[7].height = xlsx_wrapped_row_height(headers, widths, fit_multiline_cols)
+            ws.append(header_cells)
+            del ws.row_dimensions[7]
+            
+            # Data rows from the spooled first pass
+            amount_alignment = Alignment(horizontal='right', vertical='top')
+            wrap_alignment = Alignment(wrap_text=True, vertical='top')
+            text_alignment = Alignment(vertical='top', horizontal='left')
+            for row_idx, values in enumerate(iter_export_rows(iter_spooled_rows(spool), row_total, 'Writing rows'), 8):
+                cells = []
+                for col, value in enumerate(values, 1):
+                    cell = WriteOnlyCell(ws, value=value)
+                    if col == amount_col:
+                        cell.number_format = '#,##0.000'
+                        cell.alignment = amount_alignment
+                    elif col in wrap_cols:
+                        cell.alignment = wrap_alignment
+                    else:
+                        cell.alignment = text_alignment
+                    cells.append(cell)
+                # Auto-adjust row heights for rows with wrapped text
+                ws.row_dimensions[row_idx].height = xlsx_wrapped_row_height(values, widths, fit_multiline_cols)
+                ws.append(cells)
+                del ws.row_dimensions[row_idx]
+        
+        return send_xlsx_workbook(wb, f'item_request_reports_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
     except Exception as e:
         flash(f'Error generating Excel export: {str(e)}', 'error')
         return redirect(url_for('item_request_reports', **request.args))
@@ -21552,13 +21449,10 @@ def export_item_request_reports_excel():
 @app.route('/export/item-request-reports/pdf')
 @login_required
 def export_item_request_reports_pdf():
-    """Export item request reports to PDF using canvas approach (matching payment reports)"""
-    import io
-    import os
+    """Export item request reports to PDF (same table layout as the payment reports PDF)"""
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
         from reportlab.lib.units import mm
+        from pdf_reports import PdfTableReport
     except ImportError:
         flash('PDF export requires reportlab. Install with: pip install reportlab', 'warning')
         return redirect(url_for('item_request_reports', **request.args))
@@ -21655,9 +21549,6 @@ def export_item_request_reports_pdf():
             ProcurementItemRequest.completion_date <= datetime.strptime(date_to, '%Y-%m-%d')
         )
     
-    # Get all filtered requests
-    result_requests = query.order_by(ProcurementItemRequest.created_at.desc()).all()
-    
     # Helper function to convert to float
     def to_float(value):
         try:
@@ -21670,128 +21561,47 @@ def export_item_request_reports_pdf():
     # UNLESS those statuses are explicitly included in the status filter
     rejected_statuses = ['Rejected by Manager', 'Rejected by Procurement Manager']
     has_rejected_filter = status_filter and any(status in rejected_statuses for status in status_filter)
-    
-    if has_rejected_filter:
-        # If rejected statuses are in the filter, include all requests in total
-        total_amount = sum(to_float(r.receipt_amount) for r in result_requests)
+    total_query = query.with_entities(func.sum(ProcurementItemRequest.receipt_amount))
+    if not has_rejected_filter:
+        total_query = total_query.filter(db.or_(
+            ProcurementItemRequest.status.is_(None),
+            ProcurementItemRequest.status.notin_(rejected_statuses)
+        ))
+    total_amount = float(total_query.scalar() or 0)
+    
+    # Table header (include Completion Date)
+    headers = ['ID']
+    col_widths = [12*mm]
+    # Include Ref. No. only for Auditing users
+    is_auditing = current_user.department == 'Auditing' or current_user.role == 'Auditing Staff'
+    if is_auditing:
+        headers.append('Ref. No.')
+        col_widths.append(14*mm)
+    headers += ['Category', 'Item Name', 'Quantity', 'Requestor', 'Department', 'Branch', 'Request Date', 'Completion Date', 'Status', 'Amount', 'Assigned To']
+    col_widths += [16*mm, 26*mm, 14*mm, 18*mm, 16*mm, 20*mm, 18*mm, 18*mm, 17*mm, 14*mm, 18*mm]
+    
+    # Date scope
+    if date_from and date_to:
+        date_scope = f"Date Range: {date_from} to {date_to}"
+    elif date_from:
+        date_scope = f"Date From: {date_from} (no end date)"
+    elif date_to:
+        date_scope = f"Date To: {date_to} (no start date)"
     else:
-        # Exclude rejected requests from total amount
-        total_amount = sum(
-            to_float(r.receipt_amount) 
-            for r in result_requests 
-            if r.status not in rejected_statuses
-        )
+        date_scope = "Date Range: All dates (no filter applied)"
+    info_lines = [
+        f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+        f"Dept: {', '.join(department_filter) if department_filter else 'All'} | Category: {', '.join(category_filter) if category_filter else 'All'} | Branch: {', '.join(branch_filter) if branch_filter else 'All'} | Status: {', '.join(status_filter) if status_filter else 'All'}",
+        date_scope,
+    ]
     
     try:
-        # Build PDF in landscape orientation (matching payment reports)
-        buffer = io.BytesIO()
-        from reportlab.lib.pagesizes import landscape
-        c = canvas.Canvas(buffer, pagesize=landscape(A4))
-        width, height = landscape(A4)
-        
-        body_font = 'Helvetica'
-        
-        # Margins
-        left = 8 * mm
-        right = width - 8 * mm
-        top = height - 8 * mm
-        y = top
-        
-        # Header
-        c.setFont('Helvetica-Bold', 14)
-        c.drawString(left, y, 'Item Request Reports')
-        c.setFont(body_font, 10)
-        y -= 14
-        
-        # Report generation date
-        generation_date = datetime.now().strftime('%Y-%m-%d %H:%M')
-        c.drawString(left, y, f"Report Generated: {generation_date}")
-        y -= 12
-        
-        # Filters
-        filters_line = f"Dept: {', '.join(department_filter) if department_filter else 'All'} | Category: {', '.join(category_filter) if category_filter else 'All'} | Branch: {', '.join(branch_filter) if branch_filter else 'All'} | Status: {', '.join(status_filter) if status_filter else 'All'}"
-        c.drawString(left, y, filters_line)
-        y -= 12
-        
-        # Date scope
-        if date_from and date_to:
-            c.drawString(left, y, f"Date Range: {date_from} to {date_to}")
-        elif date_from:
-            c.drawString(left, y, f"Date From: {date_from} (no end date)")
-        elif date_to:
-            c.drawString(left, y, f"Date To: {date_to} (no start date)")
-        else:
-            c.drawString(left, y, "Date Range: All dates (no filter applied)")
-        y -= 12
-        
-        # Total amount
-        c.setFont('Helvetica-Bold', 11)
-        c.drawString(left, y, f"Total Amount: OMR {total_amount:.3f}")
-        y -= 18
-        
-        # Table header (include Completion Date)
-        c.setFont('Helvetica-Bold', 9)
-        headers = ['ID']
-        col_widths = [12*mm]
-        # Include Ref. No. only for Auditing users
-        if current_user.department == 'Auditing' or current_user.role == 'Auditing Staff':
-            headers.append('Ref. No.')
-            col_widths.append(14*mm)
-        headers += ['Category', 'Item Name', 'Quantity', 'Requestor', 'Department', 'Branch', 'Request Date', 'Completion Date', 'Status', 'Amount', 'Assigned To']
-        col_widths += [16*mm, 26*mm, 14*mm, 18*mm, 16*mm, 20*mm, 18*mm, 18*mm, 17*mm, 14*mm, 18*mm]
-        column_gap = 4 * mm
-        col_x = [left]
-        for i in range(1, len(col_widths)):
-            col_x.append(col_x[i-1] + col_widths[i-1] + column_gap)
-        
-        for i, (hx, text) in enumerate(zip(col_x, headers)):
-            c.drawString(hx, y, text)
-        y -= 10
-        c.line(left, y, right, y)
-        y -= 8
-        
-        # Helper function to wrap text
-        def wrap_text(text, max_width, font_name='Helvetica', font_size=9):
-            """Wrap text to fit within specified width"""
-            s = '' if text is None else str(text)
-            if not s:
-                return ['']
-            
-            try:
-                from reportlab.pdfbase import pdfmetrics
-                def string_width(t):
-                    return pdfmetrics.stringWidth(t, font_name, font_size)
-            except:
-                def string_width(t):
-                    return len(t) * font_size * 0.5
-            
-            effective_width = max_width - 2*mm
-            words = s.split()
-            wrapped_lines = []
-            current = ''
-            
-            for word in words:
-                candidate = (current + ' ' + word).strip()
-                if current and string_width(candidate) > effective_width:
-                    wrapped_lines.append(current)
-                    current = word
-                else:
-                    current = candidate
-            
-            if current:
-                wrapped_lines.append(current)
-            
-            return wrapped_lines or ['']
-        
-        # Rows
-        c.setFont(body_font, 9)
-        row_height = 10
-        bottom_margin = 15 * mm
-        for r in result_requests:
-            # Calculate maximum height needed for this row
-            max_height = 0
-            wrapped_lines_per_col = []
-            
+        # Same layout as the payment reports PDF (landscape); pages are drawn as the requests are read in chunks
+        output = tempfile.TemporaryFile()
+        report = PdfTableReport(output, app.root_path, 'Item Request Reports', info_lines,
+                                f"Total Amount: OMR {total_amount:.3f}", headers, col_widths)
+        rows = query.order_by(ProcurementItemRequest.created_at.desc()).yield_per(REPORT_EXPORT_CHUNK_SIZE)
+        for r in iter_export_rows(rows, export_job_row_total(query), 'Drawing rows'):
             # Get quantity from assigned procurement staff (preferred), then manager, then original
             quantity_source = r.assigned_procurement_quantities or r.procurement_manager_quantities or r.procurement_quantities or r.quantity or ''
             
@@ -21824,70 +21634,32 @@ def export_item_request_reports_pdf():
                             filtered_items.append(item_trimmed)
                             filtered_quantities.append(qty_val)
             
-            item_display = '\n'.join(filtered_items) if filtered_items else ''
-            quantity_display = '\n'.join(filtered_quantities) if filtered_quantities else ''
-            
             # Format Branch with line breaks instead of commas
             branches = (r.branch_name or '').split(',')
-            branch_display = '\n'.join([branch.strip() for branch in branches if branch.strip()]) if branches else ''
+            branch_display = '\n'.join([branch.strip() for branch in branches if branch.strip()])
             
             row_data = [f"#{r.id}"]
-            if current_user.department == 'Auditing' or current_user.role == 'Auditing Staff':
+            if is_auditing:
                 row_data.append(str(r.receipt_reference_number or ''))
             row_data += [
                 str(r.category or ''),
-                item_display or '',
-                quantity_display or '',
+                '\n'.join(filtered_items),
+                '\n'.join(filtered_quantities),
                 str(r.requestor_name or ''),
                 str(r.department or ''),
-                branch_display or '',
+                branch_display,
                 r.request_date.strftime('%Y-%m-%d') if r.request_date else '-',
                 r.completion_date.strftime('%Y-%m-%d') if getattr(r, 'completion_date', None) else '-',
                 str(r.status or ''),
                 f"OMR {to_float(r.receipt_amount):.3f}",
                 str(r.assigned_to_user.name if r.assigned_to_user else '')
             ]
-            
-            # Pre-wrap and measure
-            for i, (data, width) in enumerate(zip(row_data, col_widths)):
-                if data:
-                    lines = wrap_text(str(data), width, body_font, 9)
-                else:
-                    lines = ['']
-                wrapped_lines_per_col.append(lines)
-                max_height = max(max_height, len(lines) * 10)
-            
-            # If row overflows page, create new page
-            if y - max_height < bottom_margin:
-                c.showPage()
-                y = top
-                c.setFont('Helvetica-Bold', 9)
-                for i, (hx, text) in enumerate(zip(col_x, headers)):
-                    c.drawString(hx, y, text)
-                y -= 10
-                c.line(left, y, right, y)
-                y -= 8
-                c.setFont(body_font, 9)
-            
-            # Draw columns
-            for i, lines in enumerate(wrapped_lines_per_col):
-                for j, line in enumerate(lines):
-                    c.drawString(col_x[i], y - (j * 10), line)
-            
-            y -= max_height + 3
-        
-        c.showPage()
-        c.save()
-        pdf_value = buffer.getvalue()
-        buffer.close()
-        
-        from flask import make_response
-        response = make_response(pdf_value)
-        response.headers['Content-Type'] = 'application/pdf'
+            report.add_row(row_data)
+        report.finish()
+        output.seek(0)
+        
         ts = datetime.now().strftime('%Y-%m-%d_%H-%M')
-        response.headers['Content-Disposition'] = f'attachment; filename=item_request_reports_{ts}.pdf'
-        response.headers['Content-Length'] = str(len(pdf_value))
-        return response
+        return send_file(output, mimetype='application/pdf', as_attachment=True, download_name=f'item_request_reports_{ts}.pdf')
         
     except Exception as e:
         flash(f'Error generating PDF: {str(e)}', 'error')
@@ -22345,9 +22117,9 @@ def api_person_company_options():
 def export_reports_excel():
     """Export filtered reports to an Excel file with frozen columns"""
     # Lazy imports to avoid hard dependency during app startup
-    import io
     try:
         import openpyxl
+        from openpyxl.cell import WriteOnlyCell
         from openpyxl.styles import Font, PatternFill, Alignment
         from openpyxl.utils import get_column_letter
     except ImportError:
@@ -22427,38 +22199,9 @@ def export_reports_excel():
         if company_conditions:
             query = query.filter(db.or_(*company_conditions))
     if branch_filter:
-        # Alias-aware branch filtering for Excel export
-        # Handle multiple branch filters
-        all_branch_conditions = []
-        for branch_name in branch_filter:
-            selected_branch = Branch.query.filter_by(name=branch_name).first()
-            if selected_branch:
-                alias_names = [a.alias_name for a in getattr(selected_branch, 'aliases', [])]
-                names = [selected_branch.name] + alias_names
-                # Build OR conditions to match if any name appears in the comma-separated branch_name
-                conditions = []
-                for name in names:
-                    # Match exact, at start (with comma after), at end (with comma before), or in middle (with commas around)
-                    conditions.append(PaymentRequest.branch_name == name)  # Exact match
-                    conditions.append(PaymentRequest.branch_name.like(f'{name},%'))  # At start
-                    conditions.append(PaymentRequest.branch_name.like(f'%, {name}'))  # At end (with space after comma)
-                    conditions.append(PaymentRequest.branch_name.like(f'%,{name}'))  # At end (no space)
-                    conditions.append(PaymentRequest.branch_name.like(f'%, {name},%'))  # In middle (with spaces)
-                    conditions.append(PaymentRequest.branch_name.like(f'%,{name},%'))  # In middle (no spaces)
-                all_branch_conditions.append(db.or_(*conditions))
-            else:
-                # For non-alias branches, check if branch name appears in comma-separated list
-                conditions = [
-                    PaymentRequest.branch_name == branch_name,  # Exact match
-                    PaymentRequest.branch_name.like(f'{branch_name},%'),  # At start
-                    PaymentRequest.branch_name.like(f'%, {branch_name}'),  # At end (with space)
-                    PaymentRequest.branch_name.like(f'%,{branch_name}'),  # At end (no space)
-                    PaymentRequest.branch_name.like(f'%, {branch_name},%'),  # In middle (with spaces)
-                    PaymentRequest.branch_name.like(f'%,{branch_name},%')  # In middle (no spaces)
-                ]
-                all_branch_conditions.append(db.or_(*conditions))
-        if all_branch_conditions:
-            query = query.filter(db.or_(*all_branch_conditions))
+        # Alias-aware branch filtering: any of the request's branches (request_branch_allocations)
+        # is a selected branch or one of its aliases
+        query = query.filter(payment_request_branch_filter(branch_filter))
     # Branch type filter (handle multiple values)
     if branch_type_filter:
         query = query.filter(PaymentRequest.branch_type.in_(branch_type_filter))
@@ -22505,311 +22248,219 @@ def export_reports_excel():
             PaymentRequest.completion_date <= datetime.strptime(date_to, '%Y-%m-%d').date()
         )
 
-    result_requests = query.order_by(PaymentRequest.date.desc()).all()
+    is_auditing = current_user.department == 'Auditing' or current_user.role == 'Auditing Staff'
 
-    # Helper function to convert to float
-    def to_float(value):
-        try:
-            return float(value)
-        except Exception:
-            return 0.0
+    # Helper function to format duration
+    def format_duration(seconds):
+        """Format duration in seconds to readable format (H:MM:SS)"""
+        if not seconds:
+            return ''
+        
+        hours = seconds // 3600
+        minutes = (seconds % 3600) // 60
+        secs = seconds % 60
+        
+        return f"{hours}:{minutes:02d}:{secs:02d}"
 
-    # Sum all amounts (requests may be in any status); use total_display_amount (requestor + finance extra)
-    total_amount = sum(r.total_display_amount for r in result_requests)
+    def format_date(value):
+        """Submitted / Approved column text"""
+        if not value:
+            return ''
+        try:
+            if isinstance(value, datetime):
+                return value.date().strftime('%Y-%m-%d')
+            elif isinstance(value, date):
+                return value.strftime('%Y-%m-%d')
+            return str(value)
+        except Exception:
+            return ''
 
-    try:
-        # Create Excel workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Payment Reports"
-
-        # Add report header information
-        ws['A1'] = 'Payment Reports'
-        ws['A1'].font = Font(size=16, bold=True)
-        
-        generation_date = datetime.now().strftime('%Y-%m-%d %H:%M')
-        ws['A2'] = f"Report Generated: {generation_date}"
-        
-        # Build comprehensive filters line (handle multiple values)
-        filter_parts = []
-        filter_parts.append(f"Dept: {', '.join(department_filter) if department_filter else 'All'}")
-        filter_parts.append(f"Type: {', '.join(request_type_filter) if request_type_filter else 'All'}")
-        filter_parts.append(f"Branch: {', '.join(branch_filter) if branch_filter else 'All'}")
-        filter_parts.append(f"Company: {', '.join(company_filter) if company_filter else 'All'}")
-        filter_parts.append(f"Payment Type: {', '.join(payment_type_filter) if payment_type_filter else 'All'}")
-        filter_parts.append(f"Payment Method: {', '.join(payment_method_filter) if payment_method_filter else 'All'}")
-        filter_parts.append(f"Status: {', '.join(status_filter) if status_filter else 'All'}")
-        filters_line = " | ".join(filter_parts)
-        ws['A3'] = filters_line
-        
-        # Date scope
-        if date_from and date_to:
-            ws['A4'] = f"Date Range: {date_from} to {date_to}"
-        elif date_from:
-            ws['A4'] = f"Date From: {date_from} (no end date)"
-        elif date_to:
-            ws['A4'] = f"Date To: {date_to} (no start date)"
+    def row_values(r):
+        """Cell values of one request's row (the Amount column as a float, the rest as text)"""
+        # Determine payment type display
+        if r.recurring == 'Recurring':
+            payment_type_display = 'Recurring'
+        elif r.payment_date or r.recurring == 'Scheduled One-Time':
+            payment_type_display = 'Scheduled One-Time'
         else:
-            ws['A4'] = "Date Range: All dates (no filter applied)"
-        
-        ws['A5'] = f"Total Amount: OMR {total_amount:.3f}"
-        ws['A5'].font = Font(size=12, bold=True)
-
-        # Add headers starting from row 7 (removed 'Scheduled' column)
-        headers = ['ID']
-        # Include Ref. No. only for Auditing users
-        if current_user.department == 'Auditing' or current_user.role == 'Auditing Staff':
-            headers.append('Ref. No.')
-        headers += ['Type', 'Requestor', 'Department', 'Payment Type', 'Payment Method', 'Amount', 'Branch', 'Branch Type', 'Company', 'Submitted', 'Approved', 'Approver', 'Manager Duration', 'Finance Duration']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=7, column=col, value=str(header))
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-            # Ensure header row has proper height
-            ws.row_dimensions[7].height = 20
-
-        # Helper function to format duration
-        def format_duration(seconds):
-            """Format duration in seconds to readable format (H:MM:SS)"""
-            if not seconds:
-                return ''
-            
-            hours = seconds // 3600
-            minutes = (seconds % 3600) // 60
-            secs = seconds % 60
-            
-            return f"{hours}:{minutes:02d}:{secs:02d}"
-
-        # Add data rows
-        for row_idx, r in enumerate(result_requests, 8):
-            # For Approved column: format as string (like before) to ensure immediate rendering
-            approved_date_str = ''
-            if getattr(r, 'approval_date', None):
-                approval_val = r.approval_date
-                try:
-                    if isinstance(approval_val, datetime):
-                        approved_date_str = approval_val.date().strftime('%Y-%m-%d')
-                    elif isinstance(approval_val, date):
-                        approved_date_str = approval_val.strftime('%Y-%m-%d')
-                    elif isinstance(approval_val, str):
-                        approved_date_str = approval_val
-                    else:
-                        approved_date_str = str(approval_val)
-                except:
-                    approved_date_str = ''
-            
-            # For Submitted column: format as string (like before) to ensure immediate rendering
-            submitted_date_str = ''
-            if getattr(r, 'date', None):
-                date_val = r.date
-                try:
-                    if isinstance(date_val, datetime):
-                        submitted_date_str = date_val.date().strftime('%Y-%m-%d')
-                    elif isinstance(date_val, date):
-                        submitted_date_str = date_val.strftime('%Y-%m-%d')
-                    elif isinstance(date_val, str):
-                        submitted_date_str = date_val
-                    else:
-                        submitted_date_str = str(date_val)
-                except:
-                    submitted_date_str = ''
-            
-            # For Person/Company column, show person_company field only
-            company_display = r.person_company
-            
-            # Format duration columns
-            manager_duration = format_duration(r.manager_approval_duration_minutes)
-            finance_duration = format_duration(r.finance_approval_duration_minutes)
-            
-            scheduled_date = ''
-            if r.recurring == 'Recurring':
-                # Get scheduled dates for recurring payments
-                scheduled_date = get_recurring_scheduled_dates(r)
-            elif (not getattr(r, 'recurring', None) or getattr(r, 'recurring', None) != 'Recurring') and getattr(r, 'payment_date', None):
-                try:
-                    scheduled_date = r.payment_date.strftime('%Y-%m-%d')
-                except Exception:
-                    scheduled_date = str(r.payment_date)
-
-            # Determine payment type display
-            if r.recurring == 'Recurring':
-                payment_type_display = 'Recurring'
-            elif r.payment_date or r.recurring == 'Scheduled One-Time':
-                payment_type_display = 'Scheduled One-Time'
+            payment_type_display = r.recurring or 'One-Time'
+        
+        # Format branch_type for display
+        branch_type_display = ''
+        if r.branch_type:
+            if r.branch_type == 'branch':
+                branch_type_display = 'Branch'
+            elif r.branch_type == 'flats':
+                branch_type_display = 'Flats'
             else:
-                payment_type_display = r.recurring or 'One-Time'
-            
-            # Calculate amount value explicitly as float to ensure it's numeric
-            amount_value = r.total_display_amount
-            if amount_value is None:
-                amount_value = 0.0
-            
-            # Scheduled removed from export; build row data and include Ref. No. for Auditing users
-            row_data = [f"#{r.request_id}"]
-            if current_user.department == 'Auditing' or current_user.role == 'Auditing Staff':
-                row_data.append(str(r.reference_number or ''))
-            # Format branch_type for display
-            branch_type_display = ''
-            if r.branch_type:
-                if r.branch_type == 'branch':
-                    branch_type_display = 'Branch'
-                elif r.branch_type == 'flats':
-                    branch_type_display = 'Flats'
-                else:
-                    branch_type_display = str(r.branch_type)
-            row_data += [
-                str(r.request_type or ''),
-                str(r.requestor_name or ''),
-                str(r.department or ''),
-                payment_type_display,
-                str(r.payment_method or 'Card'),
-                amount_value,  # Amount column (depends on presence of Ref. No.)
-                str(r.branch_name or '').replace(',', ', '),
-                branch_type_display,
-                str(company_display or ''),
-                submitted_date_str,  # Submitted column
-                approved_date_str,   # Approved column
-                str(r.approver or ''),
-                manager_duration,
-                finance_duration
-            ]
-            
-            for col, data in enumerate(row_data, 1):
-                # For Amount column, explicitly set as float to ensure Excel treats it as number
-                # Column indices updated after adding Branch Type column
-                amount_col_index = 8 if (current_user.department == 'Auditing' or current_user.role == 'Auditing Staff') else 7
-                submitted_col_index = 12 if (current_user.department == 'Auditing' or current_user.role == 'Auditing Staff') else 11
-                approved_col_index = 13 if (current_user.department == 'Auditing' or current_user.role == 'Auditing Staff') else 12
-
-                if col == amount_col_index:
-                    # Ensure the value is a proper float, not string or None
-                    numeric_value = float(amount_value) if amount_value is not None else 0.0
-                    cell = ws.cell(row=row_idx, column=col, value=numeric_value)
-                    cell.number_format = '#,##0.000'
-                    cell.alignment = Alignment(horizontal='right', vertical='top')
-                # For Submitted date column - store as string for immediate rendering
-                elif col == submitted_col_index:
-                    cell = ws.cell(row=row_idx, column=col, value=str(data) if data else '')
-                    cell.alignment = Alignment(horizontal='left', vertical='top')
-                # For Approved date column - store as string
-                elif col == approved_col_index:
-                    cell = ws.cell(row=row_idx, column=col, value=str(data) if data else '')
-                    cell.alignment = Alignment(horizontal='left', vertical='top')
-                else:
-                    cell = ws.cell(row=row_idx, column=col, value=str(data) if data is not None else '')
-                    # Enable text wrapping for columns that may have long text (Branch, Company)
-                    # Branch, Branch Type, and Company indices changed when Ref. No. is present
-                    branch_col = 9 if (current_user.department == 'Auditing' or current_user.role == 'Auditing Staff') else 8
-                    company_col = 11 if (current_user.department == 'Auditing' or current_user.role == 'Auditing Staff') else 10
-                    if col in [branch_col, company_col]:
-                        cell.alignment = Alignment(wrap_text=True, vertical='top')
-                    else:
-                        cell.alignment = Alignment(vertical='top', horizontal='left')
+                branch_type_display = str(r.branch_type)
+        
+        # Include Ref. No. for Auditing users
+        row_data = [f"#{r.request_id}"]
+        if is_auditing:
+            row_data.append(str(r.reference_number or ''))
+        row_data += [
+            str(r.request_type or ''),
+            str(r.requestor_name or ''),
+            str(r.department or ''),
+            payment_type_display,
+            str(r.payment_method or 'Card'),
+            float(r.total_display_amount),  # Amount column (depends on presence of Ref. No.)
+            str(r.branch_name or '').replace(',', ', '),
+            branch_type_display,
+            str(r.person_company or ''),  # Person/Company column shows person_company only
+            format_date(getattr(r, 'date', None)),  # Submitted column
+            format_date(getattr(r, 'approval_date', None)),  # Approved column
+            str(r.approver or ''),
+            format_duration(r.manager_approval_duration_minutes),
+            format_duration(r.finance_approval_duration_minutes)
+        ]
+        return row_data
+
+    # Headers (removed 'Scheduled' column); Ref. No. only for Auditing users
+    headers = ['ID']
+    if is_auditing:
+        headers.append('Ref. No.')
+    headers += ['Type', 'Requestor', 'Department', 'Payment Type', 'Payment Method', 'Amount', 'Branch', 'Branch Type', 'Company', 'Submitted', 'Approved', 'Approver', 'Manager Duration', 'Finance Duration']
+    # Column indices depend on presence of Ref. No.
+    amount_col = 8 if is_auditing else 7
+    wrap_cols = (9, 11) if is_auditing else (8, 10)  # Branch, Company
+    fit_multiline_cols = (9, 10)  # Auto-fit and row heights look at these columns
 
-        # Auto-adjust column widths - fix iteration to properly get column index
-        for col_idx in range(1, len(headers) + 1):
-            max_length = 0
-            column_letter = get_column_letter(col_idx)
-            
-            # Check all cells in this column (including header row 7 and all data rows)
-            for row in range(7, ws.max_row + 1):
-                cell = ws.cell(row=row, column=col_idx)
-                try:
-                    cell_value = str(cell.value) if cell.value is not None else ''
-                    # For wrapped text columns, estimate width needed (divide by 2 for multi-line)
-                    if col_idx in [9, 10]:  # Branch Name, Company
-                        # Count newlines and estimate width
-                        lines = cell_value.split('\n')
-                        max_line_length = max(len(line) for line in lines) if lines else 0
-                        max_length = max(max_length, max_line_length)
-                    else:
-                        max_length = max(max_length, len(cell_value))
-                except:
-                    pass
-            
-            # Special handling for specific columns (adjusted after removing Scheduled)
-            if column_letter == 'A':  # ID column - make it narrower
-                adjusted_width = min(max_length + 2, 12)  # Cap ID column at 12 characters
-            elif column_letter == 'D':  # Department column - make it wider
-                adjusted_width = min(max_length + 2, 25)  # Cap Department column at 25 characters
-            elif column_letter == 'H':  # Amount column - make it wider to accommodate "OMR #,##0.000" format
-                adjusted_width = max(max_length + 2, 20)  # Minimum 20 characters, can grow if needed
-            elif column_letter == 'I':  # Branch column
-                adjusted_width = min(max_length + 2, 30)
-            elif column_letter == 'J':  # Company column
-                adjusted_width = min(max_length + 2, 30)
-            elif column_letter == 'M':  # Approver column - make it wider
-                adjusted_width = min(max_length + 2, 35)  # Cap Approver column at 35 characters
-            elif column_letter in ['N', 'O']:  # Duration columns - make them narrower
-                adjusted_width = min(max_length + 2, 15)  # Cap duration columns at 15 characters
+    try:
+        # First pass: stream the requests in chunks into a temporary file, collecting the total and
+        # the longest text per column (both are written before the first data row)
+        max_lengths = [xlsx_text_length(header, col in fit_multiline_cols) for col, header in enumerate(headers, 1)]
+        total_amount = 0.0
+        row_total = export_job_row_total(query)
+        with tempfile.TemporaryFile() as spool:
+            rows = query.order_by(PaymentRequest.date.desc()).yield_per(REPORT_EXPORT_CHUNK_SIZE)
+            for r in iter_export_rows(rows, row_total, 'Reading requests'):
+                values = row_values(r)
+                # Sum all amounts (requests may be in any status); use total_display_amount (requestor + finance extra)
+                total_amount += values[amount_col - 1]
+                for col, value in enumerate(values, 1):
+                    max_lengths[col - 1] = max(max_lengths[col - 1], xlsx_text_length(value, col in fit_multiline_cols))
+                pickle.dump(values, spool, pickle.HIGHEST_PROTOCOL)
+
+            # Auto-adjust column widths
+            widths = []
+            for col_idx, max_length in enumerate(max_lengths, 1):
+                column_letter = get_column_letter(col_idx)
+                # Special handling for specific columns (adjusted after removing Scheduled)
+                if column_letter == 'A':  # ID column - make it narrower
+                    adjusted_width = min(max_length + 2, 12)  # Cap ID column at 12 characters
+                elif column_letter == 'D':  # Department column - make it wider
+                    adjusted_width = min(max_length + 2, 25)  # Cap Department column at 25 characters
+                elif column_letter == 'H':  # Amount column - make it wider to accommodate "OMR #,##0.000" format
+                    adjusted_width = max(max_length + 2, 20)  # Minimum 20 characters, can grow if needed
+                elif column_letter == 'I':  # Branch column
+                    adjusted_width = min(max_length + 2, 30)
+                elif column_letter == 'J':  # Company column
+                    adjusted_width = min(max_length + 2, 30)
+                elif column_letter == 'M':  # Approver column - make it wider
+                    adjusted_width = min(max_length + 2, 35)  # Cap Approver column at 35 characters
+                elif column_letter in ['N', 'O']:  # Duration columns - make them narrower
+                    adjusted_width = min(max_length + 2, 15)  # Cap duration columns at 15 characters
+                else:
+                    adjusted_width = min(max_length + 2, 50)  # Cap other columns at 50 characters
+                
+                # Ensure minimum width
+                widths.append(max(adjusted_width, 10))
+
+            # Second pass: write-only workbook, rows are written to disk as they are appended.
+            # Column widths have to be set before the first row.
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet("Payment Reports")
+            for col_idx, width in enumerate(widths, 1):
+                ws.column_dimensions[get_column_letter(col_idx)].width = width
+            # Ensure date columns have proper width to display dates fully
+            # Adjust Submitted/Approved columns after header changes
+            for column_letter in (('K', 'L') if is_auditing else ('J', 'K')):
+                ws.column_dimensions[column_letter].width = max(ws.column_dimensions[column_letter].width or 10, 12)
+
+            # Report header information
+            title_cell = WriteOnlyCell(ws, value='Payment Reports')
+            title_cell.font = Font(size=16, bold=True)
+            ws.append([title_cell])
+            
+            generation_date = datetime.now().strftime('%Y-%m-%d %H:%M')
+            ws.append([f"Report Generated: {generation_date}"])
+            
+            # Build comprehensive filters line (handle multiple values)
+            filter_parts = []
+            filter_parts.append(f"Dept: {', '.join(department_filter) if department_filter else 'All'}")
+            filter_parts.append(f"Type: {', '.join(request_type_filter) if request_type_filter else 'All'}")
+            filter_parts.append(f"Branch: {', '.join(branch_filter) if branch_filter else 'All'}")
+            filter_parts.append(f"Company: {', '.join(company_filter) if company_filter else 'All'}")
+            filter_parts.append(f"Payment Type: {', '.join(payment_type_filter) if payment_type_filter else 'All'}")
+            filter_parts.append(f"Payment Method: {', '.join(payment_method_filter) if payment_method_filter else 'All'}")
+            filter_parts.append(f"Status: {', '.join(status_filter) if status_filter else 'All'}")
+            ws.append([" | ".join(filter_parts)])
+            
+            # Date scope
+            if date_from and date_to:
+                ws.append([f"Date Range: {date_from} to {date_to}"])
+            elif date_from:
+                ws.append([f"Date From: {date_from} (no end date)"])
+            elif date_to:
+                ws.append([f"Date To: {date_to} (no start date)"])
             else:
-                adjusted_width = min(max_length + 2, 50)  # Cap other columns at 50 characters
-            
-            # Ensure minimum width
-            adjusted_width = max(adjusted_width, 10)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Auto-adjust row heights for rows with wrapped text
-        for row_idx in range(7, ws.max_row + 1):
-            max_height = 15  # Default row height
-            for col_idx in [9, 10]:  # Columns with wrapped text
-                cell = ws.cell(row=row_idx, column=col_idx)
-                if cell.value:
-                    cell_value = str(cell.value)
-                    # Count lines (including wrapped lines based on column width)
-                    column_letter = get_column_letter(col_idx)
-                    column_width = ws.column_dimensions[column_letter].width
-                    # Estimate lines needed (rough calculation: ~7 characters per unit width)
-                    chars_per_line = max(1, int(column_width * 7))
-                    lines = len(cell_value.split('\n'))
-                    estimated_lines = max(lines, (len(cell_value) // chars_per_line) + 1)
-                    # Row height: ~15 points per line
-                    row_height = max(max_height, estimated_lines * 15)
-                    max_height = row_height
-            
-            ws.row_dimensions[row_idx].height = max_height
+                ws.append(["Date Range: All dates (no filter applied)"])
+            
+            total_cell = WriteOnlyCell(ws, value=f"Total Amount: OMR {total_amount:.3f}")
+            total_cell.font = Font(size=12, bold=True)
+            ws.append([total_cell])
+            ws.append([])
+
+            # Headers in row 7
+            header_font = Font(bold=True)
+            header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+            header_alignment = Alignment(horizontal="center", vertical="center")
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=str(header))
+                cell.font = header_font
+                cell.fill = header_fill
+                cell.alignment = header_alignment
+                header_cells.append(cell)
+            ws.row_dimensions[7].height = xlsx_wrapped_row_height(headers, widths, fit_multiline_cols)
+            ws.append(header_cells)
+            del ws.row_dimensions[7]
+
+            # Data rows from the spooled first pass
+            amount_alignment = Alignment(horizontal='right', vertical='top')
+            wrap_alignment = Alignment(wrap_text=True, vertical='top')
+            text_alignment = Alignment(vertical='top', horizontal='left')
+            for row_idx, values in enumerate(iter_export_rows(iter_spooled_rows(spool), row_total, 'Writing rows'), 8):
+                cells = []
+                for col, value in enumerate(values, 1):
+                    cell = WriteOnlyCell(ws, value=value)
+                    if col == amount_col:
+                        # Amount stays a float so Excel treats it as a number
+                        cell.number_format = '#,##0.000'
+                        cell.alignment = amount_alignment
+                    elif col in wrap_cols:
+                        # Enable text wrapping for columns that may have long text (Branch, Company)
+                        cell.alignment = wrap_alignment
+                    else:
+                        cell.alignment = text_alignment
+                    cells.append(cell)
+                # Auto-adjust row heights for rows with wrapped text
+                ws.row_dimensions[row_idx].height = xlsx_wrapped_row_height(values, widths, fit_multiline_cols)
+                ws.append(cells)
+                del ws.row_dimensions[row_idx]
 
         # No frozen panes - all columns can be scrolled freely
 
-        # Set workbook properties to help with date rendering
-        # Remove the post-processing loop - it might be causing the delay
-        # Instead, ensure dates are written correctly from the start
-        
-        # Ensure date columns have proper width to display dates fully
-        # Adjust Submitted/Approved columns after header changes
-        submitted_col_letter = 'K' if (current_user.department == 'Auditing' or current_user.role == 'Auditing Staff') else 'J'
-        approved_col_letter = 'L' if (current_user.department == 'Auditing' or current_user.role == 'Auditing Staff') else 'K'
-        j_width = ws.column_dimensions.get(submitted_col_letter).width if submitted_col_letter in ws.column_dimensions else None
-        k_width = ws.column_dimensions.get(approved_col_letter).width if approved_col_letter in ws.column_dimensions else None
-        ws.column_dimensions[submitted_col_letter].width = max(j_width or 10, 12)
-        ws.column_dimensions[approved_col_letter].width = max(k_width or 10, 12)
-        
         # Set workbook to use automatic calculation (helps with rendering)
         try:
             wb.calculation.calculateOnLoad = True
         except:
             pass
 
-        # Save to BytesIO with optimization settings
-        buffer = io.BytesIO()
-        # Save with write_only=False to ensure all cells are properly written
-        # This helps Excel recognize dates immediately
-        wb.save(buffer)
-        buffer.seek(0)
-        
-        # Note: The lazy rendering issue is often Excel client-side behavior
-        # Excel only renders visible cells initially for performance
-        # When you scroll, Excel renders the newly visible cells
-        # This is normal Excel behavior, not a bug in the file
-
-        from flask import make_response
-        response = make_response(buffer.getvalue())
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         ts = datetime.now().strftime('%Y-%m-%d_%H-%M')
-        response.headers['Content-Disposition'] = f'attachment; filename=reports_{ts}.xlsx'
-        response.headers['Content-Length'] = str(len(buffer.getvalue()))
-        return response
+        return send_xlsx_workbook(wb, f'reports_{ts}.xlsx')
         
     except Exception as e:
         flash(f'Error generating Excel: {str(e)}', 'error')
@@ -22822,14 +22473,9 @@ def export_reports_excel():
 def export_reports_pdf():
     """Export filtered reports to a PDF including total amount and full list"""
     # Lazy imports to avoid hard dependency during app startup
-    import io
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
         from reportlab.lib.units import mm
-        from reportlab.lib.utils import simpleSplit
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
+        from pdf_reports import PdfTableReport
     except ImportError:
         flash('PDF export requires reportlab. Install with: pip install reportlab', 'warning')
         return redirect(url_for('reports', **request.args))
@@ -22837,17 +22483,6 @@ def export_reports_pdf():
         flash(f'Error importing PDF library: {str(e)}', 'error')
         return redirect(url_for('reports', **request.args))
 
-    # Optional Arabic shaping dependencies (used if available)
-    try:
-        import os
-        import unicodedata
-        import re
-        import arabic_reshaper  # pip install arabic-reshaper
-        from bidi.algorithm import get_display  # pip install python-bidi
-    except Exception:
-        arabic_reshaper = None
-        get_display = None
-
     # Reuse the same filters as the reports() view (support multiple values)
     department_filter = request.args.getlist('department')
     request_type_filter = request.args.getlist('request_type')
@@ -22918,38 +22553,9 @@ def export_reports_pdf():
         if company_conditions:
             query = query.filter(db.or_(*company_conditions))
     if branch_filter:
-        # Alias-aware branch filtering for PDF export
-        # Handle multiple branch filters
-        all_branch_conditions = []
-        for branch_name in branch_filter:
-            selected_branch = Branch.query.filter_by(name=branch_name).first()
-            if selected_branch:
-                alias_names = [a.alias_name for a in getattr(selected_branch, 'aliases', [])]
-                names = [selected_branch.name] + alias_names
-                # Build OR conditions to match if any name appears in the comma-separated branch_name
-                conditions = []
-                for name in names:
-                    # Match exact, at start (with comma after), at end (with comma before), or in middle (with commas around)
-                    conditions.append(PaymentRequest.branch_name == name)  # Exact match
-                    conditions.append(PaymentRequest.branch_name.like(f'{name},%'))  # At start
-                    conditions.append(PaymentRequest.branch_name.like(f'%, {name}'))  # At end (with space after comma)
-                    conditions.append(PaymentRequest.branch_name.like(f'%,{name}'))  # At end (no space)
-                    conditions.append(PaymentRequest.branch_name.like(f'%, {name},%'))  # In middle (with spaces)
-                    conditions.append(PaymentRequest.branch_name.like(f'%,{name},%'))  # In middle (no spaces)
-                all_branch_conditions.append(db.or_(*conditions))
-            else:
-                # For non-alias branches, check if branch name appears in comma-separated list
-                conditions = [
-                    PaymentRequest.branch_name == branch_name,  # Exact match
-                    PaymentRequest.branch_name.like(f'{branch_name},%'),  # At start
-                    PaymentRequest.branch_name.like(f'%, {branch_name}'),  # At end (with space)
-                    PaymentRequest.branch_name.like(f'%,{branch_name}'),  # At end (no space)
-                    PaymentRequest.branch_name.like(f'%, {branch_name},%'),  # In middle (with spaces)
-                    PaymentRequest.branch_name.like(f'%,{branch_name},%')  # In middle (no spaces)
-                ]
-                all_branch_conditions.append(db.or_(*conditions))
-        if all_branch_conditions:
-            query = query.filter(db.or_(*all_branch_conditions))
+        # Alias-aware branch filtering: any of the request's branches (request_branch_allocations)
+        # is a selected branch or one of its aliases
+        query = query.filter(payment_request_branch_filter(branch_filter))
     
     # Branch type filter (handle multiple values)
     if branch_type_filter:
@@ -22999,250 +22605,49 @@ def export_reports_pdf():
         query = query.filter(PaymentRequest.completion_date.isnot(None)).filter(
             PaymentRequest.completion_date <= datetime.strptime(date_to, '%Y-%m-%d').date()
         )
-    result_requests = query.order_by(PaymentRequest.date.desc()).all()
-
-    # Helper function to convert to float
-    def to_float(value):
-        try:
-            return float(value)
-        except Exception:
-            return 0.0
-
     # Sum all amounts (requests may be in any status); use total_display_amount (requestor + finance extra)
-    total_amount = sum(r.total_display_amount for r in result_requests)
-
-    try:
-        # Build PDF in landscape orientation
-        buffer = io.BytesIO()
-        from reportlab.lib.pagesizes import landscape
-        c = canvas.Canvas(buffer, pagesize=landscape(A4))
-        width, height = landscape(A4)
-
-        # Register and select a font that supports Arabic if available
-        arabic_font_name = None
-        try:
-            # Candidate fonts: prefer bundled fonts, then system fonts (Windows/Linux/macOS)
-            font_candidates = [
-                # Project-bundled fonts
-                os.path.join(app.root_path, 'static', 'fonts', 'Amiri-Regular.ttf'),
-                os.path.join(app.root_path, 'static', 'fonts', 'NotoNaskhArabic-Regular.ttf'),
-                os.path.join(app.root_path, 'static', 'fonts', 'NotoSansArabic-Regular.ttf'),
-                os.path.join(app.root_path, 'static', 'fonts', 'Cairo-Regular.ttf'),
-                os.path.join(app.root_path, 'static', 'fonts', 'Tahoma.ttf'),
-                os.path.join(app.root_path, 'static', 'fonts', 'Arial.ttf'),
-                # Windows common fonts
-                r'C:\\Windows\\Fonts\\trado.ttf',            # Traditional Arabic
-                r'C:\\Windows\\Fonts\\Tahoma.ttf',
-                r'C:\\Windows\\Fonts\\arial.ttf',
-                r'C:\\Windows\\Fonts\\arialuni.ttf',        # Arial Unicode MS (if present)
-                r'C:\\Windows\\Fonts\\times.ttf',
-                r'C:\\Windows\\Fonts\\segoeui.ttf',
-                r'C:\\Windows\\Fonts\\segoeuib.ttf',
-                # Linux
-                '/usr/share/fonts/truetype/noto/NotoNaskhArabic-Regular.ttf',
-                '/usr/share/fonts/truetype/noto/NotoSansArabic-Regular.ttf',
-                '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-                # macOS
-                '/Library/Fonts/Arial Unicode.ttf',
-                '/Library/Fonts/Tahoma.ttf',
-                '/System/Library/Fonts/Supplemental/Times New Roman.ttf',
-            ]
-            for font_path in font_candidates:
-                if os.path.exists(font_path):
-                    try:
-                        pdfmetrics.registerFont(TTFont('ArabicFont', font_path))
-                        arabic_font_name = 'ArabicFont'
-                        break
-                    except Exception:
-                        continue
-        except Exception:
-            # If anything goes wrong, we will fall back to built-in fonts
-            arabic_font_name = None
-
-        # Use Arabic-capable font for all body text if available
-        body_font = arabic_font_name or 'Helvetica'
-
-        # Helpers for Arabic detection and shaping
-        def contains_arabic(text):
-            if not text:
-                return False
-            for ch in str(text):
-                code = ord(ch)
-                if (
-                    0x0600 <= code <= 0x06FF  # Arabic
-                    or 0x0750 <= code <= 0x077F  # Arabic Supplement
-                    or 0x08A0 <= code <= 0x08FF  # Arabic Extended-A
-                    or 0xFB50 <= code <= 0xFDFF  # Arabic Presentation Forms-A
-                    or 0xFE70 <= code <= 0xFEFF  # Arabic Presentation Forms-B
-                ):
-                    return True
-            return False
-
-        def prepare_text(value: object) -> str:
-            s = '' if value is None else str(value)
-            if arabic_reshaper and get_display and contains_arabic(s):
-                try:
-                    s = get_display(arabic_reshaper.reshape(s))
-                except Exception:
-                    # If shaping fails, return original text
-                    pass
-            return s
-        
-        def draw_text_rtl_aware(canvas, x, y, text, font_name, font_size, column_width):
-            """Draw text with RTL alignment for Arabic text, LTR for others"""
-            prepared = prepare_text(text)
-            if contains_arabic(prepared):
-                # Calculate text width
-                try:
-                    text_width = pdfmetrics.stringWidth(prepared, font_name, font_size)
-                except Exception:
-                    # Fallback estimate if metrics unavailable
-                    text_width = len(prepared) * font_size * 0.5
-                # Align from right: start position = column_start + column_width - text_width
-                rtl_x = x + column_width - text_width
-                canvas.drawString(rtl_x, y, prepared)
-            else:
-                # Regular left-to-right alignment
-                canvas.drawString(x, y, prepared)
-
-        # Margins (reduced for more space)
-        left = 8 * mm
-        right = width - 8 * mm
-        top = height - 8 * mm
-        y = top
-
-        # Header
-        c.setFont('Helvetica-Bold', 14)
-        c.drawString(left, y, 'Payment Reports')
-        c.setFont(body_font, 10)
-        y -= 14
-        
-        # Report generation date
-        generation_date = datetime.now().strftime('%Y-%m-%d %H:%M')
-        c.drawString(left, y, prepare_text(f"Report Generated: {generation_date}"))
-        y -= 12
-        
+    total_amount = float(query.with_entities(func.sum(
+        func.coalesce(PaymentRequest.amount, 0) + func.coalesce(PaymentRequest.finance_extra_amount, 0)
+    )).scalar() or 0)
+
+    # Removed 'Scheduled' column from PDF export (frontend-only removal mirrored in generated report)
+    headers = ['ID']
+    col_widths = [14*mm]
+    # Include Ref. No. only for Auditing users
+    is_auditing = current_user.department == 'Auditing' or current_user.role == 'Auditing Staff'
+    if is_auditing:
+        headers.append('Ref. No.')
+        col_widths.append(14*mm)
+    headers += ['Type', 'Requestor', 'Department', 'Payment', 'Amount', 'Branch', 'Company', 'Approver']
+    # Column widths optimized for landscape A4 with proper spacing (matching new headers)
+    col_widths += [30*mm, 22*mm, 18*mm, 16*mm, 18*mm, 30*mm, 30*mm, 28*mm]
+
+    # Date scope
+    if date_from and date_to:
+        date_scope = f"Date Range: {date_from} to {date_to}"
+    elif date_from:
+        date_scope = f"Date From: {date_from} (no end date)"
+    elif date_to:
+        date_scope = f"Date To: {date_to} (no start date)"
+    else:
+        date_scope = "Date Range: All dates (no filter applied)"
+    info_lines = [
+        f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}",
         # Filters (handle multiple values)
-        filters_line = f"Dept: {', '.join(department_filter) if department_filter else 'All'} | Type: {', '.join(request_type_filter) if request_type_filter else 'All'} | Branch: {', '.join(branch_filter) if branch_filter else 'All'} | Payment: {', '.join(payment_type_filter) if payment_type_filter else 'All'}"
-        c.drawString(left, y, prepare_text(filters_line))
-        y -= 12
-        
-        # Date scope
-        if date_from and date_to:
-            c.drawString(left, y, prepare_text(f"Date Range: {date_from} to {date_to}"))
-        elif date_from:
-            c.drawString(left, y, prepare_text(f"Date From: {date_from} (no end date)"))
-        elif date_to:
-            c.drawString(left, y, prepare_text(f"Date To: {date_to} (no start date)"))
-        else:
-            c.drawString(left, y, prepare_text("Date Range: All dates (no filter applied)"))
-        y -= 12
-
-        # Total amount
-        c.setFont('Helvetica-Bold', 11)
-        c.drawString(left, y, f"Total Amount: OMR {total_amount:.3f}")
-        y -= 18
-
-        # Helper function to wrap text manually
-        def wrap_text(text, max_width, font_name=body_font, font_size=9):
-            """Wrap text to fit within specified width using actual font metrics.
-            First splits by newlines, then wraps each line if needed."""
-            s = '' if text is None else str(text)
-            s = prepare_text(s)
-            if not s:
-                return ['']
-
-            def string_width(t: str) -> float:
-                try:
-                    return pdfmetrics.stringWidth(t, font_name, font_size)
-                except Exception:
-                    # Fallback estimate if metrics are unavailable
-                    return len(t) * font_size * 0.5
-
-            # Use a slightly smaller width to keep text away from column border
-            effective_width = max(0, max_width - (1.5 * mm))
-            
-            # First, split by newlines to preserve intentional line breaks
-            newline_split = s.split('\n')
-            all_lines = []
-            
-            for line in newline_split:
-                if not line.strip():
-                    all_lines.append('')
-                    continue
-                
-                # Wrap this line if it's too long
-                words = line.split()
-                wrapped_lines = []
-                current = ''
-
-                for word in words:
-                    candidate = (current + ' ' + word).strip()
-                    if current and string_width(candidate) > effective_width:
-                        wrapped_lines.append(current)
-                        current = word
-                    else:
-                        current = candidate
-
-                if current:
-                    wrapped_lines.append(current)
-
-                # Hard-break extremely long tokens that exceed width
-                for wrapped_line in wrapped_lines:
-                    if string_width(wrapped_line) <= effective_width:
-                        all_lines.append(wrapped_line)
-                    else:
-                        # Break by characters
-                        buf = ''
-                        for ch in wrapped_line:
-                            if string_width(buf + ch) > effective_width and buf:
-                                all_lines.append(buf)
-                                buf = ch
-                            else:
-                                buf += ch
-                        if buf:
-                            all_lines.append(buf)
-            
-            return all_lines or ['']
-        
-        # Table header
-        c.setFont(body_font if arabic_font_name else 'Helvetica-Bold', 9)
-        # Removed 'Scheduled' column from PDF export (frontend-only removal mirrored in generated report)
-        headers = ['ID']
-        col_widths = [14*mm]
-        # Include Ref. No. only for Auditing users
-        if current_user.department == 'Auditing' or current_user.role == 'Auditing Staff':
-            headers.append('Ref. No.')
-            col_widths.append(14*mm)
-        headers += ['Type', 'Requestor', 'Department', 'Payment', 'Amount', 'Branch', 'Company', 'Approver']
-        # Column widths optimized for landscape A4 with proper spacing (matching new headers)
-        col_widths += [30*mm, 22*mm, 18*mm, 16*mm, 18*mm, 30*mm, 30*mm, 28*mm]
-        # Calculate column positions based on widths to prevent overlapping
-        column_gap = 4 * mm  # slightly larger inter-column gap
-        col_x = [left]
-        for i in range(1, len(col_widths)):
-            col_x.append(col_x[i-1] + col_widths[i-1] + column_gap)
-        for i, (hx, text) in enumerate(zip(col_x, headers)):
-            draw_text_rtl_aware(c, hx, y, text, body_font if arabic_font_name else 'Helvetica-Bold', 9, col_widths[i])
-        y -= 10
-        c.line(left, y, right, y)
-        y -= 8
-
-        # Rows
-        c.setFont(body_font, 9)
-        row_height = 10
-        bottom_margin = 15 * mm
-        for r in result_requests:
-            # Calculate the maximum height needed for this row across all columns first
-            max_height = 0
-            wrapped_lines_per_col = []
-            
-            # For Person/Company column, show person_company field only
-            company_display = r.person_company
+        f"Dept: {', '.join(department_filter) if department_filter else 'All'} | Type: {', '.join(request_type_filter) if request_type_filter else 'All'} | Branch: {', '.join(branch_filter) if branch_filter else 'All'} | Payment: {', '.join(payment_type_filter) if payment_type_filter else 'All'}",
+        date_scope,
+    ]
 
+    try:
+        # Pages are drawn as the requests are read in chunks; the finished PDF is streamed from a temporary file
+        output = tempfile.TemporaryFile()
+        report = PdfTableReport(output, app.root_path, 'Payment Reports', info_lines,
+                                f"Total Amount: OMR {total_amount:.3f}", headers, col_widths)
+        rows = query.order_by(PaymentRequest.date.desc()).yield_per(REPORT_EXPORT_CHUNK_SIZE)
+        for r in iter_export_rows(rows, export_job_row_total(query), 'Drawing rows'):
             # Scheduled date removed from exported PDF (useful only in frontend view)
             row_data = [f"#{r.request_id}"]
-            if current_user.department == 'Auditing' or current_user.role == 'Auditing Staff':
+            if is_auditing:
                 row_data.append(str(r.reference_number or ''))
             row_data += [
                 str(r.request_type or ''),
@@ -23251,50 +22656,15 @@ def export_reports_pdf():
                 str(r.recurring or 'One-Time'),
                 f"OMR {r.total_display_amount:.3f}",
                 str(r.branch_name or '').replace(',', ', '),
-                str(company_display or ''),
+                str(r.person_company or ''),  # Person/Company column shows person_company only
                 str(r.approver or '')
             ]
-            
-            # Pre-wrap and measure to know if the row fits in the remaining space
-            for i, (data, width) in enumerate(zip(row_data, col_widths)):
-                if data:
-                    lines = wrap_text(str(data), width, body_font, 9)
-                else:
-                    lines = ['']
-                wrapped_lines_per_col.append(lines)
-                max_height = max(max_height, len(lines) * 10)
-
-            # If the row will overflow the page, create a new page and redraw the header
-            if y - max_height < bottom_margin:
-                c.showPage()
-                y = top
-                c.setFont(body_font if arabic_font_name else 'Helvetica-Bold', 9)
-                for i, (hx, text) in enumerate(zip(col_x, headers)):
-                    draw_text_rtl_aware(c, hx, y, text, body_font if arabic_font_name else 'Helvetica-Bold', 9, col_widths[i])
-                y -= 10
-                c.line(left, y, right, y)
-                y -= 8
-                c.setFont(body_font, 9)
-
-            # Draw each column with the precomputed wrapping
-            for i, lines in enumerate(wrapped_lines_per_col):
-                for j, line in enumerate(lines):
-                    draw_text_rtl_aware(c, col_x[i], y - (j * 10), line, body_font, 9, col_widths[i])
-            
-            y -= max_height + 3  # Reduced spacing between rows for more content
-
-        c.showPage()
-        c.save()
-        pdf_value = buffer.getvalue()
-        buffer.close()
-
-        from flask import make_response
-        response = make_response(pdf_value)
-        response.headers['Content-Type'] = 'application/pdf'
+            report.add_row(row_data)
+        report.finish()
+        output.seek(0)
+
         ts = datetime.now().strftime('%Y-%m-%d_%H-%M')
-        response.headers['Content-Disposition'] = f'attachment; filename=reports_{ts}.pdf'
-        response.headers['Content-Length'] = str(len(pdf_value))
-        return response
+        return send_file(output, mimetype='application/pdf', as_attachment=True, download_name=f'reports_{ts}.pdf')
         
     except Exception as e:
         flash(f'Error generating PDF: {str(e)}', 'error')
@@ -23671,6 +23041,15 @@ def new_user():
         
         db.session.add(new_user)
         db.session.commit()
+
+        # The new user's role, department and manager can give them approver rights on existing requests
+        try:
+            refresh_request_visibility_for_user_change(
+                request_ids_affected_by_user_change(new_user.user_id, None, user_visibility_profile(new_user))
+            )
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"Could not refresh request visibility index: {e}")
         
         log_action(f"Created new user: {username} ({role}) for department: {department}")
         
@@ -23752,6 +23131,8 @@ def edit_user(user_id):
                         # No fallback: manager assignment depends solely on users with 'Department Manager' role
                         final_manager_id = None
         
+        visibility_before = user_visibility_profile(user_to_edit)
+        
         # Update user information
         user_to_edit.name = new_name
         user_to_edit.username = new_username  # Update email/username
@@ -23765,6 +23146,22 @@ def edit_user(user_id):
             user_to_edit.set_password(new_password)
         
         db.session.commit()
+
+        # Role, department and manager changes affect approver rights on existing requests
+        try:
+            refresh_request_visibility_for_user_change(
+                request_ids_affected_by_user_change(user_to_edit.user_id, visibility_before, user_visibility_profile(user_to_edit))
+            )
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"Could not refresh request visibility index: {e}")
+        # ...and which notification types count towards the user's unread badge
+        try:
+            recount_unread_counters([user_to_edit.user_id])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"Could not recount unread notifications: {e}")
         
         log_action(f"Updated user: {user_to_edit.username} ({new_role}) - Department: {new_department}")
         
@@ -23882,6 +23279,7 @@ def delete_user(user_id):
     
     # Handle payment requests created by this user
     payment_requests = PaymentRequest.query.filter_by(user_id=user_id).all()
+    notified_user_ids = set()  # users whose notifications about these requests are deleted
     if payment_requests:
         # Delete all payment requests by this user
         for req in payment_requests:
@@ -23933,17 +23331,36 @@ def delete_user(user_id):
             RecurringPaymentSchedule.query.filter_by(request_id=req.request_id).delete()
             LateInstallment.query.filter_by(request_id=req.request_id).delete()
             PaidNotification.query.filter_by(request_id=req.request_id).delete()
+            notified_user_ids.update(uid for (uid,) in db.session.query(Notification.user_id).filter_by(request_id=req.request_id).distinct())
             Notification.query.filter_by(request_id=req.request_id).delete()
             FinanceAdminNote.query.filter_by(request_id=req.request_id).delete()
+            RequestVisibility.query.filter_by(request_id=req.request_id).delete()
+            PaymentOccurrence.query.filter_by(request_id=req.request_id).delete()
+            InstallmentLedger.query.filter_by(request_id=req.request_id).delete()
+            RequestBranchAllocation.query.filter_by(request_id=req.request_id).delete()
             
             db.session.delete(req)
     
     # Update audit logs to preserve history (user_id will be NULL, but username_snapshot kept)
     # No need to explicitly update - the nullable foreign key will handle this
     
-    # Delete the user
+    # Requests whose approver rights change without this user (found before their visibility rows go)
+    affected_request_ids = request_ids_affected_by_user_change(user_to_delete.user_id, user_visibility_profile(user_to_delete), None)
+    
+    # Delete the user and any visibility rows / notification counter of theirs
+    RequestVisibility.query.filter_by(user_id=user_to_delete.user_id).delete()
+    UserNotificationCounter.query.filter_by(user_id=user_to_delete.user_id).delete()
+    notified_user_ids.discard(user_to_delete.user_id)
+    recount_unread_counters(notified_user_ids)
     db.session.delete(user_to_delete)
     db.session.commit()
+
+    # Role, department and manager changes affect approver rights on existing requests
+    try:
+        refresh_request_visibility_for_user_change(affected_request_ids)
+    except Exception as e:
+        db.session.rollback()
+        app.logger.warning(f"Could not refresh request visibility index: {e}")
     
     log_action(f"Deleted user: {username} (and {len(payment_requests)} associated requests)")
     flash(f'User {username} has been deleted successfully.', 'success')
@@ -23996,8 +23413,11 @@ def mark_notification_read(notification_id):
     """Mark a notification as read"""
     notification = Notification.query.filter_by(notification_id=notification_id, user_id=current_user.user_id).first()
     if notification:
+        counted = _counted_unread_by_user([notification])
         notification.is_read = True
+        _adjust_unread_counters({user_id: -n for user_id, n in counted.items()})
         db.session.commit()
+        push_unread_counts([current_user.user_id])
         return jsonify({'success': True})
     return jsonify({'success': False}), 404
 
@@ -24008,7 +23428,9 @@ def mark_notification_read(notification_id):
 def mark_all_notifications_read():
     """Mark all notifications as read for current user"""
     Notification.query.filter_by(user_id=current_user.user_id, is_read=False).update({'is_read': True})
+    _set_unread_counter(current_user.user_id, 0)
     db.session.commit()
+    push_unread_counts([current_user.user_id])
     return jsonify({'success': True})
 
 @app.route('/notifications/mark_paid/<int:notification_id>')
@@ -24037,8 +23459,11 @@ def mark_notification_paid(notification_id):
     db.session.add(paid_notification)
     
     # Delete the notification
+    counted = _counted_unread_by_user([notification])
     db.session.delete(notification)
+    _adjust_unread_counters({user_id: -n for user_id, n in counted.items()})
     db.session.commit()
+    push_unread_counts([current_user.user_id])
     
     return jsonify({'success': True, 'message': 'Payment marked as paid. Notification will reappear on the next due date.'})
 
@@ -24050,8 +23475,11 @@ def delete_notification(notification_id):
     """Delete a specific notification"""
     notification = Notification.query.filter_by(notification_id=notification_id, user_id=current_user.user_id).first()
     if notification:
+        counted = _counted_unread_by_user([notification])
         db.session.delete(notification)
+        _adjust_unread_counters({user_id: -n for user_id, n in counted.items()})
         db.session.commit()
+        push_unread_counts([current_user.user_id])
         return jsonify({'success': True})
     return jsonify({'success': False, 'error': 'Notification not found'}), 404
 
@@ -24062,7 +23490,9 @@ def delete_all_notifications():
     """Delete all notifications for current user"""
     try:
         deleted_count = Notification.query.filter_by(user_id=current_user.user_id).delete()
+        _set_unread_counter(current_user.user_id, 0)
         db.session.commit()
+        push_unread_counts([current_user.user_id])
         return jsonify({'success': True, 'deleted_count': deleted_count})
     except Exception as e:
         db.session.rollback()
@@ -24078,124 +23508,199 @@ def unread_notifications_count():
     return jsonify({'count': count})
 
 
+# Statuses whose scheduled payments show on the calendar badge
+CALENDAR_PENDING_STATUSES = [
+    'Pending Finance Approval',
+    'Proof Pending',
+    'Proof Sent',
+    'Proof Rejected',
+    'Completed',
+    'Recurring'
+]
+CALENDAR_BADGE_ROLES = ('Admin', 'Project Staff', 'Finance Admin', 'Finance Staff', 'GM', 'CEO', 'Operation Manager', 'IT Staff', 'IT Department Manager')
+
+def _calendar_recurring_pending_count(today, department=None):
+    """Count unpaid recurring installments / due dates scheduled for today (one indexed COUNT, not cached:
+    a per-process cache would go stale when another worker or process commits)"""
+    # Unpaid installments / due dates scheduled for TODAY (materialised in payment_occurrences)
+    recurring_query = db.session.query(func.count(PaymentOccurrence.id)).join(
+        PaymentRequest, PaymentRequest.request_id == PaymentOccurrence.request_id
+    ).filter(
+        PaymentOccurrence.due_date == today,
+        PaymentOccurrence.paid == False,
+        PaymentRequest.recurring == 'Recurring',
+        PaymentRequest.status.in_(CALENDAR_PENDING_STATUSES),
+        PaymentRequest.is_archived == False
+    )
+    
+    # Project users can only see their department's requests
+    if department is not None:
+        recurring_query = recurring_query.filter(PaymentRequest.department == department)
+    
+    return recurring_query.scalar() or 0
+
+
+def _calendar_one_time_pending_count(user, today):
+    """Count unpaid one-time scheduled payments for today that the user may see"""
+    pending_count = 0
+    # Count one-time scheduled payments that are unpaid and scheduled for TODAY
+    one_time_query = PaymentRequest.query.filter(
+        ((PaymentRequest.recurring.is_(None)) | (PaymentRequest.recurring != 'Recurring')),
+        PaymentRequest.payment_date.isnot(None),
+        PaymentRequest.payment_date == today,  # Only TODAY
+        PaymentRequest.status.in_(CALENDAR_PENDING_STATUSES),
+        PaymentRequest.is_archived == False
+    )
+    
+    # Project Staff can only see their department's one-time requests
+    if user.role == 'Project Staff':
+        one_time_query = one_time_query.filter(PaymentRequest.department == user.department)
+    
+    one_time_requests = one_time_query.all()
+    
+    # Check authorization for one-time requests (same logic as calendar events)
+    def is_authorized_for_one_time(req, user):
+        if req.user_id == user.user_id:
+            return True
+        if getattr(req, 'temporary_manager_id', None) == user.user_id:
+            return True
+        if user.role in ['GM', 'Operation Manager']:
+            return True
+        if user.department == 'IT' and user.role in ['IT Staff', 'Department Manager']:
+            return True
+        if getattr(req.user, 'manager_id', None) == user.user_id:
+            return True
+        if user.role == 'Department Manager' and user.department == req.department:
+            return True
+        # Finance Admin and Finance Staff can see all one-time scheduled payments when status is "Pending Finance Approval"
+        if user.role in ['Finance Admin', 'Finance Staff']:
+            if req.status == 'Pending Finance Approval':
+                return True  # Finance users can see all pending finance approval requests
+        return False
+    
+    for req in one_time_requests:
+        if not is_authorized_for_one_time(req, user):
+            continue
+        
+        # Check if request is completed or has paid notification
+        is_completed = req.status == 'Completed'
+        paid_notification = PaidNotification.query.filter_by(
+            request_id=req.request_id,
+            paid_date=req.payment_date
+        ).first()
+        
+        # Only count unpaid requests
+        if not is_completed and not paid_notification:
+            pending_count += 1
+    return pending_count
+
+
+def get_calendar_pending_count(user):
+    """Count of pending (unpaid) payments scheduled for TODAY that the user sees on the calendar"""
+    today = date.today()
+    department = user.department if user.role == 'Project Staff' else None
+    return _calendar_recurring_pending_count(today, department) + _calendar_one_time_pending_count(user, today)
+
+
+def get_badge_counts(user):
+    """Navigation badge counters for a user: unread notifications and (for calendar roles) today's pending payments"""
+    counts = {'unread': get_unread_count_for_user(user)}
+    if user.role in CALENDAR_BADGE_ROLES:
+        try:
+            counts['calendar'] = get_calendar_pending_count(user)
+        except Exception as e:
+            print(f"Error getting calendar pending count: {e}")
+    return counts
+
+
+def push_unread_counts(user_ids):
+    """Push the unread notification badge to the given users (only those with a tab open)"""
+    with _connected_user_sids_lock:
+        user_ids = [uid for uid in set(user_ids) if uid in _connected_user_sids]
+    if not user_ids:
+        return
+    try:
+        for user in User.query.filter(User.user_id.in_(user_ids)).all():
+            socketio.emit('badge_counts', {'unread': get_unread_count_for_user(user)}, room=f'user_{user.user_id}')
+    except Exception as e:
+        print(f"Error pushing unread counts: {e}")
+
+
+# Seconds to wait after a calendar-relevant commit before recomputing, so bursts of commits push once
+CALENDAR_BADGE_PUSH_DELAY = 2
+_calendar_push_lock = threading.Lock()
+_calendar_push_scheduled = False
+
+
+def schedule_calendar_badge_push():
+    """Drop the cached cash-flow forecast and push fresh calendar counts to connected calendar users shortly"""
+    global _calendar_push_scheduled
+    _cash_flow_forecast_cache.clear()
+    with _calendar_push_lock:
+        if _calendar_push_scheduled:
+            return
+        with _connected_user_sids_lock:
+            if not _connected_user_sids:
+                return
+        _calendar_push_scheduled = True
+    socketio.start_background_task(_push_calendar_badge_counts)
+
+
+def _push_calendar_badge_counts():
+    global _calendar_push_scheduled
+    socketio.sleep(CALENDAR_BADGE_PUSH_DELAY)
+    with _calendar_push_lock:
+        _calendar_push_scheduled = False
+    with _connected_user_sids_lock:
+        user_ids = list(_connected_user_sids)
+    if not user_ids:
+        return
+    try:
+        with app.app_context():
+            users = User.query.filter(User.user_id.in_(user_ids), User.role.in_(CALENDAR_BADGE_ROLES)).all()
+            for user in users:
+                socketio.emit('badge_counts', {'calendar': get_calendar_pending_count(user)}, room=f'user_{user.user_id}')
+    except Exception as e:
+        print(f"Error pushing calendar badge counts: {e}")
+
+
+_CALENDAR_MODELS = (PaymentRequest, RecurringPaymentSchedule, PaidNotification)
+
+
+@db.event.listens_for(SASession, 'after_flush')
+def _track_calendar_changes(session, flush_context):
+    """Flag sessions that changed payment requests, installments or paid markers"""
+    if any(isinstance(obj, _CALENDAR_MODELS) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['calendar_changed'] = True
+
+
+@db.event.listens_for(SASession, 'do_orm_execute')
+def _track_calendar_bulk_changes(orm_execute_state):
+    """Same for query.update() / query.delete() on those models"""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        if issubclass(orm_execute_state.bind_mapper.class_, _CALENDAR_MODELS):
+            orm_execute_state.session.info['calendar_changed'] = True
+
+
+@db.event.listens_for(SASession, 'after_commit')
+def _push_calendar_changes(session):
+    if session.info.pop('calendar_changed', False):
+        schedule_calendar_badge_push()
+
+
+@db.event.listens_for(SASession, 'after_rollback')
+def _discard_calendar_changes(session):
+    session.info.pop('calendar_changed', None)
+
+
 @app.route('/api/calendar/pending_count')
 @login_required
 @role_required('Admin', 'Project Staff', 'Finance Admin', 'Finance Staff', 'GM', 'CEO', 'Operation Manager', 'IT Staff', 'IT Department Manager')
 def calendar_pending_count():
-    """Get count of pending (unpaid) payment requests scheduled for TODAY only"""
+    """Get count of pending (unpaid) payment requests scheduled for TODAY only.
+    Clients normally receive this over Socket.IO (badge_counts); this endpoint is the fallback poll."""
     try:
-        from datetime import date, timedelta
-        today = date.today()
-        pending_count = 0
-        
-        # Count recurring payment requests with unpaid installments scheduled for TODAY
-        recurring_query = PaymentRequest.query.filter(
-            PaymentRequest.recurring == 'Recurring',
-            PaymentRequest.recurring_interval.isnot(None),
-            PaymentRequest.recurring_interval != '',
-            PaymentRequest.status.in_([
-                'Pending Finance Approval',
-                'Proof Pending',
-                'Proof Sent',
-                'Proof Rejected',
-                'Completed',
-                'Recurring'
-            ]),
-            PaymentRequest.is_archived == False
-        )
-        
-        # Project users can only see their department's requests
-        if current_user.role == 'Project Staff':
-            recurring_query = recurring_query.filter(PaymentRequest.department == current_user.department)
-        
-        recurring_requests = recurring_query.all()
-        
-        for req in recurring_requests:
-            schedules = RecurringPaymentSchedule.query.filter_by(request_id=req.request_id).all()
-            
-            if schedules:
-                # For variable payments, check each installment
-                for installment in schedules:
-                    # Only count unpaid installments scheduled for TODAY
-                    if not installment.is_paid and installment.payment_date == today:
-                        pending_count += 1
-            else:
-                # For regular recurring payments, generate due dates and check if today is included
-                end_date = today + timedelta(days=1)  # Only check up to today
-                due_dates = generate_future_due_dates(req, today, end_date)
-                
-                for due_date, amount in due_dates:
-                    # Only count if the due date is TODAY
-                    if due_date == today:
-                        # Check if this payment is already marked as paid
-                        paid_notification = PaidNotification.query.filter_by(
-                            request_id=req.request_id,
-                            paid_date=due_date
-                        ).first()
-                        
-                        # Only count unpaid payments
-                        if not paid_notification:
-                            pending_count += 1
-        
-        # Count one-time scheduled payments that are unpaid and scheduled for TODAY
-        one_time_query = PaymentRequest.query.filter(
-            ((PaymentRequest.recurring.is_(None)) | (PaymentRequest.recurring != 'Recurring')),
-            PaymentRequest.payment_date.isnot(None),
-            PaymentRequest.payment_date == today,  # Only TODAY
-            PaymentRequest.status.in_([
-                'Pending Finance Approval',
-                'Proof Pending',
-                'Proof Sent',
-                'Proof Rejected',
-                'Completed',
-                'Recurring'
-            ]),
-            PaymentRequest.is_archived == False
-        )
-        
-        # Project Staff can only see their department's one-time requests
-        if current_user.role == 'Project Staff':
-            one_time_query = one_time_query.filter(PaymentRequest.department == current_user.department)
-        
-        one_time_requests = one_time_query.all()
-        
-        # Check authorization for one-time requests (same logic as calendar events)
-        def is_authorized_for_one_time(req, user):
-            if req.user_id == user.user_id:
-                return True
-            if getattr(req, 'temporary_manager_id', None) == user.user_id:
-                return True
-            if user.role in ['GM', 'Operation Manager']:
-                return True
-            if user.department == 'IT' and user.role in ['IT Staff', 'Department Manager']:
-                return True
-            if getattr(req.user, 'manager_id', None) == user.user_id:
-                return True
-            if user.role == 'Department Manager' and user.department == req.department:
-                return True
-            # Finance Admin and Finance Staff can see all one-time scheduled payments when status is "Pending Finance Approval"
-            if user.role in ['Finance Admin', 'Finance Staff']:
-                if req.status == 'Pending Finance Approval':
-                    return True  # Finance users can see all pending finance approval requests
-            return False
-        
-        for req in one_time_requests:
-            if not is_authorized_for_one_time(req, current_user):
-                continue
-            
-            # Check if request is completed or has paid notification
-            is_completed = req.status == 'Completed'
-            paid_notification = PaidNotification.query.filter_by(
-                request_id=req.request_id,
-                paid_date=req.payment_date
-            ).first()
-            
-            # Only count unpaid requests
-            if not is_completed and not paid_notification:
-                pending_count += 1
-        
-        return jsonify({'count': pending_count})
-        
+        return jsonify({'count': get_calendar_pending_count(current_user)})
     except Exception as e:
         print(f"Error getting calendar pending count: {e}")
         return jsonify({'count': 0})
@@ -25008,6 +24513,18 @@ def settings():
                 old_manager = existing.temporary_manager
                 db.session.delete(existing)
                 db.session.commit()
+                try:
+                    refresh_request_visibility_for_department(department)
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.warning(f"Could not re-index visibility for {department} requests: {e}")
+                try:
+                    # Item-request temporary managers see more notification types
+                    recount_unread_counters([getattr(old_manager, 'user_id', None)])
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.warning(f"Could not recount unread notifications: {e}")
                 log_action(f"Removed department-level temporary manager for {department} ({request_type}) by {current_user.name}")
                 if old_manager:
                     create_notification(
@@ -25062,6 +24579,19 @@ def settings():
 
         db.session.commit()
 
+        try:
+            refresh_request_visibility_for_department(department)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"Could not re-index visibility for {department} requests: {e}")
+        try:
+            # Item-request temporary managers see more notification types
+            recount_unread_counters([new_manager.user_id, getattr(old_manager, 'user_id', None)])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"Could not recount unread notifications: {e}")
+
         # Notifications
         if request_type == 'Both Payment and Item Request':
             approval_text = "both payment and item requests"
@@ -25225,6 +24755,19 @@ def unassign_temp_manager():
         flash('Failed to unassign temporary manager. Please try again.', 'danger')
         return redirect(url_for('settings'))
 
+    try:
+        refresh_request_visibility_for_department(department)
+    except Exception as e:
+        db.session.rollback()
+        app.logger.warning(f"Could not re-index visibility for {department} requests: {e}")
+    try:
+        # Item-request temporary managers see more notification types
+        recount_unread_counters([getattr(old_manager, 'user_id', None)])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        app.logger.warning(f"Could not recount unread notifications: {e}")
+
     log_action(f"Removed department-level temporary manager for {department}" + (f" ({request_type})" if request_type else "") + f" by {current_user.name}")
 
     notified_ids = set()
@@ -25302,236 +24845,185 @@ def unassign_temp_manager():
     flash(f'Temporary manager removed for {department}.', 'success')
     return redirect(url_for('settings'))
 
-@app.route('/api/admin/recurring-events')
-@role_required('Admin', 'Project Staff', 'Finance Admin', 'Finance Staff', 'GM', 'CEO', 'Operation Manager', 'IT Staff', 'IT Department Manager', 'Department Manager')
-def api_admin_recurring_events():
-    """API endpoint for calendar events (recurring + one-time scheduled)."""
-    # Restrict Department Manager to IT department only
-    if current_user.role == 'Department Manager' and getattr(current_user, 'department', None) != 'IT':
-        flash('You do not have permission to access this resource.', 'danger')
-        return redirect(url_for('dashboard'))
-    try:
-        # Build query for recurring payment requests (exclude archived)
-        # Include requests with Payment Type "Recurring" and status in allowed list
-        query = PaymentRequest.query.filter(
-            PaymentRequest.recurring == 'Recurring',  # Payment Type must be "Recurring"
-            PaymentRequest.recurring_interval.isnot(None),
-            PaymentRequest.recurring_interval != '',
-            PaymentRequest.status.in_([
-                'Pending Finance Approval',
-                'Proof Pending',
-                'Proof Sent',
-                'Proof Rejected',
-                'Completed',
-                'Recurring'
-            ]),
-            PaymentRequest.is_archived == False
+# Longest date range one calendar events request may cover (FullCalendar asks for the visible range)
+CALENDAR_MAX_WINDOW_DAYS = 366
+
+
+def _calendar_window(args):
+    """[start, end) date window from FullCalendar's start / end parameters (ISO dates or datetimes).
+    Defaults to the current month; longer ranges are cut to CALENDAR_MAX_WINDOW_DAYS."""
+    def _parse(value):
+        try:
+            return datetime.strptime((value or '')[:10], '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    start, end = _parse(args.get('start')), _parse(args.get('end'))
+    if start is None:
+        start = date.today().replace(day=1)
+    if end is None or end <= start:
+        end = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return start, min(end, start + timedelta(days=CALENDAR_MAX_WINDOW_DAYS))
+
+
+def _calendar_version(user, start, end, today):
+    """Version token (ETag) for a user's calendar window: changes whenever an occurrence in the window,
+    any payment request or any paid marker changes. One query of index lookups."""
+    in_window = PaymentOccurrence.due_date >= start, PaymentOccurrence.due_date < end
+    fingerprint = db.session.query(
+        db.select(func.count(PaymentOccurrence.id)).where(*in_window).scalar_subquery(),
+        db.select(func.max(PaymentOccurrence.id)).where(*in_window).scalar_subquery(),
+        db.select(func.sum(PaymentOccurrence.paid)).where(*in_window).scalar_subquery(),
+        db.select(func.sum(PaymentOccurrence.late)).where(*in_window).scalar_subquery(),
+        db.select(func.count(PaymentRequest.request_id)).scalar_subquery(),
+        db.select(func.max(PaymentRequest.updated_at)).scalar_subquery(),
+        db.select(func.count(PaidNotification.id)).scalar_subquery(),
+        db.select(func.max(PaidNotification.id)).scalar_subquery(),
+    ).one()
+    key = f"{user.user_id}:{user.role}:{user.department}:{start}:{end}:{today}:{tuple(fingerprint)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+# Sync tokens (?since=) are re-sent this many seconds back, so a request updated by a transaction that
+# committed just after the token was issued (with an earlier updated_at) is not missed
+CALENDAR_SYNC_MARGIN_SECONDS = 5
+# Above this many changed requests a ?since= call returns the whole window instead
+CALENDAR_SYNC_MAX_CHANGES = 500
+
+
+def _calendar_sync_markers():
+    """(request count, max request_id, max updated_at, max occurrence id, paid marker count, max paid marker id)"""
+    return tuple(db.session.query(
+        db.select(func.count(PaymentRequest.request_id)).scalar_subquery(),
+        db.select(func.max(PaymentRequest.request_id)).scalar_subquery(),
+        db.select(func.max(PaymentRequest.updated_at)).scalar_subquery(),
+        db.select(func.max(PaymentOccurrence.id)).scalar_subquery(),
+        db.select(func.count(PaidNotification.id)).scalar_subquery(),
+        db.select(func.max(PaidNotification.id)).scalar_subquery(),
+    ).one())
+
+
+def _calendar_sync_scope(user, start, end, today):
+    """The part of a sync token that must match for ?since= to be answered with changes only"""
+    user_key = hashlib.sha1(f"{user.user_id}:{user.role}:{user.department}".encode('utf-8')).hexdigest()[:8]
+    return f"{today:%Y%m%d}.{start:%Y%m%d}.{end:%Y%m%d}.{user_key}"
+
+
+def _calendar_sync_token(user, start, end, today):
+    """Opaque token for ?since=: the window / user it was issued for plus the change markers at that moment"""
+    request_count, max_request_id, max_updated_at, max_occurrence_id, paid_count, max_paid_id = _calendar_sync_markers()
+    updated_at = max_updated_at.strftime('%Y%m%dT%H%M%S%f') if max_updated_at else ''
+    return (f"{_calendar_sync_scope(user, start, end, today)}.{request_count}.{max_request_id or 0}.{updated_at}."
+            f"{max_occurrence_id or 0}.{paid_count}.{max_paid_id or 0}")
+
+
+def _calendar_changed_request_ids(token, user, start, end, today):
+    """Requests whose calendar events may have changed since the token was issued, or None if the whole
+    window has to be sent again (token for another window / user / day, invalid, rows deleted or too many changes).
+    Occurrences are rebuilt with new ids whenever a request's installments or paid / late markers change."""
+    scope = _calendar_sync_scope(user, start, end, today)
+    if not token or not token.startswith(scope + '.'):
+        return None
+    try:
+        request_count, max_request_id, updated_at, max_occurrence_id, paid_count, max_paid_id = token[len(scope) + 1:].split('.')
+        request_count, max_request_id = int(request_count), int(max_request_id)
+        max_occurrence_id, paid_count, max_paid_id = int(max_occurrence_id), int(paid_count), int(max_paid_id)
+        updated_after = datetime.strptime(updated_at, '%Y%m%dT%H%M%S%f') - timedelta(seconds=CALENDAR_SYNC_MARGIN_SECONDS) if updated_at else None
+    except ValueError:
+        return None
+    
+    # Deleted requests / paid markers leave no trace to diff against
+    remaining = db.session.query(
+        db.select(func.count(PaymentRequest.request_id)).where(PaymentRequest.request_id <= max_request_id).scalar_subquery(),
+        db.select(func.count(PaidNotification.id)).where(PaidNotification.id <= max_paid_id).scalar_subquery(),
+    ).one()
+    if tuple(remaining) != (request_count, paid_count):
+        return None
+    
+    changed = [
+        db.select(PaymentRequest.request_id).where(PaymentRequest.request_id > max_request_id),
+        db.select(PaymentOccurrence.request_id).where(PaymentOccurrence.id > max_occurrence_id),
+        db.select(PaidNotification.request_id).where(PaidNotification.id > max_paid_id),
+    ]
+    if updated_after is not None:
+        changed.append(db.select(PaymentRequest.request_id).where(PaymentRequest.updated_at > updated_after))
+    changed = db.union(*changed)
+    request_ids = [request_id for (request_id,) in db.session.execute(changed.limit(CALENDAR_SYNC_MAX_CHANGES + 1)) if request_id]
+    if len(request_ids) > CALENDAR_SYNC_MAX_CHANGES:
+        return None
+    return sorted(request_ids)
+
+
+def _calendar_events_by_date(user, window_start, window_end, today, request_ids=None):
+    """{date_key: [event, ...]} of the recurring and one-time scheduled payments the user sees in the
+    [window_start, window_end) window, optionally only for the given requests"""
+    # Recurring payments: occurrences in the window (exclude archived)
+    # Include requests with Payment Type "Recurring" and status in allowed list
+    query = db.session.query(PaymentOccurrence, PaymentRequest).join(
+        PaymentRequest, PaymentRequest.request_id == PaymentOccurrence.request_id
+    ).filter(
+        PaymentOccurrence.due_date >= window_start,
+        PaymentOccurrence.due_date < window_end,
+        PaymentRequest.recurring == 'Recurring',  # Payment Type must be "Recurring"
+        PaymentRequest.status.in_(CALENDAR_PENDING_STATUSES),
+        PaymentRequest.is_archived == False,
+        # Installments are shown in full; interval-based due dates for the next year
+        or_(
+            PaymentOccurrence.schedule_id.isnot(None),
+            PaymentOccurrence.due_date.between(today, today + timedelta(days=365))
         )
+    )
+    
+    # Project users can only see their department's requests
+    if user.role == 'Project Staff':
+        query = query.filter(PaymentRequest.department == user.department)
+    if request_ids is not None:
+        query = query.filter(PaymentRequest.request_id.in_(request_ids))
+    
+    occurrences_by_request = {}
+    for occurrence, req in query.order_by(PaymentOccurrence.request_id, PaymentOccurrence.due_date, PaymentOccurrence.id).all():
+        occurrences_by_request.setdefault(req.request_id, (req, []))[1].append(occurrence)
+    
+    # Whole-request paid state (may depend on installments outside the window)
+    requests_with_paid_markers = set()
+    paid_installment_totals = {}
+    if occurrences_by_request:
+        shown_request_ids = list(occurrences_by_request)
+        requests_with_paid_markers = {
+            request_id for (request_id,) in db.session.query(PaidNotification.request_id).filter(
+                PaidNotification.request_id.in_(shown_request_ids)
+            ).distinct()
+        }
+        paid_installment_totals = dict(db.session.query(InstallmentLedger.request_id, InstallmentLedger.marked_paid_total).filter(
+            InstallmentLedger.request_id.in_(list(requests_with_paid_markers))
+        ).all()) if requests_with_paid_markers else {}
+    
+    # Group events by date
+    events_by_date = {}
+    
+    for req, occurrences in occurrences_by_request.values():
+        is_variable = occurrences[0].schedule_id is not None
         
-        # Project users can only see their department's requests
-        if current_user.role == 'Project Staff':
-            query = query.filter(PaymentRequest.department == current_user.department)
-        
-        recurring_requests = query.all()
-        
-        # Group events by date
-        events_by_date = {}
-        today = date.today()
+        if is_variable:
+            # For variable payments, skip the request once the paid installments cover its amount
+            total_paid_amount = float(paid_installment_totals.get(req.request_id) or 0)
+            if float(req.amount) - total_paid_amount <= 0:
+                continue
+        else:
+            # For regular recurring payments, a paid notification marks the whole request as paid
+            if req.request_id in requests_with_paid_markers:
+                continue
         
-        for req in recurring_requests:
-            # Check if this is a variable payment with installments
-            schedule = RecurringPaymentSchedule.query.filter_by(request_id=req.request_id).all()
-            
-            if schedule:
-                # For variable payments, calculate remaining amount
-                total_paid_amount = 0
-                paid_notifications = PaidNotification.query.filter_by(request_id=req.request_id).all()
-                
-                for installment in schedule:
-                    # Check if this specific installment is paid
-                    is_paid = any(
-                        paid_notif.paid_date == installment.payment_date 
-                        for paid_notif in paid_notifications
-                    )
-                    
-                    # If this installment is paid, add its amount to total paid
-                    if is_paid:
-                        total_paid_amount += float(installment.amount)
-                
-                # Calculate remaining amount
-                remaining_amount = float(req.amount) - total_paid_amount
-                
-                # If remaining amount is 0 or less, skip this request
-                if remaining_amount <= 0:
-                    continue
-            else:
-                # For regular recurring payments, check if there are any paid notifications
-                paid_notifications_count = PaidNotification.query.filter_by(request_id=req.request_id).count()
-                
-                # If there are paid notifications, skip this request entirely
-                if paid_notifications_count > 0:
-                    continue
+        for occurrence in occurrences:
+            # Green if paid, red if marked late, purple if due
+            event_color = '#2e7d32' if occurrence.paid else ('#d32f2f' if occurrence.late else '#8e24aa')
             
-            if schedule:
-                # For variable payments, show only the specific installment dates
-                for installment in schedule:
-                    # Check if this specific installment is paid using the RecurringPaymentSchedule.is_paid field
-                    is_paid = installment.is_paid
-                    
-                    # Determine event color (red if marked late)
-                    is_late = LateInstallment.query.filter_by(
-                        request_id=req.request_id,
-                        payment_date=installment.payment_date
-                    ).first() is not None
-                    
-                    # Debug: Log payment status determination
-                    print(f"Request {req.request_id}, Date {installment.payment_date}: Paid={is_paid}, Late={is_late}")
-                    
-                    event_color = '#2e7d32' if is_paid else ('#d32f2f' if is_late else '#8e24aa')
-                    
-                    # Calculate remaining amount
-                    total_paid = sum(
-                        pn.amount if hasattr(pn, 'amount') else 0 
-                        for pn in PaidNotification.query.filter_by(request_id=req.request_id).all()
-                    )
-                    remaining_amount = req.amount - total_paid
-                    
-                    # Add to events_by_date
-                    date_key = installment.payment_date.isoformat()
-                    if date_key not in events_by_date:
-                        events_by_date[date_key] = []
-                    
-                    events_by_date[date_key].append({
-                        'title': f'OMR {installment.amount:.3f}',
-                        'start': installment.payment_date.isoformat(),
-                        'color': event_color,
-                        'url': f'/request/{req.request_id}',
-                        'extendedProps': {
-                            'requestId': req.request_id,
-                            'requestType': req.request_type,
-                            'companyName': req.person_company or 'N/A',
-                            'department': req.department,
-                            'purpose': req.purpose,
-                            'baseAmount': f'OMR {req.amount:.3f}',
-                            'remainingAmount': f'OMR {remaining_amount:.3f}'
-                        }
-                    })
-            else:
-                # For regular recurring payments, generate future due dates
-                start_date = today
-                end_date = today + timedelta(days=365)
-                
-                due_dates = generate_future_due_dates(req, start_date, end_date)
-                
-                for due_date, amount in due_dates:
-                    # Check if this payment is already marked as paid
-                    paid_notification = PaidNotification.query.filter_by(
-                        request_id=req.request_id,
-                        paid_date=due_date
-                    ).first()
-                    
-                    # Determine event color (red if marked late)
-                    is_late = LateInstallment.query.filter_by(
-                        request_id=req.request_id,
-                        payment_date=due_date
-                    ).first() is not None
-                    
-                    # Debug: Log payment status determination
-                    print(f"Request {req.request_id}, Date {due_date}: Paid={paid_notification is not None}, Late={is_late}")
-                    
-                    event_color = '#2e7d32' if paid_notification else ('#d32f2f' if is_late else '#8e24aa')
-                    
-                    # Add to events_by_date
-                    date_key = due_date.isoformat()
-                    if date_key not in events_by_date:
-                        events_by_date[date_key] = []
-                    
-                    events_by_date[date_key].append({
-                        'title': f'OMR {amount:.3f}',
-                        'start': due_date.isoformat(),
-                        'color': event_color,
-                        'url': f'/request/{req.request_id}',
-                        'extendedProps': {
-                            'requestId': req.request_id,
-                            'requestType': req.request_type,
-                            'companyName': req.person_company or 'N/A',
-                            'department': req.department,
-                            'purpose': req.purpose,
-                            'baseAmount': None,
-                            'remainingAmount': None
-                        }
-                    })
-        
-        # Also include ONE-TIME scheduled payments that the current user is authorized to see
-        def is_authorized_for_one_time(req, user):
-            # Requestor
-            if req.user_id == user.user_id:
-                return True
-            # Temporary manager
-            if getattr(req, 'temporary_manager_id', None) == user.user_id:
-                return True
-            # GM and Operation Manager (global)
-            if user.role in ['GM', 'Operation Manager']:
-                return True
-            # IT Staff and IT Department Manager (global IT access)
-            if user.department == 'IT' and user.role in ['IT Staff', 'Department Manager']:
-                return True
-            # Assigned manager
-            if getattr(req.user, 'manager_id', None) == user.user_id:
-                return True
-            # Department Manager of same department
-            if user.role == 'Department Manager' and user.department == req.department:
-                return True
-            # Finance Admin and Finance Staff can see all one-time scheduled payments when status is "Pending Finance Approval"
-            if user.role in ['Finance Admin', 'Finance Staff']:
-                if req.status == 'Pending Finance Approval':
-                    return True  # Finance users can see all pending finance approval requests
-            return False
-
-        one_time_query = PaymentRequest.query.filter(
-            (PaymentRequest.recurring.is_(None)) | (PaymentRequest.recurring != 'Recurring'),
-            PaymentRequest.payment_date.isnot(None),
-            PaymentRequest.status.in_([
-                'Pending Finance Approval',
-                'Proof Pending',
-                'Proof Sent',
-                'Proof Rejected',
-                'Completed',
-                'Recurring'
-            ]),
-            PaymentRequest.is_archived == False
-        )
-        # Project Staff can only see their department's one-time requests as well
-        if current_user.role == 'Project Staff':
-            one_time_query = one_time_query.filter(PaymentRequest.department == current_user.department)
-        one_time_requests = one_time_query.all()
-
-        for req in one_time_requests:
-            if not is_authorized_for_one_time(req, current_user):
-                continue
-            date_key = req.payment_date.isoformat()
+            date_key = occurrence.due_date.isoformat()
             if date_key not in events_by_date:
                 events_by_date[date_key] = []
             
-            # Determine color based on payment status
-            # Check if request is completed
-            is_completed = req.status == 'Completed'
-            
-            # Check if there's a paid notification for this payment date
-            paid_notification = PaidNotification.query.filter_by(
-                request_id=req.request_id,
-                paid_date=req.payment_date
-            ).first()
-            
-            # Determine event color: green if completed/paid, purple if due
-            if is_completed or paid_notification:
-                event_color = '#2e7d32'  # green for paid/completed
-            else:
-                event_color = '#8e24aa'  # purple for due (matches recurring payment color scheme)
-            
             events_by_date[date_key].append({
-                'title': f'OMR {float(req.amount):.3f}',
-                'start': req.payment_date.isoformat(),
+                'title': f'OMR {occurrence.amount:.3f}',
+                'start': occurrence.due_date.isoformat(),
                 'color': event_color,
                 'url': f'/request/{req.request_id}',
                 'extendedProps': {
@@ -25540,12 +25032,136 @@ def api_admin_recurring_events():
                     'companyName': req.person_company or 'N/A',
                     'department': req.department,
                     'purpose': req.purpose,
-                    'baseAmount': f'OMR {float(req.amount):.3f}',
-                    'remainingAmount': None,
-                    'oneTime': True
+                    # Paid notifications carry no amount, so the remaining amount is the request amount
+                    'baseAmount': f'OMR {req.amount:.3f}' if is_variable else None,
+                    'remainingAmount': f'OMR {req.amount:.3f}' if is_variable else None
                 }
             })
+    
+    # Also include ONE-TIME scheduled payments that the current user is authorized to see
+    def is_authorized_for_one_time(req, user):
+        # Requestor
+        if req.user_id == user.user_id:
+            return True
+        # Temporary manager
+        if getattr(req, 'temporary_manager_id', None) == user.user_id:
+            return True
+        # GM and Operation Manager (global)
+        if user.role in ['GM', 'Operation Manager']:
+            return True
+        # IT Staff and IT Department Manager (global IT access)
+        if user.department == 'IT' and user.role in ['IT Staff', 'Department Manager']:
+            return True
+        # Assigned manager
+        if getattr(req.user, 'manager_id', None) == user.user_id:
+            return True
+        # Department Manager of same department
+        if user.role == 'Department Manager' and user.department == req.department:
+            return True
+        # Finance Admin and Finance Staff can see all one-time scheduled payments when status is "Pending Finance Approval"
+        if user.role in ['Finance Admin', 'Finance Staff']:
+            if req.status == 'Pending Finance Approval':
+                return True  # Finance users can see all pending finance approval requests
+        return False
+    
+    one_time_query = PaymentRequest.query.options(db.joinedload(PaymentRequest.user)).filter(
+        (PaymentRequest.recurring.is_(None)) | (PaymentRequest.recurring != 'Recurring'),
+        PaymentRequest.payment_date >= window_start,
+        PaymentRequest.payment_date < window_end,
+        PaymentRequest.status.in_(CALENDAR_PENDING_STATUSES),
+        PaymentRequest.is_archived == False
+    )
+    # Project Staff can only see their department's one-time requests as well
+    if user.role == 'Project Staff':
+        one_time_query = one_time_query.filter(PaymentRequest.department == user.department)
+    if request_ids is not None:
+        one_time_query = one_time_query.filter(PaymentRequest.request_id.in_(request_ids))
+    one_time_requests = [req for req in one_time_query.all() if is_authorized_for_one_time(req, user)]
+    
+    # Paid markers on the scheduled payment dates, in one query
+    one_time_paid = set()
+    if one_time_requests:
+        one_time_paid = set(db.session.query(PaidNotification.request_id, PaidNotification.paid_date).filter(
+            PaidNotification.request_id.in_([req.request_id for req in one_time_requests])
+        ).all())
+    
+    for req in one_time_requests:
+        date_key = req.payment_date.isoformat()
+        if date_key not in events_by_date:
+            events_by_date[date_key] = []
+        
+        # Determine event color: green if completed/paid, purple if due
+        if req.status == 'Completed' or (req.request_id, req.payment_date) in one_time_paid:
+            event_color = '#2e7d32'  # green for paid/completed
+        else:
+            event_color = '#8e24aa'  # purple for due (matches recurring payment color scheme)
+        
+        events_by_date[date_key].append({
+            'title': f'OMR {float(req.amount):.3f}',
+            'start': req.payment_date.isoformat(),
+            'color': event_color,
+            'url': f'/request/{req.request_id}',
+            'extendedProps': {
+                'requestId': req.request_id,
+                'requestType': req.request_type,
+                'companyName': req.person_company or 'N/A',
+                'department': req.department,
+                'purpose': req.purpose,
+                'baseAmount': f'OMR {float(req.amount):.3f}',
+                'remainingAmount': None,
+                'oneTime': True
+            }
+        })
+    return events_by_date
 
+
+@app.route('/api/admin/recurring-events')
+@role_required('Admin', 'Project Staff', 'Finance Admin', 'Finance Staff', 'GM', 'CEO', 'Operation Manager', 'IT Staff', 'IT Department Manager', 'Department Manager')
+def api_admin_recurring_events():
+    """API endpoint for calendar events (recurring + one-time scheduled) in the [start, end) window
+    the calendar is showing. Responses carry an ETag so unchanged windows are answered with 304.
+    
+    Responses also carry an X-Calendar-Sync token. With ?since=<token> only the changes are returned:
+    {"full": false, "sync": <new token>, "changed_request_ids": [...], "events": [...]} where events are the
+    per-payment events (as in extendedProps.events) of the changed requests in the window; a changed request
+    without events has left the window. When the changes cannot be worked out (other window / user / day,
+    deleted rows, too many changes) "full" is true and events holds every payment in the window."""
+    # Restrict Department Manager to IT department only
+    if current_user.role == 'Department Manager' and getattr(current_user, 'department', None) != 'IT':
+        flash('You do not have permission to access this resource.', 'danger')
+        return redirect(url_for('dashboard'))
+    try:
+        today = date.today()
+        window_start, window_end = _calendar_window(request.args)
+        sync_token = _calendar_sync_token(current_user, window_start, window_end, today)
+        
+        if 'since' in request.args:
+            changed_request_ids = _calendar_changed_request_ids(request.args.get('since'), current_user, window_start, window_end, today)
+            if changed_request_ids is None or changed_request_ids:
+                events_by_date = _calendar_events_by_date(current_user, window_start, window_end, today, changed_request_ids)
+            else:
+                events_by_date = {}
+            changes = {
+                'full': changed_request_ids is None,
+                'sync': sync_token,
+                'events': [event for date_key in sorted(events_by_date) for event in events_by_date[date_key]]
+            }
+            if changed_request_ids is not None:
+                changes['changed_request_ids'] = changed_request_ids
+            response = jsonify(changes)
+            response.headers['X-Calendar-Sync'] = sync_token
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        
+        version = _calendar_version(current_user, window_start, window_end, today)
+        if version in request.if_none_match:
+            not_modified = Response(status=304)
+            not_modified.set_etag(version)
+            not_modified.headers['X-Calendar-Sync'] = sync_token
+            return not_modified
+        
+        events_by_date = _calendar_events_by_date(current_user, window_start, window_end, today)
+        
         # Convert grouped events to calendar format
         calendar_events = []
         for date_key, day_events in events_by_date.items():
@@ -25590,123 +25206,232 @@ def api_admin_recurring_events():
                 }
             })
         
-        return jsonify(calendar_events)
+        response = jsonify(calendar_events)
+        response.set_etag(version)
+        response.headers['X-Calendar-Sync'] = sync_token
+        # Let the browser keep the events but revalidate them (If-None-Match) on every fetch
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
         
     except Exception as e:
         print(f"Error generating calendar events: {e}")
         return jsonify([])
 
-def add_months(source_date, months):
-    """Add months to a date, handling month overflow correctly"""
-    month = source_date.month - 1 + months
-    year = source_date.year + month // 12
-    month = month % 12 + 1
-    day = min(source_date.day, [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month - 1])
-    return date(year, month, day)
-
-def generate_future_due_dates(req, start_date, end_date):
-    """Generate future due dates for a recurring request"""
-    if not req.recurring_interval:
-        return []
+# --- Cash-flow forecast: unpaid future recurring payments, bucketed by week or month ---
+CASH_FLOW_FORECAST_DEFAULT_MONTHS = 12
+CASH_FLOW_FORECAST_MAX_MONTHS = 36
+CASH_FLOW_FORECAST_ROLES = ('Admin', 'Finance Admin', 'Finance Staff', 'GM', 'CEO')
+# group_by parameter -> index into the (department, payment method) part of a daily totals key;
+# branch totals are split over request_branch_allocations instead
+CASH_FLOW_FORECAST_GROUPS = {'department': 0, 'branch': None, 'payment_method': 1}
+
+# (daily totals, branch shares) per (today, horizon end, data version). The version is read from the
+# database on every call, so changes made by other workers / processes are picked up too; the cache is
+# also cleared on every calendar-relevant commit in this process (see schedule_calendar_badge_push)
+_cash_flow_forecast_cache = {}
+
+
+def _cash_flow_data_version():
+    """Fingerprint of the data the forecast is built from: changes whenever a payment request, occurrence,
+    installment ledger, paid marker or branch allocation is added, changed or removed. One query of index lookups."""
+    return tuple(db.session.query(
+        db.select(func.count(PaymentRequest.request_id)).scalar_subquery(),
+        db.select(func.max(PaymentRequest.updated_at)).scalar_subquery(),
+        db.select(func.count(PaymentOccurrence.id)).scalar_subquery(),
+        db.select(func.max(PaymentOccurrence.id)).scalar_subquery(),
+        db.select(func.max(InstallmentLedger.updated_at)).scalar_subquery(),
+        db.select(func.count(PaidNotification.id)).scalar_subquery(),
+        db.select(func.max(PaidNotification.id)).scalar_subquery(),
+        db.select(func.count(RequestBranchAllocation.id)).scalar_subquery(),
+        db.select(func.max(RequestBranchAllocation.id)).scalar_subquery(),
+    ).one())
+
+
+def cash_flow_daily_totals(today, horizon_end):
+    """Unpaid recurring payments due between today and horizon_end, for the requests the calendar shows as unpaid:
+    ({(due_date, department, payment_method, request_id): [amount, count]}, {request_id: [(branch, share), ...]}).
+    The shares of a request's branches add up to 1 (its per-branch amounts, else an equal split). Installments are
+    summed in SQL from payment_occurrences; interval-based series are expanded from their compiled rules, so any
+    horizon works."""
+    key = (today, horizon_end, _cash_flow_data_version())
+    cached = _cash_flow_forecast_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    totals = {}
+    def _add(due_date, req_department, method, request_id, amount, count):
+        entry = totals.setdefault((due_date, req_department or 'Unassigned', method or 'Unassigned', request_id), [0.0, 0])
+        entry[0] += float(amount or 0)
+        entry[1] += count
+    
+    calendar_requests = (
+        PaymentRequest.recurring == 'Recurring',
+        PaymentRequest.status.in_(CALENDAR_PENDING_STATUSES),
+        PaymentRequest.is_archived == False
+    )
+    
+    # Installments: unpaid ones of requests whose paid installments do not cover the amount yet
+    installment_rows = db.session.query(
+        PaymentOccurrence.due_date, PaymentRequest.department, PaymentRequest.payment_method, PaymentRequest.request_id,
+        func.sum(PaymentOccurrence.amount), func.count(PaymentOccurrence.id)
+    ).join(
+        PaymentRequest, PaymentRequest.request_id == PaymentOccurrence.request_id
+    ).outerjoin(
+        InstallmentLedger, InstallmentLedger.request_id == PaymentOccurrence.request_id
+    ).filter(
+        PaymentOccurrence.schedule_id.isnot(None),
+        PaymentOccurrence.paid == False,
+        PaymentOccurrence.due_date.between(today, horizon_end),
+        *calendar_requests,
+        or_(InstallmentLedger.request_id.is_(None), InstallmentLedger.marked_paid_total < PaymentRequest.amount)
+    ).group_by(
+        PaymentOccurrence.due_date, PaymentRequest.request_id
+    )
+    for row in installment_rows:
+        _add(*row)
+    
+    # Interval-based series without installments; a paid marker marks the whole request as paid
+    has_installments = db.select(RecurringPaymentSchedule.schedule_id).where(
+        RecurringPaymentSchedule.request_id == PaymentRequest.request_id
+    ).exists()
+    has_paid_marker = db.select(PaidNotification.id).where(
+        PaidNotification.request_id == PaymentRequest.request_id
+    ).exists()
+    interval_rows = db.session.query(
+        PaymentRequest.recurring_interval, PaymentRequest.date, PaymentRequest.amount,
+        PaymentRequest.department, PaymentRequest.payment_method, PaymentRequest.request_id
+    ).filter(
+        *calendar_requests,
+        PaymentRequest.recurring_interval.isnot(None),
+        PaymentRequest.recurring_interval != '',
+        ~has_installments,
+        ~has_paid_marker
+    )
+    for interval, anchor, amount, req_department, method, request_id in interval_rows:
+        rule = compile_rule(interval)
+        if rule is None or rule.frequency == 'custom':
+            continue
+        for due_date in _rule_dates(rule, today, horizon_end, anchor):
+            _add(due_date, req_department, method, request_id, amount, 1)
+    
+    # Branch shares of the calendar requests from their allocations
+    allocations = {}
+    for request_id, branch, amount in db.session.query(
+        RequestBranchAllocation.request_id, RequestBranchAllocation.branch_name, RequestBranchAllocation.amount
+    ).join(
+        PaymentRequest, PaymentRequest.request_id == RequestBranchAllocation.request_id
+    ).filter(*calendar_requests).order_by(RequestBranchAllocation.request_id, RequestBranchAllocation.position):
+        allocations.setdefault(request_id, []).append((branch, amount))
+    branch_shares = {}
+    for request_id, rows in allocations.items():
+        allocated = sum(float(amount) for _, amount in rows if amount is not None)
+        if allocated > 0 and all(amount is not None for _, amount in rows):
+            branch_shares[request_id] = [(branch, float(amount) / allocated) for branch, amount in rows]
+        else:
+            branch_shares[request_id] = [(branch, 1.0 / len(rows)) for branch, _ in rows]
+    
+    if len(_cash_flow_forecast_cache) > 32:
+        _cash_flow_forecast_cache.clear()
+    _cash_flow_forecast_cache[key] = (totals, branch_shares)
+    return totals, branch_shares
+
+
+def _forecast_bucket_start(day, bucket):
+    return day - timedelta(days=day.weekday()) if bucket == 'week' else day.replace(day=1)
+
+
+def _forecast_next_bucket(start, bucket):
+    return start + timedelta(days=7) if bucket == 'week' else (start + timedelta(days=32)).replace(day=1)
+
+
+def build_cash_flow_forecast(today, horizon_end, bucket='month', group_by='department'):
+    """Forecast dict for the API / page: consecutive week or month buckets from today to horizon_end,
+    each with its total, payment count and per-group totals, plus the totals per group"""
+    group_index = CASH_FLOW_FORECAST_GROUPS[group_by]
+    buckets = {}
+    groups = {}
+    totals, branch_shares = cash_flow_daily_totals(today, horizon_end)
+    for (due_date, *dimensions, request_id), (amount, count) in totals.items():
+        bucket_entry = buckets.setdefault(_forecast_bucket_start(due_date, bucket), {'total': 0.0, 'count': 0, 'groups': {}})
+        bucket_entry['total'] += amount
+        bucket_entry['count'] += count
+        if group_index is None:
+            shares = branch_shares.get(request_id) or [('Unassigned', 1.0)]
+        else:
+            shares = [(dimensions[group_index], 1.0)]
+        # A payment split over several branches counts once in each of them
+        for group, share in shares:
+            bucket_entry['groups'][group] = bucket_entry['groups'].get(group, 0.0) + amount * share
+            group_entry = groups.setdefault(group, {'name': group, 'total': 0.0, 'count': 0})
+            group_entry['total'] += amount * share
+            group_entry['count'] += count
+    
+    rows = []
+    start = _forecast_bucket_start(today, bucket)
+    while start <= horizon_end:
+        next_start = _forecast_next_bucket(start, bucket)
+        entry = buckets.get(start, {'total': 0.0, 'count': 0, 'groups': {}})
+        rows.append({
+            'start': start.isoformat(),
+            'end': min(next_start - timedelta(days=1), horizon_end).isoformat(),
+            'label': f"Week of {start.strftime('%d %b %Y')}" if bucket == 'week' else start.strftime('%B %Y'),
+            'total': round(entry['total'], 3),
+            'count': entry['count'],
+            'groups': {name: round(amount, 3) for name, amount in sorted(entry['groups'].items())},
+        })
+        start = next_start
     
+    group_rows = sorted(groups.values(), key=lambda g: -g['total'])
+    for group in group_rows:
+        group['total'] = round(group['total'], 3)
+    return {
+        'start': today.isoformat(),
+        'end': horizon_end.isoformat(),
+        'bucket': bucket,
+        'group_by': group_by,
+        'buckets': rows,
+        'groups': group_rows,
+        'total': round(sum(entry['total'] for entry in buckets.values()), 3),
+        'count': sum(entry['count'] for entry in buckets.values()),
+    }
+
+
+def _cash_flow_forecast_args(args):
+    """(horizon end, bucket, group_by) from the query string, with defaults for missing or invalid values"""
+    months = args.get('months', CASH_FLOW_FORECAST_DEFAULT_MONTHS, type=int)
+    months = min(max(months or CASH_FLOW_FORECAST_DEFAULT_MONTHS, 1), CASH_FLOW_FORECAST_MAX_MONTHS)
+    bucket = args.get('bucket') if args.get('bucket') in ('week', 'month') else 'month'
+    group_by = args.get('group_by') if args.get('group_by') in CASH_FLOW_FORECAST_GROUPS else 'department'
+    today = date.today()
+    month_index = today.year * 12 + today.month - 1 + months
+    year, month = divmod(month_index, 12)
+    # Same day `months` months ahead (clamped to the month's last day), exclusive
+    horizon_end = date(year, month + 1, min(today.day, calendar.monthrange(year, month + 1)[1])) - timedelta(days=1)
+    return today, horizon_end, bucket, group_by
+
+
+@app.route('/api/cash-flow-forecast')
+@login_required
+@role_required(*CASH_FLOW_FORECAST_ROLES)
+def api_cash_flow_forecast():
+    """Committed outflow of unpaid recurring payments over the next `months` months (default 12),
+    in `bucket` = month | week buckets, split by `group_by` = department | branch | payment_method"""
     try:
-        # Parse the recurring interval
-        parts = req.recurring_interval.split(':')
-        if len(parts) < 2:
-            return []
-        
-        frequency = parts[0]
-        interval = int(parts[1])
-        
-        if frequency == 'monthly':
-            due_dates = []
-            
-            # Check for new :date: format (e.g., monthly:1:date:2025-10-18:end:2026-01-30)
-            if len(parts) > 2 and parts[2] == 'date':
-                # Parse the start date
-                try:
-                    base_date_str = parts[3]
-                    base_date = datetime.strptime(base_date_str, '%Y-%m-%d').date()
-                    
-                    # Parse end date if present
-                    config_end_date = None
-                    if 'end' in parts:
-                        end_index = parts.index('end')
-                        if end_index + 1 < len(parts):
-                            config_end_date = datetime.strptime(parts[end_index + 1], '%Y-%m-%d').date()
-                    
-                    # Use the earlier of the two end dates
-                    effective_end_date = end_date
-                    if config_end_date:
-                        effective_end_date = min(end_date, config_end_date)
-                    
-                    # Generate recurring dates starting from base_date
-                    current_date = base_date
-                    if current_date < start_date:
-                        # If base_date is before start_date, advance to the first occurrence after start_date
-                        months_diff = (start_date.year - base_date.year) * 12 + (start_date.month - base_date.month)
-                        cycles = (months_diff // interval) + 1
-                        current_date = add_months(base_date, cycles * interval)
-                    
-                    # Generate dates
-                    while current_date <= effective_end_date:
-                        if current_date >= start_date:
-                            due_dates.append((current_date, req.amount))
-                        # Move to next occurrence
-                        current_date = add_months(current_date, interval)
-                    
-                except (ValueError, IndexError) as e:
-                    print(f"Error parsing date format: {e}")
-                    return []
-            
-            # Check if old specific days format is configured
-            elif len(parts) > 2 and parts[2] == 'days':
-                # Parse specific days from the interval
-                days = [int(day) for day in parts[3].split(',')]
-                year = int(parts[4]) if len(parts) > 4 else start_date.year
-                month = int(parts[5]) if len(parts) > 5 else start_date.month
-                
-                # Generate dates for the specific days
-                current_date = start_date
-                month_count = 0
-                
-                while current_date <= end_date:
-                    if month_count % interval == 0:
-                        # Generate dates for each specific day in this month
-                        for day in days:
-                            try:
-                                # Create date for this specific day
-                                due_date = date(current_date.year, current_date.month, day)
-                                if due_date >= start_date and due_date <= end_date:
-                                    due_dates.append((due_date, req.amount))
-                            except ValueError:
-                                # Skip invalid dates (like Feb 30)
-                                continue
-                    
-                    # Move to next month
-                    if current_date.month == 12:
-                        current_date = date(current_date.year + 1, 1, 1)
-                    else:
-                        current_date = date(current_date.year, current_date.month + 1, 1)
-                    month_count += 1
-            else:
-                # Fallback to original logic for simple monthly intervals
-                current_date = start_date
-                month_count = 0
-                while current_date <= end_date:
-                    if month_count % interval == 0:
-                        due_dates.append((current_date, req.amount))
-                    current_date = current_date + timedelta(days=1)
-                    if current_date.day == 1:  # New month
-                        month_count += 1
-            
-            return due_dates[:12]  # Limit to 12 months
-        
-        return []
-        
+        today, horizon_end, bucket, group_by = _cash_flow_forecast_args(request.args)
+        return jsonify(build_cash_flow_forecast(today, horizon_end, bucket, group_by))
     except Exception as e:
-        print(f"Error generating due dates: {e}")
-        return []
+        print(f"Error building cash-flow forecast: {e}")
+        return jsonify({'error': 'Could not build the forecast'}), 500
+
+
+@app.route('/cash-flow-forecast')
+@login_required
+@role_required(*CASH_FLOW_FORECAST_ROLES)
+def cash_flow_forecast():
+    """Cash-flow forecast page (tables filled from /api/cash-flow-forecast)"""
+    return render_template('cash_flow_forecast.html',
+                           default_months=CASH_FLOW_FORECAST_DEFAULT_MONTHS,
+                           max_months=CASH_FLOW_FORECAST_MAX_MONTHS)
 
 
 @app.route('/api/requests/mark_paid', methods=['POST'])
@@ -25910,249 +25635,239 @@ def mark_installment_late():
         return jsonify({'success': False, 'message': 'An error occurred while marking installment as late'}), 500
 
 
-if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-        
-        # Ensure payment_requests has archive and different_amounts columns (safe to call every startup)
-        _ensure_archive_columns_payment_requests()
+# Most installments one /api/installments/bulk call may change
+BULK_INSTALLMENT_MAX_ITEMS = 500
+
+
+@app.route('/api/installments/bulk', methods=['POST'])
+@role_required('Admin', 'Finance Staff')
+def bulk_update_installments():
+    """Mark many installments as paid or late in one transaction.
+    
+    Body: {"action": "paid" | "late", "installments": [{"request_id": 1, "payment_date": "YYYY-MM-DD", "amount": 10}, ...]}
+    The same rules as /api/installments/mark_paid and /api/installments/mark_late apply to every item
+    (marking late is Admin only), and Recurring requests are accepted too: their installment
+    (recurring_payment_schedules row due on payment_date) is marked paid as on the request page, and a
+    request whose installments are then all paid is completed. If any item is invalid nothing is changed
+    and the errors are returned; items already in the requested state are skipped.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'success': False, 'message': 'No data provided'}), 400
         
-        # Migrate: Add amount and receipt_path columns to procurement_item_requests if they don't exist
-        try:
-            import sqlite3
-            db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-            if os.name == 'nt':  # Windows
-                db_path = db_path.replace('/', '\\')
-            
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            
-            # Check if columns exist
-            cursor.execute("PRAGMA table_info(procurement_item_requests)")
-            existing_columns = [row[1] for row in cursor.fetchall()]
-            
-            if 'amount' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN amount NUMERIC(10, 3)")
-                conn.commit()
-                print("✓ Added 'amount' column to procurement_item_requests table")
-            else:
-                print("✓ 'amount' column already exists in procurement_item_requests table")
-            
-            if 'receipt_path' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN receipt_path VARCHAR(255)")
-                conn.commit()
-                print("✓ Added 'receipt_path' column to procurement_item_requests table")
-            else:
-                print("✓ 'receipt_path' column already exists in procurement_item_requests table")
-            
-            if 'invoice_path' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN invoice_path VARCHAR(255)")
-                conn.commit()
-                print("✓ Added 'invoice_path' column to procurement_item_requests table")
-            else:
-                print("✓ 'invoice_path' column already exists in procurement_item_requests table")
-            
-            if 'receipt_amount' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN receipt_amount NUMERIC(10, 3)")
-                conn.commit()
-                print("✓ Added 'receipt_amount' column to procurement_item_requests table")
-            else:
-                print("✓ 'receipt_amount' column already exists in procurement_item_requests table")
-            
-            if 'invoice_amount' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN invoice_amount NUMERIC(10, 3)")
-                conn.commit()
-                print("✓ Added 'invoice_amount' column to procurement_item_requests table")
-            else:
-                print("✓ 'invoice_amount' column already exists in procurement_item_requests table")
-            
-            if 'receipt_reference_number' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN receipt_reference_number VARCHAR(100)")
-                conn.commit()
-                print("✓ Added 'receipt_reference_number' column to procurement_item_requests table")
-            else:
-                print("✓ 'receipt_reference_number' column already exists in procurement_item_requests table")
-            
-            if 'procurement_quantities' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_quantities TEXT")
-                conn.commit()
-                print("✓ Added 'procurement_quantities' column to procurement_item_requests table")
-            else:
-                print("✓ 'procurement_quantities' column already exists in procurement_item_requests table")
-            
-            if 'payment_date' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN payment_date DATE")
-                conn.commit()
-                print("✓ Added 'payment_date' column to procurement_item_requests table")
-            else:
-                print("✓ 'payment_date' column already exists in procurement_item_requests table")
-            
-            if 'manager_quantity_rejection_reason' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN manager_quantity_rejection_reason TEXT")
-                conn.commit()
-                print("✓ Added 'manager_quantity_rejection_reason' column to procurement_item_requests table")
+        action = data.get('action')
+        items = data.get('installments')
+        if action not in ('paid', 'late'):
+            return jsonify({'success': False, 'message': "action must be 'paid' or 'late'"}), 400
+        if action == 'late' and current_user.role != 'Admin':
+            return jsonify({'success': False, 'message': 'Only Admin can mark installments as late'}), 403
+        if not isinstance(items, list) or not items:
+            return jsonify({'success': False, 'message': 'No installments provided'}), 400
+        if len(items) > BULK_INSTALLMENT_MAX_ITEMS:
+            return jsonify({'success': False, 'message': f'At most {BULK_INSTALLMENT_MAX_ITEMS} installments per call'}), 400
+        
+        # Parse and de-duplicate the (request_id, payment_date) pairs
+        errors = []
+        pairs = {}
+        for index, item in enumerate(items):
+            item = item if isinstance(item, dict) else {}
+            request_id = item.get('request_id')
+            payment_date = item.get('payment_date')
+            try:
+                request_id = int(request_id)
+                payment_date_obj = datetime.strptime(payment_date, '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                errors.append({'index': index, 'request_id': request_id, 'payment_date': payment_date, 'message': 'Missing or invalid request_id / payment_date'})
+                continue
+            pairs.setdefault((request_id, payment_date_obj), item.get('amount'))
+        
+        request_ids = {request_id for request_id, _ in pairs}
+        payment_dates = {payment_date for _, payment_date in pairs}
+        requests_by_id = {req.request_id: req for req in PaymentRequest.query.filter(PaymentRequest.request_id.in_(request_ids)).all()} if request_ids else {}
+        paid_pairs = set(db.session.query(PaidNotification.request_id, PaidNotification.paid_date).filter(
+            PaidNotification.request_id.in_(request_ids),
+            PaidNotification.paid_date.in_(payment_dates)
+        )) if pairs else set()
+        late_pairs = set(db.session.query(LateInstallment.request_id, LateInstallment.payment_date).filter(
+            LateInstallment.request_id.in_(request_ids),
+            LateInstallment.payment_date.in_(payment_dates)
+        )) if pairs and action == 'late' else set()
+        # Installments (recurring_payment_schedules rows) due on the given dates
+        schedules = {}
+        if pairs:
+            for schedule in RecurringPaymentSchedule.query.filter(
+                RecurringPaymentSchedule.request_id.in_(request_ids),
+                RecurringPaymentSchedule.payment_date.in_(payment_dates)
+            ):
+                schedules.setdefault((schedule.request_id, schedule.payment_date), []).append(schedule)
+        
+        to_apply = []
+        skipped = []
+        for (request_id, payment_date), amount in pairs.items():
+            label = {'request_id': request_id, 'payment_date': payment_date.strftime('%Y-%m-%d')}
+            payment_request = requests_by_id.get(request_id)
+            installments = schedules.get((request_id, payment_date), [])
+            installment_paid = bool(installments) and all(schedule.is_paid for schedule in installments)
+            if not payment_request:
+                errors.append(dict(label, message='Request not found'))
+            elif payment_request.status not in ('Approved', 'Recurring'):
+                errors.append(dict(label, message='Request must be approved before marking as paid' if action == 'paid' else 'Request must be approved before marking installments as late'))
+            elif payment_request.status == 'Recurring' and not installments:
+                errors.append(dict(label, message='Installment not found'))
+            elif action == 'paid' and (request_id, payment_date) in paid_pairs and (not installments or installment_paid):
+                skipped.append(dict(label, message='This installment is already marked as paid'))
+            elif action == 'late' and ((request_id, payment_date) in paid_pairs or installment_paid):
+                errors.append(dict(label, message='This installment is already marked as paid'))
+            elif action == 'late' and (request_id, payment_date) in late_pairs:
+                skipped.append(dict(label, message='Installment already marked as late'))
             else:
-                print("✓ 'manager_quantity_rejection_reason' column already exists in procurement_item_requests table")
-            
-            if 'procurement_manager_quantity_rejection_reason' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_manager_quantity_rejection_reason TEXT")
-                conn.commit()
-                print("✓ Added 'procurement_manager_quantity_rejection_reason' column to procurement_item_requests table")
+                to_apply.append((request_id, payment_date, amount))
+        
+        if errors:
+            return jsonify({'success': False, 'message': f'{len(errors)} installment(s) could not be updated; nothing was changed', 'errors': errors}), 400
+        
+        # Amounts for the audit trail when the caller did not send them
+        missing_amounts = {(request_id, payment_date) for request_id, payment_date, amount in to_apply if not amount}
+        occurrence_amounts = {}
+        if missing_amounts:
+            occurrence_amounts = {
+                (request_id, due_date): amount
+                for request_id, due_date, amount in db.session.query(PaymentOccurrence.request_id, PaymentOccurrence.due_date, PaymentOccurrence.amount).filter(
+                    PaymentOccurrence.request_id.in_({request_id for request_id, _ in missing_amounts}),
+                    PaymentOccurrence.due_date.in_({payment_date for _, payment_date in missing_amounts})
+                )
+            }
+        
+        records = []
+        for request_id, payment_date, amount in to_apply:
+            payment_date_text = payment_date.strftime('%Y-%m-%d')
+            if action == 'paid':
+                amount = amount or occurrence_amounts.get((request_id, payment_date))
+                for schedule in schedules.get((request_id, payment_date), []):
+                    if not schedule.is_paid:
+                        schedule.is_paid = True
+                        schedule.paid_date = payment_date
+                if (request_id, payment_date) not in paid_pairs:
+                    records.append(PaidNotification(
+                        request_id=request_id,
+                        user_id=current_user.user_id,
+                        paid_date=payment_date
+                    ))
+                records.append(AuditLog(
+                    user_id=current_user.user_id,
+                    action=f"Marked installment of OMR {amount} due on {payment_date_text} as paid for request #{request_id} (bulk)",
+                    username_snapshot=current_user.username
+                ))
             else:
-                print("✓ 'procurement_manager_quantity_rejection_reason' column already exists in procurement_item_requests table")
+                records.append(LateInstallment(
+                    request_id=request_id,
+                    payment_date=payment_date,
+                    marked_by_user_id=current_user.user_id
+                ))
+                records.append(AuditLog(
+                    user_id=current_user.user_id,
+                    action=f"Marked installment due on {payment_date_text} as LATE for request #{request_id} (bulk)",
+                    username_snapshot=current_user.username
+                ))
+        db.session.add_all(records)
+        db.session.commit()
+        
+        affected_request_ids = sorted({request_id for request_id, _, _ in to_apply})
+        completed_request_ids = []
+        if action == 'paid':
+            # Check once per request whether all its installments are now paid
+            completed_request_ids = [request_id for request_id in affected_request_ids if check_recurring_payment_completion(request_id, emit=False)]
+        
+        if affected_request_ids:
+            socketio.emit('request_updated', {
+                'request_ids': affected_request_ids,
+                'action': 'installments_paid' if action == 'paid' else 'installments_late',
+                'count': len(to_apply),
+                'completed_request_ids': completed_request_ids,
+                'recurring': True,
+                'bulk': True
+            })
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(to_apply)} installment(s) marked as {action}',
+            'updated': len(to_apply),
+            'skipped': skipped,
+            'request_ids': affected_request_ids,
+            'completed_request_ids': completed_request_ids
+        })
+    except Exception as e:
+        print(f"Error updating installments in bulk: {e}")
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'An error occurred while updating installments'}), 500
+
+
+# --- One-time data backfills ---
+# Fill derived tables that need the app's Python logic (so they cannot be plain SQL in migrations.py).
+# They run once per database at import, right after the schema migrations, in whichever process gets
+# there first (gunicorn worker, `flask run`, `python app.py`, a script); data_backfills records them.
+DATA_BACKFILLS = [
+    ('request_visibility', rebuild_request_visibility),
+    ('payment_occurrences', rebuild_payment_occurrences),
+    ('request_branch_allocations', rebuild_branch_allocations),
+    ('finance_sla_deadlines', backfill_finance_sla_deadlines),
+]
+DATA_BACKFILL_CLAIM_SECONDS = 3600  # A claim not completed within this time (crashed process) is taken over
 
-            if 'procurement_quantity_rejection_reason' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_quantity_rejection_reason TEXT")
-                conn.commit()
-                print("✓ Added 'procurement_quantity_rejection_reason' column to procurement_item_requests table")
-            else:
-                print("✓ 'procurement_quantity_rejection_reason' column already exists in procurement_item_requests table")
-            
-            if 'category' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN category VARCHAR(100)")
-                conn.commit()
-                print("✓ Added 'category' column to procurement_item_requests table")
-            else:
-                print("✓ 'category' column already exists in procurement_item_requests table")
-            
-            if 'procurement_manager_quantities' not in existing_columns:
-                cursor.execute("ALTER TABLE procurement_item_requests ADD COLUMN procurement_manager_quantities TEXT")
-                conn.commit()
-                print("✓ Added 'procurement_manager_quantities' column to procurement_item_requests table")
-            else:
-                print("✓ 'procurement_manager_quantities' column already exists in procurement_item_requests table")
-            
-            # Migrate: Add item_request_id column to notifications table if it doesn't exist
-            cursor.execute("PRAGMA table_info(notifications)")
-            notification_columns = [row[1] for row in cursor.fetchall()]
-            
-            if 'item_request_id' not in notification_columns:
-                cursor.execute("ALTER TABLE notifications ADD COLUMN item_request_id INTEGER")
-                conn.commit()
-                print("✓ Added 'item_request_id' column to notifications table")
-            else:
-                print("✓ 'item_request_id' column already exists in notifications table")
-            
-            # Migrate: Add on_hold columns to procurement_item_requests table if they don't exist
-            cursor.execute("PRAGMA table_info(procurement_item_requests)")
-            item_request_columns = [row[1] for row in cursor.fetchall()]
-            
-            on_hold_columns = [
-                ('manager_on_hold_date', 'DATE'),
-                ('manager_on_hold_by', 'VARCHAR(100)'),
-                ('manager_on_hold_by_user_id', 'INTEGER'),
-                ('manager_on_hold_reason', 'TEXT'),
-                ('procurement_manager_on_hold_date', 'DATE'),
-                ('procurement_manager_on_hold_by', 'VARCHAR(100)'),
-                ('procurement_manager_on_hold_by_user_id', 'INTEGER'),
-                ('procurement_manager_on_hold_reason', 'TEXT')
-            ]
-            
-            for col_name, col_type in on_hold_columns:
-                if col_name not in item_request_columns:
-                    cursor.execute(f"ALTER TABLE procurement_item_requests ADD COLUMN {col_name} {col_type}")
-                    conn.commit()
-                    print(f"✓ Added '{col_name}' column to procurement_item_requests table")
-                else:
-                    print(f"✓ '{col_name}' column already exists in procurement_item_requests table")
-            
-            # Migrate: Add account_name and account_number columns to person_company_options table if they don't exist
-            cursor.execute("PRAGMA table_info(person_company_options)")
-            person_company_columns = [row[1] for row in cursor.fetchall()]
-            
-            if 'account_name' not in person_company_columns:
-                cursor.execute("ALTER TABLE person_company_options ADD COLUMN account_name VARCHAR(200)")
-                conn.commit()
-                print("✓ Added 'account_name' column to person_company_options table")
-            else:
-                print("✓ 'account_name' column already exists in person_company_options table")
-            
-            if 'account_number' not in person_company_columns:
-                cursor.execute("ALTER TABLE person_company_options ADD COLUMN account_number VARCHAR(50)")
-                conn.commit()
-                print("✓ Added 'account_number' column to person_company_options table")
-            else:
-                print("✓ 'account_number' column already exists in person_company_options table")
-            
-            if 'bank_name' not in person_company_columns:
-                cursor.execute("ALTER TABLE person_company_options ADD COLUMN bank_name VARCHAR(200)")
-                conn.commit()
-                print("✓ Added 'bank_name' column to person_company_options table")
-            else:
-                print("✓ 'bank_name' column already exists in person_company_options table")
-            
-            # Migrate: Add on_hold columns to payment_requests table if they don't exist
-            cursor.execute("PRAGMA table_info(payment_requests)")
-            payment_request_columns = [row[1] for row in cursor.fetchall()]
-            
-            payment_on_hold_columns = [
-                ('manager_on_hold_date', 'DATE'),
-                ('manager_on_hold_by', 'VARCHAR(100)'),
-                ('manager_on_hold_by_user_id', 'INTEGER'),
-                ('manager_on_hold_reason', 'TEXT')
-            ]
-            
-            for col_name, col_type in payment_on_hold_columns:
-                if col_name not in payment_request_columns:
-                    cursor.execute(f"ALTER TABLE payment_requests ADD COLUMN {col_name} {col_type}")
-                    conn.commit()
-                    print(f"✓ Added '{col_name}' column to payment_requests table")
-                else:
-                    print(f"✓ '{col_name}' column already exists in payment_requests table")
-            
-            # Migrate: Add cash_receiver column to payment_requests table if it doesn't exist
-            if 'cash_receiver' not in payment_request_columns:
-                cursor.execute("ALTER TABLE payment_requests ADD COLUMN cash_receiver VARCHAR(200)")
-                conn.commit()
-                print("✓ Added 'cash_receiver' column to payment_requests table")
-            else:
-                print("✓ 'cash_receiver' column already exists in payment_requests table")
-            
-            # Migrate: Add is_draft column to payment_requests table if it doesn't exist
-            if 'is_draft' not in payment_request_columns:
-                cursor.execute("ALTER TABLE payment_requests ADD COLUMN is_draft BOOLEAN DEFAULT 0")
-                conn.commit()
-                print("✓ Added 'is_draft' column to payment_requests table")
-            else:
-                print("✓ 'is_draft' column already exists in payment_requests table")
 
-            # Migrate: Add book_holder_user_id and bank_name to cheque_books table if they don't exist
-            try:
-                cursor.execute("PRAGMA table_info(cheque_books)")
-                cheque_book_columns = [row[1] for row in cursor.fetchall()]
-                if 'book_holder_user_id' not in cheque_book_columns:
-                    cursor.execute("ALTER TABLE cheque_books ADD COLUMN book_holder_user_id INTEGER REFERENCES users(user_id)")
-                    conn.commit()
-                    print("✓ Added 'book_holder_user_id' column to cheque_books table")
-                if 'bank_name' not in cheque_book_columns:
-                    cursor.execute("ALTER TABLE cheque_books ADD COLUMN bank_name VARCHAR(200)")
-                    conn.commit()
-                    print("✓ Added 'bank_name' column to cheque_books table")
-            except Exception as e_cheque:
-                print(f"Note: cheque_books migration skipped or already applied: {e_cheque}")
-
-            # Migrate: Add upload_original_filename to cheque_serials table if it doesn't exist
-            try:
-                cursor.execute("PRAGMA table_info(cheque_serials)")
-                cheque_serial_columns = [row[1] for row in cursor.fetchall()]
-                if 'upload_original_filename' not in cheque_serial_columns:
-                    cursor.execute("ALTER TABLE cheque_serials ADD COLUMN upload_original_filename VARCHAR(500)")
-                    conn.commit()
-                    print("✓ Added 'upload_original_filename' column to cheque_serials table")
-                if 'upload_paths' not in cheque_serial_columns:
-                    cursor.execute("ALTER TABLE cheque_serials ADD COLUMN upload_paths TEXT")
-                    conn.commit()
-                    print("✓ Added 'upload_paths' column to cheque_serials table")
-                if 'cancelled_upload_paths' not in cheque_serial_columns:
-                    cursor.execute("ALTER TABLE cheque_serials ADD COLUMN cancelled_upload_paths TEXT")
-                    conn.commit()
-                    print("✓ Added 'cancelled_upload_paths' column to cheque_serials table")
-            except Exception as e_cs:
-                print(f"Note: cheque_serials migration skipped or already applied: {e_cs}")
-            
-            conn.close()
+def run_data_backfills():
+    """Run the DATA_BACKFILLS that have not been applied to this database yet. Returns the names that ran."""
+    ran = []
+    for name, backfill in DATA_BACKFILLS:
+        now = datetime.utcnow()
+        try:
+            # Claim the backfill so concurrent workers skip it; a stale claim can be taken over
+            claimed = db.session.execute(
+                sqlite_insert(DataBackfill)
+                .values(name=name, started_at=now)
+                .on_conflict_do_update(
+                    index_elements=['name'],
+                    set_={'started_at': now},
+                    where=db.and_(
+                        DataBackfill.applied_at.is_(None),
+                        DataBackfill.started_at < now - timedelta(seconds=DATA_BACKFILL_CLAIM_SECONDS)
+                    )
+                )
+            ).rowcount
+            db.session.commit()
+        except Exception as e:
+            # e.g. a brand-new database whose tables db.create_all() has not created yet
+            db.session.rollback()
+            print(f"Warning: Could not claim data backfill {name}: {e}")
+            continue
+        if not claimed:
+            continue
+        try:
+            result = backfill()
+            db.session.execute(
+                db.update(DataBackfill).where(DataBackfill.name == name)
+                .values(applied_at=datetime.utcnow(), result=result if isinstance(result, int) else None)
+            )
+            db.session.commit()
+            ran.append(name)
+            print(f"✓ Applied data backfill {name} ({result} rows)")
         except Exception as e:
-            print(f"Warning: Could not migrate columns: {e}")
+            db.session.rollback()
+            # Release the claim so the next start tries again
+            DataBackfill.query.filter_by(name=name, applied_at=None).delete(synchronize_session=False)
+            db.session.commit()
+            print(f"Warning: Data backfill {name} failed: {e}")
+    return ran
+
+
+with app.app_context():
+    run_data_backfills()
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        db.create_all()
         
         # Automatically initialize location priorities from existing branches
         # This is SAFE: Only reads from branches table and inserts into location_priorities table
@@ -26221,17 +25936,10 @@ if __name__ == '__main__':
             print(f"Warning: Could not auto-initialize location priorities: {e}")
             print("  (This is non-critical - you can manually add location priorities later)")
         
-        # Check for timing alerts on startup
-        try:
-            check_finance_approval_timing_alerts()
-            print("Timing alerts check completed on startup")
-        except Exception as e:
-            print(f"Error checking timing alerts on startup: {e}")
-        
-        # Start background scheduler in a separate thread
-        scheduler_thread = threading.Thread(target=background_scheduler, daemon=True)
-        scheduler_thread.start()
-        print("Background scheduler started")
+        # Start the job scheduler (timing alerts, recurring payments due, counter reconciliation).
+        # Jobs that are due - including ones missed while the app was down - run on its first tick.
+        if start_background_scheduler():
+            print("Background scheduler started")
     
     socketio.run(app, debug=True, host='0.0.0.0', port=5005)
 
@@ -69,6 +69,28 @@ class Config:
     TICKETING_SYNC_URL = os.environ.get('TICKETING_SYNC_URL') or None  # e.g. http://localhost:9009
     FINANCE_SYNC_SECRET = os.environ.get('FINANCE_SYNC_SECRET') or None  # same as Ticketing's FINANCE_SYNC_SECRET
 
+    # Background job scheduler (timing alerts, recurring payments due). Each process starts a scheduler
+    # thread and a DB lease picks one leader. Set to false to run jobs only via scripts/run_jobs.py (e.g. cron).
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() in ['true', 'on', '1']
+
+    # Finance approval SLA in hours (a request is overdue once its finance timer runs longer).
+    # Per request type / department overrides live in the finance_sla_policies table (scripts/finance_sla_policies.py).
+    FINANCE_SLA_URGENT_HOURS = float(os.environ.get('FINANCE_SLA_URGENT_HOURS') or 2)
+    FINANCE_SLA_NORMAL_HOURS = float(os.environ.get('FINANCE_SLA_NORMAL_HOURS') or 24)
+    # Finance timing alerts: repeat every FINANCE_ALERT_REPEAT_HOURS (0 = every SLA period) and, from the
+    # (FINANCE_ALERT_ESCALATE_AFTER + 1)th alert on, also notify the GM (0 = never escalate)
+    FINANCE_ALERT_REPEAT_HOURS = float(os.environ.get('FINANCE_ALERT_REPEAT_HOURS') or 0)
+    FINANCE_ALERT_ESCALATE_AFTER = int(os.environ.get('FINANCE_ALERT_ESCALATE_AFTER') or 3)
+
+    # Background exports (report Excel/PDF, database backup): generated by EXPORT_JOB_WORKERS threads per process
+    # into EXPORT_FOLDER and deleted EXPORT_RETENTION_HOURS after they finish. Jobs still queued/running after
+    # EXPORT_JOB_TIMEOUT_MINUTES (e.g. the process was restarted) are marked failed.
+    EXPORT_FOLDER = os.environ.get('EXPORT_FOLDER') or os.path.join(_INSTANCE_DIR, 'exports')
+    EXPORT_RETENTION_HOURS = float(os.environ.get('EXPORT_RETENTION_HOURS') or 24)
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS') or 2)
+    EXPORT_JOB_MAX_ACTIVE_PER_USER = int(os.environ.get('EXPORT_JOB_MAX_ACTIVE_PER_USER') or 3)
+    EXPORT_JOB_TIMEOUT_MINUTES = float(os.environ.get('EXPORT_JOB_TIMEOUT_MINUTES') or 120)
+
     # IT Support / Ticketing link (Ask IT Support button). Set in .env: localhost use http://localhost:9009, production use https://ticketing.maagroup.om
     TICKETING_URL = os.environ.get('TICKETING_URL') or 'https://ticketing.maagroup.om'
 
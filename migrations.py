@@ -0,0 +1,787 @@
+#!/usr/bin/env python3
+"""Versioned schema migrations for the SQLite database.
+
+Each migration runs once and is recorded in the `schema_version` table, so request handlers never
+need to check columns or create tables. Migrations are written to be safe on databases that were
+partly migrated by the old one-off scripts (columns are only added when missing) and on fresh
+databases (tables that do not exist yet are left to db.create_all()).
+
+Usage (from project root):
+  python migrations.py                  # apply pending migrations
+  python migrations.py --status         # list applied / pending migrations
+  python migrations.py --db instance/payment_system.db
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from models import ALL_TAB_PRIORITY_SQL, ALL_TAB_SORT_AT_SQL
+
+
+# --- Helpers ---
+
+def _table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+
+def _columns(conn, table):
+    # table_xinfo (not table_info) also lists generated columns
+    return [row[1] for row in conn.execute(f"PRAGMA table_xinfo('{table}')").fetchall()]
+
+
+def _add_missing_columns(conn, table, columns):
+    """Add (name, type_sql) columns that do not exist yet. Skips tables that do not exist (db.create_all() builds them)."""
+    if not _table_exists(conn, table):
+        return []
+    existing = _columns(conn, table)
+    added = []
+    for name, type_sql in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {type_sql}")
+            added.append(name)
+            print(f"✓ Added '{name}' column to {table} table")
+    return added
+
+
+# --- Migrations ---
+
+def m001_payment_request_columns(conn):
+    """payment_requests: archive, per-branch amounts, on-hold, cash receiver, draft and finance extra amount columns."""
+    _add_missing_columns(conn, 'payment_requests', [
+        ('archive_reason', 'TEXT'),
+        ('archive_supporting_files', 'TEXT'),
+        ('different_amounts_per_branch', 'INTEGER DEFAULT 0'),
+        ('branch_amounts', 'TEXT'),
+        ('truck_plate_no', 'VARCHAR(50)'),
+        ('finance_extra_amount', 'REAL'),
+        ('manager_on_hold_date', 'DATE'),
+        ('manager_on_hold_by', 'VARCHAR(100)'),
+        ('manager_on_hold_by_user_id', 'INTEGER'),
+        ('manager_on_hold_reason', 'TEXT'),
+        ('cash_receiver', 'VARCHAR(200)'),
+        ('is_draft', 'BOOLEAN DEFAULT 0'),
+    ])
+
+
+def m002_procurement_item_request_columns(conn):
+    """procurement_item_requests: amounts, receipts/invoices, quantities, on-hold, uploads, archive and from-store columns."""
+    _add_missing_columns(conn, 'procurement_item_requests', [
+        ('amount', 'NUMERIC(10, 3)'),
+        ('receipt_path', 'VARCHAR(255)'),
+        ('invoice_path', 'VARCHAR(255)'),
+        ('receipt_amount', 'NUMERIC(10, 3)'),
+        ('invoice_amount', 'NUMERIC(10, 3)'),
+        ('receipt_reference_number', 'VARCHAR(100)'),
+        ('procurement_quantities', 'TEXT'),
+        ('payment_date', 'DATE'),
+        ('manager_quantity_rejection_reason', 'TEXT'),
+        ('procurement_manager_quantity_rejection_reason', 'TEXT'),
+        ('procurement_quantity_rejection_reason', 'TEXT'),
+        ('category', 'VARCHAR(100)'),
+        ('procurement_manager_quantities', 'TEXT'),
+        ('manager_on_hold_date', 'DATE'),
+        ('manager_on_hold_by', 'VARCHAR(100)'),
+        ('manager_on_hold_by_user_id', 'INTEGER'),
+        ('manager_on_hold_reason', 'TEXT'),
+        ('procurement_manager_on_hold_date', 'DATE'),
+        ('procurement_manager_on_hold_by', 'VARCHAR(100)'),
+        ('procurement_manager_on_hold_by_user_id', 'INTEGER'),
+        ('procurement_manager_on_hold_reason', 'TEXT'),
+        ('requestor_item_upload_path', 'TEXT'),
+        ('requestor_evidence_upload_path', 'TEXT'),
+        ('is_archived', 'INTEGER DEFAULT 0'),
+        ('archived_at', 'TEXT'),
+        ('archived_by', 'VARCHAR(100)'),
+        ('archived_by_user_id', 'INTEGER REFERENCES users(user_id)'),
+        ('from_store_no_receipt', 'INTEGER DEFAULT 0'),
+    ])
+
+
+def m003_notification_and_person_company_columns(conn):
+    """notifications.item_request_id and person_company_options bank details."""
+    _add_missing_columns(conn, 'notifications', [('item_request_id', 'INTEGER')])
+    _add_missing_columns(conn, 'person_company_options', [
+        ('account_name', 'VARCHAR(200)'),
+        ('account_number', 'VARCHAR(50)'),
+        ('bank_name', 'VARCHAR(200)'),
+    ])
+
+
+def m004_cheque_tables(conn):
+    """cheque_books holder/bank/acknowledgment columns, cheque_serials upload columns, cheque_book_permissions table."""
+    _add_missing_columns(conn, 'cheque_books', [
+        ('book_holder_user_id', 'INTEGER REFERENCES users(user_id)'),
+        ('bank_name', 'VARCHAR(200)'),
+        ('acknowledged', 'INTEGER NOT NULL DEFAULT 0'),
+        ('acknowledged_at', 'DATETIME'),
+        ('acknowledged_by_user_id', 'INTEGER REFERENCES users(user_id)'),
+    ])
+    _add_missing_columns(conn, 'cheque_serials', [
+        ('upload_original_filename', 'VARCHAR(500)'),
+        ('upload_paths', 'TEXT'),
+        ('cancelled_upload_paths', 'TEXT'),
+    ])
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cheque_book_permissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            book_id INTEGER NOT NULL REFERENCES cheque_books(id) ON DELETE CASCADE,
+            serial_id INTEGER REFERENCES cheque_serials(id) ON DELETE CASCADE,
+            granted_to_user_id INTEGER NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+            granted_by_user_id INTEGER NOT NULL REFERENCES users(user_id),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def m005_bank_layout_print_offsets(conn):
+    """bank_layouts print offset columns; widen layouts narrower than the 220mm cheque page."""
+    offsets = ['print_offset_name_x', 'print_offset_name_y', 'print_offset_amount_words_x', 'print_offset_amount_words_y',
+               'print_offset_amount_nums_x', 'print_offset_amount_nums_y', 'print_offset_date_x', 'print_offset_date_y',
+               'print_offset_crossing_x', 'print_offset_crossing_y']
+    _add_missing_columns(conn, 'bank_layouts', [(col, 'REAL') for col in offsets])
+    if _table_exists(conn, 'bank_layouts'):
+        conn.execute(
+            "UPDATE bank_layouts SET cheque_width_mm=?, cheque_height_mm=? "
+            "WHERE cheque_width_mm IS NULL OR cheque_width_mm < 220.0",
+            (220.0, 88.9)
+        )
+
+
+SEED_REGIONS = ['Muscat', 'Al Maabilah', 'Al Dakhilia', 'Al Batinah', 'Al Sharqiah', 'Al Dhahira']
+
+
+def m006_branches_and_regions(conn):
+    """branches code/region/type/flat columns and the regions table (seeded when empty)."""
+    added = _add_missing_columns(conn, 'branches', [
+        ('region', 'VARCHAR(50)'),
+        ('branch_code', 'VARCHAR(20)'),
+        ('branch_type', 'VARCHAR(20)'),
+        ('parent_branch_id', 'INTEGER REFERENCES branches(id)'),
+        ('accommodation_type', 'VARCHAR(20)'),
+        ('floor_number', 'VARCHAR(20)'),
+        ('flat_number', 'VARCHAR(20)'),
+        ('villa_number', 'VARCHAR(20)'),
+    ])
+    if 'branch_type' in added:
+        conn.execute("UPDATE branches SET branch_type = 'branch' WHERE branch_type IS NULL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS regions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name VARCHAR(100) NOT NULL UNIQUE
+        )
+    """)
+    if conn.execute("SELECT COUNT(*) FROM regions").fetchone()[0] == 0:
+        conn.executemany("INSERT INTO regions (name) VALUES (?)", [(name,) for name in SEED_REGIONS])
+        print(f"✓ Seeded {len(SEED_REGIONS)} regions")
+
+
+def m007_current_money_entry_columns(conn):
+    """current_money_entries adjustment/report/balance/source columns."""
+    _add_missing_columns(conn, 'current_money_entries', [
+        ('adjustment_amount', 'NUMERIC DEFAULT 0'),
+        ('affects_reports', 'INTEGER DEFAULT 0'),
+        ('include_in_balance', 'INTEGER DEFAULT 0'),
+        ('source', 'TEXT'),
+        ('source_id', 'INTEGER'),
+        ('note', 'TEXT'),
+        ('created_by', 'INTEGER'),
+    ])
+
+
+def _has_unique_index_on(conn, table, columns):
+    for index in conn.execute(f"PRAGMA index_list('{table}')").fetchall():
+        # index_list rows: seq, name, unique, origin, partial
+        if index[2]:
+            index_columns = [row[2] for row in conn.execute(f"PRAGMA index_info('{index[1]}')").fetchall()]
+            if index_columns == list(columns):
+                return True
+    return False
+
+
+def m008_department_temporary_manager_request_type(conn):
+    """department_temporary_managers: request_type and include_procurement_approvals columns,
+    and the unique constraint moved from (department) to (department, request_type)."""
+    if not _table_exists(conn, 'department_temporary_managers'):
+        return
+    added = _add_missing_columns(conn, 'department_temporary_managers', [
+        ('request_type', 'VARCHAR(100)'),
+        ('include_procurement_approvals', 'INTEGER DEFAULT 0'),
+    ])
+    if 'request_type' in added:
+        conn.execute("UPDATE department_temporary_managers SET request_type = 'Finance Payment Request' WHERE request_type IS NULL")
+    if _has_unique_index_on(conn, 'department_temporary_managers', ['department', 'request_type']):
+        return
+    # SQLite cannot alter constraints: rebuild the table with the composite unique constraint
+    conn.execute("UPDATE department_temporary_managers SET request_type = 'Finance Payment Request' WHERE request_type IS NULL")
+    conn.execute("""
+        CREATE TABLE department_temporary_managers_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_type VARCHAR(100) NOT NULL,
+            department VARCHAR(100) NOT NULL,
+            temporary_manager_id INTEGER NOT NULL,
+            set_by_user_id INTEGER,
+            set_at DATETIME,
+            include_procurement_approvals INTEGER DEFAULT 0,
+            FOREIGN KEY (temporary_manager_id) REFERENCES users(user_id),
+            FOREIGN KEY (set_by_user_id) REFERENCES users(user_id),
+            UNIQUE(department, request_type)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO department_temporary_managers_new
+        (id, request_type, department, temporary_manager_id, set_by_user_id, set_at, include_procurement_approvals)
+        SELECT id, request_type, department, temporary_manager_id, set_by_user_id, set_at, COALESCE(include_procurement_approvals, 0)
+        FROM department_temporary_managers
+    """)
+    conn.execute("DROP TABLE department_temporary_managers")
+    conn.execute("ALTER TABLE department_temporary_managers_new RENAME TO department_temporary_managers")
+    print("✓ Rebuilt department_temporary_managers with unique (department, request_type)")
+
+
+def m009_edit_history_tables(conn):
+    """Edit-tracking tables previously created on demand by the request/quantity edit endpoints."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS request_field_edits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL,
+            field_name TEXT NOT NULL,
+            first_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(request_id, field_name)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS request_field_edit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL,
+            field_name TEXT NOT NULL,
+            old_value TEXT,
+            new_value TEXT,
+            edited_by_user_id INTEGER,
+            edited_by_name TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS item_request_quantity_edits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_request_id INTEGER NOT NULL,
+            first_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_edited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(item_request_id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS item_request_quantity_edit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_request_id INTEGER NOT NULL,
+            old_value TEXT,
+            new_value TEXT,
+            edited_by_user_id INTEGER,
+            edited_by_name TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _receipt_entry_values(entry):
+    """(filename, amount, reference_number) for one legacy receipt_path JSON entry, or None."""
+    if isinstance(entry, dict):
+        filename = entry.get('filename') or entry.get('file') or entry.get('name')
+        if filename:
+            return (filename, entry.get('amount') or 0, entry.get('reference_number') or entry.get('referenceNumber') or '')
+    elif isinstance(entry, str):
+        return (entry, 0, '')
+    return None
+
+
+def _invoice_entry_values(entry):
+    """(filename, amount, items_json) for one legacy invoice_path JSON entry, or None."""
+    if isinstance(entry, dict):
+        filename = entry.get('filename') or entry.get('file') or entry.get('name')
+        if filename:
+            items = entry.get('items') or []
+            return (filename, entry.get('amount') or 0, json.dumps(items) if isinstance(items, list) else '[]')
+    elif isinstance(entry, str):
+        return (entry, 0, '[]')
+    return None
+
+
+def _copy_json_entries(conn, item_id, raw, insert_sql, entry_values):
+    """Copy one legacy receipt_path/invoice_path JSON list into its entries table. Returns rows inserted."""
+    try:
+        data = json.loads(raw)
+    except Exception as e:
+        print(f"Warning: Could not migrate entries for item request {item_id}: {e}")
+        return 0
+    count = 0
+    for entry in data if isinstance(data, list) else []:
+        values = entry_values(entry)
+        if values:
+            conn.execute(insert_sql, (item_id,) + values)
+            count += 1
+    return count
+
+
+def m010_procurement_receipt_invoice_entries(conn):
+    """Receipt/invoice entry tables, the one-time copy of legacy JSON receipt/invoice data into them,
+    and the legacy 'Assigned' item request status renamed to 'Assigned to Procurement'."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS procurement_receipt_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_request_id INTEGER NOT NULL,
+            filename VARCHAR(500) NOT NULL,
+            amount NUMERIC(10, 3) NOT NULL,
+            reference_number VARCHAR(100) NOT NULL,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL,
+            FOREIGN KEY (item_request_id) REFERENCES procurement_item_requests(id)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS procurement_invoice_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_request_id INTEGER NOT NULL,
+            filename VARCHAR(500) NOT NULL,
+            amount NUMERIC(10, 3) NOT NULL,
+            items TEXT NOT NULL,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL,
+            FOREIGN KEY (item_request_id) REFERENCES procurement_item_requests(id)
+        )
+    """)
+    if not _table_exists(conn, 'procurement_item_requests'):
+        return
+    item_columns = _columns(conn, 'procurement_item_requests')
+    receipt_count = conn.execute("SELECT COUNT(*) FROM procurement_receipt_entries").fetchone()[0]
+    invoice_count = conn.execute("SELECT COUNT(*) FROM procurement_invoice_entries").fetchone()[0]
+    # Only copy legacy JSON data into empty tables
+    if receipt_count == 0 and invoice_count == 0 and 'receipt_path' in item_columns and 'invoice_path' in item_columns:
+        receipt_sql = """
+            INSERT INTO procurement_receipt_entries
+            (item_request_id, filename, amount, reference_number, created_at, updated_at)
+            VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
+        """
+        invoice_sql = """
+            INSERT INTO procurement_invoice_entries
+            (item_request_id, filename, amount, items, created_at, updated_at)
+            VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
+        """
+        migrated_receipts = 0
+        migrated_invoices = 0
+        rows = conn.execute(
+            "SELECT id, receipt_path, invoice_path FROM procurement_item_requests "
+            "WHERE receipt_path IS NOT NULL OR invoice_path IS NOT NULL"
+        ).fetchall()
+        for item_id, receipt_path, invoice_path in rows:
+            if receipt_path:
+                migrated_receipts += _copy_json_entries(conn, item_id, receipt_path, receipt_sql, _receipt_entry_values)
+            if invoice_path:
+                migrated_invoices += _copy_json_entries(conn, item_id, invoice_path, invoice_sql, _invoice_entry_values)
+        if migrated_receipts or migrated_invoices:
+            print(f"✓ Migrated {migrated_receipts} receipt entries and {migrated_invoices} invoice entries from JSON to database tables")
+    conn.execute("UPDATE procurement_item_requests SET status = 'Assigned to Procurement' WHERE status = 'Assigned'")
+
+
+def m011_request_visibility(conn):
+    """request_visibility index table (which users can see which payment requests)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS request_visibility (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(user_id),
+            request_id INTEGER NOT NULL REFERENCES payment_requests(request_id),
+            reason VARCHAR(50) NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT unique_user_request_reason UNIQUE (user_id, request_id, reason)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_request_visibility_request_id ON request_visibility (request_id)")
+
+
+def m012_payment_request_all_tab_sort_key(conn):
+    """payment_requests "All Requests" sort-key generated columns and their keyset index."""
+    if not _table_exists(conn, 'payment_requests'):
+        return
+    existing = _columns(conn, 'payment_requests')
+    if 'all_tab_priority' not in existing:
+        conn.execute(f"ALTER TABLE payment_requests ADD COLUMN all_tab_priority INTEGER GENERATED ALWAYS AS ({ALL_TAB_PRIORITY_SQL}) VIRTUAL")
+        print("✓ Added 'all_tab_priority' column to payment_requests table")
+    if 'all_tab_sort_at' not in existing:
+        conn.execute(f"ALTER TABLE payment_requests ADD COLUMN all_tab_sort_at VARCHAR(26) GENERATED ALWAYS AS ({ALL_TAB_SORT_AT_SQL}) VIRTUAL")
+        print("✓ Added 'all_tab_sort_at' column to payment_requests table")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_payment_requests_all_tab_order ON payment_requests (all_tab_priority, all_tab_sort_at DESC, request_id DESC)")
+
+
+# Composite / partial indexes for the hot query predicates, mirrored on the models.
+# (name, table, columns, partial WHERE or None). scripts/check_query_plans.py checks they are used.
+HOT_PATH_INDEXES = [
+    ('ix_payment_requests_archived_status_draft', 'payment_requests', 'is_archived, status, is_draft', None),
+    ('ix_payment_requests_department_status', 'payment_requests', 'department, is_archived, status', None),
+    ('ix_payment_requests_user_id', 'payment_requests', 'user_id', None),
+    ('ix_notifications_user_read_type_created', 'notifications', 'user_id, is_read, notification_type, created_at', None),
+    ('ix_notifications_user_created', 'notifications', 'user_id, created_at', None),
+    ('ix_recurring_payment_schedules_request_date', 'recurring_payment_schedules', 'request_id, payment_date, is_paid', None),
+    ('ix_recurring_payment_schedules_unpaid_date', 'recurring_payment_schedules', 'payment_date, request_id', 'is_paid = 0'),
+    ('ix_paid_notifications_request_date', 'paid_notifications', 'request_id, paid_date', None),
+    ('ix_late_installments_request_date', 'late_installments', 'request_id, payment_date', None),
+    ('ix_department_temporary_managers_manager_type', 'department_temporary_managers', 'temporary_manager_id, request_type', None),
+]
+
+
+def m013_hot_path_indexes(conn):
+    """Composite and partial indexes for dashboard, notification, calendar and report filters."""
+    for name, table, columns, where in HOT_PATH_INDEXES:
+        if not _table_exists(conn, table):
+            continue
+        sql = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+        if where:
+            sql += f" WHERE {where}"
+        conn.execute(sql)
+
+
+def m014_user_notification_counters(conn):
+    """Per-user unread notification counters (filled by reconcile_unread_counters() on first start)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_notification_counters (
+            user_id INTEGER NOT NULL PRIMARY KEY REFERENCES users(user_id),
+            unread_count INTEGER NOT NULL DEFAULT 0,
+            updated_at DATETIME
+        )
+    """)
+
+
+def m015_scheduled_jobs(conn):
+    """Job scheduler bookkeeping and leader-lock tables."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scheduled_jobs (
+            name VARCHAR(100) NOT NULL PRIMARY KEY,
+            interval_seconds INTEGER NOT NULL,
+            next_run_at DATETIME,
+            last_started_at DATETIME,
+            last_finished_at DATETIME,
+            last_duration_ms INTEGER,
+            last_status VARCHAR(20),
+            last_error TEXT,
+            run_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS scheduler_leases (
+            name VARCHAR(50) NOT NULL PRIMARY KEY,
+            holder VARCHAR(200) NOT NULL,
+            expires_at DATETIME NOT NULL
+        )
+    """)
+
+
+def m016_payment_occurrences(conn):
+    """payment_occurrences table (materialised recurring due dates, filled by refresh_payment_occurrences())."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS payment_occurrences (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL REFERENCES payment_requests(request_id),
+            schedule_id INTEGER REFERENCES recurring_payment_schedules(schedule_id),
+            due_date DATE NOT NULL,
+            amount NUMERIC(12, 3) NOT NULL,
+            paid BOOLEAN NOT NULL DEFAULT 0,
+            late BOOLEAN NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_payment_occurrences_due_date_paid ON payment_occurrences (due_date, paid)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_payment_occurrences_request_date ON payment_occurrences (request_id, due_date)")
+
+
+def m017_payment_request_updated_at_index(conn):
+    """Index for max(payment_requests.updated_at), part of the calendar events version token."""
+    if not _table_exists(conn, 'payment_requests'):
+        return
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_payment_requests_updated_at ON payment_requests (updated_at)")
+
+
+def m018_notification_request_index(conn):
+    """Index for "already reminded today" checks (notifications by request, type and time)."""
+    if not _table_exists(conn, 'notifications'):
+        return
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_notifications_request_type_created ON notifications (request_id, notification_type, created_at)")
+
+
+def m019_finance_sla(conn):
+    """payment_requests.finance_sla_deadline (indexed with is_archived) and finance_sla_policies; open finance timers get the default SLA."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS finance_sla_policies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_type VARCHAR(50),
+            department VARCHAR(100),
+            urgent_hours FLOAT NOT NULL,
+            normal_hours FLOAT NOT NULL,
+            updated_at DATETIME,
+            CONSTRAINT unique_finance_sla_scope UNIQUE (request_type, department)
+        )
+    """)
+    if not _table_exists(conn, 'payment_requests'):
+        return
+    _add_missing_columns(conn, 'payment_requests', [('finance_sla_deadline', 'DATETIME')])
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_payment_requests_archived_sla_deadline ON payment_requests (is_archived, finance_sla_deadline)")
+    # Same defaults as config.py (2 h urgent, 24 h otherwise). The app's finance_sla_deadlines data backfill
+    # re-stamps them at import with the configured FINANCE_SLA_* hours and finance_sla_policies.
+    conn.execute("""
+        UPDATE payment_requests
+        SET finance_sla_deadline = strftime('%Y-%m-%d %H:%M:%f', finance_approval_start_time,
+                                            CASE WHEN is_urgent THEN '+2 hours' ELSE '+24 hours' END)
+        WHERE finance_approval_start_time IS NOT NULL AND finance_approval_end_time IS NULL
+    """)
+
+
+def m020_finance_alert_state(conn):
+    """Per-request finance timing alert state, backfilled from the timing alerts sent since each running timer started."""
+    if not _table_exists(conn, 'payment_requests'):
+        return
+    _add_missing_columns(conn, 'payment_requests', [
+        ('finance_alert_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('finance_last_alert_at', 'DATETIME'),
+        ('finance_next_alert_at', 'DATETIME'),
+    ])
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_payment_requests_status_next_alert ON payment_requests (status, finance_next_alert_at)")
+    if _table_exists(conn, 'notifications'):
+        # One alert goes to every Finance Admin, so count distinct send times rather than rows
+        conn.execute("""
+            UPDATE payment_requests
+            SET finance_alert_count = (
+                    SELECT count(DISTINCT strftime('%Y-%m-%d %H:%M', n.created_at)) FROM notifications n
+                    WHERE n.request_id = payment_requests.request_id
+                      AND n.notification_type IN ('finance_approval_timing_alert', 'finance_approval_timing_recurring')
+                      AND n.created_at >= payment_requests.finance_approval_start_time),
+                finance_last_alert_at = (
+                    SELECT max(n.created_at) FROM notifications n
+                    WHERE n.request_id = payment_requests.request_id
+                      AND n.notification_type IN ('finance_approval_timing_alert', 'finance_approval_timing_recurring')
+                      AND n.created_at >= payment_requests.finance_approval_start_time)
+            WHERE finance_approval_start_time IS NOT NULL AND finance_approval_end_time IS NULL
+        """)
+    # Next alert: at the SLA deadline, or one SLA period after the last alert
+    conn.execute("""
+        UPDATE payment_requests
+        SET finance_next_alert_at = CASE
+            WHEN finance_last_alert_at IS NULL THEN finance_sla_deadline
+            ELSE max(finance_sla_deadline, strftime('%Y-%m-%d %H:%M:%f',
+                     julianday(finance_last_alert_at) + julianday(finance_sla_deadline) - julianday(finance_approval_start_time)))
+        END
+        WHERE finance_sla_deadline IS NOT NULL
+    """)
+
+
+def m021_installment_ledgers(conn):
+    """installment_ledgers table (paid total / remaining balance per request with installments), backfilled from the schedules."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS installment_ledgers (
+            request_id INTEGER NOT NULL PRIMARY KEY REFERENCES payment_requests(request_id),
+            installment_count INTEGER NOT NULL DEFAULT 0,
+            paid_count INTEGER NOT NULL DEFAULT 0,
+            scheduled_total NUMERIC(12, 3) NOT NULL DEFAULT 0,
+            paid_total NUMERIC(12, 3) NOT NULL DEFAULT 0,
+            marked_paid_total NUMERIC(12, 3) NOT NULL DEFAULT 0,
+            remaining_amount NUMERIC(12, 3) NOT NULL DEFAULT 0,
+            next_due_date DATE,
+            updated_at DATETIME
+        )
+    """)
+    if not (_table_exists(conn, 'payment_requests') and _table_exists(conn, 'recurring_payment_schedules')
+            and _table_exists(conn, 'paid_notifications')):
+        return
+    # Same rows as refresh_payment_occurrences() in app.py writes
+    conn.execute("""
+        INSERT OR REPLACE INTO installment_ledgers (request_id, installment_count, paid_count, scheduled_total, paid_total,
+                                                    marked_paid_total, remaining_amount, next_due_date, updated_at)
+        SELECT s.request_id, count(*), sum(CASE WHEN s.is_paid THEN 1 ELSE 0 END), round(sum(s.amount), 3),
+               round(sum(CASE WHEN s.is_paid THEN s.amount ELSE 0 END), 3),
+               round(sum(CASE WHEN EXISTS (SELECT 1 FROM paid_notifications p
+                                           WHERE p.request_id = s.request_id AND p.paid_date = s.payment_date)
+                              THEN s.amount ELSE 0 END), 3),
+               round(r.amount - sum(CASE WHEN s.is_paid THEN s.amount ELSE 0 END), 3),
+               min(CASE WHEN s.is_paid THEN NULL ELSE s.payment_date END),
+               strftime('%Y-%m-%d %H:%M:%f', 'now')
+        FROM recurring_payment_schedules s
+        JOIN payment_requests r ON r.request_id = s.request_id
+        WHERE r.recurring = 'Recurring' AND r.recurring_interval IS NOT NULL AND r.recurring_interval != ''
+        GROUP BY s.request_id
+    """)
+
+
+
+def m022_request_branch_allocations(conn):
+    """request_branch_allocations table (one row per branch of a request, filled by refresh_branch_allocations())."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS request_branch_allocations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL REFERENCES payment_requests(request_id),
+            position INTEGER NOT NULL,
+            branch_name VARCHAR(100) NOT NULL,
+            branch_id INTEGER REFERENCES branches(id),
+            amount NUMERIC(12, 3)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_request_branch_allocations_name_request ON request_branch_allocations (branch_name, request_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_request_branch_allocations_request ON request_branch_allocations (request_id, branch_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_request_branch_allocations_branch ON request_branch_allocations (branch_id, request_id)")
+
+def m023_export_jobs(conn):
+    """export_jobs table (background report exports and database backups, see EXPORT_JOB_KINDS in app.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id VARCHAR(32) PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(user_id),
+            kind VARCHAR(50) NOT NULL,
+            params TEXT,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            error TEXT,
+            file_path VARCHAR(500),
+            download_name VARCHAR(255),
+            mimetype VARCHAR(100),
+            file_size INTEGER,
+            created_at DATETIME NOT NULL,
+            started_at DATETIME,
+            finished_at DATETIME,
+            expires_at DATETIME
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_export_jobs_user_created ON export_jobs (user_id, created_at)")
+
+def m024_data_backfills(conn):
+    """data_backfills table (one-time backfills run by the app at import, see DATA_BACKFILLS in app.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_backfills (
+            name VARCHAR(100) PRIMARY KEY,
+            started_at DATETIME NOT NULL,
+            applied_at DATETIME,
+            result INTEGER
+        )
+    """)
+
+# Ordered list of (version, name, function). Append new migrations at the end; never renumber.
+MIGRATIONS = [
+    (1, 'payment_request_columns', m001_payment_request_columns),
+    (2, 'procurement_item_request_columns', m002_procurement_item_request_columns),
+    (3, 'notification_and_person_company_columns', m003_notification_and_person_company_columns),
+    (4, 'cheque_tables', m004_cheque_tables),
+    (5, 'bank_layout_print_offsets', m005_bank_layout_print_offsets),
+    (6, 'branches_and_regions', m006_branches_and_regions),
+    (7, 'current_money_entry_columns', m007_current_money_entry_columns),
+    (8, 'department_temporary_manager_request_type', m008_department_temporary_manager_request_type),
+    (9, 'edit_history_tables', m009_edit_history_tables),
+    (10, 'procurement_receipt_invoice_entries', m010_procurement_receipt_invoice_entries),
+    (11, 'request_visibility', m011_request_visibility),
+    (12, 'payment_request_all_tab_sort_key', m012_payment_request_all_tab_sort_key),
+    (13, 'hot_path_indexes', m013_hot_path_indexes),
+    (14, 'user_notification_counters', m014_user_notification_counters),
+    (15, 'scheduled_jobs', m015_scheduled_jobs),
+    (16, 'payment_occurrences', m016_payment_occurrences),
+    (17, 'payment_request_updated_at_index', m017_payment_request_updated_at_index),
+    (18, 'notification_request_index', m018_notification_request_index),
+    (19, 'finance_sla', m019_finance_sla),
+    (20, 'finance_alert_state', m020_finance_alert_state),
+    (21, 'installment_ledgers', m021_installment_ledgers),
+    (22, 'request_branch_allocations', m022_request_branch_allocations),
+    (23, 'export_jobs', m023_export_jobs),
+    (24, 'data_backfills', m024_data_backfills),
+]
+
+
+# --- Runner ---
+
+def sqlite_path_from_uri(db_uri):
+    """Filesystem path for a sqlite:/// URI, or None for other databases."""
+    db_uri = db_uri or ''
+    if not db_uri.startswith('sqlite:///'):
+        return None
+    db_path = db_uri.replace('sqlite:///', '')
+    if os.name == 'nt':
+        db_path = db_path.replace('/', '\\')
+    return db_path
+
+
+def _connect(db_path):
+    # Autocommit mode so each migration can be wrapped in an explicit BEGIN IMMEDIATE ... COMMIT
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return conn
+
+
+def _applied_versions(conn):
+    return {row[0] for row in conn.execute("SELECT version FROM schema_version").fetchall()}
+
+
+def pending_migrations(db_path):
+    """Migrations not yet recorded in schema_version."""
+    conn = _connect(db_path)
+    try:
+        applied = _applied_versions(conn)
+    finally:
+        conn.close()
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def run_migrations(db_path, verbose=False):
+    """Apply pending migrations in order, each in its own transaction. Returns the list of versions applied.
+    Safe to call from several processes at once: BEGIN IMMEDIATE serialises them and versions are re-checked."""
+    conn = _connect(db_path)
+    applied_now = []
+    try:
+        applied = _applied_versions(conn)
+        for version, name, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                    conn.execute("COMMIT")
+                    continue
+                migrate(conn)
+                conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied_now.append(version)
+            if verbose:
+                print(f"✓ Applied migration {version:03d} {name}")
+    finally:
+        conn.close()
+    return applied_now
+
+
+def main():
+    p = argparse.ArgumentParser(description='Apply versioned schema migrations to the SQLite database')
+    p.add_argument('--db', help='Path to SQLite DB (default: from config / DATABASE_URL)')
+    p.add_argument('--status', action='store_true', help='List applied and pending migrations without applying')
+    args = p.parse_args()
+
+    if args.db:
+        db_path = os.path.abspath(args.db)
+    else:
+        from config import Config
+        db_path = sqlite_path_from_uri(Config.SQLALCHEMY_DATABASE_URI)
+        if not db_path:
+            print('ERROR: migrations only support SQLite databases', file=sys.stderr)
+            sys.exit(1)
+
+    if args.status:
+        pending = {m[0] for m in pending_migrations(db_path)}
+        for version, name, _ in MIGRATIONS:
+            print(f"{version:03d} {name}: {'pending' if version in pending else 'applied'}")
+        return
+
+    applied = run_migrations(db_path, verbose=True)
+    if not applied:
+        print("Database schema is up to date.")
+
+
+if __name__ == '__main__':
+    main()
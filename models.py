@@ -160,6 +160,39 @@ class UserPermission(db.Model):
         }
 
 
+# SQL for the "All Requests" sort key, stored as virtual generated columns on payment_requests so the
+# dashboard order (and prev/next navigation on the request page) can be served from an index.
+# Must stay in sync with get_status_priority_order() / get_all_tab_datetime_order() in app.py.
+ALL_TAB_PRIORITY_SQL = (
+    "CASE"
+    " WHEN status = 'Returned to Requestor' THEN 1"
+    " WHEN status = 'Returned to Manager' THEN 2"
+    " WHEN status = 'Pending Manager Approval' THEN 3"
+    " WHEN status = 'On Hold' THEN 4"
+    " WHEN status = 'Pending Finance Approval' THEN 5"
+    " WHEN status = 'Proof Pending' THEN 6"
+    " WHEN status = 'Proof Sent' THEN 7"
+    " WHEN status = 'Proof Rejected' THEN 8"
+    " WHEN status = 'Recurring' THEN 9"
+    " WHEN status = 'Completed' THEN 10"
+    " WHEN status IN ('Rejected by Manager', 'Rejected by Finance') THEN 11"
+    " ELSE 99 END"
+)
+ALL_TAB_SORT_AT_SQL = (
+    "CASE"
+    " WHEN status = 'Completed' THEN coalesce(finance_approval_end_time, completion_date, approval_date, updated_at, created_at)"
+    " WHEN status = 'Pending Finance Approval' THEN coalesce(finance_approval_start_time, manager_approval_end_time, updated_at, created_at)"
+    " WHEN status = 'Pending Manager Approval' THEN coalesce(manager_approval_start_time, updated_at, created_at)"
+    " WHEN status = 'On Hold' THEN coalesce(updated_at, created_at)"
+    " WHEN status = 'Proof Pending' THEN coalesce(updated_at, finance_approval_end_time, created_at)"
+    " WHEN status = 'Proof Sent' THEN coalesce(updated_at, created_at)"
+    " WHEN status = 'Proof Rejected' THEN coalesce(finance_rejection_date, updated_at, created_at)"
+    " WHEN status = 'Recurring' THEN coalesce(updated_at, created_at)"
+    " WHEN status = 'Rejected by Manager' THEN coalesce(manager_rejection_date, updated_at, created_at)"
+    " WHEN status = 'Rejected by Finance' THEN coalesce(finance_rejection_date, updated_at, created_at)"
+    " ELSE created_at END"
+)
+
 class PaymentRequest(db.Model):
     """Payment request model"""
     __tablename__ = 'payment_requests'
@@ -230,10 +263,18 @@ class PaymentRequest(db.Model):
     finance_approval_end_time = db.Column(db.DateTime)  # When finance approval process ends
     manager_approval_duration_minutes = db.Column(db.Integer)  # Duration in minutes
     finance_approval_duration_minutes = db.Column(db.Integer)  # Duration in minutes
+    finance_sla_deadline = db.Column(db.DateTime)  # finance_approval_start_time + SLA while the finance timer runs (set in app.py)
+    finance_alert_count = db.Column(db.Integer, nullable=False, default=0)  # Timing alerts sent for the running finance timer
+    finance_last_alert_at = db.Column(db.DateTime)
+    finance_next_alert_at = db.Column(db.DateTime)  # When check_finance_approval_timing_alerts() alerts next
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # "All Requests" sort key (status priority asc, per-status recency desc), computed by SQLite
+    all_tab_priority = db.Column(db.Integer, db.Computed(ALL_TAB_PRIORITY_SQL, persisted=False))
+    all_tab_sort_at = db.Column(db.String(26), db.Computed(ALL_TAB_SORT_AT_SQL, persisted=False))
+    
     # Additional field for tracking who created the request
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'))
     
@@ -336,6 +377,23 @@ class PaymentRequest(db.Model):
         return f'<PaymentRequest {self.request_id} - {self.request_type} - {self.status}>'
 
 
+# Keyset index for "All Requests" order (priority asc, sort datetime desc, id desc)
+db.Index(
+    'ix_payment_requests_all_tab_order',
+    PaymentRequest.all_tab_priority,
+    PaymentRequest.all_tab_sort_at.desc(),
+    PaymentRequest.request_id.desc()
+)
+
+# Hot-path filters: dashboards/calendar (is_archived, status, is_draft), department dashboards and reports, own requests
+db.Index('ix_payment_requests_archived_status_draft', PaymentRequest.is_archived, PaymentRequest.status, PaymentRequest.is_draft)
+db.Index('ix_payment_requests_department_status', PaymentRequest.department, PaymentRequest.is_archived, PaymentRequest.status)
+db.Index('ix_payment_requests_user_id', PaymentRequest.user_id)
+db.Index('ix_payment_requests_updated_at', PaymentRequest.updated_at)  # calendar ETag (max(updated_at))
+db.Index('ix_payment_requests_archived_sla_deadline', PaymentRequest.is_archived, PaymentRequest.finance_sla_deadline)  # overdue finance approvals
+db.Index('ix_payment_requests_status_next_alert', PaymentRequest.status, PaymentRequest.finance_next_alert_at)  # timing alerts due
+
+
 class AuditLog(db.Model):
     """Audit log for tracking all actions"""
     __tablename__ = 'audit_logs'
@@ -371,6 +429,12 @@ class Notification(db.Model):
     user = db.relationship('User', backref='notifications')
     request = db.relationship('PaymentRequest', backref='notifications')
     item_request = db.relationship('ProcurementItemRequest', backref='notifications')
+
+    __table_args__ = (
+        db.Index('ix_notifications_user_read_type_created', 'user_id', 'is_read', 'notification_type', 'created_at'),  # unread counts
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),  # newest-first lists
+        db.Index('ix_notifications_request_type_created', 'request_id', 'notification_type', 'created_at'),  # same-day reminder checks
+    )
     
     def to_dict(self):
         """Convert notification to dictionary"""
@@ -389,6 +453,21 @@ class Notification(db.Model):
         return f'<Notification {self.notification_id} - {self.title}>'
 
 
+class UserNotificationCounter(db.Model):
+    """Denormalised unread-notification badge count per user.
+    Kept in step with the notifications table by the notification helpers in app.py (in the same
+    transaction as the change) and recomputed from scratch by reconcile_unread_counters().
+    """
+    __tablename__ = 'user_notification_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UserNotificationCounter user_id={self.user_id} unread={self.unread_count}>'
+
+
 class UserPermissionToggle(db.Model):
     """Per-user permission toggles for the Edit Permissions panel.
     Stores which permission keys are enabled for each user.
@@ -448,7 +527,10 @@ class DepartmentTemporaryManager(db.Model):
     include_procurement_approvals = db.Column(db.Boolean, default=False)  # If True, temp manager can also do Procurement Manager Approval and Final Approval for item requests from ALL departments
 
     # Unique constraint on combination of department and request_type
-    __table_args__ = (db.UniqueConstraint('department', 'request_type', name='unique_dept_request_type'),)
+    __table_args__ = (
+        db.UniqueConstraint('department', 'request_type', name='unique_dept_request_type'),
+        db.Index('ix_department_temporary_managers_manager_type', 'temporary_manager_id', 'request_type'),
+    )
 
     temporary_manager = db.relationship('User', foreign_keys=[temporary_manager_id], backref='department_temporary_assignments')
     set_by_user = db.relationship('User', foreign_keys=[set_by_user_id], backref='department_temporary_set_actions')
@@ -457,6 +539,30 @@ class DepartmentTemporaryManager(db.Model):
         return f"<DepartmentTemporaryManager dept={self.department} request_type={self.request_type} temp_manager={self.temporary_manager.name if self.temporary_manager else self.temporary_manager_id} include_procurement_approvals={self.include_procurement_approvals}>"
 
 
+class RequestVisibility(db.Model):
+    """Precomputed per-user visibility of payment requests.
+    One row per (user, request, reason). Maintained by refresh_request_visibility() in app.py
+    whenever a request is created, its department or temporary manager changes, or a
+    department-level temporary manager is set, so dashboards can filter with one indexed
+    subquery instead of evaluating get_authorized_manager_approvers() for every request.
+    """
+    __tablename__ = 'request_visibility'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    request_id = db.Column(db.Integer, db.ForeignKey('payment_requests.request_id'), nullable=False)
+    reason = db.Column(db.String(50), nullable=False)  # requestor, temporary_manager, department_temporary_manager, manager_approver
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'request_id', 'reason', name='unique_user_request_reason'),
+        db.Index('ix_request_visibility_request_id', 'request_id'),
+    )
+
+    def __repr__(self):
+        return f'<RequestVisibility user_id={self.user_id} request_id={self.request_id} reason={self.reason}>'
+
+
 class PaidNotification(db.Model):
     """Track when recurring payment notifications were marked as paid"""
     __tablename__ = 'paid_notifications'
@@ -466,6 +572,8 @@ class PaidNotification(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     paid_date = db.Column(db.Date, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_paid_notifications_request_date', 'request_id', 'paid_date'),)
     
     def __repr__(self):
         return f'<PaidNotification {self.id} - Request {self.request_id} paid on {self.paid_date}>'
@@ -489,6 +597,12 @@ class RecurringPaymentSchedule(db.Model):
     
     # Relationship to the main payment request
     request = db.relationship('PaymentRequest', backref='payment_schedules')
+
+    __table_args__ = (
+        db.Index('ix_recurring_payment_schedules_request_date', 'request_id', 'payment_date', 'is_paid'),
+        # Partial index: unpaid installments by due date (due-today / overdue scans)
+        db.Index('ix_recurring_payment_schedules_unpaid_date', 'payment_date', 'request_id', sqlite_where=db.text('is_paid = 0')),
+    )
     
     def to_dict(self):
         """Convert schedule to dictionary"""
@@ -518,11 +632,59 @@ class LateInstallment(db.Model):
     payment_date = db.Column(db.Date, nullable=False)
     marked_by_user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_late_installments_request_date', 'request_id', 'payment_date'),)
     
     def __repr__(self):
         return f'<LateInstallment {self.id} - Request {self.request_id} - {self.payment_date}>'
 
 
+
+class PaymentOccurrence(db.Model):
+    """Materialised due dates of recurring payment requests: one row per installment
+    (RecurringPaymentSchedule) or per date generated from recurring_interval, with its paid / late state.
+    Rebuilt per request by refresh_payment_occurrences() in app.py whenever the request, its installments,
+    paid markers or late markers change, so the calendar and its badge read one indexed date-range query.
+    """
+    __tablename__ = 'payment_occurrences'
+
+    id = db.Column(db.Integer, primary_key=True)
+    request_id = db.Column(db.Integer, db.ForeignKey('payment_requests.request_id'), nullable=False)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('recurring_payment_schedules.schedule_id'), nullable=True)  # NULL = generated from recurring_interval
+    due_date = db.Column(db.Date, nullable=False)
+    amount = db.Column(db.Numeric(12, 3), nullable=False)
+    paid = db.Column(db.Boolean, nullable=False, default=False)
+    late = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        db.Index('ix_payment_occurrences_due_date_paid', 'due_date', 'paid'),
+        db.Index('ix_payment_occurrences_request_date', 'request_id', 'due_date'),
+    )
+
+    def __repr__(self):
+        return f'<PaymentOccurrence request_id={self.request_id} {self.due_date} paid={self.paid} late={self.late}>'
+
+
+class InstallmentLedger(db.Model):
+    """Paid total and remaining balance of each recurring request that has installments (RecurringPaymentSchedule).
+    Rebuilt together with the request's payment_occurrences by refresh_payment_occurrences() in app.py, so
+    installments being paid, marked or edited keep it current and readers do not re-aggregate the schedule.
+    """
+    __tablename__ = 'installment_ledgers'
+
+    request_id = db.Column(db.Integer, db.ForeignKey('payment_requests.request_id'), primary_key=True)
+    installment_count = db.Column(db.Integer, nullable=False, default=0)
+    paid_count = db.Column(db.Integer, nullable=False, default=0)
+    scheduled_total = db.Column(db.Numeric(12, 3), nullable=False, default=0)
+    paid_total = db.Column(db.Numeric(12, 3), nullable=False, default=0)  # installments with is_paid
+    marked_paid_total = db.Column(db.Numeric(12, 3), nullable=False, default=0)  # installments with a PaidNotification on their due date
+    remaining_amount = db.Column(db.Numeric(12, 3), nullable=False, default=0)  # request amount - paid_total
+    next_due_date = db.Column(db.Date)  # earliest unpaid installment
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<InstallmentLedger request_id={self.request_id} paid={self.paid_total} remaining={self.remaining_amount}>'
+
 class InstallmentEditHistory(db.Model):
     """Track edit history for recurring payment installments"""
     __tablename__ = 'installment_edit_history'
@@ -739,6 +901,30 @@ class BranchAlias(db.Model):
         return f"<BranchAlias {self.id} - {self.alias_name} (branch_id={self.branch_id})>"
 
 
+class RequestBranchAllocation(db.Model):
+    """One row per branch listed on a payment request (PaymentRequest.branch_name is comma-separated and
+    branch_amounts a parallel JSON array). Rebuilt by refresh_branch_allocations() in app.py whenever a
+    request's branches or amounts change, so branch filters and per-branch totals are indexed lookups.
+    """
+    __tablename__ = 'request_branch_allocations'
+
+    id = db.Column(db.Integer, primary_key=True)
+    request_id = db.Column(db.Integer, db.ForeignKey('payment_requests.request_id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)  # 0-based place in branch_name
+    branch_name = db.Column(db.String(100), nullable=False)  # name as written on the request
+    branch_id = db.Column(db.Integer, db.ForeignKey('branches.id'), nullable=True)  # branch with that name, else with that alias
+    amount = db.Column(db.Numeric(12, 3), nullable=True)  # this branch's share when the request has different amounts per branch
+
+    __table_args__ = (
+        db.Index('ix_request_branch_allocations_name_request', 'branch_name', 'request_id'),
+        db.Index('ix_request_branch_allocations_request', 'request_id', 'branch_name'),
+        db.Index('ix_request_branch_allocations_branch', 'branch_id', 'request_id'),
+    )
+
+    def __repr__(self):
+        return f'<RequestBranchAllocation request_id={self.request_id} {self.branch_name} amount={self.amount}>'
+
+
 class LocationPriority(db.Model):
     """Location priority for ordering location groups in branch dropdowns"""
     __tablename__ = 'location_priorities'
@@ -1265,4 +1451,109 @@ class ChequeBookPermission(db.Model):
 
     def __repr__(self):
         scope = f'serial {self.serial_id}' if self.serial_id else 'whole book'
-        return f'<ChequeBookPermission book_id={self.book_id} {scope} → user {self.granted_to_user_id}>'
\ No newline at end of file
+        return f'<ChequeBookPermission book_id={self.book_id} {scope} → user {self.granted_to_user_id}>'
+
+class ScheduledJob(db.Model):
+    """Bookkeeping for a periodic background job (see SCHEDULED_JOBS in app.py).
+    next_run_at decides when the job is due; the last_* columns record the most recent run."""
+    __tablename__ = 'scheduled_jobs'
+
+    name = db.Column(db.String(100), primary_key=True)
+    interval_seconds = db.Column(db.Integer, nullable=False)
+    next_run_at = db.Column(db.DateTime, nullable=True)  # NULL = due now
+    last_started_at = db.Column(db.DateTime, nullable=True)
+    last_finished_at = db.Column(db.DateTime, nullable=True)
+    last_duration_ms = db.Column(db.Integer, nullable=True)
+    last_status = db.Column(db.String(20), nullable=True)  # ok, error
+    last_error = db.Column(db.Text, nullable=True)
+    run_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ScheduledJob {self.name} next={self.next_run_at} last={self.last_status}>'
+
+
+class SchedulerLease(db.Model):
+    """Leader lock for the job scheduler: only the process holding an unexpired lease runs jobs,
+    so several workers (or a worker and the CLI runner) never send the same alerts twice."""
+    __tablename__ = 'scheduler_leases'
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(200), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} holder={self.holder} expires={self.expires_at}>'
+
+
+class FinanceSlaPolicy(db.Model):
+    """Finance approval SLA (hours until a request counts as overdue) for a request type and/or department.
+    The most specific row wins: type + department, then type, then department, then the row with neither
+    (falling back to FINANCE_SLA_URGENT_HOURS / FINANCE_SLA_NORMAL_HOURS in config.py).
+    Managed with scripts/finance_sla_policies.py."""
+    __tablename__ = 'finance_sla_policies'
+
+    id = db.Column(db.Integer, primary_key=True)
+    request_type = db.Column(db.String(50), nullable=True)  # NULL = any request type
+    department = db.Column(db.String(100), nullable=True)  # NULL = any department
+    urgent_hours = db.Column(db.Float, nullable=False)
+    normal_hours = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('request_type', 'department', name='unique_finance_sla_scope'),)
+
+    def __repr__(self):
+        return f'<FinanceSlaPolicy type={self.request_type} department={self.department} urgent={self.urgent_hours}h normal={self.normal_hours}h>'
+
+
+class ExportJob(db.Model):
+    """A report export or database backup generated in the background (see EXPORT_JOB_KINDS in app.py).
+    The finished file lives in EXPORT_FOLDER until expires_at; live progress is pushed over Socket.IO."""
+    __tablename__ = 'export_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=True)  # JSON list of [name, value] query parameters (the page's filters)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    error = db.Column(db.Text, nullable=True)
+    file_path = db.Column(db.String(500), nullable=True)
+    download_name = db.Column(db.String(255), nullable=True)
+    mimetype = db.Column(db.String(100), nullable=True)
+    file_size = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)  # The file and the job are deleted after this (set when the job finishes)
+
+    __table_args__ = (db.Index('ix_export_jobs_user_created', 'user_id', 'created_at'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'error': self.error,
+            'download_name': self.download_name,
+            'file_size': self.file_size,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+        }
+
+    def __repr__(self):
+        return f'<ExportJob {self.id} {self.kind} {self.status}>'
+
+
+class DataBackfill(db.Model):
+    """One-time data backfills that need the app's Python logic (see DATA_BACKFILLS in app.py).
+    A row is claimed (started_at) before the backfill runs and completed (applied_at) after it succeeds."""
+    __tablename__ = 'data_backfills'
+
+    name = db.Column(db.String(100), primary_key=True)
+    started_at = db.Column(db.DateTime, nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=True)  # NULL = running (or crashed; retaken after DATA_BACKFILL_CLAIM_SECONDS)
+    result = db.Column(db.Integer, nullable=True)  # Rows written, as returned by the backfill
+
+    def __repr__(self):
+        return f'<DataBackfill {self.name} applied={self.applied_at}>'
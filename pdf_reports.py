@@ -0,0 +1,249 @@
+"""Table-style PDF reports (payment reports, item request reports) drawn with reportlab.
+
+PdfTableReport draws a title block and then one table row at a time, repeating the column headers
+on every page, so callers can feed it rows straight from a chunked query. Per-process caches keep
+the expensive parts out of the row loop:
+
+  report_body_font()  registers the first Arabic-capable TTF font found, once per process
+  prepare_text()      Arabic reshaping + bidi reordering, memoised per string
+  wrap_text()         word wrapping against real font metrics, memoised per (text, width, font)
+
+arabic-reshaper and python-bidi are optional; without them Arabic text is drawn unshaped.
+"""
+import os
+import re
+from functools import lru_cache
+
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+try:
+    import arabic_reshaper  # pip install arabic-reshaper
+    from bidi.algorithm import get_display  # pip install python-bidi
+except Exception:
+    arabic_reshaper = None
+    get_display = None
+
+# Candidate fonts: prefer bundled fonts (relative to the app root), then system fonts (Windows/Linux/macOS)
+BUNDLED_FONTS = (
+    'Amiri-Regular.ttf',
+    'NotoNaskhArabic-Regular.ttf',
+    'NotoSansArabic-Regular.ttf',
+    'Cairo-Regular.ttf',
+    'Tahoma.ttf',
+    'Arial.ttf',
+)
+SYSTEM_FONTS = (
+    # Windows common fonts
+    r'C:\\Windows\\Fonts\\trado.ttf',            # Traditional Arabic
+    r'C:\\Windows\\Fonts\\Tahoma.ttf',
+    r'C:\\Windows\\Fonts\\arial.ttf',
+    r'C:\\Windows\\Fonts\\arialuni.ttf',        # Arial Unicode MS (if present)
+    r'C:\\Windows\\Fonts\\times.ttf',
+    r'C:\\Windows\\Fonts\\segoeui.ttf',
+    r'C:\\Windows\\Fonts\\segoeuib.ttf',
+    # Linux
+    '/usr/share/fonts/truetype/noto/NotoNaskhArabic-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansArabic-Regular.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    # macOS
+    '/Library/Fonts/Arial Unicode.ttf',
+    '/Library/Fonts/Tahoma.ttf',
+    '/System/Library/Fonts/Supplemental/Times New Roman.ttf',
+)
+ARABIC_FONT_NAME = 'ArabicFont'
+
+# Arabic, Arabic Supplement, Arabic Extended-A, Arabic Presentation Forms-A and -B
+_ARABIC_RE = re.compile('[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+# Sizes of the per-process text caches (report cells repeat a lot: departments, types, approvers)
+TEXT_CACHE_SIZE = 20000
+
+
+@lru_cache(maxsize=None)
+def report_body_font(root_path):
+    """Name of the registered Arabic-capable font, or None to fall back to Helvetica.
+    The font files are looked up and registered with reportlab only once per process."""
+    candidates = [os.path.join(root_path, 'static', 'fonts', name) for name in BUNDLED_FONTS] + list(SYSTEM_FONTS)
+    for font_path in candidates:
+        if os.path.exists(font_path):
+            try:
+                pdfmetrics.registerFont(TTFont(ARABIC_FONT_NAME, font_path))
+                return ARABIC_FONT_NAME
+            except Exception:
+                continue
+    return None
+
+
+def contains_arabic(text):
+    return bool(text) and _ARABIC_RE.search(str(text)) is not None
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _shape(s):
+    try:
+        return get_display(arabic_reshaper.reshape(s))
+    except Exception:
+        # If shaping fails, return original text
+        return s
+
+
+def prepare_text(value):
+    """Text ready to draw: Arabic is reshaped and put in visual order when the shaping libraries are installed"""
+    s = '' if value is None else str(value)
+    if arabic_reshaper and get_display and contains_arabic(s):
+        return _shape(s)
+    return s
+
+
+def string_width(text, font_name, font_size):
+    try:
+        return pdfmetrics.stringWidth(text, font_name, font_size)
+    except Exception:
+        # Fallback estimate if metrics are unavailable
+        return len(text) * font_size * 0.5
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def wrap_text(text, max_width, font_name, font_size=9):
+    """Lines of `text` (prepared for drawing) that fit within max_width, as a tuple.
+    First splits by newlines, then wraps each line by words; tokens wider than a line are broken by characters."""
+    s = prepare_text(text)
+    if not s:
+        return ('',)
+
+    # Use a slightly smaller width to keep text away from column border
+    effective_width = max(0, max_width - (1.5 * mm))
+
+    all_lines = []
+    # First, split by newlines to preserve intentional line breaks
+    for line in s.split('\n'):
+        if not line.strip():
+            all_lines.append('')
+            continue
+
+        # Wrap this line if it's too long
+        wrapped_lines = []
+        current = ''
+        for word in line.split():
+            candidate = (current + ' ' + word).strip()
+            if current and string_width(candidate, font_name, font_size) > effective_width:
+                wrapped_lines.append(current)
+                current = word
+            else:
+                current = candidate
+        if current:
+            wrapped_lines.append(current)
+
+        # Hard-break extremely long tokens that exceed width
+        for wrapped_line in wrapped_lines:
+            if string_width(wrapped_line, font_name, font_size) <= effective_width:
+                all_lines.append(wrapped_line)
+            else:
+                buf = ''
+                for ch in wrapped_line:
+                    if string_width(buf + ch, font_name, font_size) > effective_width and buf:
+                        all_lines.append(buf)
+                        buf = ch
+                    else:
+                        buf += ch
+                if buf:
+                    all_lines.append(buf)
+
+    return tuple(all_lines) or ('',)
+
+
+class PdfTableReport:
+    """Landscape A4 report: title, info lines and a bold total, then a table drawn row by row.
+
+    report = PdfTableReport(output, app.root_path, 'Payment Reports', info_lines, total_line, headers, col_widths)
+    for row in rows:
+        report.add_row(row)
+    report.finish()
+    """
+
+    line_height = 10
+    font_size = 9
+    column_gap = 4 * mm
+    bottom_margin = 15 * mm
+
+    def __init__(self, output, root_path, title, info_lines, total_line, headers, col_widths):
+        self.canvas = canvas.Canvas(output, pagesize=landscape(A4))
+        width, height = landscape(A4)
+        arabic_font_name = report_body_font(root_path)
+        # Use Arabic-capable font for all body text if available (Helvetica-Bold has no Arabic glyphs)
+        self.body_font = arabic_font_name or 'Helvetica'
+        self.header_font = arabic_font_name or 'Helvetica-Bold'
+        self.headers = list(headers)
+        self.col_widths = list(col_widths)
+        # Margins (reduced for more space)
+        self.left = 8 * mm
+        self.right = width - 8 * mm
+        self.top = height - 8 * mm
+        # Calculate column positions based on widths to prevent overlapping
+        self.col_x = [self.left]
+        for i in range(1, len(self.col_widths)):
+            self.col_x.append(self.col_x[i - 1] + self.col_widths[i - 1] + self.column_gap)
+
+        c = self.canvas
+        y = self.top
+        c.setFont('Helvetica-Bold', 14)
+        c.drawString(self.left, y, title)
+        c.setFont(self.body_font, 10)
+        y -= 14
+        for line in info_lines:
+            c.drawString(self.left, y, prepare_text(line))
+            y -= 12
+        c.setFont('Helvetica-Bold', 11)
+        c.drawString(self.left, y, total_line)
+        y -= 18
+        self.y = y
+        self._draw_table_header()
+
+    def _draw_text(self, x, y, text, font_name, column_width):
+        """Draw text with RTL alignment for Arabic text, LTR for others"""
+        prepared = prepare_text(text)
+        if contains_arabic(prepared):
+            # Align from right: start position = column_start + column_width - text_width
+            text_width = string_width(prepared, font_name, self.font_size)
+            self.canvas.drawString(x + column_width - text_width, y, prepared)
+        else:
+            self.canvas.drawString(x, y, prepared)
+
+    def _draw_table_header(self):
+        c = self.canvas
+        c.setFont(self.header_font, self.font_size)
+        for hx, text, column_width in zip(self.col_x, self.headers, self.col_widths):
+            self._draw_text(hx, self.y, text, self.header_font, column_width)
+        self.y -= 10
+        c.line(self.left, self.y, self.right, self.y)
+        self.y -= 8
+        c.setFont(self.body_font, self.font_size)
+
+    def add_row(self, values):
+        """Draw one row (one value per column), starting a new page with the headers when it does not fit"""
+        # Pre-wrap and measure to know if the row fits in the remaining space
+        wrapped_lines_per_col = [
+            wrap_text(str(value), column_width, self.body_font, self.font_size) if value else ('',)
+            for value, column_width in zip(values, self.col_widths)
+        ]
+        max_height = max(len(lines) for lines in wrapped_lines_per_col) * self.line_height
+
+        if self.y - max_height < self.bottom_margin:
+            self.canvas.showPage()
+            self.y = self.top
+            self._draw_table_header()
+
+        for hx, lines, column_width in zip(self.col_x, wrapped_lines_per_col, self.col_widths):
+            for j, line in enumerate(lines):
+                self._draw_text(hx, self.y - (j * self.line_height), line, self.body_font, column_width)
+
+        self.y -= max_height + 3  # Reduced spacing between rows for more content
+
+    def finish(self):
+        """Close the last page and write the document to the output"""
+        self.canvas.showPage()
+        self.canvas.save()
@@ -0,0 +1,314 @@
+"""Recurring payment rules (the PaymentRequest.recurring_interval mini-language).
+
+compile_rule() parses an interval string once into an immutable RecurringRule and keeps it in
+an LRU cache keyed by the string, so the calendar, due-today checks, scheduled-date listings
+and schedule descriptions all share one parser and one set of semantics.
+
+Supported strings:
+  daily:N[:time:HH:MM]
+  weekly:N[:days:monday,friday]
+  monthly:N                                       (from the request date)
+  monthly:N:date:YYYY-MM-DD[:end:YYYY-MM-DD]
+  monthly:N:days:D1,D2[:YYYY:MM][:end:YYYY-MM-DD]
+  quarterly:N[:months:January,April[:days:D1,D2]]
+  yearly:N[:months:January[:days:D1,D2]]
+  custom:YYYY-MM-DD:AMOUNT,...                    (installments; stored in recurring_payment_schedules)
+
+Rules that have no explicit start date are anchored at the request date. Expansion uses month /
+day arithmetic, so it never walks the calendar day by day.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# Upper bound on the dates returned by one expansion (guards against open-ended daily rules)
+MAX_OCCURRENCES = 500
+
+WEEKDAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+MONTH_NAMES = ('January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December')
+
+
+def _month_index(day):
+    return day.year * 12 + day.month - 1
+
+
+def _date_in_month(month_index, day, clamp):
+    """date for `day` in the month `month_index`; clamp to the last day of the month, or None if it does not exist."""
+    year, month = divmod(month_index, 12)
+    month += 1
+    last_day = calendar.monthrange(year, month)[1]
+    if day > last_day:
+        if not clamp:
+            return None
+        day = last_day
+    return date(year, month, day)
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+@dataclass(frozen=True)
+class RecurringRule:
+    """A compiled recurring_interval string. Build with compile_rule()."""
+    text: str
+    frequency: str                 # daily, weekly, monthly, quarterly, yearly, custom
+    interval: int = 1
+    kind: str = 'plain'            # plain, date, days, months (which optional parts were given)
+    start: date = None             # explicit first date (monthly:N:date, or the first of YYYY-MM for monthly:N:days)
+    end: date = None
+    days: tuple = ()               # days of the month
+    weekdays: tuple = ()           # 0 = Monday
+    months: tuple = ()             # 1-12
+    time: tuple = None             # (hour, minute) for daily:N:time:HH:MM
+    custom_dates: tuple = ()       # ((date, amount), ...) for custom:
+
+    # --- Series definition ---
+
+    def _month_series(self, anchor):
+        """(base month index, step in months, first k, days, clamp) for month-based rules, or None."""
+        if self.frequency == 'monthly':
+            if self.kind == 'date':
+                return _month_index(self.start), self.interval, 0, (self.start.day,), True
+            if self.kind == 'days' and self.start:
+                return _month_index(self.start), self.interval, 0, self.days, False
+            if anchor is None:
+                return None
+            # Anchored at the request date: never due in the month it was created
+            days = self.days if self.kind == 'days' else (anchor.day,)
+            return _month_index(anchor), self.interval, 1, days, False
+        if self.frequency == 'quarterly':
+            if anchor is None:
+                return None
+            return _month_index(anchor), self.interval * 3, 1, self.days or (anchor.day,), False
+        return None
+
+    def is_due(self, day, anchor=None):
+        """True if a payment falls due on `day`. `anchor` is the request date (needed unless the rule has a start date)."""
+        if self.end and day > self.end:
+            return False
+        if self.frequency == 'custom':
+            return any(due_date == day for due_date, _ in self.custom_dates)
+
+        if self.frequency == 'daily':
+            if anchor is None:
+                return False
+            elapsed = (day - anchor).days
+            first = 0 if self.interval == 1 else self.interval
+            return elapsed >= first and elapsed % self.interval == 0
+
+        if self.frequency == 'weekly':
+            if anchor is None or day < anchor:
+                return False
+            weeks = (day - (anchor - timedelta(days=anchor.weekday()))).days // 7
+            weekdays = self.weekdays or (anchor.weekday(),)
+            return day.weekday() in weekdays and weeks % self.interval == 0
+
+        if self.frequency == 'yearly':
+            if anchor is None:
+                return False
+            years = day.year - anchor.year
+            return (years > 0 and years % self.interval == 0
+                    and day.month in (self.months or (anchor.month,))
+                    and day.day in (self.days or (anchor.day,)))
+
+        series = self._month_series(anchor)
+        if series is None:
+            return False
+        base, step, first_k, days, clamp = series
+        offset = _month_index(day) - base
+        if offset < first_k * step or offset % step != 0:
+            return False
+        if self.months and day.month not in self.months:
+            return False
+        return any(_date_in_month(_month_index(day), d, clamp) == day for d in days)
+
+    def occurrences(self, window_start=None, window_end=None, anchor=None):
+        """Sorted due dates between window_start and window_end (inclusive; None = from the start of the series).
+        window_end defaults to the rule's end date; open-ended rules need one."""
+        window_end = min(window_end, self.end) if (window_end and self.end) else (window_end or self.end)
+        if window_end is None:
+            return []
+        if self.frequency == 'custom':
+            dates = sorted(due_date for due_date, _ in self.custom_dates)
+            return [d for d in dates if (window_start is None or d >= window_start) and d <= window_end][:MAX_OCCURRENCES]
+
+        dates = []
+        if self.frequency == 'daily':
+            if anchor is None:
+                return []
+            k = 0 if self.interval == 1 else 1
+            if window_start and window_start > anchor:
+                k = max(k, -(-(window_start - anchor).days // self.interval))
+            current = anchor + timedelta(days=k * self.interval)
+            while current <= window_end and len(dates) < MAX_OCCURRENCES:
+                dates.append(current)
+                current += timedelta(days=self.interval)
+            return dates
+
+        if self.frequency == 'weekly':
+            if anchor is None:
+                return []
+            week_start = anchor - timedelta(days=anchor.weekday())
+            lower = max(window_start or anchor, anchor)
+            k = max(0, (lower - week_start).days // 7 // self.interval)
+            weekdays = sorted(self.weekdays or (anchor.weekday(),))
+            while len(dates) < MAX_OCCURRENCES:
+                monday = week_start + timedelta(weeks=k * self.interval)
+                if monday > window_end:
+                    break
+                for weekday in weekdays:
+                    due_date = monday + timedelta(days=weekday)
+                    if lower <= due_date <= window_end:
+                        dates.append(due_date)
+                k += 1
+            return dates[:MAX_OCCURRENCES]
+
+        if self.frequency == 'yearly':
+            if anchor is None:
+                return []
+            year = anchor.year + self.interval
+            if window_start and window_start.year > year:
+                year += -(-(window_start.year - year) // self.interval) * self.interval
+            while year <= window_end.year and len(dates) < MAX_OCCURRENCES:
+                for month in sorted(self.months or (anchor.month,)):
+                    for day in sorted(self.days or (anchor.day,)):
+                        due_date = _date_in_month(year * 12 + month - 1, day, clamp=False)
+                        if due_date and (window_start is None or due_date >= window_start) and due_date <= window_end:
+                            dates.append(due_date)
+                year += self.interval
+            return dates[:MAX_OCCURRENCES]
+
+        series = self._month_series(anchor)
+        if series is None:
+            return []
+        base, step, first_k, days, clamp = series
+        k = first_k
+        if window_start:
+            k = max(k, -(-(_month_index(window_start) - base) // step))
+        days = sorted(days)
+        while len(dates) < MAX_OCCURRENCES:
+            month_index = base + k * step
+            if month_index > _month_index(window_end):
+                break
+            if not self.months or month_index % 12 + 1 in self.months:
+                for day in days:
+                    due_date = _date_in_month(month_index, day, clamp)
+                    if due_date and (window_start is None or due_date >= window_start) and due_date <= window_end:
+                        dates.append(due_date)
+            k += 1
+        return dates[:MAX_OCCURRENCES]
+
+    def configured_dates(self, anchor=None):
+        """Dates listed on the request (monthly rules): the whole series when it has an end date,
+        otherwise the dates of its first period."""
+        if self.frequency != 'monthly':
+            return []
+        if self.end:
+            return self.occurrences(None, self.end, anchor)
+        if self.kind == 'date':
+            return [self.start]
+        if self.kind == 'days':
+            year, month = (self.start.year, self.start.month) if self.start else (anchor.year, anchor.month) if anchor else (None, None)
+            if year is None:
+                return []
+            return [d for d in (_date_in_month(year * 12 + month - 1, day, clamp=False) for day in self.days) if d]
+        return [anchor] if anchor else []
+
+    # --- Display ---
+
+    def describe(self):
+        """Human-readable schedule, e.g. 'Every 2 months starting on October 18, 2025 until January 30, 2026'."""
+        every = lambda one, many: one if self.interval == 1 else f"Every {self.interval} {many}"
+        if self.frequency == 'monthly' and self.kind in ('date', 'days'):
+            if self.kind == 'date':
+                starting_text = self.start.strftime('%B %d, %Y')
+            elif self.start:
+                starting_text = ", ".join(f"{MONTH_NAMES[self.start.month - 1]} {day}, {self.start.year}" for day in self.days)
+            else:
+                starting_text = f"days {', '.join(str(day) for day in self.days)}"
+            text = f"{every('Every month', 'months')} starting on {starting_text}"
+            if self.end:
+                text += f" until {self.end.strftime('%B %d, %Y')}"
+            return text
+        return {
+            'daily': every('Daily', 'days'),
+            'weekly': every('Weekly', 'weeks'),
+            'monthly': every('Monthly', 'months'),
+            'quarterly': every('Quarterly', 'quarters'),
+            'yearly': every('Yearly', 'years'),
+        }.get(self.frequency)
+
+
+def _parse_time(hour, minute):
+    """(hour, minute) of a daily rule's time of day, or None (due from the start of the day) if invalid"""
+    try:
+        hour, minute = int(hour), int(minute)
+    except ValueError:
+        return None
+    return (hour, minute) if 0 <= hour <= 23 and 0 <= minute <= 59 else None
+
+
+def _parse_days(value):
+    return tuple(sorted({int(day) for day in value.split(',') if day.strip()}))
+
+
+def _parse_months(value):
+    names = [name.strip() for name in value.split(',')]
+    return tuple(MONTH_NAMES.index(name) + 1 for name in names if name in MONTH_NAMES)
+
+
+@lru_cache(maxsize=1024)
+def compile_rule(text):
+    """Compile a recurring_interval string into a RecurringRule (cached). Returns None if it cannot be parsed."""
+    if not text:
+        return None
+    try:
+        parts = text.split(':')
+        frequency = parts[0]
+
+        if frequency == 'custom':
+            custom_dates = []
+            for pair in text[len('custom:'):].split(','):
+                if ':' in pair:
+                    date_str, amount_str = pair.split(':', 1)
+                    custom_dates.append((_parse_date(date_str), float(amount_str)))
+            return RecurringRule(text=text, frequency='custom', kind='custom', custom_dates=tuple(custom_dates))
+
+        if frequency not in ('daily', 'weekly', 'monthly', 'quarterly', 'yearly'):
+            return None
+        interval = int(parts[1])
+        if interval < 1:
+            return None
+        fields = {'text': text, 'frequency': frequency, 'interval': interval}
+
+        if 'end' in parts:
+            end_index = parts.index('end')
+            if end_index + 1 < len(parts):
+                fields['end'] = _parse_date(parts[end_index + 1])
+
+        option = parts[2] if len(parts) > 3 else None
+        if frequency == 'daily' and option == 'time' and len(parts) > 4:
+            fields['time'] = _parse_time(parts[3], parts[4])
+        elif frequency == 'weekly' and option == 'days':
+            fields['kind'] = 'days'
+            fields['weekdays'] = tuple(sorted(WEEKDAY_NAMES.index(name.strip().lower())
+                                              for name in parts[3].split(',') if name.strip().lower() in WEEKDAY_NAMES))
+        elif frequency == 'monthly' and option == 'date':
+            fields['kind'] = 'date'
+            fields['start'] = _parse_date(parts[3])
+        elif frequency == 'monthly' and option == 'days':
+            fields['kind'] = 'days'
+            fields['days'] = _parse_days(parts[3])
+            if len(parts) > 5 and parts[4] != 'end':
+                fields['start'] = date(int(parts[4]), int(parts[5]), 1)
+        elif frequency in ('quarterly', 'yearly') and option == 'months':
+            fields['kind'] = 'months'
+            fields['months'] = _parse_months(parts[3])
+            if len(parts) > 5 and parts[4] == 'days':
+                fields['days'] = _parse_days(parts[5])
+        return RecurringRule(**fields)
+    except (ValueError, IndexError, TypeError):
+        return None
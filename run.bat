@@ -47,6 +47,11 @@ if /i "%INIT_DB%"=="yes" (
     echo.
 )
 
+REM Apply pending database schema migrations
+echo Applying database migrations...
+python migrations.py
+echo.
+
 REM Start the application
 echo Starting Flask application...
 echo.
@@ -48,6 +48,11 @@ if [ "$INIT_DB" = "yes" ] || [ "$INIT_DB" = "y" ]; then
     echo ""
 fi
 
+# Apply pending database schema migrations
+echo "Applying database migrations..."
+python migrations.py
+echo ""
+
 # Start the application
 echo "Starting Flask application..."
 echo ""
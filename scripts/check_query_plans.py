@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Check that the hot query paths use the composite / partial indexes.
+
+Runs the queries behind the dashboards, the unread-notification badge, the
+calendar, the overdue finance approvals and the reports page, captures the SQL they issue and prints the
+EXPLAIN QUERY PLAN for each. A check fails if its table is read with a full
+table scan or none of the expected indexes (migrations.HOT_PATH_INDEXES) is used.
+Nothing is written to the database.
+
+Usage (from project root):
+  python scripts/check_query_plans.py
+  python scripts/check_query_plans.py --verbose   # print every plan
+Exits with status 1 if any check fails.
+"""
+import argparse
+import os
+import re
+import sys
+from datetime import date, datetime
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _capture_sql(db, fn):
+    """Run fn() and return the (statement, parameters) pairs it executed."""
+    from sqlalchemy import event
+
+    captured = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', _before)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', _before)
+    return captured
+
+
+def _explain(db, statement, parameters):
+    rows = db.session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def _check(db, label, table, expected, fn, verbose=False):
+    """Return True if fn() reads `table` through one of the `expected` indexes and never full-scans it."""
+    full_scan = re.compile(rf'^SCAN {table}\b(?!.*INDEX)')
+    uses_index = re.compile(rf'^(SEARCH|SCAN) {table}\b.*USING (COVERING )?INDEX (\w+)')
+    used, scanned = set(), False
+    for statement, parameters in _capture_sql(db, fn):
+        plan = _explain(db, statement, parameters)
+        if not any(re.match(rf'^(SEARCH|SCAN) {table}\b', line) for line in plan):
+            continue
+        for line in plan:
+            if full_scan.match(line):
+                scanned = True
+            m = uses_index.match(line)
+            if m:
+                used.add(m.group(3))
+        if verbose:
+            print(f"  {statement.strip().splitlines()[0][:100]}...")
+            for line in plan:
+                print(f"    {line}")
+    ok = bool(used & set(expected)) and not scanned
+    detail = ', '.join(sorted(used)) or 'no index'
+    if scanned:
+        detail += f'; full scan of {table}'
+    print(f"{'✓' if ok else '✗'} {label}: {detail}")
+    return ok
+
+
+def main():
+    p = argparse.ArgumentParser(description='Verify hot query paths use the composite / partial indexes')
+    p.add_argument('--verbose', action='store_true', help='Print the query plan of every captured statement')
+    args = p.parse_args()
+
+    from app import (app, get_dashboard_all_tab_base_query, count_unread_notifications, get_notifications_for_user,
+                     _calendar_recurring_pending_count, _calendar_recurring_pending_cache, overdue_finance_requests_query)
+    from migrations import HOT_PATH_INDEXES
+    from models import db, User, Notification, PaymentRequest, RecurringPaymentSchedule, PaidNotification, LateInstallment, DepartmentTemporaryManager
+
+    indexes = {}
+    for name, table, _, _ in HOT_PATH_INDEXES:
+        indexes.setdefault(table, []).append(name)
+
+    # Transient users: the helpers only read role / department / name / id
+    finance_admin = User(user_id=1, username='plan_check', name='Plan Check', role='Finance Admin', department='Finance')
+    gm = User(user_id=1, username='plan_check', name='Plan Check', role='GM', department='Management')
+    project_staff = User(user_id=1, username='plan_check', name='Plan Check', role='Project Staff', department='Project')
+    today = date.today()
+    calendar_statuses = ['Pending Finance Approval', 'Proof Pending', 'Proof Sent', 'Proof Rejected', 'Completed', 'Recurring']
+
+    checks = [
+        ('Finance dashboard (status / archived / draft)', 'payment_requests', indexes['payment_requests'],
+         lambda: get_dashboard_all_tab_base_query(finance_admin).limit(20).all()),
+        ('Department dashboard / reports (department)', 'payment_requests', indexes['payment_requests'],
+         lambda: PaymentRequest.query.filter(
+             PaymentRequest.is_archived == False,
+             PaymentRequest.department == 'IT',
+             PaymentRequest.status != 'Rejected by Manager'
+         ).count()),
+        ('Calendar recurring requests', 'payment_requests', indexes['payment_requests'],
+         lambda: PaymentRequest.query.filter(
+             PaymentRequest.recurring == 'Recurring',
+             PaymentRequest.recurring_interval.isnot(None),
+             PaymentRequest.status.in_(calendar_statuses),
+             PaymentRequest.is_archived == False
+         ).all()),
+        ('Unread count (Finance Admin)', 'notifications', indexes['notifications'],
+         lambda: count_unread_notifications(finance_admin)),
+        ('Unread count (GM)', 'notifications', indexes['notifications'],
+         lambda: count_unread_notifications(gm)),
+        ('Overdue finance approvals (SLA deadline)', 'payment_requests', ['ix_payment_requests_archived_sla_deadline'],
+         lambda: overdue_finance_requests_query().count()),
+        ('Finance timing alerts due', 'payment_requests', ['ix_payment_requests_status_next_alert'],
+         lambda: PaymentRequest.query.filter(
+             PaymentRequest.is_archived == False,
+             PaymentRequest.status == 'Pending Finance Approval',
+             PaymentRequest.finance_next_alert_at <= datetime.utcnow(),
+             PaymentRequest.finance_approval_end_time.is_(None)
+         ).all()),
+        ('Notification dropdown', 'notifications', indexes['notifications'],
+         lambda: get_notifications_for_user(project_staff, limit=5)),
+        ('Calendar installments by request', 'recurring_payment_schedules', indexes['recurring_payment_schedules'],
+         lambda: RecurringPaymentSchedule.query.filter_by(request_id=1).order_by(RecurringPaymentSchedule.payment_date).all()),
+        ('Installments due today', 'recurring_payment_schedules', indexes['recurring_payment_schedules'],
+         lambda: RecurringPaymentSchedule.query.filter(
+             RecurringPaymentSchedule.is_paid == False,
+             RecurringPaymentSchedule.payment_date == today
+         ).all()),
+        ('Calendar badge (occurrences due today)', 'payment_occurrences', ['ix_payment_occurrences_due_date_paid'],
+         lambda: (_calendar_recurring_pending_cache.clear(), _calendar_recurring_pending_count(today))),
+        ('Same-day recurring reminders by request', 'notifications', ['ix_notifications_request_type_created'],
+         lambda: Notification.query.filter(
+             Notification.request_id == 1,
+             Notification.notification_type == 'recurring_due',
+             Notification.created_at >= datetime.combine(today, datetime.min.time())
+         ).first()),
+        ('Paid notifications by request', 'paid_notifications', indexes['paid_notifications'],
+         lambda: PaidNotification.query.filter_by(request_id=1, paid_date=today).first()),
+        ('Late installments by request', 'late_installments', indexes['late_installments'],
+         lambda: LateInstallment.query.filter_by(request_id=1, payment_date=today).first()),
+        ('Temporary manager assignments', 'department_temporary_managers', indexes['department_temporary_managers'],
+         lambda: DepartmentTemporaryManager.query.filter(
+             DepartmentTemporaryManager.temporary_manager_id == 1,
+             DepartmentTemporaryManager.request_type.in_(['Finance Payment Request', 'Both Payment and Item Request'])
+         ).all()),
+    ]
+
+    with app.app_context():
+        existing = {row[0] for row in db.session.execute(db.text("SELECT name FROM sqlite_master WHERE type='index'"))}
+        missing = [name for name, _, _, _ in HOT_PATH_INDEXES if name not in existing]
+        if missing:
+            print(f"✗ Missing indexes (run python migrations.py): {', '.join(missing)}")
+        failed = 0
+        for label, table, expected, fn in checks:
+            if not _check(db, label, table, expected, fn, verbose=args.verbose):
+                failed += 1
+        db.session.rollback()
+
+    if missing or failed:
+        print(f"{failed} check(s) failed.")
+        sys.exit(1)
+    print("All hot query paths use their indexes.")
+
+
+if __name__ == '__main__':
+    main()
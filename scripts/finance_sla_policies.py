@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""List or change the finance approval SLAs (finance_sla_policies).
+
+A request counts as overdue once its finance timer has run longer than its SLA. The most specific
+policy wins: request type + department, then request type, then department, then the global row
+(no type, no department), then FINANCE_SLA_URGENT_HOURS / FINANCE_SLA_NORMAL_HOURS in config.py.
+Every change re-stamps payment_requests.finance_sla_deadline on the running finance timers.
+
+Usage (from project root):
+  python scripts/finance_sla_policies.py                                   # list policies
+  python scripts/finance_sla_policies.py --set --urgent-hours 2 --normal-hours 24                  # global
+  python scripts/finance_sla_policies.py --set --type Supplier/Rental --urgent-hours 4 --normal-hours 48
+  python scripts/finance_sla_policies.py --set --department IT --type Item --urgent-hours 1 --normal-hours 8
+  python scripts/finance_sla_policies.py --delete --department IT --type Item
+  python scripts/finance_sla_policies.py --recompute                       # re-stamp deadlines only
+"""
+import argparse
+import os
+import sys
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _scope(request_type, department):
+    return f"type={request_type or '*'} department={department or '*'}"
+
+
+def main():
+    p = argparse.ArgumentParser(description='List or change the finance approval SLAs')
+    group = p.add_mutually_exclusive_group()
+    group.add_argument('--set', action='store_true', help='Create or update the policy for --type / --department')
+    group.add_argument('--delete', action='store_true', help='Delete the policy for --type / --department')
+    group.add_argument('--recompute', action='store_true', help='Only re-stamp the deadlines of running finance timers')
+    p.add_argument('--type', dest='request_type', help='Request type (omit for any type)')
+    p.add_argument('--department', help='Department (omit for any department)')
+    p.add_argument('--urgent-hours', type=float, help='SLA for urgent requests, in hours')
+    p.add_argument('--normal-hours', type=float, help='SLA for non-urgent requests, in hours')
+    args = p.parse_args()
+
+    if args.set and (not args.urgent_hours or not args.normal_hours or args.urgent_hours <= 0 or args.normal_hours <= 0):
+        p.error('--set needs positive --urgent-hours and --normal-hours')
+
+    from app import app, refresh_finance_sla_deadlines
+    from models import db, FinanceSlaPolicy
+
+    with app.app_context():
+        db.create_all()
+        if args.set or args.delete:
+            policy = FinanceSlaPolicy.query.filter_by(request_type=args.request_type, department=args.department).first()
+            if args.delete:
+                if policy is None:
+                    print(f"No policy for {_scope(args.request_type, args.department)}")
+                    sys.exit(1)
+                db.session.delete(policy)
+                print(f"✓ Deleted policy for {_scope(args.request_type, args.department)}")
+            else:
+                if policy is None:
+                    policy = FinanceSlaPolicy(request_type=args.request_type, department=args.department)
+                    db.session.add(policy)
+                policy.urgent_hours = args.urgent_hours
+                policy.normal_hours = args.normal_hours
+                print(f"✓ {_scope(args.request_type, args.department)}: urgent {args.urgent_hours:g} h, normal {args.normal_hours:g} h")
+            db.session.flush()
+
+        if args.set or args.delete or args.recompute:
+            updated = refresh_finance_sla_deadlines()
+            db.session.commit()
+            print(f"✓ Re-stamped SLA deadlines on {updated} running finance timer(s)")
+            return
+
+        print(f"Default: urgent {app.config['FINANCE_SLA_URGENT_HOURS']:g} h, normal {app.config['FINANCE_SLA_NORMAL_HOURS']:g} h (config.py)")
+        policies = FinanceSlaPolicy.query.order_by(FinanceSlaPolicy.request_type, FinanceSlaPolicy.department).all()
+        if not policies:
+            print("No policies.")
+        for policy in policies:
+            print(f"  {_scope(policy.request_type, policy.department)}: urgent {policy.urgent_hours:g} h, normal {policy.normal_hours:g} h")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,86 +0,0 @@
-#!/usr/bin/env python3
-"""
-Temporary migration script to add `request_type` column to
-department_temporary_managers table (SQLite). 
-Also updates the unique constraint from department-only to (department, request_type).
-Safe to run multiple times.
-"""
-from sqlalchemy import text
-import os
-import sys
-# Ensure project root is on sys.path so we can import app module
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-from app import app, db
-
-def column_exists(conn, table, column_name):
-    res = conn.execute(text(f"PRAGMA table_info({table})")).fetchall()
-    # PRAGMA returns rows where the second column is the name
-    return any(row[1] == column_name for row in res)
-
-def index_exists(conn, index_name):
-    res = conn.execute(text(f"SELECT name FROM sqlite_master WHERE type='index' AND name='{index_name}'")).fetchall()
-    return len(res) > 0
-
-def add_column_if_missing():
-    with app.app_context():
-        conn = db.engine.connect()
-        trans = conn.begin()
-        try:
-            # Check if column already exists
-            if column_exists(conn, 'department_temporary_managers', 'request_type'):
-                print("Column 'request_type' already exists. Checking unique constraint...")
-                # Check if the new unique constraint exists
-                if index_exists(conn, 'unique_dept_request_type'):
-                    print("Unique constraint 'unique_dept_request_type' already exists. Nothing to do.")
-                    trans.commit()
-                    return 0
-                else:
-                    print("Column exists but unique constraint is missing. Adding constraint...")
-                    # Note: SQLite doesn't support ALTER TABLE to add unique constraints directly
-                    # We'll need to recreate the table with the new constraint
-                    # But first, let's check if there are any existing rows
-                    existing_rows = conn.execute(text("SELECT COUNT(*) FROM department_temporary_managers")).scalar()
-                    if existing_rows > 0:
-                        print(f"Warning: Found {existing_rows} existing rows. Setting default request_type to 'Finance Payment Request' for existing rows.")
-                        # Set default value for existing rows
-                        conn.execute(text("UPDATE department_temporary_managers SET request_type = 'Finance Payment Request' WHERE request_type IS NULL"))
-                    
-                    # SQLite doesn't support dropping unique constraints easily
-                    # We need to recreate the table. This is a more complex migration.
-                    print("Note: To add the unique constraint, you may need to recreate the table.")
-                    print("For now, the column has been added. The unique constraint will be enforced by the application.")
-                    trans.commit()
-                    return 0
-            
-            # Add the column (nullable first)
-            print("Adding column 'request_type' to department_temporary_managers...")
-            conn.execute(text("ALTER TABLE department_temporary_managers ADD COLUMN request_type VARCHAR(100)"))
-            
-            # Set default value for existing rows
-            existing_rows = conn.execute(text("SELECT COUNT(*) FROM department_temporary_managers")).scalar()
-            if existing_rows > 0:
-                print(f"Found {existing_rows} existing rows. Setting default request_type to 'Finance Payment Request' for existing rows.")
-                conn.execute(text("UPDATE department_temporary_managers SET request_type = 'Finance Payment Request' WHERE request_type IS NULL"))
-            
-            # Note: SQLite doesn't support making a column NOT NULL after creation easily
-            # The model will enforce this at the application level
-            # For the unique constraint, SQLite doesn't support ALTER TABLE to add unique constraints
-            # The application will enforce uniqueness through the model's __table_args__
-            
-            trans.commit()
-            print("Successfully added column 'request_type' to department_temporary_managers.")
-            print("Note: The unique constraint on (department, request_type) will be enforced by the application.")
-            return 0
-        except Exception as e:
-            trans.rollback()
-            print(f"Error adding column: {e}")
-            import traceback
-            traceback.print_exc()
-            return 2
-        finally:
-            conn.close()
-
-if __name__ == '__main__':
-    raise SystemExit(add_column_if_missing())
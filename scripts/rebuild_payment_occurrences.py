@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Rebuild the payment_occurrences table from scratch.
+
+The calendar and its badge read recurring due dates from payment_occurrences.
+The app rebuilds a request's occurrences whenever it, its installments or its
+paid / late markers change, and refreshes every request once a day; run this
+after editing those tables directly, or any time the calendar looks stale.
+
+Usage (from project root):
+  python scripts/rebuild_payment_occurrences.py
+"""
+import os
+import sys
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def main():
+    from app import app, rebuild_payment_occurrences
+    from models import db
+
+    with app.app_context():
+        db.create_all()
+        count = rebuild_payment_occurrences()
+        print(f"Rebuilt payment_occurrences: {count} row(s).")
+
+
+if __name__ == '__main__':
+    main()
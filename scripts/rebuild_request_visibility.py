@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Rebuild the request_visibility index from scratch.
+
+The dashboards read manager/approver visibility of payment requests from the
+request_visibility table. The app keeps it up to date as requests, users and
+temporary managers change; run this once after deploying the table, or any time
+the index is suspected to be stale.
+
+Usage (from project root):
+  python scripts/rebuild_request_visibility.py
+"""
+import os
+import sys
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def main():
+    from app import app, rebuild_request_visibility
+    from models import db
+
+    with app.app_context():
+        db.create_all()
+        count = rebuild_request_visibility()
+        print(f"Rebuilt request_visibility: {count} row(s).")
+
+
+if __name__ == '__main__':
+    main()
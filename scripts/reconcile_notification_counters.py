@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Recompute the per-user unread notification counters from scratch.
+
+The unread badge reads user_notification_counters, which the app keeps in step
+with the notifications table. The app also reconciles the counters once a day;
+run this after editing notifications directly in the database, or any time a
+badge is suspected to be wrong.
+
+Usage (from project root):
+  python scripts/reconcile_notification_counters.py
+"""
+import os
+import sys
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def main():
+    from app import app, reconcile_unread_counters
+    from models import db
+
+    with app.app_context():
+        db.create_all()
+        corrected = reconcile_unread_counters()
+        print(f"Reconciled unread notification counters: {corrected} corrected.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Run or inspect the background jobs (see SCHEDULED_JOBS in app.py).
+
+The web app runs these on its scheduler thread; a leader lease in scheduler_leases
+makes sure only one process executes them. Use this script to run jobs from cron
+or a dedicated process (with SCHEDULER_ENABLED=false on the web workers), or to
+trigger / inspect a job by hand.
+
+Usage (from project root):
+  python scripts/run_jobs.py                      # run the jobs that are due, once
+  python scripts/run_jobs.py --list               # show schedule, last run and lease holder
+  python scripts/run_jobs.py --job recurring_payments_due
+  python scripts/run_jobs.py --all                # run every job now
+  python scripts/run_jobs.py --loop               # keep running due jobs (dedicated scheduler process)
+Running jobs needs the leader lease; --force runs them even if another process holds it.
+A job that is still running (in any process) is skipped either way.
+"""
+import argparse
+import os
+import sys
+
+# Project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _fmt(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else '-'
+
+
+def _list_jobs(SCHEDULED_JOBS, ScheduledJob, SchedulerLease, db):
+    lease = db.session.get(SchedulerLease, 'scheduler')
+    if lease:
+        print(f"Leader lease: {lease.holder} (expires {_fmt(lease.expires_at)} UTC)")
+    else:
+        print("Leader lease: none")
+    for name, interval, _ in SCHEDULED_JOBS:
+        job = db.session.get(ScheduledJob, name)
+        if job is None:
+            print(f"  {name}: every {interval}s, never run")
+            continue
+        status = job.last_status or '-'
+        if job.last_error:
+            status += f" ({job.last_error})"
+        print(f"  {name}: every {interval}s, runs={job.run_count}, last={_fmt(job.last_started_at)} "
+              f"{status} in {job.last_duration_ms} ms, next={_fmt(job.next_run_at)}")
+
+
+def main():
+    p = argparse.ArgumentParser(description='Run or inspect the background jobs')
+    group = p.add_mutually_exclusive_group()
+    group.add_argument('--list', action='store_true', help='Show job schedule, last run and the lease holder')
+    group.add_argument('--job', help='Run one job now, whatever its schedule')
+    group.add_argument('--all', action='store_true', help='Run every job now, whatever its schedule')
+    group.add_argument('--loop', action='store_true', help='Keep running due jobs (dedicated scheduler process)')
+    p.add_argument('--force', action='store_true', help='Run even if another process holds the leader lease')
+    args = p.parse_args()
+
+    from app import (app, SCHEDULED_JOBS, acquire_scheduler_lease, release_scheduler_lease,
+                     run_scheduled_job, run_due_jobs, scheduler_loop, scheduler_holder_id)
+    from models import db, ScheduledJob, SchedulerLease
+
+    job_names = [name for name, _, _ in SCHEDULED_JOBS]
+    if args.job and args.job not in job_names:
+        print(f"Unknown job '{args.job}'. Jobs: {', '.join(job_names)}")
+        sys.exit(2)
+
+    if args.loop:
+        print("Running scheduler loop (Ctrl+C to stop)")
+        scheduler_loop(scheduler_holder_id('scheduler'))
+        return
+
+    with app.app_context():
+        db.create_all()
+        if args.list:
+            _list_jobs(SCHEDULED_JOBS, ScheduledJob, SchedulerLease, db)
+            return
+
+        holder = scheduler_holder_id('cli')
+        try:
+            if args.job or args.all:
+                if not acquire_scheduler_lease(holder) and not args.force:
+                    print("Another process holds the scheduler lease; use --force to run anyway.")
+                    sys.exit(1)
+                failed = [name for name in ([args.job] if args.job else job_names) if run_scheduled_job(name) is False]
+            else:
+                ran = run_due_jobs(holder)
+                if not ran:
+                    print("No jobs ran (none due, or another process holds the scheduler lease).")
+                failed = [name for name in ran if db.session.get(ScheduledJob, name).last_status != 'ok']
+        finally:
+            release_scheduler_lease(holder)
+
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,7 @@
 Branch names and order match production. Format: BrandLetter-RegionCodeNNN
 (e.g. K-MU001). If a branch is not in the local DB, it is skipped.
 
-Ensure the regions table is seeded first (scripts/migrate_create_regions_table.py)
+Ensure the regions table is seeded first (python migrations.py seeds it when empty)
 so that Muscat, Al Batinah, Al Dakhilia, Al Sharqiah, Al Dhahira (and Al Maabilah)
 exist; otherwise branches in missing regions will be skipped.
 
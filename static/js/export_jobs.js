@@ -0,0 +1,110 @@
+/**
+ * Background exports: queue an export of the current page's filters, show its progress on the
+ * clicked button and download the file when it is ready.
+ * Progress arrives over Socket.IO ('export_job_update', socket from realtime.js); the job is also
+ * polled in case the socket is not connected.
+ *
+ * <a href="{{ url_for('export_reports_pdf') }}..." onclick="return queueExportJob(event, 'reports_pdf')">
+ *     <i class="fas fa-file-pdf"></i> <span>Export PDF</span>
+ * </a>
+ */
+
+const EXPORT_JOB_POLL_INTERVAL = 3000;
+
+function queueExportJob(event, kind) {
+    event.preventDefault();
+    const button = event.currentTarget;
+    if (button.dataset.exporting === '1') {
+        return false; // Prevent multiple clicks
+    }
+    const label = button.querySelector('span');
+    const originalLabel = label ? label.innerHTML : '';
+
+    function setLabel(html) {
+        if (label) {
+            label.innerHTML = html;
+        }
+    }
+
+    function finish() {
+        button.dataset.exporting = '';
+        button.style.pointerEvents = 'auto';
+        button.style.opacity = '1';
+        setLabel(originalLabel);
+    }
+
+    button.dataset.exporting = '1';
+    button.style.pointerEvents = 'none';
+    button.style.opacity = '0.6';
+    setLabel('<i class="fas fa-spinner fa-spin"></i> Queued...');
+
+    fetch('/api/exports', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ kind: kind, params: window.location.search })
+    })
+        .then(response => response.json().then(data => ({ ok: response.ok, data: data })))
+        .then(result => {
+            if (!result.ok) {
+                throw new Error(result.data.error || 'Could not start the export.');
+            }
+            watchExportJob(result.data, function(job) {
+                if (job.status === 'done') {
+                    finish();
+                    downloadExportJob(job);
+                } else if (job.status === 'failed') {
+                    finish();
+                    alert(job.error || 'The export failed.');
+                } else if (job.status === 'running') {
+                    const progress = job.progress;
+                    const percent = progress && progress.percent !== null && progress.percent !== undefined ? ' ' + progress.percent + '%' : '';
+                    setLabel('<i class="fas fa-spinner fa-spin"></i> ' + (progress ? progress.stage : 'Exporting') + percent);
+                }
+            });
+        })
+        .catch(error => {
+            finish();
+            alert(error.message);
+        });
+    return false;
+}
+
+function watchExportJob(job, onUpdate) {
+    let finished = false;
+    let poll = null;
+
+    function handle(update) {
+        if (finished || !update || update.id !== job.id) {
+            return;
+        }
+        onUpdate(update);
+        if (update.status === 'done' || update.status === 'failed') {
+            finished = true;
+            clearInterval(poll);
+            if (typeof socket !== 'undefined' && socket) {
+                socket.off('export_job_update', handle);
+            }
+        }
+    }
+
+    if (typeof socket !== 'undefined' && socket) {
+        socket.on('export_job_update', handle);
+    }
+    poll = setInterval(function() {
+        fetch('/api/exports/' + encodeURIComponent(job.id))
+            .then(response => response.json())
+            .then(handle)
+            .catch(() => {
+                // Keep waiting for the socket / next poll
+            });
+    }, EXPORT_JOB_POLL_INTERVAL);
+    handle(job);
+}
+
+function downloadExportJob(job) {
+    // A detached link with the download attribute: the page stays (no navigation loader)
+    const link = document.createElement('a');
+    link.href = job.download_url;
+    link.download = job.download_name || '';
+    link.click();
+}
@@ -119,6 +119,17 @@ function initRealTimeUpdates() {
         }
     });
     
+    // Badge counters pushed by the server (on connect and whenever they change)
+    socket.on('badge_counts', function(counts) {
+        if (window.applyBadgeCounts) {
+            window.applyBadgeCounts(counts);
+        }
+        if (counts && typeof counts.unread === 'number') {
+            unreadTotal = counts.unread;
+            updateTabTitle();
+        }
+    });
+    
     // Listen for disconnection
     socket.on('disconnect', function() {
         console.log('%c WebSocket Disconnected ', 'background: #f44336; color: white; font-weight: bold; padding: 5px;');
@@ -131,39 +142,27 @@ function initRealTimeUpdates() {
         console.log('🔔 DEBUG: Current user role:', document.body.getAttribute('data-user-role'));
         console.log('🔔 DEBUG: Current page:', window.location.pathname);
         handleNewRequest(data);
-        // Update notification count when new request is created
-        updateNotificationCount();
-        // Also sync tab title badge
-        syncTabTitleFromServer();
+        // Badge counts arrive separately via badge_counts
     });
     
     // Listen for request updates (approval/pending)
     socket.on('request_updated', function(data) {
         console.log('Payment request updated:', data);
         handleRequestUpdate(data);
-        // Update notification count when request is updated
-        updateNotificationCount();
-        // Also sync tab title badge
-        syncTabTitleFromServer();
     });
     
     // Listen for new notifications
     socket.on('new_notification', function(data) {
         console.log('New notification received:', data);
         handleNewNotification(data);
-        // Ensure tab title reflects newest count
-        syncTabTitleFromServer();
     });
     
     // Listen for notification updates (triggers badge update)
     socket.on('notification_update', function(data) {
         console.log('🔔 DEBUG: Notification update received:', data);
-        // Force update notification count
-        updateNotificationCount();
-        // Also sync tab title badge
-        syncTabTitleFromServer();
+        // Badge counts arrive separately via badge_counts
         
-        // Also refresh dropdown if it's open
+        // Refresh dropdown if it's open
         if (typeof notificationDropdownOpen !== 'undefined' && notificationDropdownOpen) {
             console.log('🔔 DEBUG: Dropdown is open, refreshing due to notification_update');
             if (typeof loadNotifications === 'function') {
@@ -249,9 +248,6 @@ function handleNewRequest(data) {
     // Show notification
     showNewRequestNotification(1, data);
     
-    // Update notification count immediately
-    updateNotificationCount();
-    
     // Don't update dashboard table immediately if we just submitted a form (to avoid permission errors during redirect)
     // Only update if we're already on a dashboard page, not during redirects
     const currentPath = window.location.pathname;
@@ -386,13 +382,10 @@ function addRefreshIndicator() {
  */
 document.addEventListener('DOMContentLoaded', function() {
     // Initialize real-time updates on ALL pages for ALL roles
+    // (the server sends badge_counts as soon as the socket connects)
     initRealTimeUpdates();
     
-    // Update notification badge on page load
-    if (window.updateNotificationBadge) {
-        window.updateNotificationBadge();
-    }
-    // Always sync tab title count on load
+    // Sync tab title count on load
     syncTabTitleFromServer();
     
     console.log('%c Real-Time WebSocket Active for ALL ROLES ', 'background: #4CAF50; color: white; font-weight: bold; padding: 5px;');
@@ -409,9 +402,6 @@ function handleNewNotification(data) {
     // Play notification sound for notification bell
     playNotificationSound();
     
-    // Update notification count
-    updateNotificationCount();
-    
     // Update notification dropdown if it's open
     if (notificationDropdownOpen) {
         console.log('🔔 DEBUG: Dropdown is open, refreshing notifications');